@@ -0,0 +1,139 @@
+"""
+mito_forge.io.reads 与 Bio.SeqIO 的吞吐对比
+
+生成指定大小的合成 FASTQ（默认 2GB，可选 gzip/zstd 压缩），分别统计读数、碱基数与平均质量：
+
+    python benchmarks/bench_reads.py --size-gb 2 --compression gzip
+    python benchmarks/bench_reads.py --input existing.fq.gz   # 使用已有文件
+
+SeqIO 在多 GB 输入上很慢，可用 --seqio-limit 只让其解析前 N 条记录并按比例外推。
+"""
+import argparse
+import gzip
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from mito_forge.io.reads import iter_batches, iter_reads
+
+
+def make_fastq(path: str, size_gb: float, read_length: int = 150, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    target = int(size_gb * 1024 ** 3)
+    block = []
+    for i in range(10000):
+        seq = "".join(rng.choice("ACGT") for _ in range(read_length))
+        qual = "".join(chr(33 + rng.randint(2, 40)) for _ in range(read_length))
+        block.append(f"@bench_{i} len={read_length}\n{seq}\n+\n{qual}\n")
+    data = "".join(block).encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < target:
+            f.write(data)
+            written += len(data)
+
+
+def compress(path: str, compression: str) -> str:
+    if compression == "gzip":
+        out = path + ".gz"
+        with open(path, "rb") as src, gzip.open(out, "wb", compresslevel=1) as dst:
+            shutil.copyfileobj(src, dst, 16 * 1024 * 1024)
+    elif compression == "zstd":
+        import zstandard
+        out = path + ".zst"
+        with open(path, "rb") as src, open(out, "wb") as dst:
+            zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+    else:
+        return path
+    os.remove(path)
+    return out
+
+
+def bench_batches(path: str, use_mmap: bool) -> dict:
+    start = time.perf_counter()
+    reads = bases = 0
+    qual_sum = 0
+    for batch in iter_batches(path, use_mmap=use_mmap):
+        reads += len(batch)
+        bases += batch.total_bases
+        qual_sum += int(batch.qual.sum(dtype=np.int64))
+    return {"reads": reads, "bases": bases, "mean_q": qual_sum / max(bases, 1),
+            "seconds": time.perf_counter() - start}
+
+
+def bench_records(path: str) -> dict:
+    start = time.perf_counter()
+    reads = bases = 0
+    for rec in iter_reads(path):
+        reads += 1
+        bases += len(rec.seq)
+    return {"reads": reads, "bases": bases, "seconds": time.perf_counter() - start}
+
+
+def bench_seqio(path: str, limit: int) -> dict:
+    from Bio import SeqIO
+    opener = gzip.open if path.endswith(".gz") else open
+    if path.endswith(".zst"):
+        import zstandard, io
+        opener = lambda p, mode: io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(p, "rb")))
+    start = time.perf_counter()
+    reads = bases = 0
+    with opener(path, "rt") as handle:
+        for rec in SeqIO.parse(handle, "fastq"):
+            reads += 1
+            bases += len(rec.seq)
+            _ = rec.letter_annotations["phred_quality"]
+            if limit and reads >= limit:
+                break
+    return {"reads": reads, "bases": bases, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="已有的 FASTQ 文件（不生成合成数据）")
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--compression", choices=["plain", "gzip", "zstd"], default="plain")
+    parser.add_argument("--seqio-limit", type=int, default=2_000_000,
+                        help="SeqIO 最多解析的记录数（0 表示全部）")
+    args = parser.parse_args()
+
+    tmpdir = None
+    path = args.input
+    if path is None:
+        tmpdir = tempfile.mkdtemp(prefix="mito_bench_")
+        path = os.path.join(tmpdir, "bench.fq")
+        print(f"Generating {args.size_gb} GB synthetic FASTQ ...")
+        make_fastq(path, args.size_gb)
+        path = compress(path, args.compression)
+
+    try:
+        size_mb = os.path.getsize(path) / 1024 ** 2
+        print(f"Input: {path} ({size_mb:.0f} MB on disk)")
+        runs = [("io.reads batches", bench_batches(path, use_mmap=False))]
+        if path.endswith((".fq", ".fastq")):
+            runs.append(("io.reads batches (mmap)", bench_batches(path, use_mmap=True)))
+        runs.append(("io.reads records", bench_records(path)))
+
+        seqio = bench_seqio(path, args.seqio_limit)
+        total_reads = runs[0][1]["reads"]
+        if seqio["reads"] < total_reads:
+            seqio["seconds"] *= total_reads / max(seqio["reads"], 1)
+            seqio["extrapolated"] = True
+        runs.append(("Bio.SeqIO", seqio))
+
+        baseline = seqio["seconds"]
+        for name, result in runs:
+            note = " (extrapolated)" if result.get("extrapolated") else ""
+            print(f"{name:28s} {result['seconds']:8.2f}s  {size_mb / result['seconds']:8.1f} MB/s  "
+                  f"x{baseline / result['seconds']:.1f} vs SeqIO{note}")
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Batch命令 - 多样本批量运行流水线"""
+
+import json
+import os
+from pathlib import Path
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from ...graph.batch import load_samplesheet, run_batch
+from ...utils.exceptions import ValidationError
+from ...utils.logging import setup_logging
+
+console = Console()
+
+
+@click.command("batch")
+@click.option("--samplesheet", type=click.Path(exists=True), required=True,
+              help="样本表 TSV（列: sample, reads[, reads2, long_reads, kingdom, seq_type]）")
+@click.option("--output", "-o", type=click.Path(), default="batch_results", show_default=True,
+              help="批处理输出目录（每个样本一个子目录）")
+@click.option("--threads", "-t", type=int, default=os.cpu_count() or 8, show_default=True,
+              help="全局线程预算，由并发样本均分")
+@click.option("--memory", "memory_gb", type=float, default=None,
+              help="全局内存预算（GB），由并发样本均分")
+@click.option("--jobs", "-j", type=int, default=None,
+              help="同时运行的样本数（默认: min(样本数, threads/4)）")
+@click.option("--kingdom", type=click.Choice(["animal", "plant"]), default="animal", show_default=True,
+              help="样本表未指定时使用的物种类型")
+@click.option("--config-file", type=click.Path(exists=True), help="所有样本共享的 JSON 配置文件")
+@click.option("--verbose", "-v", is_flag=True, help="输出详细日志")
+def batch(samplesheet, output, threads, memory_gb, jobs, kingdom, config_file, verbose):
+    """多样本批量运行流水线
+
+    在进程池中并行运行样本表中的所有样本，共享全局线程/内存预算，
+    单个样本失败不影响其它样本，汇总状态写入 batch_status.tsv。
+
+    示例:
+        mito-forge batch --samplesheet samples.tsv -t 32 -j 4
+    """
+    output_dir = Path(output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    setup_logging(
+        level="DEBUG" if verbose else "INFO",
+        log_file=str(output_dir / "logs" / "batch.log")
+    )
+
+    try:
+        samples = load_samplesheet(samplesheet)
+    except ValidationError as e:
+        console.print(f"[red]❌ {e}[/red]")
+        raise SystemExit(1)
+
+    config = {"kingdom": kingdom}
+    if config_file:
+        with open(config_file) as f:
+            config.update(json.load(f))
+
+    console.print(f"[bold blue]🧬 Mito-Forge batch: {len(samples)} samples[/bold blue]")
+
+    def _on_result(rec):
+        icon = "✅" if rec["status"] == "success" else "❌"
+        console.print(f"{icon} {rec['sample']} ({rec['duration_s']}s)")
+
+    records = run_batch(
+        samples,
+        output_dir=str(output_dir),
+        config=config,
+        threads=threads,
+        memory_gb=memory_gb,
+        jobs=jobs,
+        on_result=_on_result,
+    )
+
+    table = Table(title="Batch status")
+    table.add_column("Sample")
+    table.add_column("Status")
+    table.add_column("Stages")
+    table.add_column("Time (s)", justify="right")
+    table.add_column("Error")
+    for rec in records:
+        style = "green" if rec["status"] == "success" else "red"
+        table.add_row(
+            rec["sample"],
+            f"[{style}]{rec['status']}[/{style}]",
+            rec["completed_stages"],
+            str(rec["duration_s"]),
+            str(rec["error"])[:80],
+        )
+    console.print(table)
+    console.print(f"📄 {output_dir / 'batch_status.tsv'}")
+
+    if any(r["status"] != "success" for r in records):
+        raise SystemExit(1)
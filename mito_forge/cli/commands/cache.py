@@ -0,0 +1,73 @@
+"""
+阶段结果缓存管理命令
+"""
+import time
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from ...graph.stage_cache import StageCache, DEFAULT_MAX_SIZE_GB
+
+console = Console()
+
+
+def _fmt_size(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+@click.group(name="cache")
+def cache_group():
+    """阶段结果缓存管理命令"""
+    pass
+
+
+@cache_group.command(name="ls")
+@click.option("--cache-dir", type=click.Path(), default=None, help="缓存目录（默认 ~/.mito-forge/stage_cache）")
+@click.option("--stage", type=click.Choice(["qc", "bait", "downsample", "assembly", "polish", "annotation"]), default=None,
+              help="仅显示指定阶段")
+def cache_ls(cache_dir, stage):
+    """列出缓存条目（按最近访问时间排序）"""
+    cache = StageCache(cache_dir)
+    entries = [e for e in cache.entries() if not stage or e.get("stage") == stage]
+
+    if not entries:
+        console.print(f"[yellow]缓存为空: {cache.root}[/yellow]")
+        return
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("缓存键", style="cyan")
+    table.add_column("阶段", style="green")
+    table.add_column("工具")
+    table.add_column("大小", justify="right")
+    table.add_column("命中", justify="right")
+    table.add_column("最近访问")
+    for e in entries:
+        table.add_row(
+            e["key"],
+            e.get("stage", ""),
+            f"{e.get('tool') or '-'} ({e.get('tool_version') or '?'})",
+            _fmt_size(e.get("size_bytes", 0)),
+            str(e.get("hits", 0)),
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(e.get("last_access", 0))),
+        )
+    console.print(table)
+    console.print(f"📦 {len(entries)} entries, {_fmt_size(sum(e.get('size_bytes', 0) for e in entries))} @ {cache.root}")
+
+
+@cache_group.command(name="prune")
+@click.option("--cache-dir", type=click.Path(), default=None, help="缓存目录（默认 ~/.mito-forge/stage_cache）")
+@click.option("--max-size", type=float, default=DEFAULT_MAX_SIZE_GB, show_default=True,
+              help="保留的缓存大小上限（GB），按最近访问时间淘汰")
+@click.option("--stage", type=click.Choice(["qc", "bait", "downsample", "assembly", "polish", "annotation"]), default=None,
+              help="仅清理指定阶段")
+@click.option("--all", "remove_all", is_flag=True, help="删除全部缓存条目")
+def cache_prune(cache_dir, max_size, stage, remove_all):
+    """按 LRU 策略清理缓存"""
+    cache = StageCache(cache_dir)
+    removed = cache.prune(max_size_bytes=int(max_size * 1024 ** 3), stage=stage, remove_all=remove_all)
+    console.print(f"[green]🧹 已删除 {len(removed)} 个缓存条目，剩余 {_fmt_size(cache.total_size())}[/green]")
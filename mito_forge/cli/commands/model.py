@@ -12,6 +12,7 @@ from typing import Dict, Any
 
 from ...core.llm.config_manager import ModelConfigManager
 from ...core.llm.unified_provider import UnifiedProvider
+from ...core.llm.response_cache import get_response_cache
 from ...utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -86,6 +87,26 @@ def test(name: str):
         click.echo(_t("test_failed"))
         click.echo(f"{_t('error')}: {result['error']}")
 
+@model.command()
+@click.argument('prompt')
+@click.option('--profile', 'profile_name', help='使用的模型配置（默认为当前默认配置）')
+@click.option('--system', help='系统提示词')
+@click.option('--no-stream', is_flag=True, help='等待完整响应后一次性输出')
+def ask(prompt: str, profile_name: str, system: str, no_stream: bool):
+    """向模型提问，逐块流式输出响应 / Ask the model (streamed output)"""
+    config_manager = ModelConfigManager()
+    try:
+        provider = config_manager.create_provider(profile_name)
+        if no_stream:
+            click.echo(provider.generate(prompt, system=system))
+            return
+        for chunk in provider.stream_generate(prompt, system=system):
+            click.echo(chunk, nl=False)
+        click.echo()
+    except Exception as e:
+        click.echo(f"\n❌ {_t('error')}: {e}", err=True)
+        raise SystemExit(1)
+
 @model.command()
 @click.argument('name')
 def use(name: str):
@@ -340,5 +361,44 @@ def doctor():
     else:
         click.echo(("\n✅ 系统正常，有 " if os.getenv("MITO_LANG","zh")!="en" else "\n✅ System OK, available profiles ") + f"{available_count}" + ("" if os.getenv("MITO_LANG","zh")=="en" else " 个可用配置"))
 
+@model.command()
+@click.option('--clear', is_flag=True, help='清空 LLM 响应缓存')
+@click.option('--disable', 'disable', flag_value=True, default=None, help='关闭响应缓存（写入 model_config.yaml）')
+@click.option('--enable', 'disable', flag_value=False, help='开启响应缓存')
+@click.option('--ttl-hours', type=float, help='缓存有效期（小时）')
+@click.option('--max-size-mb', type=float, help='缓存容量上限（MB），超出后按 LRU 淘汰')
+def cache(clear: bool, disable, ttl_hours: float, max_size_mb: float):
+    """LLM 响应缓存：查看统计、清空、开关 / LLM response cache"""
+    en = os.getenv("MITO_LANG", "zh") == "en"
+    config_manager = ModelConfigManager()
+    settings = dict(config_manager.config.get("response_cache") or {})
+    
+    if disable is not None or ttl_hours is not None or max_size_mb is not None:
+        if disable is not None:
+            settings["enabled"] = not disable
+        if ttl_hours is not None:
+            settings["ttl_hours"] = ttl_hours
+        if max_size_mb is not None:
+            settings["max_size_mb"] = max_size_mb
+        config_manager.config["response_cache"] = settings
+        config_manager.save_config()
+        click.echo(("✅ Cache settings saved: " if en else "✅ 缓存配置已保存: ") + json.dumps(settings, ensure_ascii=False))
+    
+    # 统计/清空不受开关影响
+    cache_obj = get_response_cache({**settings, "enabled": True})
+    if cache_obj is None:
+        click.echo("⚠️ " + ("Cache disabled by MITO_LLM_CACHE" if en else "缓存已被环境变量 MITO_LLM_CACHE 关闭"))
+        return
+    
+    if clear:
+        removed = cache_obj.clear()
+        click.echo(("🧹 Removed " if en else "🧹 已删除 ") + f"{removed}" + (" cached responses" if en else " 条缓存响应"))
+    
+    stats = cache_obj.stats()
+    click.echo(("Status: " if en else "状态: ") + (("enabled" if en else "开启") if settings.get("enabled", True) else ("disabled" if en else "关闭")))
+    click.echo(("Path: " if en else "路径: ") + stats["path"])
+    click.echo(("Entries: " if en else "条目: ") + f"{stats['entries']} ({stats['size_bytes'] / 1024:.1f} KB)")
+    click.echo(("Hits/Misses: " if en else "命中/未命中: ") + f"{stats['hits']}/{stats['misses']} (hit rate {stats['hit_rate']:.1%})")
+
 if __name__ == "__main__":
     model()
\ No newline at end of file
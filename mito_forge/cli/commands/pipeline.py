@@ -71,7 +71,9 @@ def _help(key: str) -> str:
     envvar="MITO_SEQ_TYPE",
     help="选择测序类型以匹配合适的工具链；可用 auto/illumina/ont/pacbio-hifi/pacbio-clr/hybrid（也可用环境变量 MITO_SEQ_TYPE 覆盖）",
 )
-def pipeline(reads, reads2, long_reads, output, threads, kingdom, resume, checkpoint, config_file, verbose, interactive, lang, detail_level, seq_type):
+@click.option("--race-assemblers", type=int, default=0, show_default=True,
+              help="竞速模式：并发运行前 N 个候选组装器（共享线程预算），采用首个达到验收评分的结果；0 表示关闭")
+def pipeline(reads, reads2, long_reads, output, threads, kingdom, resume, checkpoint, config_file, verbose, interactive, lang, detail_level, seq_type, race_assemblers):
     """
     运行完整的线粒体基因组组装流水线 / Run the complete mitochondrial genome assembly pipeline
 
@@ -146,6 +148,9 @@ def pipeline(reads, reads2, long_reads, output, threads, kingdom, resume, checkp
                 "generate_report": True,
                 "interactive": interactive
             }
+            if race_assemblers >= 2:
+                config["assembly_race"] = True
+                config["race_size"] = race_assemblers
             # 将工具计划注入配置，供后续各 Agent/调度使用
             try:
                 # 推断输入文件类型
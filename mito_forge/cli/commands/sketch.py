@@ -0,0 +1,54 @@
+"""
+参考线粒体基因组草图库命令
+"""
+import click
+from rich.console import Console
+from rich.table import Table
+
+from ...io.sketch import DEFAULT_K, DEFAULT_SCALED, SketchDB, build_sketch_db
+
+console = Console()
+
+
+@click.group(name="sketch")
+def sketch_group():
+    """参考线粒体基因组草图库（用于候选筛选与最接近参考）"""
+    pass
+
+
+@sketch_group.command(name="build")
+@click.argument("references", type=click.Path(exists=True))
+@click.option("--output", "-o", type=click.Path(), required=True, help="草图库输出文件")
+@click.option("--k", "k", type=click.IntRange(8, 21), default=DEFAULT_K, show_default=True, help="k-mer 长度")
+@click.option("--scaled", type=click.IntRange(1), default=DEFAULT_SCALED, show_default=True,
+              help="FracMinHash 抽样比例（保留约 1/scaled 的 k-mer）")
+def sketch_build(references, output, k, scaled):
+    """从参考线粒体基因组 FASTA 构建草图库"""
+    path = build_sketch_db(references, output, k=k, scaled=scaled)
+    with SketchDB(path) as db:
+        console.print(f"[green]🧬 已构建草图库 {path}：{len(db)} 条参考[/green]")
+    console.print(f"在配置中设置 reference_sketches: {path} 以启用候选筛选与最接近参考")
+
+
+@sketch_group.command(name="query")
+@click.argument("database", type=click.Path(exists=True))
+@click.argument("contigs", type=click.Path(exists=True))
+@click.option("--top", type=int, default=1, show_default=True, help="每条 contig 显示的参考数")
+def sketch_query(database, contigs, top):
+    """查询 contig 最接近的参考线粒体基因组"""
+    with SketchDB(database) as db:
+        results = db.classify_fasta(contigs, top=top)
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Contig", style="cyan")
+    table.add_column("参考", style="green")
+    table.add_column("包含度", justify="right")
+    table.add_column("ANI", justify="right")
+    table.add_column("共享哈希", justify="right")
+    for name, hits in results.items():
+        if not hits:
+            table.add_row(name, "-", "0", "-", "0")
+        for hit in hits:
+            table.add_row(name, f"{hit['reference']} {hit['description']}".strip(), f"{hit['containment']:.3f}",
+                          f"{hit['ani']:.3f}", f"{hit['shared_hashes']}/{hit['query_hashes']}")
+    console.print(table)
@@ -15,6 +15,9 @@ from .commands.assembly import assembly
 from .commands.annotate import annotate
 from .commands.tools_setup import tools_group
 from .commands.resume import resume
+from .commands.batch import batch
+from .commands.cache import cache_group
+from .commands.sketch import sketch_group
 
 class MitoGroup(click.Group):
     """自定义分组：默认仅显示核心命令；--expert 时显示全部命令"""
@@ -87,6 +90,9 @@ cli.add_command(assembly, name="assembly")
 cli.add_command(annotate, name="annotate")
 cli.add_command(tools_group, name="tools")
 cli.add_command(resume, name="resume")
+cli.add_command(batch, name="batch")
+cli.add_command(cache_group, name="cache")
+cli.add_command(sketch_group, name="sketch")
 
 # 添加快捷命令别名
 @cli.command()
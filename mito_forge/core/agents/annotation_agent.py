@@ -4,8 +4,9 @@
 
 import json
 import os
+import re
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 from .base_agent import BaseAgent
 from .types import AgentStatus, StageResult, AgentCapability
@@ -431,8 +432,8 @@ class AnnotationAgent(BaseAgent):
             # 执行注释（带智能错误处理和重试）
             annotation_results = self._execute_annotation_with_retry(inputs, max_retries=3)
             
-            # AI 分析注释结果
-            ai_analysis = self.analyze_annotation_results(annotation_results)
+            # AI 分析注释结果（延迟模式下由调用方后台执行）
+            ai_analysis = {} if self.defer_llm_analysis else self.analyze_annotation_results(annotation_results)
             
             # 构建结果
             result = StageResult(
@@ -539,42 +540,51 @@ class AnnotationAgent(BaseAgent):
                 
                 exe = find_tool("runmitos.py") or find_tool("mitos")
                 if exe:
-                    # MITOS 参数: --input assembly.fasta --code 2 --outdir output
+                    from ...utils.parsers import parse_mitos_output
                     genetic_code = 2  # 动物线粒体遗传密码
-                    args = [
-                        "--input", str(assembly_file),
-                        "--code", str(genetic_code),
-                        "--outdir", str(ann_dir)
-                    ]
-                    rc = self.run_tool(exe, args, cwd=ann_dir)
-                    if rc.get("exit_code") == 0:
+                    runs, genome_length = self._split_for_annotation(assembly_file, ann_dir)
+                    parsed_runs = []
+                    for contig_fasta, out_dir in runs:
+                        # MITOS 参数: --input assembly.fasta --code 2 --outdir output
+                        args = [
+                            "--input", str(contig_fasta),
+                            "--code", str(genetic_code),
+                            "--outdir", str(out_dir)
+                        ]
+                        rc = self.run_tool(exe, args, cwd=ann_dir)
+                        if rc.get("exit_code") != 0:
+                            continue
                         # 解析 MITOS 输出
                         try:
-                            from ...utils.parsers import parse_mitos_output
-                            parsed = parse_mitos_output(ann_dir)
-                            
+                            parsed = parse_mitos_output(out_dir)
                             if parsed['success']:
-                                return {
-                                    "annotator": "mitos",
-                                    "genome_length": 0,  # 需要从 assembly_file 获取
-                                    "kingdom": kingdom,
-                                    "genetic_code": genetic_code,
-                                    "annotation_file": parsed['files'].get('gff', ''),
-                                    "total_genes": parsed['metrics'].get('total_genes', 0),
-                                    "protein_genes": parsed['metrics'].get('cds_count', 0),
-                                    "trna_genes": parsed['metrics'].get('trna_count', 0),
-                                    "rrna_genes": parsed['metrics'].get('rrna_count', 0),
-                                    "other_genes": 0,
-                                    "coding_coverage": 0,  # 需要计算
-                                    "genome_utilization": 0,
-                                    "avg_gene_length": 0,
-                                    "detected_issues": [],
-                                    "gene_details": parsed['metrics'].get('genes', [])
-                                }
+                                parsed_runs.append(parsed)
                             else:
                                 logger.warning(f"MITOS parsing failed: {parsed.get('errors')}")
                         except Exception as e:
                             logger.warning(f"Failed to parse MITOS output: {e}")
+                    
+                    if parsed_runs:
+                        def total(key: str) -> int:
+                            return sum(p['metrics'].get(key, 0) for p in parsed_runs)
+                        return {
+                            "annotator": "mitos",
+                            "genome_length": genome_length,
+                            "kingdom": kingdom,
+                            "genetic_code": genetic_code,
+                            "annotation_file": parsed_runs[0]['files'].get('gff', ''),
+                            "annotation_files": [p['files'].get('gff', '') for p in parsed_runs],
+                            "total_genes": total('total_genes'),
+                            "protein_genes": total('cds_count'),
+                            "trna_genes": total('trna_count'),
+                            "rrna_genes": total('rrna_count'),
+                            "other_genes": 0,
+                            "coding_coverage": 0,  # 需要计算
+                            "genome_utilization": 0,
+                            "avg_gene_length": 0,
+                            "detected_issues": [],
+                            "gene_details": [g for p in parsed_runs for g in p['metrics'].get('genes', [])]
+                        }
         except Exception as _e:
             logger.error(f"Annotation tool execution failed: {_e}")
             raise RuntimeError(
@@ -594,6 +604,35 @@ class AnnotationAgent(BaseAgent):
             f"Check logs: {self.workdir}/annotation/{annotator}.stdout.log"
         )
     
+    def _split_for_annotation(self, assembly_file: str, ann_dir: Path) -> Tuple[List[Tuple[Path, Path]], int]:
+        """
+        MITOS 每次注释一条序列：多条候选序列时按 FASTA 索引逐条拆分（只复制所需字节）
+        
+        Returns:
+            ([(序列文件, 输出目录), ...], 基因组总长度)
+        """
+        from ...io.faidx import open_fasta_index
+        try:
+            index = open_fasta_index(assembly_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not index {assembly_file}, annotating it as a whole: {e}")
+            return [(Path(assembly_file), ann_dir)], 0
+        genome_length = sum(index.length(name) for name in index.names)
+        if len(index) <= 1:
+            return [(Path(assembly_file), ann_dir)], genome_length
+        
+        split_dir = ann_dir / "contigs"
+        split_dir.mkdir(parents=True, exist_ok=True)
+        runs = []
+        for i, name in enumerate(index.names, start=1):
+            safe_name = re.sub(r"[^\w.-]", "_", name) or f"contig_{i}"
+            contig_fasta = index.write_subset([name], split_dir / f"{safe_name}.fasta")
+            out_dir = ann_dir / safe_name
+            out_dir.mkdir(parents=True, exist_ok=True)
+            runs.append((contig_fasta, out_dir))
+        logger.info(f"Split {len(runs)} sequences from {assembly_file} for per-contig annotation")
+        return runs, genome_length
+    
     def analyze_annotation_results(self, annotation_results: Dict[str, Any]) -> Dict[str, Any]:
         """使用 AI 分析注释结果"""
         logger.info("Analyzing annotation results with AI...")
@@ -627,7 +666,7 @@ class AnnotationAgent(BaseAgent):
             extra_guidance = "请输出完整且结构化的结果：每类要点尽量给出3-5条，包含关键阈值与推荐参数，推理要简洁但覆盖依据。"
         else:
             extra_guidance = "请保持精简：每类要点不超过2条，一句话总结，推理尽量短。"
-        prompt = f"{prompt}\n\n### 输出风格要求\n{extra_guidance}"
+        prompt = f"{prompt}\n\n### 输出风格要求\n{extra_guidance}{self.review_prompt(annotation_results)}"
         
         # 注入记忆与 RAG（自动探测，可用即启用；不可用时静默跳过）
         try:
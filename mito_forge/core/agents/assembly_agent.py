@@ -4,6 +4,8 @@
 
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -14,6 +16,9 @@ from ...utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 竞速模式下 run_assembly 能实际执行的组装器
+RACE_ASSEMBLERS = ("spades", "flye", "pmat", "getorganelle")
+
 # 组装分析系统提示词
 ASSEMBLY_SYSTEM_PROMPT = """你是一个专业的生物信息学基因组组装专家，负责分析组装结果并提供优化建议。
 
@@ -110,6 +115,9 @@ class AssemblyAgent(BaseAgent):
         self.target_length = self.config.get("target_length", 16500)  # 线粒体基因组预期长度
         self.min_contig_length = self.config.get("min_contig_length", 1000)
         self.supported_assemblers = ["spades", "flye", "unicycler", "hifiasm", "miniasm", "canu"]
+        # 长读筛选结果：重试与竞速候选共享，同一输入只筛选一次
+        self._read_selections: Dict[tuple, Optional[Dict[str, Any]]] = {}
+        self._read_selection_lock = threading.Lock()
     
     def get_capability(self) -> AgentCapability:
         """返回 Assembly Agent 的能力描述"""
@@ -171,11 +179,18 @@ class AssemblyAgent(BaseAgent):
             if not self.validate_inputs(inputs):
                 raise ValueError("Input validation failed")
             
-            # 执行组装（带智能错误处理和重试）
-            assembly_results = self._execute_assembly_with_retry(inputs, max_retries=3)
+            # 执行组装（竞速模式并发运行多个候选组装器，否则带智能错误处理和重试）
+            assembly_results = None
+            if self.config.get("assembly_race"):
+                try:
+                    assembly_results = self._race_assemblers(inputs)
+                except Exception as race_error:
+                    logger.warning(f"⚠️ Assembler race failed, falling back to sequential retry: {race_error}")
+            if assembly_results is None:
+                assembly_results = self._execute_assembly_with_retry(inputs, max_retries=3)
             
-            # AI 分析组装结果
-            ai_analysis = self.analyze_assembly_results(assembly_results)
+            # AI 分析组装结果（延迟模式下由调用方后台执行）
+            ai_analysis = {} if self.defer_llm_analysis else self.analyze_assembly_results(assembly_results)
             
             # 构建结果
             result = StageResult(
@@ -462,6 +477,186 @@ class AssemblyAgent(BaseAgent):
         # 不应该到这里
         raise RuntimeError("Unexpected error in retry loop")
     
+    def _race_candidates(self, inputs: Dict[str, Any]) -> List[str]:
+        """
+        竞速候选组装器：首选组装器 + 工具计划候选 + 策略回退工具，去重后取前 N 个
+        
+        配置 race_candidates 可显式指定候选列表，race_size 控制并发数量（默认 2）
+        """
+        ordered = [inputs.get("assembler", "spades")]
+        explicit = self.config.get("race_candidates")
+        if explicit:
+            ordered.extend(explicit)
+        else:
+            tool_plan = self.config.get("tool_plan") or {}
+            ordered.extend((tool_plan.get("candidates") or {}).get("assembler") or [])
+            fallbacks = self.config.get("fallback_tools") or []
+            if isinstance(fallbacks, dict):
+                fallbacks = fallbacks.get("assembly") or []
+            ordered.extend(fallbacks)
+        
+        candidates = []
+        for tool in ordered:
+            name = str(tool).lower()
+            if name in ("spades.py",):
+                name = "spades"
+            elif name == "get_organelle_from_reads.py":
+                name = "getorganelle"
+            if name in RACE_ASSEMBLERS and name not in candidates:
+                candidates.append(name)
+        return candidates[:max(1, int(self.config.get("race_size", 2)))]
+    
+    def _score_assembly(self, result: Dict[str, Any]) -> float:
+        """
+        组装结果评分（0-1）：环状 40%、最长序列接近预期线粒体长度 40%、N50 20%
+        """
+        if not result:
+            return 0.0
+        target = float(self.target_length or 16500)
+        is_circular = bool(
+            result.get("is_circular")
+            or result.get("num_circular")
+            or result.get("circular_sequences")
+            or self._detect_circularity(result.get("assembly_file"))
+        )
+        length = result.get("max_length") or result.get("total_length") or 0
+        length_score = max(0.0, 1.0 - abs(length - target) / target) if length else 0.0
+        n50_score = min(1.0, (result.get("n50") or 0) / target)
+        return round(0.4 * is_circular + 0.4 * length_score + 0.2 * n50_score, 3)
+    
+    def _pmat_metrics(self, mt_fasta: Path, inputs: Dict[str, Any], read_type: str) -> Dict[str, Any]:
+        """
+        PMAT 不提供统计文件：从输出 FASTA 流式统计长度与 N50，环化取标题标记、首尾重叠或
+        同目录 GFA 组装图中的环，使其能与其它组装器按同一标准评分
+        """
+        from ...io.fasta import fasta_stats
+        stats = fasta_stats(mt_fasta)
+        is_circular = any("circular" in c["header"].lower() for c in stats["contigs"])
+        is_circular = is_circular or self._detect_circularity(str(mt_fasta))
+        if not is_circular:
+            for gfa in sorted(mt_fasta.parent.glob("*.gfa")):
+                try:
+                    import numpy as np
+                    from ...io.graph import load_graph
+                    graph = load_graph(gfa)
+                    if graph.n_segments and graph.has_cycle(np.arange(graph.n_segments)):
+                        is_circular = True
+                        break
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Could not read PMAT graph {gfa}: {e}")
+        return {
+            "assembler": "pmat",
+            "read_type": read_type,
+            "kingdom": inputs.get("kingdom", "animal"),
+            "assembly_file": str(mt_fasta),
+            "num_contigs": stats["num_sequences"],
+            "total_length": stats["total_length"],
+            "max_length": stats["max_length"],
+            "n50": stats["n50"],
+            "n90": stats["n90"],
+            "gc_content": round(stats["gc_content"], 2),
+            "is_circular": is_circular,
+        }
+    
+    def _detect_circularity(self, assembly_file: Optional[str], longest: int = 5) -> bool:
+        """组装器未报告环化时，对最长的几条序列做首尾重叠检测"""
+        if not assembly_file or not Path(assembly_file).is_file():
+            return False
+        try:
+            from ...io.circular import check_circularity
+            from ...io.faidx import open_fasta_index
+            entries = sorted(open_fasta_index(assembly_file).entries, key=lambda e: e.length, reverse=True)
+            report = check_circularity(assembly_file, [e.name for e in entries[:longest]])
+        except (OSError, ValueError) as e:
+            logger.debug(f"Circularity check skipped for {assembly_file}: {e}")
+            return False
+        return any(r["is_circular"] for r in report.values())
+    
+    def _race_assemblers(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        竞速模式：在共享线程预算下并发运行多个候选组装器
+        
+        每个候选在独立子目录中运行；一旦某个结果的评分达到 race_accept_score（默认 0.8）
+        即采用该结果并终止其余候选，否则等待全部完成后取评分最高者。
+        
+        Raises:
+            RuntimeError: 所有候选均失败时抛出
+        """
+        candidates = self._race_candidates(inputs)
+        if len(candidates) < 2:
+            raise RuntimeError(f"Not enough race candidates: {candidates}")
+        
+        threshold = float(self.config.get("race_accept_score", 0.8))
+        total_threads = int(self.config.get("threads", 4))
+        per_threads = max(1, total_threads // len(candidates))
+        race_dir = (self.workdir or Path(".")) / "race"
+        logger.info(
+            f"🏁 Racing assemblers {candidates} with {per_threads} threads each "
+            f"(accept score >= {threshold})"
+        )
+        
+        racers = {}
+        for tool in candidates:
+            racer = AssemblyAgent({**self.config, "threads": per_threads, "assembly_race": False,
+                                   "cancellable_tools": True})
+            racer.prepare(race_dir / tool)
+            racer._read_selections = self._read_selections
+            racer._read_selection_lock = self._read_selection_lock
+            racers[tool] = racer
+        
+        def run(tool: str) -> Dict[str, Any]:
+            racer = racers[tool]
+            racer.status = AgentStatus.RUNNING
+            return racer.run_assembly({**inputs, "assembler": tool, "threads": per_threads})
+        
+        scores: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        finished: Dict[str, Dict[str, Any]] = {}
+        winner = None
+        futures = {}
+        executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="asm-race")
+        try:
+            futures = {executor.submit(run, tool): tool for tool in candidates}
+            for future in as_completed(futures):
+                tool = futures[future]
+                try:
+                    finished[tool] = future.result()
+                except Exception as e:
+                    errors[tool] = str(e)
+                    logger.warning(f"❌ Race candidate {tool} failed: {e}")
+                    continue
+                scores[tool] = self._score_assembly(finished[tool])
+                logger.info(f"🏁 {tool} finished with score {scores[tool]:.3f}")
+                if scores[tool] >= threshold:
+                    winner = tool
+                    break
+        finally:
+            # 终止未完成的候选，避免继续占用线程预算
+            cancelled = [tool for tool, racer in racers.items()
+                         if tool not in finished and tool not in errors and racer.cancel()]
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+        
+        if winner is None:
+            if not scores:
+                raise RuntimeError(f"All race candidates failed: {errors}")
+            winner = max(scores, key=scores.get)
+        if cancelled:
+            logger.info(f"🛑 Cancelled race candidates: {cancelled}")
+        logger.info(f"🏆 Assembler race won by {winner} (score {scores[winner]:.3f})")
+        
+        result = dict(finished[winner])
+        result["race"] = {
+            "candidates": candidates,
+            "winner": winner,
+            "scores": scores,
+            "errors": errors,
+            "cancelled": cancelled,
+            "threads_per_candidate": per_threads,
+        }
+        return result
+    
     def run_assembly(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """运行基因组组装"""
         # 转换为绝对路径并验证文件存在
@@ -573,6 +768,9 @@ class AssemblyAgent(BaseAgent):
             if assembler.lower() == "flye":
                 exe = find_tool("flye")
                 if exe:
+                    # 长读组装耗时随输入碱基数增长：先按读长与质量筛选到目标碱基预算
+                    read_selection = self._select_long_reads(reads_file, asm_dir, threads)
+                    reads_file = Path(read_selection["reads"]) if read_selection else reads_file
                     # 简化：假设 nanopore
                     args = ["--nano-raw", str(reads_file), "-o", str(asm_dir), "--threads", str(threads)]
                     rc = self.run_tool(exe, args, cwd=asm_dir)
@@ -598,7 +796,8 @@ class AssemblyAgent(BaseAgent):
                                     "coverage": parsed['metrics'].get('average_coverage', 0),
                                     "num_circular": parsed['metrics'].get('num_circular', 0),
                                     "completeness": 0,
-                                    "contamination": 0
+                                    "contamination": 0,
+                                    "read_selection": read_selection
                                 }
                             else:
                                 logger.warning(f"Flye parsing failed: {parsed.get('errors')}")
@@ -612,6 +811,8 @@ class AssemblyAgent(BaseAgent):
                 # 4. PMAT2 (可能的别名)
                 exe = find_tool("pmat2") or find_tool("PMAT") or find_tool("pmat") or find_tool("PMAT2")
                 if exe:
+                    read_selection = self._select_long_reads(reads_file, asm_dir, threads)
+                    reads_file = Path(read_selection["reads"]) if read_selection else reads_file
                     # PMAT autoMito for HiFi/ONT/CLR data
                     # Usage: PMAT autoMito -i input -o output -t seqtype -T threads -m
                     seq_type = inputs.get("seq_type", "hifi")  # hifi/ont/clr
@@ -637,12 +838,15 @@ class AssemblyAgent(BaseAgent):
                         mt_fasta = pmat_out / "gfa_result" / "PMAT_mt.fa"
                         
                         if mt_fasta.exists():
-                            return {
+                            result = {
                                 "assembly": str(mt_fasta),
                                 "tool": "PMAT",
                                 "exit_code": 0,
-                                "output_dir": str(pmat_out)
+                                "output_dir": str(pmat_out),
+                                "read_selection": read_selection
                             }
+                            result.update(self._pmat_metrics(mt_fasta, inputs, read_type))
+                            return result
                         else:
                             logger.warning(f"PMAT output not found: {mt_fasta}")
             
@@ -710,6 +914,49 @@ class AssemblyAgent(BaseAgent):
             f"Check errors: {self.workdir}/assembly/{assembler}.stderr.log"
         )
     
+    def _select_long_reads(self, reads_file: Path, asm_dir: Path, threads: int) -> Optional[Dict[str, Any]]:
+        """
+        Filtlong 风格的长读筛选（long_read_select: false 关闭）
+        
+        目标碱基预算 = long_read_target_bases，或
+        预期线粒体长度 × long_read_coverage（默认 100）/ mito_read_fraction（默认 0.01，线粒体读占全部碱基的比例）。
+        筛选失败时返回 None，使用全部读段。
+        结果按输入与预算缓存，重试和竞速候选复用第一次筛选写出的文件。
+        """
+        if not self.config.get("long_read_select", True):
+            return None
+        target_bases = self.config.get("long_read_target_bases") or int(
+            float(self.target_length or 16500)
+            * float(self.config.get("long_read_coverage", 100))
+            / float(self.config.get("mito_read_fraction", 0.01))
+        )
+        try:
+            from ...io.longread_filter import select_long_reads, DEFAULT_MIN_LENGTH
+        except ImportError as e:
+            logger.warning(f"Long-read selection unavailable, using all reads: {e}")
+            return None
+        min_length = int(self.config.get("long_read_min_length", DEFAULT_MIN_LENGTH))
+        key = (str(Path(reads_file).resolve()), int(target_bases), min_length)
+        with self._read_selection_lock:
+            if key in self._read_selections:
+                cached = self._read_selections[key]
+                if cached is None or Path(cached["reads"]).exists():
+                    logger.info("♻️ Reusing long-read selection from an earlier attempt")
+                    return cached
+            try:
+                selection = select_long_reads(
+                    reads_file,
+                    asm_dir / "read_selection",
+                    int(target_bases),
+                    min_length=min_length,
+                    threads=threads
+                )
+            except Exception as e:
+                logger.warning(f"Long-read selection failed, using all reads: {e}")
+                selection = None
+            self._read_selections[key] = selection
+            return selection
+    
     def analyze_assembly_results(self, assembly_results: Dict[str, Any]) -> Dict[str, Any]:
         """使用 AI 分析组装结果"""
         logger.info("Analyzing assembly results with AI...")
@@ -743,7 +990,7 @@ class AssemblyAgent(BaseAgent):
             extra_guidance = "请输出完整且结构化的结果：每类要点尽量给出3-5条，包含关键阈值与推荐参数，推理要简洁但覆盖依据。"
         else:
             extra_guidance = "请保持精简：每类要点不超过2条，一句话总结，推理尽量短。"
-        prompt = f"{prompt}\n\n### 输出风格要求\n{extra_guidance}"
+        prompt = f"{prompt}\n\n### 输出风格要求\n{extra_guidance}{self.review_prompt(assembly_results)}"
         
         # 注入记忆与 RAG（自动探测，可用即启用；不可用时静默跳过）
         try:
@@ -875,7 +1122,7 @@ class AssemblyAgent(BaseAgent):
                 "summary": f"基于规则的组装评估：N50 {n50}, 序列数 {num_contigs}, 总长度 {total_length}"
             },
             "structural_analysis": {
-                "is_circular": num_contigs == 1,
+                "is_circular": bool(assembly_results.get("is_circular")) or self._detect_circularity(assembly_results.get("assembly_file")),
                 "is_complete": num_contigs <= 2 and 16000 <= total_length <= 18000,
                 "fragmentation_level": "low" if num_contigs <= 3 else "high",
                 "main_contigs": min(num_contigs, 5),
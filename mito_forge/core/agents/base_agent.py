@@ -5,6 +5,7 @@ Agent 基类定义
 import abc
 import uuid
 import os
+import threading
 from pathlib import Path
 from typing import Dict, Any, Optional, Callable, List
 
@@ -12,11 +13,11 @@ from .types import AgentStatus, StageResult, TaskSpec, AgentEvent, AgentCapabili
 from ...utils.logging import get_logger
 
 # 延迟导入 LLM 相关模块，避免启动时依赖检查
-def _get_model_config_manager():
-    """延迟导入 ModelConfigManager"""
+def _get_provider_registry():
+    """延迟导入进程级共享的提供者注册表"""
     try:
-        from ..llm.config_manager import ModelConfigManager
-        return ModelConfigManager
+        from ..llm.registry import get_provider_registry
+        return get_provider_registry()
     except ImportError as e:
         logger.warning(f"LLM 功能不可用: {e}")
         return None
@@ -123,6 +124,13 @@ class BaseAgent(abc.ABC):
         # LLM 提供者 - 延迟初始化
         self._provider: Optional[ModelProvider] = None
         self._profile_name: Optional[str] = config.get("llm_profile") if config else None
+        
+        # 正在运行的外部工具进程 - cancel() 时终止；登记与取消在同一把锁下进行
+        self._active_procs = set()
+        self._procs_lock = threading.Lock()
+        
+        # 为 True 时 execute_stage 跳过 LLM 结果分析，由调用方（流水线节点）在后台执行
+        self.defer_llm_analysis = bool(self.config.get("defer_llm_analysis", False))
     
     def set_event_callback(self, callback: Callable[[AgentEvent], None]):
         """设置事件回调函数"""
@@ -215,9 +223,35 @@ class BaseAgent(abc.ABC):
         
         if env:
             env_all.update(env)
+        if self.status == AgentStatus.CANCELLED:
+            return {"exit_code": -15, "stdout_path": "", "stderr_path": "", "elapsed_sec": 0.0}
         start = time.time()
         with open(stdout_path, "w", encoding="utf-8") as out, open(stderr_path, "w", encoding="utf-8") as err:
-            proc = subprocess.run(cmd, cwd=str(cwd), env=env_all, stdout=out, stderr=err, timeout=timeout or self.config.get("tool_timeout"))
+            if self.config.get("cancellable_tools"):
+                # 使用 Popen 跟踪进程，以便 cancel() 能终止正在运行的工具；
+                # 工具在独立会话（进程组）中运行，终止时连同其派生的子进程（如 SPAdes 调用的 spades-core）一起结束
+                proc = subprocess.Popen(cmd, cwd=str(cwd), env=env_all, stdout=out, stderr=err,
+                                        start_new_session=(os.name != "nt"))
+                with self._procs_lock:
+                    self._active_procs.add(proc)
+                    cancelled = self.status == AgentStatus.CANCELLED
+                if cancelled:
+                    # cancel() 发生在启动与登记之间，未能向该进程发送信号
+                    self._signal_tool(proc)
+                try:
+                    proc.wait(timeout=timeout or self.config.get("tool_timeout"))
+                except subprocess.TimeoutExpired:
+                    self._signal_tool(proc, kill=True)
+                    proc.wait()
+                    raise
+                finally:
+                    with self._procs_lock:
+                        self._active_procs.discard(proc)
+                    if self.status == AgentStatus.CANCELLED:
+                        # 主进程已退出，清理忽略了 SIGTERM 的残留子进程
+                        self._signal_tool(proc, kill=True)
+            else:
+                proc = subprocess.run(cmd, cwd=str(cwd), env=env_all, stdout=out, stderr=err, timeout=timeout or self.config.get("tool_timeout"))
         elapsed = time.time() - start
         return {"exit_code": proc.returncode, "stdout_path": str(stdout_path), "stderr_path": str(stderr_path), "elapsed_sec": elapsed}
 
@@ -339,6 +373,21 @@ class BaseAgent(abc.ABC):
         """获取当前状态"""
         return self.status
     
+    @staticmethod
+    def _signal_tool(proc, kill: bool = False) -> None:
+        """向工具所在进程组发送 SIGTERM/SIGKILL（非 POSIX 平台只作用于工具进程本身）"""
+        if os.name == "nt":
+            try:
+                proc.kill() if kill else proc.terminate()
+            except OSError:
+                pass
+            return
+        import signal
+        try:
+            os.killpg(proc.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
     def cancel(self) -> bool:
         """
         取消当前执行（如果支持）
@@ -346,11 +395,15 @@ class BaseAgent(abc.ABC):
         Returns:
             bool: 是否成功取消
         """
-        if self.status in (AgentStatus.RUNNING, AgentStatus.PREPARING):
+        with self._procs_lock:
+            if self.status not in (AgentStatus.RUNNING, AgentStatus.PREPARING):
+                return False
             self.status = AgentStatus.CANCELLED
-            self.emit_event("cancelled")
-            return True
-        return False
+            procs = list(self._active_procs)
+        for proc in procs:
+            self._signal_tool(proc)
+        self.emit_event("cancelled")
+        return True
     
     def validate_inputs(self, inputs: Dict[str, Any]) -> List[str]:
         """
@@ -385,23 +438,24 @@ class BaseAgent(abc.ABC):
         """
         获取 LLM 提供者实例（延迟初始化）
         
+        提供者由进程级注册表共享：配置只解析一次，连接池复用，可用性探测结果带 TTL 缓存。
+        
         Returns:
             ModelProvider: 统一的模型提供者，如果不可用则返回 None
         """
         if self._provider is None:
             try:
-                ModelConfigManager = _get_model_config_manager()
-                if ModelConfigManager is None:
-                    logger.warning(f"Agent {self.name}: LLM 功能不可用，ModelConfigManager 导入失败")
+                registry = _get_provider_registry()
+                if registry is None:
+                    logger.warning(f"Agent {self.name}: LLM 功能不可用，提供者注册表导入失败")
                     return None
                 
-                config_manager = ModelConfigManager()
                 if self._profile_name:
-                    self._provider = config_manager.create_provider(self._profile_name)
-                    logger.info(f"Agent {self.name} using LLM profile: {self._profile_name}")
+                    self._provider = registry.get(self._profile_name)
+                    logger.debug(f"Agent {self.name} using LLM profile: {self._profile_name}")
                 else:
-                    self._provider = config_manager.create_provider_with_fallback()
-                    logger.info(f"Agent {self.name} using default LLM provider with fallback")
+                    self._provider = registry.get_with_fallback()
+                    logger.debug(f"Agent {self.name} using default LLM provider with fallback")
             except Exception as e:
                 logger.warning(f"Agent {self.name} LLM provider 初始化失败: {e}")
                 logger.info(f"Agent {self.name} 将在无 LLM 模式下运行")
@@ -444,6 +498,10 @@ class BaseAgent(abc.ABC):
         # 记录 LLM 调用
         self.emit_event("llm_call", prompt_length=len(prompt), system_length=len(system or ""))
         
+        # 流水线配置 llm_cache: false 跳过响应缓存（提供者为进程共享，不能直接修改其缓存）
+        if self.config.get("llm_cache") is False:
+            kwargs.setdefault("use_cache", False)
+        
         try:
             response = provider.generate(prompt, system=system, **kwargs)
             logger.debug(f"Agent {self.name} LLM response length: {len(response)}")
@@ -490,6 +548,12 @@ class BaseAgent(abc.ABC):
                        system_length=len(system or ""),
                        has_schema=schema is not None)
         
+        # llm_stream: 流式接收，收到完整 JSON 对象即中断，不等待模型输出结束
+        if self.config.get("llm_stream"):
+            kwargs.setdefault("stream", True)
+        if self.config.get("llm_cache") is False:
+            kwargs.setdefault("use_cache", False)
+        
         try:
             response = provider.generate_json(
                 prompt, 
@@ -606,6 +670,22 @@ class BaseAgent(abc.ABC):
         except Exception:
             return prompt, []
     
+    def review_prompt(self, results: Optional[Dict[str, Any]], max_chars: int = 4000) -> str:
+        """
+        复核轮提示词：results 中带有首轮评估（review_of）时，附上首轮结论并要求逐项复核；
+        否则返回空字符串
+        """
+        first = (results or {}).get("review_of")
+        if not first:
+            return ""
+        import json
+        text = json.dumps(first, ensure_ascii=False, default=str)
+        if len(text) > max_chars:
+            text = text[:max_chars] + "..."
+        return ("\n\n### 首轮评估（请复核）\n"
+                "请逐项核对首轮评估的结论与评分是否与上述数据一致，指出遗漏或错误，并给出修正后的完整评估：\n"
+                f"{text}")
+    
     def memory_query(self, tags: List[str], top_k: int = 3) -> List[Dict[str, Any]]:
         """
         查询 Mem0 记忆（短期上下文）。不可用时返回空列表。
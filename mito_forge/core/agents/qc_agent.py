@@ -100,7 +100,7 @@ class QCAgent(BaseAgent):
         # QC 特有配置
         self.quality_threshold = self.config.get("quality_threshold", 20)
         self.length_threshold = self.config.get("length_threshold", 100)
-        self.supported_tools = ["fastqc", "nanoplot", "trimmomatic", "cutadapt"]
+        self.supported_tools = ["fastqc", "nanoplot", "builtin", "trimmomatic", "cutadapt"]
     
     def get_capability(self) -> AgentCapability:
         """返回 QC Agent 的能力描述"""
@@ -236,7 +236,7 @@ class QCAgent(BaseAgent):
                 "can_fix": True,
                 "fix_strategy": "switch_tool",
                 "suggestions": {
-                    "alternative_tool": "nanoplot",
+                    "alternative_tool": "builtin" if self.config.get("qc_builtin_fallback") else "nanoplot",
                     "explanation": "Try alternative QC tool"
                 }
             }
@@ -290,12 +290,14 @@ class QCAgent(BaseAgent):
         current_params = {
             "threads": int(self.config.get("threads", 4))
         }
-        current_tool = inputs.get("qc_tool", "fastqc")
+        current_tool = inputs.get("qc_tool") or self.config.get("qc_tool", "fastqc")
+        requested_tool = current_tool
         
         while retry_count <= max_retries:
             try:
                 inputs_copy = inputs.copy()
                 inputs_copy["qc_tool"] = current_tool
+                inputs_copy["qc_fallback"] = current_tool != requested_tool
                 inputs_copy.update(current_params)
                 
                 logger.info(
@@ -366,6 +368,12 @@ class QCAgent(BaseAgent):
                 
                 if fix_strategy == "switch_tool":
                     alt_tool = suggestions.get("alternative_tool")
+                    if alt_tool == "builtin" and not self.config.get("qc_builtin_fallback"):
+                        # 内置引擎只在显式选择或开启 qc_builtin_fallback 时使用
+                        raise RuntimeError(
+                            f"QC with {current_tool} failed: {error_msg}\n"
+                            f"Set qc_tool: builtin or qc_builtin_fallback: true to use the builtin QC engine."
+                        )
                     if alt_tool:
                         logger.info(f"🔄 Switching from {current_tool} to {alt_tool}")
                         logger.info(f"   Reason: {suggestions.get('explanation', 'N/A')}")
@@ -406,8 +414,8 @@ class QCAgent(BaseAgent):
             # 执行 QC 分析（带智能错误处理和重试）
             qc_results = self._execute_qc_with_retry(inputs, max_retries=3)
             
-            # AI 分析结果
-            ai_analysis = self.analyze_qc_results(qc_results)
+            # AI 分析结果（延迟模式下由调用方后台执行）
+            ai_analysis = {} if self.defer_llm_analysis else self.analyze_qc_results(qc_results)
             
             # 构建结果
             result = StageResult(
@@ -446,18 +454,31 @@ class QCAgent(BaseAgent):
             )
     
     def run_qc_analysis(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """运行基础 QC 分析工具"""
+        """
+        运行基础 QC 分析工具
+
+        双端数据的 R1/R2 通过一次多文件 FastQC 调用（-t N）并发分析；
+        长读数据使用内置长读长统计引擎（long_read_qc: nanoplot 时调用 NanoPlot），
+        hybrid 模式下长读 QC 与 FastQC 同时运行。
+        qc_tool 为 builtin 时使用内置向量化 QC 引擎；FastQC/NanoPlot 都不可用时，
+        仅在 qc_builtin_fallback 开启时回退到内置引擎（结果记为 qc_engine: builtin (fallback)）。
+        """
         reads_file = inputs["reads"]
         reads2_file = inputs.get("reads2")  # 双端测序 R2
+        long_reads_file = inputs.get("long_reads")  # hybrid 模式的长读数据
         read_type = inputs.get("read_type", "illumina")
         
         if reads2_file:
             logger.info(f"Running QC analysis on paired-end data: {reads_file} + {reads2_file}")
         else:
             logger.info(f"Running QC analysis on {reads_file}")
+        qc_tool = str(inputs.get("qc_tool") or self.config.get("qc_tool") or "").lower()
+        if qc_tool == "builtin":
+            return self._run_builtin_qc(inputs, fallback=bool(inputs.get("qc_fallback")))
         # 优先尝试真实工具：fastqc 或 NanoPlot
         try:
             import shutil
+            from concurrent.futures import ThreadPoolExecutor
             qc_dir = (self.workdir or Path(".")) / "qc"
             qc_dir.mkdir(parents=True, exist_ok=True)
             # 简单策略：Illumina 优先 fastqc，其他优先 NanoPlot
@@ -479,12 +500,31 @@ class QCAgent(BaseAgent):
             if self.config.get("dry_run"):
                 pass  # run_tool 内部会处理
             if prefer_fastqc and fastqc_exists:
-                # 运行 FastQC for R1
-                rc1 = self.run_tool("fastqc", ["-o", str(qc_dir.absolute()), str(Path(reads_file).absolute())], cwd=qc_dir)
+                short_files = [reads_file] + ([reads2_file] if reads2_file else [])
                 
-                # 如果是双端数据，也对 R2 运行 QC
-                if reads2_file and rc1.get("exit_code") == 0:
-                    rc2 = self.run_tool("fastqc", ["-o", str(qc_dir.absolute()), str(Path(reads2_file).absolute())], cwd=qc_dir)
+                # hybrid：长读 QC 在后台线程中与 FastQC 同时运行；
+                # FastQC 出错时退出 with 块会等待长读 QC 结束，不留无人管理的后台任务
+                with ThreadPoolExecutor(max_workers=1) as long_executor:
+                    long_future = None
+                    if long_reads_file:
+                        long_future = long_executor.submit(
+                            lambda: self._run_long_read_qc(long_reads_file, qc_dir / "long_reads",
+                                                           self._long_read_type(inputs), nanoplot_exists)
+                        )
+                    
+                    # 一次 FastQC 调用处理 R1/R2，-t 让每个文件占用一个线程并行分析
+                    threads = max(1, int(self.config.get("threads", 4) or 1))
+                    fastqc_threads = max(1, min(threads, len(short_files)))
+                    fastqc_args = ["-t", str(fastqc_threads), "-o", str(qc_dir.absolute())]
+                    fastqc_args += [str(Path(f).absolute()) for f in short_files]
+                    rc1 = self.run_tool("fastqc", fastqc_args, cwd=qc_dir)
+                    
+                    long_result = None
+                    if long_future is not None:
+                        try:
+                            long_result = long_future.result()
+                        except Exception as e:
+                            logger.warning(f"Long-read QC failed: {e}")
                 
                 if rc1.get("exit_code") == 0:
                     # 解析 FastQC 输出
@@ -493,8 +533,8 @@ class QCAgent(BaseAgent):
                         zip_file_r1 = find_fastqc_output(qc_dir, Path(reads_file))
                         
                         if zip_file_r1 and zip_file_r1.exists():
-                            result_r1 = parse_fastqc_output(zip_file_r1)
-                            result_r1["read_type"] = read_type
+                            result = parse_fastqc_output(zip_file_r1)
+                            result["read_type"] = read_type
                             
                             # 如果有 R2，解析并合并
                             if reads2_file:
@@ -503,12 +543,13 @@ class QCAgent(BaseAgent):
                                     result_r2 = parse_fastqc_output(zip_file_r2)
                                     # 合并 R1 和 R2 的指标
                                     from ...utils.paired_end_utils import merge_paired_qc_metrics
-                                    merged = merge_paired_qc_metrics(result_r1, result_r2)
-                                    merged["read_type"] = read_type
-                                    return merged
+                                    result = merge_paired_qc_metrics(result, result_r2)
+                                    result["read_type"] = read_type
                             
                             # 单端或 R2 解析失败时返回 R1 结果
-                            return result_r1
+                            if long_result:
+                                result["long_reads_qc"] = long_result
+                            return result
                         else:
                             raise QCFailedError(
                                 f"FastQC output not found: {qc_dir}\n"
@@ -522,32 +563,21 @@ class QCAgent(BaseAgent):
                             f"Output directory: {qc_dir}\n"
                             f"Check if FastQC completed successfully."
                         )
-            if nanoplot_exists:
-                exe = "NanoPlot" if shutil.which("NanoPlot") else "nanoplot"
-                rc = self.run_tool(exe, ["--fastq", str(reads_file), "-o", str(qc_dir)], cwd=qc_dir)
-                if rc.get("exit_code") == 0:
-                    # 解析 NanoPlot 输出
-                    try:
-                        from ...utils.parsers import parse_nanoplot_output
-                        parsed = parse_nanoplot_output(qc_dir)
-                        
-                        if parsed['success']:
-                            return {
-                                "filename": Path(reads_file).name,
-                                "read_type": read_type,
-                                "total_reads": parsed['metrics'].get('total_reads', 0),
-                                "total_bases": parsed['metrics'].get('total_bases', 0),
-                                "avg_length": parsed['metrics'].get('avg_length', 0),
-                                "avg_quality": parsed['metrics'].get('avg_quality', 0),
-                                "q20_percent": parsed['metrics'].get('q20_percent', 0),
-                                "gc_content": parsed['metrics'].get('gc_content', 0),
-                                "n50": parsed['metrics'].get('n50', 0),
-                                "detected_issues": []
-                            }
-                        else:
-                            logger.warning(f"NanoPlot parsing failed: {parsed.get('errors')}")
-                    except Exception as e:
-                        logger.warning(f"Failed to parse NanoPlot output: {e}")
+            if not prefer_fastqc:
+                parsed = self._run_long_read_qc(reads_file, qc_dir, read_type, nanoplot_exists)
+                if parsed:
+                    return parsed
+            elif nanoplot_exists:
+                parsed = self._run_nanoplot_qc(reads_file, qc_dir, read_type)
+                if parsed:
+                    return parsed
+            # FastQC/NanoPlot 不可用或未产出结果：仅在显式开启时回退到内置引擎
+            if self.config.get("qc_builtin_fallback"):
+                return self._run_builtin_qc(inputs, fallback=True)
+            raise QCFailedError(
+                "FastQC/NanoPlot not available or produced no result.\n"
+                "Install them, or set qc_tool: builtin (or qc_builtin_fallback: true) to use the builtin QC engine."
+            )
         except Exception as _e:
             logger.error(f"QC tool execution failed: {_e}")
             raise RuntimeError(
@@ -556,6 +586,91 @@ class QCAgent(BaseAgent):
                 f"Error: {_e}"
             )
     
+    def _run_builtin_qc(self, inputs: Dict[str, Any], fallback: bool = False) -> Dict[str, Any]:
+        """
+        内置向量化 QC 引擎：无需外部工具，Q20/Q30 为精确值，结果写入 qc/builtin_qc.json
+
+        fallback 为 True 表示替代未能运行的 FastQC/NanoPlot，结果中记为 qc_engine: builtin (fallback)。
+        """
+        from ...io.qc import run_builtin_qc
+        if fallback:
+            logger.warning("⚠️ FastQC/NanoPlot unavailable, falling back to builtin QC engine (qc_builtin_fallback)")
+        threads = max(1, int(inputs.get("threads") or self.config.get("threads", 4) or 1))
+        read_type = inputs.get("read_type", "illumina")
+        result = run_builtin_qc(inputs["reads"], inputs.get("reads2"), threads=threads, read_type=read_type)
+        if inputs.get("long_reads"):
+            result["long_reads_qc"] = run_builtin_qc(inputs["long_reads"], threads=threads,
+                                                     read_type=self._long_read_type(inputs))
+        result["qc_engine"] = "builtin (fallback)" if fallback else "builtin"
+        qc_dir = (self.workdir or Path(".")) / "qc"
+        qc_dir.mkdir(parents=True, exist_ok=True)
+        (qc_dir / "builtin_qc.json").write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        return result
+    
+    def _long_read_type(self, inputs: Dict[str, Any]) -> str:
+        """hybrid 长读的测序类型：long_read_type（输入或配置）> 抽样画像推断 > nanopore"""
+        read_type = inputs.get("long_read_type") or self.config.get("long_read_type")
+        if read_type:
+            return str(read_type).lower()
+        try:
+            from ...io.profile import cached_profile
+            detected = cached_profile(inputs["long_reads"])["read_type"]
+        except Exception as e:
+            logger.debug(f"Long-read type detection failed: {e}")
+            return "nanopore"
+        return detected if detected != "illumina" else "nanopore"
+    
+    def _run_long_read_qc(self, reads_file: str, out_dir: Path, read_type: str,
+                          nanoplot_exists: bool = True) -> Optional[Dict[str, Any]]:
+        """长读 QC：默认使用内置统计引擎；long_read_qc: nanoplot 且已安装时调用 NanoPlot"""
+        if str(self.config.get("long_read_qc", "native")).lower() == "nanoplot" and nanoplot_exists:
+            return self._run_nanoplot_qc(reads_file, out_dir, read_type)
+        from ...io.longreads import long_read_stats
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        # 图表只在 qc_plots 开启时渲染
+        plot_dir = out_dir if self.config.get("qc_plots") else None
+        result = long_read_stats(reads_file, read_type=read_type, plot_dir=plot_dir)
+        (out_dir / "long_read_stats.json").write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        return result
+    
+    def _run_nanoplot_qc(self, reads_file: str, out_dir: Path, read_type: str) -> Optional[Dict[str, Any]]:
+        """运行 NanoPlot 并解析为 QC 指标；失败时返回 None"""
+        import shutil
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        exe = "NanoPlot" if shutil.which("NanoPlot") else "nanoplot"
+        args = ["--fastq", str(reads_file), "-o", str(out_dir)]
+        threads = int(self.config.get("threads", 0) or 0)
+        if threads > 1:
+            args += ["-t", str(threads)]
+        rc = self.run_tool(exe, args, cwd=out_dir)
+        if rc.get("exit_code") != 0:
+            return None
+        # 解析 NanoPlot 输出
+        try:
+            from ...utils.parsers import parse_nanoplot_output
+            parsed = parse_nanoplot_output(out_dir)
+            
+            if parsed['success']:
+                return {
+                    "filename": Path(reads_file).name,
+                    "read_type": read_type,
+                    "total_reads": parsed['metrics'].get('total_reads', 0),
+                    "total_bases": parsed['metrics'].get('total_bases', 0),
+                    "avg_length": parsed['metrics'].get('avg_length', 0),
+                    "avg_quality": parsed['metrics'].get('avg_quality', 0),
+                    "q20_percent": parsed['metrics'].get('q20_percent', 0),
+                    "gc_content": parsed['metrics'].get('gc_content', 0),
+                    "n50": parsed['metrics'].get('n50', 0),
+                    "detected_issues": []
+                }
+            else:
+                logger.warning(f"NanoPlot parsing failed: {parsed.get('errors')}")
+        except Exception as e:
+            logger.warning(f"Failed to parse NanoPlot output: {e}")
+        return None
+    
     def analyze_qc_results(self, qc_results: Dict[str, Any]) -> Dict[str, Any]:
         """使用 AI 分析 QC 结果"""
         logger.info("Analyzing QC results with AI...")
@@ -596,7 +711,7 @@ class QCAgent(BaseAgent):
             extra_guidance = "请输出完整且结构化的结果：每类要点尽量给出3-5条，包含关键阈值与推荐参数，推理要简洁但覆盖依据。"
         else:
             extra_guidance = "请保持精简：每类要点不超过2条，一句话总结，推理尽量短。"
-        prompt = f"{prompt}\n\n### 输出风格要求\n{extra_guidance}"
+        prompt = f"{prompt}\n\n### 输出风格要求\n{extra_guidance}{self.review_prompt(qc_results)}"
         
         # 注入记忆与 RAG（自动探测，可用即启用；不可用时静默跳过）
         try:
@@ -6,12 +6,15 @@ LLM 模型调用模块
 from .provider import ModelProvider
 from .unified_provider import UnifiedProvider
 from .config_manager import ModelConfigManager
+from .registry import ProviderRegistry, get_provider_registry
 from .factory import create_provider, auto_select_provider
 
 __all__ = [
     "ModelProvider",
     "UnifiedProvider", 
     "ModelConfigManager",
+    "ProviderRegistry",
+    "get_provider_registry",
     "create_provider",
     "auto_select_provider"
 ]
\ No newline at end of file
@@ -10,6 +10,7 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from .unified_provider import UnifiedProvider
+from .response_cache import get_response_cache
 from ...utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -173,7 +174,10 @@ class ModelConfigManager:
         if not profile:
             raise ValueError(f"Profile '{profile_name}' not found")
         
-        return UnifiedProvider.create_from_config(profile)
+        provider = UnifiedProvider.create_from_config(profile)
+        # 持久化响应缓存（model_config.yaml 的 response_cache 段可关闭或调整）
+        provider.response_cache = get_response_cache(self.config.get("response_cache"))
+        return provider
     
     def create_provider_with_fallback(self) -> UnifiedProvider:
         """创建带回退的模型提供者"""
@@ -265,7 +269,7 @@ class ModelConfigManager:
             if available:
                 # 尝试生成测试响应
                 try:
-                    test_response = provider.generate("Hello", max_tokens=10)
+                    test_response = provider.generate("Hello", max_tokens=10, use_cache=False)
                     return {
                         "success": True,
                         "available": True,
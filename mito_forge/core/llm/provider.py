@@ -4,14 +4,68 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
+import asyncio
 import json
 import re
 from pathlib import Path
 
+from .response_cache import LLMResponseCache
+
+
+class _JSONObjectScanner:
+    """增量扫描流式文本，检测第一个完整且可解析的顶层 JSON 对象"""
+    
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """追加文本块，返回已完整接收的 JSON 对象（尚未完整时返回 None）"""
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._start < 0:
+                if char == "{":
+                    self._start, self._depth = i, 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate, self._start = text[self._start:i + 1], -1
+                    try:
+                        parsed = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(parsed, dict):
+                        self._pos = i + 1
+                        return parsed
+        self._pos = len(text)
+        return None
+
 class ModelProvider(ABC):
     """统一的模型调用接口，支持云端和本地模型"""
     
+    # LLM 响应缓存（LLMResponseCache），为 None 时不缓存
+    response_cache: Optional[LLMResponseCache] = None
+    
     def __init__(self, model: str, **kwargs):
         self.model = model
         self.config = kwargs
@@ -31,6 +85,22 @@ class ModelProvider(ABC):
         """
         raise NotImplementedError
     
+    def stream_generate(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """
+        流式生成文本，逐块产出
+        
+        默认一次性产出完整响应；支持流式接口的子类应覆盖此方法。关闭生成器即中断请求。
+        """
+        yield self.generate(prompt, system=system, **kwargs)
+    
+    async def agenerate(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
+        """
+        异步生成文本响应
+        
+        默认在线程池中调用同步 generate；支持原生异步 HTTP 的子类应覆盖此方法。
+        """
+        return await asyncio.to_thread(self.generate, prompt, system=system, **kwargs)
+    
     def generate_json(
         self, 
         prompt: str, 
@@ -38,6 +108,7 @@ class ModelProvider(ABC):
         system: Optional[str] = None, 
         schema: Optional[Dict[str, Any]] = None,
         max_retries: int = 3,
+        stream: bool = False,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -48,6 +119,7 @@ class ModelProvider(ABC):
             system: 系统提示词（可选）
             schema: JSON Schema 约束（可选）
             max_retries: 最大重试次数
+            stream: 流式接收，收到第一个完整 JSON 对象即中断（不等待模型输出结束）
             **kwargs: 其他参数
             
         Returns:
@@ -59,10 +131,19 @@ class ModelProvider(ABC):
         for attempt in range(max_retries + 1):
             try:
                 # 生成响应
-                response = self.generate(prompt, system=json_system, **kwargs)
+                parsed = None
+                if stream:
+                    response, parsed = self._stream_json(prompt, json_system, kwargs)
+                else:
+                    response = self.generate(prompt, system=json_system, **kwargs)
                 
-                # 尝试解析 JSON
-                parsed = self._parse_json_response(response)
+                # 尝试解析 JSON（失败时丢弃缓存的无效响应，重试会重新请求）
+                if parsed is None:
+                    try:
+                        parsed = self._parse_json_response(response)
+                    except ValueError:
+                        self._discard_cached_response(prompt, json_system, kwargs)
+                        raise
                 
                 # 如果有 schema，进行验证
                 if schema:
@@ -83,6 +164,96 @@ class ModelProvider(ABC):
                 if attempt > 0:
                     prompt = f"{prompt}\n\n注意：请确保输出是有效的 JSON 格式，上次尝试失败了。"
     
+    async def agenerate_json(
+        self, 
+        prompt: str, 
+        *, 
+        system: Optional[str] = None, 
+        schema: Optional[Dict[str, Any]] = None,
+        max_retries: int = 3,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """异步生成结构化 JSON 响应，重试与解析逻辑同 generate_json"""
+        json_system = (system or "") + "\n\n请严格按照 JSON 格式输出，不要包含任何其他文本。"
+        response = None
+        
+        for attempt in range(max_retries + 1):
+            try:
+                response = await self.agenerate(prompt, system=json_system, **kwargs)
+                try:
+                    parsed = self._parse_json_response(response)
+                except ValueError:
+                    self._discard_cached_response(prompt, json_system, kwargs)
+                    raise
+                if schema:
+                    self._validate_json_schema(parsed, schema)
+                return parsed
+                
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == max_retries:
+                    return {
+                        "error": f"Failed to generate valid JSON after {max_retries + 1} attempts",
+                        "last_error": str(e),
+                        "raw_response": response
+                    }
+                
+                if attempt > 0:
+                    prompt = f"{prompt}\n\n注意：请确保输出是有效的 JSON 格式，上次尝试失败了。"
+    
+    def _stream_json(self, prompt: str, system: str, params: Dict[str, Any]):
+        """流式接收响应，收到第一个完整 JSON 对象即关闭流；返回 (已接收文本, 解析结果或 None)"""
+        scanner = _JSONObjectScanner()
+        chunks = self.stream_generate(prompt, system=system, **params)
+        try:
+            for chunk in chunks:
+                parsed = scanner.feed(chunk)
+                if parsed is not None:
+                    # 提前中断的流不会自动写缓存，这里补写解析出的 JSON（已接收文本可能含未闭合的代码块）
+                    self._cache_store(self._response_cache_key(prompt, system, params),
+                                      json.dumps(parsed, ensure_ascii=False))
+                    return scanner.text, parsed
+        finally:
+            chunks.close()
+        return scanner.text, None
+    
+    def _cache_identity(self) -> Dict[str, Any]:
+        """参与缓存键的提供者标识，子类可补充端点等信息"""
+        return {"provider": self.__class__.__name__, "model": self.model}
+    
+    def _response_cache_key(self, prompt: str, system: Optional[str], params: Dict[str, Any]) -> Optional[str]:
+        """计算缓存键；未启用缓存或调用方传入 use_cache=False 时返回 None"""
+        if self.response_cache is None or not params.get("use_cache", True):
+            return None
+        params = {k: v for k, v in params.items() if k != "use_cache"}
+        return LLMResponseCache.make_key(self._cache_identity(), system, prompt, params)
+    
+    def _cache_lookup(self, key: Optional[str]) -> Optional[str]:
+        if not key:
+            return None
+        try:
+            return self.response_cache.get(key)
+        except Exception:
+            # 缓存故障不影响正常调用
+            return None
+    
+    def _cache_store(self, key: Optional[str], response: str) -> None:
+        if not key or not response:
+            return
+        try:
+            self.response_cache.put(key, response, provider=self._cache_identity().get("provider", ""), model=self.model)
+        except Exception:
+            pass
+    
+    def _discard_cached_response(self, prompt: str, system: Optional[str], params: Dict[str, Any]) -> None:
+        key = self._response_cache_key(prompt, system, params)
+        if key:
+            try:
+                self.response_cache.delete(key)
+            except Exception:
+                pass
+    
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """
         从响应中提取并解析 JSON
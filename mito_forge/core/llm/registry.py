@@ -0,0 +1,157 @@
+"""
+进程级共享的模型提供者注册表
+
+流水线中每个阶段都会新建智能体，若每个智能体各自解析配置、创建提供者并逐个探测
+默认/回退配置的可用性，每阶段都要付出数次 HTTP 往返。注册表在进程内：
+
+- 只解析一次 model_config.yaml / model_profiles.yaml（文件修改后自动重新加载）
+- 按配置名复用提供者实例及其 requests.Session 连接池
+- 缓存健康检查结果：首次探测同步进行，超过 TTL 后返回旧结果并在后台刷新
+
+配置项（model_config.yaml）：health_check_ttl（秒，默认 300）。
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config_manager import ModelConfigManager
+from .unified_provider import UnifiedProvider
+from ...utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_HEALTH_TTL = 300.0
+
+
+class ProviderRegistry:
+    """共享提供者与健康状态缓存（线程安全）"""
+
+    def __init__(self, config_dir: Optional[Path] = None):
+        self.config_dir = Path(config_dir) if config_dir else Path.home() / ".mito-forge"
+        self._lock = threading.RLock()
+        self._manager: Optional[ModelConfigManager] = None
+        self._stamp: Optional[tuple] = None
+        self._providers: Dict[str, UnifiedProvider] = {}
+        # 配置名 -> (是否可用, 探测时间)
+        self._health: Dict[str, Tuple[bool, float]] = {}
+        self._refreshing: set = set()
+
+    def _config_stamp(self) -> tuple:
+        stamps = []
+        for name in ("model_config.yaml", "model_profiles.yaml"):
+            path = self.config_dir / name
+            if path.exists():
+                stat = path.stat()
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            else:
+                stamps.append(None)
+        return tuple(stamps)
+
+    @property
+    def manager(self) -> ModelConfigManager:
+        """配置管理器；配置文件变化时重新加载并丢弃已创建的提供者"""
+        with self._lock:
+            stamp = self._config_stamp()
+            if self._manager is None or stamp != self._stamp:
+                if self._manager is not None:
+                    logger.info("🔄 Model config changed, reloading provider registry")
+                self._manager = ModelConfigManager(self.config_dir)
+                self._stamp = stamp
+                self._providers.clear()
+                self._health.clear()
+            return self._manager
+
+    @property
+    def health_ttl(self) -> float:
+        return float(self.manager.config.get("health_check_ttl", DEFAULT_HEALTH_TTL))
+
+    def get(self, profile_name: Optional[str] = None) -> UnifiedProvider:
+        """按配置名返回共享的提供者实例（默认使用默认配置）"""
+        manager = self.manager
+        if profile_name is None:
+            profile_name = manager.config.get("default_profile", "openai")
+        with self._lock:
+            provider = self._providers.get(profile_name)
+            if provider is None:
+                provider = manager.create_provider(profile_name)
+                self._providers[profile_name] = provider
+            return provider
+
+    def _probe(self, profile_name: str) -> bool:
+        try:
+            available = bool(self.get(profile_name).is_available())
+        except Exception as e:
+            logger.warning(f"Health check failed for profile '{profile_name}': {e}")
+            available = False
+        with self._lock:
+            self._health[profile_name] = (available, time.time())
+            self._refreshing.discard(profile_name)
+        return available
+
+    def _refresh_in_background(self, profile_name: str) -> None:
+        with self._lock:
+            if profile_name in self._refreshing:
+                return
+            self._refreshing.add(profile_name)
+        threading.Thread(
+            target=self._probe, args=(profile_name,), name=f"llm-health-{profile_name}", daemon=True
+        ).start()
+
+    def is_available(self, profile_name: str) -> bool:
+        """
+        返回缓存的健康状态
+
+        首次查询同步探测；结果过期时立即返回旧结果并在后台刷新。
+        """
+        ttl = self.health_ttl
+        with self._lock:
+            entry = self._health.get(profile_name)
+        if entry is None:
+            return self._probe(profile_name)
+        available, checked_at = entry
+        if time.time() - checked_at > ttl:
+            self._refresh_in_background(profile_name)
+        return available
+
+    def mark_unavailable(self, profile_name: str) -> None:
+        """调用方发现请求失败时标记不可用，TTL 过期后重新探测"""
+        with self._lock:
+            self._health[profile_name] = (False, time.time())
+
+    def get_with_fallback(self) -> UnifiedProvider:
+        """返回默认配置或第一个可用的回退配置（使用缓存的健康状态）"""
+        config = self.manager.config
+        candidates = [config.get("default_profile", "openai")]
+        if config.get("auto_fallback", True):
+            candidates += [p for p in config.get("fallback_profiles", []) if p not in candidates]
+
+        for profile_name in candidates:
+            if self.is_available(profile_name):
+                logger.debug(f"Using LLM profile: {profile_name}")
+                return self.get(profile_name)
+        raise RuntimeError("No available model providers found")
+
+    def clear(self) -> None:
+        """丢弃已创建的提供者与健康状态（下次访问时重新加载配置）"""
+        with self._lock:
+            self._manager = None
+            self._providers.clear()
+            self._health.clear()
+
+
+_registries: Dict[str, ProviderRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_provider_registry(config_dir: Optional[Path] = None) -> ProviderRegistry:
+    """返回进程内共享的注册表（按配置目录区分）"""
+    config_dir = Path(config_dir) if config_dir else Path.home() / ".mito-forge"
+    key = str(config_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = ProviderRegistry(config_dir)
+            _registries[key] = registry
+        return registry
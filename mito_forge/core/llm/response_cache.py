@@ -0,0 +1,202 @@
+"""
+LLM 响应持久化缓存
+
+相同的提供者/模型/系统提示词/提示词/采样参数直接返回已缓存的响应，
+避免重跑、expert 复核及批处理中相同指标的样本重复访问网络。
+
+- 存储：SQLite（默认 ~/.mito-forge/llm_cache.sqlite）
+- 过期：TTL（默认 7 天）
+- 淘汰：超过容量上限（默认 256MB）时按最近访问时间（LRU）淘汰
+- 统计：命中/未命中计数持久化，可通过 `mito-forge model cache` 查看
+
+配置（model_config.yaml 的 response_cache 段）：enabled / path / ttl_hours / max_size_mb；
+环境变量 MITO_LLM_CACHE=0 关闭，MITO_LLM_CACHE_PATH 指定数据库路径。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ...utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL_HOURS = 24 * 7
+DEFAULT_MAX_SIZE_MB = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT,
+    model TEXT,
+    response TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def default_cache_path() -> Path:
+    return Path(os.getenv("MITO_LLM_CACHE_PATH") or Path.home() / ".mito-forge" / "llm_cache.sqlite")
+
+
+class LLMResponseCache:
+    """基于 SQLite 的 LLM 响应缓存（线程安全，可多进程共享）"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+    ):
+        self.path = Path(path) if path else default_cache_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.max_size_bytes = int(float(max_size_mb) * 1024 * 1024)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def make_key(identity: Dict[str, Any], system: Optional[str], prompt: str, params: Dict[str, Any]) -> str:
+        """缓存键：提供者标识 + 系统提示词 + 提示词 + 采样参数"""
+        material = json.dumps(
+            {"identity": identity, "system": system or "", "prompt": prompt, "params": params},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _bump(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存；过期条目删除并计为未命中"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._bump(conn, "hits")
+            return row[0]
+
+    def put(self, key: str, response: str, provider: str = "", model: str = "") -> None:
+        """写入缓存并按 LRU 淘汰超出容量的条目"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses(key, provider, model, response, size_bytes, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, size, now, now),
+            )
+            self._evict(conn)
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM responses").fetchone()[0]
+        removed = 0
+        if total <= self.max_size_bytes:
+            return removed
+        for key, size in conn.execute("SELECT key, size_bytes FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_size_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        return removed
+
+    def prune_expired(self) -> int:
+        """删除所有过期条目"""
+        if self.ttl_seconds <= 0:
+            return 0
+        with self._lock, self._connect() as conn:
+            cur = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+            return cur.rowcount
+
+    def clear(self) -> int:
+        """清空缓存条目与计数器，返回删除的条目数"""
+        with self._lock, self._connect() as conn:
+            removed = conn.execute("DELETE FROM responses").rowcount
+            conn.execute("DELETE FROM counters")
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock, self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+            ).fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "size_bytes": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
+
+_caches: Dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(settings: Optional[Dict[str, Any]] = None) -> Optional[LLMResponseCache]:
+    """
+    按配置返回进程内共享的缓存实例；被禁用时返回 None
+
+    Args:
+        settings: model_config.yaml 中的 response_cache 配置段
+    """
+    settings = settings or {}
+    if os.getenv("MITO_LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    if not settings.get("enabled", True):
+        return None
+
+    path = str(settings.get("path") or default_cache_path())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            try:
+                cache = LLMResponseCache(
+                    path,
+                    ttl_hours=settings.get("ttl_hours", DEFAULT_TTL_HOURS),
+                    max_size_mb=settings.get("max_size_mb", DEFAULT_MAX_SIZE_MB),
+                )
+            except Exception as e:
+                logger.warning(f"LLM response cache unavailable ({path}): {e}")
+                return None
+            _caches[path] = cache
+        return cache
@@ -6,7 +6,10 @@
 import os
 import json
 import time
-from typing import Dict, Any, Optional, List
+import asyncio
+import threading
+import weakref
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -16,9 +19,16 @@ from ...utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 异步请求遇到这些状态码时退避重试（与同步会话的 Retry 策略一致）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
 class UnifiedProvider(ModelProvider):
     """统一模型提供者，支持多种 API 格式"""
     
+    # 事件循环 -> {api_base: asyncio.Semaphore}，同一服务端点的并发上限在实例间共享
+    _semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+    _semaphores_lock = threading.Lock()
+    
     # 预定义的模型配置
     PRESET_CONFIGS = {
         # OpenAI 官方
@@ -101,6 +111,8 @@ class UnifiedProvider(ModelProvider):
         custom_config: Optional[Dict[str, Any]] = None,
         timeout: int = 60,
         max_retries: int = 3,
+        pool_size: int = 10,
+        max_concurrency: int = 8,
         **kwargs
     ):
         """
@@ -114,6 +126,8 @@ class UnifiedProvider(ModelProvider):
             custom_config: 自定义配置
             timeout: 请求超时时间
             max_retries: 最大重试次数
+            pool_size: 异步 HTTP 连接池上限
+            max_concurrency: 同一服务端点的异步并发请求上限
         """
         # 获取预设配置
         if provider_type in self.PRESET_CONFIGS:
@@ -133,6 +147,8 @@ class UnifiedProvider(ModelProvider):
         self.api_base = (api_base or self.config["api_base"]).rstrip("/")
         self.timeout = timeout
         self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
         
         # 保存配置，因为父类 __init__ 会重置 self.config
         saved_config = self.config.copy()
@@ -149,6 +165,10 @@ class UnifiedProvider(ModelProvider):
         adapter = HTTPAdapter(max_retries=retry_strategy)
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
+        
+        # 异步 HTTP 客户端（httpx），按事件循环延迟创建
+        self._async_client = None
+        self._async_loop = None
     
     def _get_api_key_from_env(self) -> Optional[str]:
         """从环境变量获取 API 密钥"""
@@ -166,22 +186,87 @@ class UnifiedProvider(ModelProvider):
         return None
     
     def generate(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
-        """生成文本响应"""
+        """生成文本响应（命中响应缓存时直接返回）"""
+        key = self._response_cache_key(prompt, system, kwargs)
+        kwargs.pop("use_cache", None)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            logger.debug("LLM response cache hit")
+            return cached
+        response = self._make_request(**self._build_request(prompt, system=system, **kwargs))
+        self._cache_store(key, response)
+        return response
+    
+    async def agenerate(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
+        """异步生成文本响应（共享连接池，受端点并发上限约束，可被取消）"""
+        key = self._response_cache_key(prompt, system, kwargs)
+        kwargs.pop("use_cache", None)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            logger.debug("LLM response cache hit")
+            return cached
+        response = await self._amake_request(**self._build_request(prompt, system=system, **kwargs))
+        self._cache_store(key, response)
+        return response
+    
+    def stream_generate(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """
+        流式生成文本：OpenAI/Azure/Anthropic 解析 SSE，Ollama 解析 NDJSON
+        
+        关闭生成器即关闭 HTTP 响应（提前中断）；只有完整接收的响应才写入缓存。
+        """
+        key = self._response_cache_key(prompt, system, kwargs)
+        kwargs.pop("use_cache", None)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            logger.debug("LLM response cache hit")
+            yield cached
+            return
+        
+        request = self._build_request(prompt, system=system, **kwargs)
+        request["payload"]["stream"] = True
+        response_key = request.get("response_key", "choices")
+        logger.debug(f"Streaming API: {request['url']}")
+        response = self.session.post(
+            request["url"],
+            json=request["payload"],
+            headers=request["headers"],
+            params=request.get("params"),
+            timeout=self.timeout,
+            stream=True
+        )
+        chunks = []
+        with response:
+            response.raise_for_status()
+            # SSE 未声明 charset 时 requests 会按 ISO-8859-1 解码，这里按 UTF-8 自行解码
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                text, done = self._parse_stream_line(line.decode("utf-8"), response_key)
+                if text:
+                    chunks.append(text)
+                    yield text
+                if done:
+                    break
+        self._cache_store(key, "".join(chunks))
+    
+    def _build_request(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """按 API 格式构造请求（url/payload/headers/params/response_key），同步与异步调用共用"""
         api_format = self.config["api_format"]
         
         if api_format == "openai":
-            return self._generate_openai_format(prompt, system=system, **kwargs)
+            return self._openai_request(prompt, system=system, **kwargs)
         elif api_format == "anthropic":
-            return self._generate_anthropic_format(prompt, system=system, **kwargs)
+            return self._anthropic_request(prompt, system=system, **kwargs)
         elif api_format == "ollama":
-            return self._generate_ollama_format(prompt, system=system, **kwargs)
+            return self._ollama_request(prompt, system=system, **kwargs)
         elif api_format == "azure":
-            return self._generate_azure_format(prompt, system=system, **kwargs)
+            return self._azure_request(prompt, system=system, **kwargs)
         else:
             raise ValueError(f"Unsupported API format: {api_format}")
     
-    def _generate_openai_format(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
-        """OpenAI 格式 API 调用"""
+    def _openai_request(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """OpenAI 格式请求"""
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
@@ -206,10 +291,10 @@ class UnifiedProvider(ModelProvider):
             auth_value = f"{self.config['auth_prefix']} {self.api_key}".strip()
             headers[self.config["auth_header"]] = auth_value
         
-        return self._make_request(f"{self.api_base}/chat/completions", payload, headers)
+        return {"url": f"{self.api_base}/chat/completions", "payload": payload, "headers": headers}
     
-    def _generate_anthropic_format(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
-        """Anthropic Claude 格式 API 调用"""
+    def _anthropic_request(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Anthropic Claude 格式请求"""
         payload = {
             "model": self.model,
             "max_tokens": kwargs.get("max_tokens", 4000),
@@ -228,15 +313,11 @@ class UnifiedProvider(ModelProvider):
         if self.api_key:
             headers["x-api-key"] = self.api_key
         
-        response = self._make_request(f"{self.api_base}/messages", payload, headers, response_key="content")
-        
-        # Anthropic 返回格式特殊处理
-        if isinstance(response, list) and len(response) > 0:
-            return response[0].get("text", "")
-        return str(response)
+        return {"url": f"{self.api_base}/messages", "payload": payload, "headers": headers,
+                "response_key": "content"}
     
-    def _generate_ollama_format(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
-        """Ollama 格式 API 调用"""
+    def _ollama_request(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Ollama 格式请求"""
         full_prompt = prompt
         if system:
             full_prompt = f"{system}\n\n{prompt}"
@@ -254,10 +335,11 @@ class UnifiedProvider(ModelProvider):
         
         headers = {"Content-Type": "application/json"}
         
-        return self._make_request(f"{self.api_base}/api/generate", payload, headers, response_key="response")
+        return {"url": f"{self.api_base}/api/generate", "payload": payload, "headers": headers,
+                "response_key": "response"}
     
-    def _generate_azure_format(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> str:
-        """Azure OpenAI 格式 API 调用"""
+    def _azure_request(self, prompt: str, *, system: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Azure OpenAI 格式请求"""
         # Azure 使用 OpenAI 格式，但 URL 结构不同
         messages = []
         if system:
@@ -278,7 +360,7 @@ class UnifiedProvider(ModelProvider):
         url = f"{self.api_base}/openai/deployments/{self.model}/chat/completions"
         params = {"api-version": "2023-12-01-preview"}
         
-        return self._make_request(url, payload, headers, params=params)
+        return {"url": url, "payload": payload, "headers": headers, "params": params}
     
     def _make_request(
         self, 
@@ -305,26 +387,7 @@ class UnifiedProvider(ModelProvider):
             logger.debug(f"API call completed in {elapsed_time:.2f}s")
             
             response.raise_for_status()
-            result = response.json()
-            
-            # 根据不同的响应格式提取内容
-            if response_key == "choices":
-                # OpenAI 格式
-                if "choices" not in result or not result["choices"]:
-                    raise ValueError("Invalid response format")
-                return result["choices"][0]["message"]["content"]
-            
-            elif response_key == "content":
-                # Anthropic 格式
-                return result.get("content", "")
-            
-            elif response_key == "response":
-                # Ollama 格式
-                return result.get("response", "")
-            
-            else:
-                # 直接返回结果
-                return str(result)
+            return self._extract_content(response.json(), response_key)
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
@@ -336,6 +399,125 @@ class UnifiedProvider(ModelProvider):
             logger.error(f"Unexpected error calling API: {e}")
             raise
     
+    @staticmethod
+    def _extract_content(result: Dict[str, Any], response_key: str) -> str:
+        """根据不同的响应格式提取内容"""
+        if response_key == "choices":
+            # OpenAI 格式
+            if "choices" not in result or not result["choices"]:
+                raise ValueError("Invalid response format")
+            return result["choices"][0]["message"]["content"]
+        
+        elif response_key == "content":
+            # Anthropic 格式：content 为内容块列表
+            content = result.get("content", "")
+            if isinstance(content, list) and len(content) > 0:
+                return content[0].get("text", "")
+            return str(content)
+        
+        elif response_key == "response":
+            # Ollama 格式
+            return result.get("response", "")
+        
+        else:
+            # 直接返回结果
+            return str(result)
+    
+    @staticmethod
+    def _parse_stream_line(line: str, response_key: str) -> Tuple[str, bool]:
+        """解析一行流式响应，返回 (文本增量, 是否结束)"""
+        if response_key == "response":
+            # Ollama: 每行一个 JSON 对象
+            event = json.loads(line)
+            return event.get("response", ""), bool(event.get("done"))
+        
+        # SSE: 只处理 data 行（忽略 event:/id:/注释行）
+        if not line.startswith("data:"):
+            return "", False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return "", True
+        event = json.loads(data)
+        
+        if response_key == "content":
+            # Anthropic: content_block_delta 携带文本，message_stop 结束
+            event_type = event.get("type")
+            if event_type == "error":
+                raise RuntimeError(f"Anthropic stream error: {event.get('error')}")
+            if event_type == "content_block_delta":
+                return event.get("delta", {}).get("text", ""), False
+            return "", event_type == "message_stop"
+        
+        # OpenAI/Azure: choices[0].delta.content
+        choices = event.get("choices") or []
+        if not choices:
+            return "", False
+        delta = choices[0].get("delta") or {}
+        return delta.get("content") or "", choices[0].get("finish_reason") is not None
+    
+    def _get_async_client(self):
+        """获取当前事件循环的 httpx.AsyncClient（连接池大小受 pool_size 限制）"""
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError("Async LLM calls require httpx: pip install httpx") from e
+        
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                )
+            )
+            self._async_loop = loop
+        return self._async_client
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环下该服务端点的并发信号量"""
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            per_loop = self._semaphores.setdefault(loop, {})
+            semaphore = per_loop.get(self.api_base)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(max(1, int(self.max_concurrency)))
+                per_loop[self.api_base] = semaphore
+            return semaphore
+    
+    async def _amake_request(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        params: Optional[Dict[str, str]] = None,
+        response_key: str = "choices"
+    ) -> str:
+        """异步发送 HTTP 请求；取消（CancelledError）会立即中断请求并释放并发名额"""
+        client = self._get_async_client()
+        async with self._get_semaphore():
+            for attempt in range(self.max_retries + 1):
+                logger.debug(f"Calling API (async): {url}")
+                start_time = time.time()
+                response = await client.post(url, json=payload, headers=headers, params=params)
+                logger.debug(f"Async API call completed in {time.time() - start_time:.2f}s")
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                try:
+                    response.raise_for_status()
+                except Exception as e:
+                    logger.error(f"API request failed: {e}")
+                    raise
+                return self._extract_content(response.json(), response_key)
+    
+    async def aclose(self) -> None:
+        """关闭异步 HTTP 客户端"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+    
     def is_available(self) -> bool:
         """检查提供者是否可用"""
         # Ollama 不需要 API 密钥
@@ -360,11 +542,15 @@ class UnifiedProvider(ModelProvider):
         """测试 API 连接"""
         try:
             # 发送最小测试请求
-            test_response = self.generate("test", max_tokens=1, temperature=0)
+            test_response = self.generate("test", max_tokens=1, temperature=0, use_cache=False)
             return bool(test_response)
         except Exception:
             return False
     
+    def _cache_identity(self) -> Dict[str, Any]:
+        """缓存键包含提供者类型与服务端点"""
+        return {"provider": self.provider_type, "api_base": self.api_base, "model": self.model}
+    
     def get_model_info(self) -> Dict[str, Any]:
         """获取模型信息"""
         info = super().get_model_info()
@@ -393,5 +579,7 @@ class UnifiedProvider(ModelProvider):
             api_base=config.get("api_base"),
             custom_config=config.get("custom_config"),
             timeout=config.get("timeout", 60),
-            max_retries=config.get("max_retries", 3)
+            max_retries=config.get("max_retries", 3),
+            pool_size=config.get("pool_size", 10),
+            max_concurrency=config.get("max_concurrency", 8)
         )
\ No newline at end of file
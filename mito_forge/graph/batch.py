@@ -0,0 +1,338 @@
+"""
+多样本批处理运行器
+
+在一个进程池中并行运行多个样本的流水线：
+- 所有样本共享一个全局线程/内存预算，按并发数均分
+- 每个样本拥有独立的工作目录 <output>/<sample>/work
+- 单个样本失败不会影响其它样本；工作进程被杀导致进程池损坏时，
+  未完成的样本改为每个样本独占一个进程重新运行
+- 汇总状态写入 <output>/batch_status.tsv
+"""
+import csv
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from ..utils.exceptions import ValidationError
+from . import scheduler as scheduler_mod
+from .scheduler import ResourceScheduler
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 样本表必需/可选列
+SAMPLESHEET_REQUIRED = ("sample", "reads")
+SAMPLESHEET_OPTIONAL = ("reads2", "long_reads", "kingdom", "seq_type")
+
+# 汇总表列顺序
+STATUS_COLUMNS = (
+    "sample", "status", "completed_stages", "current_stage",
+    "duration_s", "threads", "memory_gb", "workdir", "error",
+)
+
+
+def _invalid_sample_name(name: str) -> bool:
+    """样本名用作 <output>/<sample> 目录名，不能包含路径分隔符或 '..'"""
+    return name == "." or "/" in name or "\\" in name or ".." in name
+
+
+def load_samplesheet(path: str) -> List[Dict[str, str]]:
+    """
+    读取样本表（TSV，首行为表头）
+
+    必需列：sample, reads；可选列：reads2, long_reads, kingdom, seq_type。
+    相对路径按样本表所在目录解析；样本名不能包含路径分隔符或 '..'。
+    """
+    sheet = Path(path)
+    if not sheet.exists():
+        raise ValidationError(f"Samplesheet not found: {path}")
+
+    base_dir = sheet.resolve().parent
+    samples: List[Dict[str, str]] = []
+    seen = set()
+
+    with sheet.open("r", encoding="utf-8", newline="") as f:
+        lines = (line for line in f if line.strip() and not line.startswith("#"))
+        reader = csv.DictReader(lines, delimiter="\t")
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        missing = [c for c in SAMPLESHEET_REQUIRED if c not in header]
+        if missing:
+            raise ValidationError(f"Samplesheet missing required columns: {', '.join(missing)}")
+
+        for lineno, row in enumerate(reader, start=2):
+            row = {(k or "").strip(): (v or "").strip() for k, v in row.items()}
+            name = row.get("sample", "")
+            if not name or not row.get("reads"):
+                raise ValidationError(f"Samplesheet row {lineno}: 'sample' and 'reads' are required")
+            if _invalid_sample_name(name):
+                raise ValidationError(
+                    f"Samplesheet row {lineno}: invalid sample name '{name}' "
+                    f"(must not contain path separators or '..')"
+                )
+            if name in seen:
+                raise ValidationError(f"Samplesheet row {lineno}: duplicate sample '{name}'")
+            seen.add(name)
+
+            entry = {"sample": name}
+            for key in ("reads", "reads2", "long_reads"):
+                value = row.get(key)
+                if value:
+                    p = Path(value)
+                    entry[key] = str(p if p.is_absolute() else base_dir / p)
+            for key in ("kingdom", "seq_type"):
+                if row.get(key):
+                    entry[key] = row[key].lower()
+            samples.append(entry)
+
+    if not samples:
+        raise ValidationError(f"Samplesheet has no samples: {path}")
+    return samples
+
+
+def split_budget(total_threads: int, total_memory_gb: Optional[float], jobs: int) -> Dict[str, Any]:
+    """将全局线程/内存预算均分给并发样本"""
+    jobs = max(1, int(jobs))
+    threads = max(1, int(total_threads) // jobs)
+    memory = None
+    if total_memory_gb:
+        memory = round(float(total_memory_gb) / jobs, 2)
+    return {"threads": threads, "memory_gb": memory}
+
+
+def build_sample_config(sample: Dict[str, str], base_config: Dict[str, Any],
+                        sample_dir: Path, budget: Dict[str, Any]) -> Dict[str, Any]:
+    """为单个样本构建流水线配置（与 pipeline 命令保持一致）"""
+    kingdom = sample.get("kingdom") or base_config.get("kingdom", "animal")
+    config = dict(base_config)
+    config.update({
+        "threads": budget["threads"],
+        "kingdom": kingdom,
+        "output_dir": str(sample_dir),
+    })
+    if budget.get("memory_gb"):
+        config["memory_gb"] = budget["memory_gb"]
+    config.setdefault("skip_qc", False)
+    config.setdefault("skip_annotation", False)
+    config.setdefault("generate_report", True)
+    config["interactive"] = False
+    if sample.get("seq_type"):
+        config["seq_type"] = sample["seq_type"]
+
+    if "tool_plan" not in base_config:
+        try:
+            from ..utils.selection import build_tool_plan, detect_seq_type
+            seq_type = (sample.get("seq_type") or base_config.get("seq_type") or "auto").lower()
+            if seq_type == "auto":
+                seq_type = detect_seq_type([sample["reads"]])
+            plan = build_tool_plan(seq_type, kingdom, sample["reads"])
+            if isinstance(plan, dict):
+                config["tool_plan"] = plan
+        except Exception as e:
+            logger.warning(f"Tool plan selection failed for {sample['sample']}: {e}")
+    return config
+
+
+def run_sample(sample: Dict[str, str], base_config: Dict[str, Any],
+               output_dir: str, budget: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    运行单个样本（在工作进程中执行）
+
+    任何异常都被捕获并转换为失败记录，保证批处理中的失败隔离。
+    """
+    from .build import run_pipeline_sync, save_checkpoint
+
+    name = sample["sample"]
+    sample_dir = Path(output_dir) / name
+    sample_dir.mkdir(parents=True, exist_ok=True)
+    record = {
+        "sample": name,
+        "status": "failed",
+        "completed_stages": "",
+        "current_stage": "",
+        "duration_s": 0.0,
+        "threads": budget["threads"],
+        "memory_gb": budget.get("memory_gb") or "",
+        "workdir": str(sample_dir / "work"),
+        "error": "",
+    }
+
+    start = time.time()
+    try:
+        config = build_sample_config(sample, base_config, sample_dir, budget)
+
+        inputs = {"reads": sample["reads"], "kingdom": config["kingdom"]}
+        for key in ("reads2", "long_reads"):
+            if sample.get(key):
+                inputs[key] = sample[key]
+
+        final_state = run_pipeline_sync(
+            inputs=inputs,
+            config=config,
+            workdir=record["workdir"],
+            pipeline_id=name,
+        )
+        save_checkpoint(final_state, str(sample_dir / "pipeline_state.json"))
+
+        record["status"] = "success" if final_state.get("done") and not final_state.get("errors") else "failed"
+        record["completed_stages"] = ",".join(final_state.get("completed_stages", []))
+        record["current_stage"] = final_state.get("current_stage", "")
+        errors = final_state.get("errors") or []
+        record["error"] = "; ".join(str(e) for e in errors)
+    except Exception as e:
+        logger.error(f"❌ Sample {name} failed: {e}")
+        record["error"] = str(e)
+
+    record["duration_s"] = round(time.time() - start, 2)
+    return record
+
+
+def write_status_table(records: List[Dict[str, Any]], path: Path) -> Path:
+    """写入批处理汇总状态表（TSV）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=STATUS_COLUMNS, delimiter="\t", extrasaction="ignore")
+        writer.writeheader()
+        for rec in records:
+            row = dict(rec)
+            row["error"] = str(row.get("error", "")).replace("\t", " ").replace("\n", " ")
+            writer.writerow(row)
+    return path
+
+
+def run_batch(
+    samples: List[Dict[str, str]],
+    output_dir: str,
+    config: Optional[Dict[str, Any]] = None,
+    threads: int = 8,
+    memory_gb: Optional[float] = None,
+    jobs: Optional[int] = None,
+    executor_cls=ProcessPoolExecutor,
+    on_result=None,
+) -> List[Dict[str, Any]]:
+    """
+    使用进程池并行运行多个样本
+
+    Args:
+        samples: load_samplesheet 返回的样本列表
+        output_dir: 批处理输出根目录
+        config: 所有样本共享的基础配置
+        threads: 全局线程预算
+        memory_gb: 全局内存预算（GB，可选）
+        jobs: 并发样本数（默认不超过样本数与线程预算）
+        executor_cls: 执行器类型（测试中可替换）
+        on_result: 每个样本完成后的回调
+
+    Returns:
+        每个样本的状态记录（按样本表顺序）
+    """
+    for sample in samples:
+        if _invalid_sample_name(sample["sample"]):
+            raise ValidationError(f"Invalid sample name '{sample['sample']}' "
+                                  f"(must not contain path separators or '..')")
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    base_config = dict(config or {})
+
+    if jobs is None:
+        jobs = min(len(samples), max(1, threads // 4))
+    jobs = max(1, min(int(jobs), len(samples) or 1))
+    budget = split_budget(threads, memory_gb, jobs)
+
+    # 共享资源调度器：各样本的阶段按资源计划向同一账本预留 CPU/内存，
+    # 内存不再按样本硬切分，而是由调度器在阶段之间动态分配
+    executor_kwargs: Dict[str, Any] = {}
+    shared = None
+    manager = None
+    previous_scheduler = scheduler_mod._scheduler
+    if base_config.get("resource_scheduler", True):
+        budget["memory_gb"] = None
+        if isinstance(executor_cls, type) and issubclass(executor_cls, ProcessPoolExecutor):
+            manager = multiprocessing.Manager()
+            shared = ResourceScheduler.shared(manager, threads, memory_gb)
+        else:
+            shared = ResourceScheduler(threads, memory_gb)
+        executor_kwargs = {"initializer": scheduler_mod.set_scheduler, "initargs": (shared,)}
+
+    logger.info(f"🚀 Batch start: {len(samples)} samples, {jobs} parallel, "
+                f"{budget['threads']} threads/sample")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        _collect_results(samples, base_config, out, budget, jobs, executor_cls,
+                         executor_kwargs, results, on_result, scheduler=shared)
+    finally:
+        scheduler_mod.set_scheduler(previous_scheduler)
+        if manager is not None:
+            manager.shutdown()
+
+    ordered = [results[s["sample"]] for s in samples]
+    write_status_table(ordered, out / "batch_status.tsv")
+    n_ok = sum(1 for r in ordered if r["status"] == "success")
+    logger.info(f"✅ Batch finished: {n_ok}/{len(ordered)} samples succeeded")
+    return ordered
+
+
+def _crash_record(name: str, out: Path, budget: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    return {
+        "sample": name, "status": "failed", "completed_stages": "",
+        "current_stage": "", "duration_s": 0.0,
+        "threads": budget["threads"], "memory_gb": budget.get("memory_gb") or "",
+        "workdir": str(out / name / "work"), "error": f"worker crashed: {error}",
+    }
+
+
+def _collect_results(samples, base_config, out, budget, jobs, executor_cls,
+                     executor_kwargs, results, on_result, scheduler=None):
+    """
+    提交所有样本并收集结果（失败隔离）
+
+    一个工作进程异常退出（如 OOM 被杀）会使整个进程池损坏，池中所有未完成的样本都以
+    BrokenProcessPool 失败，无法判断是哪个样本导致的。此时回收已退出进程的资源预留，
+    把未完成的样本各自放到独立的单进程池中重新运行，只有在独立进程中仍然崩溃的样本记为失败。
+    """
+    def finish(name, record):
+        results[name] = record
+        if on_result:
+            on_result(record)
+
+    unfinished = []
+    with executor_cls(max_workers=jobs, **executor_kwargs) as executor:
+        futures = {
+            executor.submit(run_sample, s, base_config, str(out), budget): s
+            for s in samples
+        }
+        for future in as_completed(futures):
+            sample = futures[future]
+            try:
+                finish(sample["sample"], future.result())
+            except BrokenProcessPool:
+                unfinished.append(sample)
+            except Exception as e:
+                logger.error(f"❌ Sample {sample['sample']} worker crashed: {e}")
+                finish(sample["sample"], _crash_record(sample["sample"], out, budget, e))
+    if not unfinished:
+        return
+
+    if scheduler is not None:
+        scheduler.reclaim_dead()
+    logger.warning(f"⚠️ Worker pool broke; rerunning {len(unfinished)} unfinished sample(s) in isolated processes")
+
+    def run_isolated(sample):
+        with executor_cls(max_workers=1, **executor_kwargs) as executor:
+            return executor.submit(run_sample, sample, base_config, str(out), budget).result()
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch-isolated") as runner:
+        futures = {runner.submit(run_isolated, s): s for s in unfinished}
+        for future in as_completed(futures):
+            name = futures[future]["sample"]
+            try:
+                record = future.result()
+            except Exception as e:
+                logger.error(f"❌ Sample {name} worker crashed: {e}")
+                record = _crash_record(name, out, budget, e)
+                if scheduler is not None:
+                    scheduler.reclaim_dead()
+            finish(name, record)
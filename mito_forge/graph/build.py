@@ -2,33 +2,61 @@
 LangGraph 图构建
 定义状态机的节点连接和条件路由
 """
-from typing import Literal
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Literal, Optional
 
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.sqlite import SqliteSaver
 
 from .state import PipelineState, get_next_stage, is_pipeline_complete
-from .nodes import supervisor_node, qc_node, assembly_node, polish_node, annotation_node, report_node
+from .nodes import (
+    supervisor_node, qc_node, bait_node, downsample_node, assembly_node, polish_node, annotation_node,
+    report_node, bait_enabled, downsample_enabled
+)
+from .scheduler import scheduled_node
+from .stage_cache import cached_node
+from . import llm_eval
+from ..utils.logging import get_logger
 
-def build_pipeline_graph():
+logger = get_logger(__name__)
+
+# 图中阶段的拓扑顺序
+STAGE_ORDER = ["supervisor", "qc", "bait", "downsample", "assembly", "polish", "annotation", "report"]
+
+# qc 与 assembly 之间的可选阶段（按顺序，各自由启用条件决定是否进入）
+PRE_ASSEMBLY_STAGES = [("bait", bait_enabled), ("downsample", downsample_enabled)]
+
+# 工作目录下的默认检查点数据库
+CHECKPOINT_DB_NAME = "checkpoints.sqlite"
+
+def build_pipeline_graph(checkpointer=None):
     """
     构建线粒体组装流水线的状态图
     
     流程：
-    START → supervisor → qc → assembly → annotation → report → END
-           ↑         ↓    ↓        ↓           ↓
-           └─ retry ─┴────┴────────┴───────────┘
+    START → supervisor → qc → [bait] → [downsample] → assembly → annotation → report → END
+           ↑         ↓    ↓                              ↓           ↓
+           └─ retry ─┴────┴──────────────────────────────┴───────────┘
+
+    bait（k-mer 诱饵招募线粒体读段）与 downsample（按覆盖度降采样）仅在启用时进入。
+
+    Args:
+        checkpointer: LangGraph 检查点存储（如 SqliteSaver），每次节点转换后持久化状态
     """
     
     # 创建状态图
     graph = StateGraph(PipelineState)
     
-    # 添加节点
+    # 添加节点（计算密集阶段先查阶段结果缓存，未命中时按资源计划预留 CPU/内存后再执行）
     graph.add_node("supervisor", supervisor_node)
-    graph.add_node("qc", qc_node)
-    graph.add_node("assembly", assembly_node)
-    graph.add_node("polish", polish_node)
-    graph.add_node("annotation", annotation_node)
+    graph.add_node("qc", cached_node("qc", scheduled_node("qc", qc_node)))
+    graph.add_node("bait", cached_node("bait", scheduled_node("bait", bait_node)))
+    graph.add_node("downsample", cached_node("downsample", scheduled_node("downsample", downsample_node)))
+    graph.add_node("assembly", cached_node("assembly", scheduled_node("assembly", assembly_node)))
+    graph.add_node("polish", cached_node("polish", scheduled_node("polish", polish_node)))
+    graph.add_node("annotation", cached_node("annotation", scheduled_node("annotation", annotation_node)))
     graph.add_node("report", report_node)
     
     # 设置入口点
@@ -49,6 +77,8 @@ def build_pipeline_graph():
         supervisor_route_decider,
         {
             "qc": "qc",  # 正常流程:进入QC
+            "bait": "bait",  # 跳过QC:先诱饵/降采样再组装
+            "downsample": "downsample",
             "assembly": "assembly",  # 跳过QC:直接进入Assembly
             "terminate": END
         }
@@ -56,14 +86,35 @@ def build_pipeline_graph():
     
     graph.add_conditional_edges(
         "qc",
-        stage_route_decider,
+        qc_route_decider,
         {
+            "bait": "bait",
+            "downsample": "downsample",
             "continue": "assembly",
             "retry": "qc",
             "terminate": END
         }
     )
     
+    graph.add_conditional_edges(
+        "bait",
+        bait_route_decider,
+        {
+            "downsample": "downsample",
+            "continue": "assembly",
+            "terminate": END
+        }
+    )
+    
+    graph.add_conditional_edges(
+        "downsample",
+        stage_route_decider,
+        {
+            "continue": "assembly",
+            "terminate": END
+        }
+    )
+    
     graph.add_conditional_edges(
         "assembly", 
         assembly_route_decider,
@@ -95,37 +146,10 @@ def build_pipeline_graph():
         }
     )
     
-    # 编译图 (暂时不使用 checkpointer，避免配置复杂性)
-    return graph.compile()
-    # 如需启用检查点功能，使用:
-    # return graph.compile(checkpointer=SqliteSaver.from_conn_string(":memory:"))
-    
-    # 以下为旧的临时实现（已启用LangGraph）
-    # 旧的临时实现（保留作为备用）
-    # return {
-    #     "nodes": {
-    #         "supervisor": supervisor_node,
-    #         "qc": qc_node,
-    #         "assembly": assembly_node,
-    #         "annotation": annotation_node,
-    #         "report": report_node
-    #     },
-    #     "edges": {
-    #         "supervisor": ["qc"],
-    #         "qc": ["assembly"],
-    #         "assembly": ["annotation"],
-    #         "annotation": ["report"],
-    #         "report": ["END"]
-    #     },
-    #     "conditional_edges": {
-    #         "supervisor": supervisor_route_decider,
-    #         "qc": stage_route_decider,
-    #         "assembly": stage_route_decider,
-    #         "annotation": stage_route_decider
-    #     }
-    # }
-
-def supervisor_route_decider(state: PipelineState) -> Literal["qc", "assembly", "terminate"]:
+    # 编译图（传入 checkpointer 时每个节点转换都会持久化）
+    return graph.compile(checkpointer=checkpointer)
+
+def supervisor_route_decider(state: PipelineState) -> Literal["qc", "bait", "downsample", "assembly", "terminate"]:
     """主管节点路由决策 - 根据skip_qc决定下一阶段"""
     from .state import RouteDecision
     route = state["route"]
@@ -139,10 +163,35 @@ def supervisor_route_decider(state: PipelineState) -> Literal["qc", "assembly",
     # 根据config决定下一个阶段
     config = state["config"]
     if config.get("skip_qc", False):
-        return "assembly"  # 跳过QC,直接进入Assembly
+        return _next_pre_assembly_stage(state)  # 跳过QC,直接进入组装前阶段或Assembly
     else:
         return "qc"
 
+def _next_pre_assembly_stage(state: PipelineState, after: Optional[str] = None) -> str:
+    """after 之后第一个启用的组装前阶段，都未启用时为 assembly"""
+    names = [name for name, _ in PRE_ASSEMBLY_STAGES]
+    start = names.index(after) + 1 if after in names else 0
+    for name, enabled in PRE_ASSEMBLY_STAGES[start:]:
+        if enabled(state):
+            return name
+    return "assembly"
+
+def qc_route_decider(state: PipelineState) -> Literal["bait", "downsample", "continue", "retry", "terminate"]:
+    """QC 节点路由决策 - 启用诱饵/降采样时先进入对应阶段"""
+    decision = stage_route_decider(state)
+    if decision == "continue":
+        next_stage = _next_pre_assembly_stage(state)
+        return "continue" if next_stage == "assembly" else next_stage
+    return decision
+
+def bait_route_decider(state: PipelineState) -> Literal["downsample", "continue", "terminate"]:
+    """诱饵节点路由决策 - 启用降采样时进入 downsample"""
+    decision = stage_route_decider(state)
+    if decision == "continue":
+        next_stage = _next_pre_assembly_stage(state, "bait")
+        return "continue" if next_stage == "assembly" else next_stage
+    return decision
+
 def assembly_route_decider(state: PipelineState) -> Literal["polish", "skip_polish", "retry", "fallback", "terminate"]:
     """组装节点路由决策 - 决定是否需要抛光"""
     from .state import RouteDecision
@@ -184,52 +233,88 @@ def stage_route_decider(state: PipelineState) -> Literal["continue", "retry", "f
     else:
         return "continue"
 
+def _checkpoint_serde():
+    """检查点序列化器：显式允许流水线状态中的枚举类型"""
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    allowed = [
+        ("mito_forge.graph.state", name)
+        for name in ("StageStatus", "RouteDecision", "DataType", "Kingdom")
+    ]
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=allowed)
+    except TypeError:
+        # 旧版本 langgraph 不支持 allowed_msgpack_modules
+        return JsonPlusSerializer()
+
+@contextmanager
+def open_checkpointer(db_path):
+    """打开 SQLite 检查点存储（上下文管理器，退出时关闭连接）"""
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    try:
+        yield SqliteSaver(conn, serde=_checkpoint_serde())
+    finally:
+        conn.close()
+
+def _invoke_graph(compiled_graph, state, run_config, current_stage=None):
+    """执行图并将路由错误转换为 RuntimeError"""
+    import inspect
+    kwargs = {}
+    # 同步写入检查点：保证进程被杀时最近完成的节点已落盘
+    if "durability" in inspect.signature(compiled_graph.invoke).parameters:
+        kwargs["durability"] = "sync"
+    try:
+        final_state = compiled_graph.invoke(state, config=run_config, **kwargs)
+    except KeyError as e:
+        # LangGraph 路由错误
+        import traceback
+        logger.error(f"Graph routing error: {e}")
+        logger.error(f"Current stage: {current_stage}")
+        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        raise RuntimeError(f"Pipeline routing error at stage {current_stage}: {e}")
+    # 流水线提前终止（未进入报告阶段）时，仍等待已提交的后台 LLM 评估落盘
+    if llm_eval.pending_stages(final_state):
+        llm_eval.collect_evaluations(final_state)
+    return final_state
+
 def run_pipeline_sync(
     inputs: dict,
     config: dict,
     workdir: str,
-    pipeline_id: str = None
+    pipeline_id: str = None,
+    checkpoint_db: Optional[str] = None
 ) -> PipelineState:
     """
     同步运行流水线（使用 LangGraph）
+
+    每个节点转换都会写入 SQLite 检查点（默认 <workdir>/checkpoints.sqlite），
+    进程崩溃后可通过 resume_pipeline 从第一个未完成阶段继续。
     """
     from .state import init_pipeline_state
     
     # 初始化状态
     state = init_pipeline_state(inputs, config, workdir, pipeline_id)
-    
-    # 构建并编译 LangGraph
-    compiled_graph = build_pipeline_graph()
+    thread_id = pipeline_id or state.get("pipeline_id", "default")
+    db_path = checkpoint_db or str(Path(workdir) / CHECKPOINT_DB_NAME)
     
     # 配置 LangGraph 执行 (添加必需的 thread_id)
     run_config = {
         "configurable": {
-            "thread_id": pipeline_id or state.get("pipeline_id", "default")
+            "thread_id": thread_id
         }
     }
     
-    # 使用 LangGraph 执行流水线
-    try:
-        final_state = compiled_graph.invoke(state, config=run_config)
-    except KeyError as e:
-        # LangGraph 路由错误
-        import logging
-        import traceback
-        logger = logging.getLogger(__name__)
-        logger.error(f"Graph routing error: {e}")
-        logger.error(f"Current state route: {state.get('route')}")
-        logger.error(f"Current stage: {state.get('current_stage')}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
-        raise RuntimeError(f"Pipeline routing error at stage {state.get('current_stage')}: {e}")
-    
-    return final_state
+    with open_checkpointer(db_path) as saver:
+        compiled_graph = build_pipeline_graph(checkpointer=saver)
+        logger.info(f"Checkpointing pipeline {thread_id} to {db_path}")
+        return _invoke_graph(compiled_graph, state, run_config, state.get("current_stage"))
 
 # === 检查点和持久化 ===
 
 def save_checkpoint(state: PipelineState, checkpoint_path: str):
-    """保存检查点"""
+    """保存检查点（JSON 快照，便于查看状态）"""
     import json
-    from pathlib import Path
     
     checkpoint_file = Path(checkpoint_path)
     checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
@@ -240,7 +325,6 @@ def save_checkpoint(state: PipelineState, checkpoint_path: str):
 def load_checkpoint(checkpoint_path: str) -> PipelineState:
     """加载检查点"""
     import json
-    from pathlib import Path
     
     checkpoint_file = Path(checkpoint_path)
     if not checkpoint_file.exists():
@@ -249,34 +333,95 @@ def load_checkpoint(checkpoint_path: str) -> PipelineState:
     with checkpoint_file.open("r") as f:
         return json.load(f)
 
-def resume_pipeline(checkpoint_path: str) -> PipelineState:
-    """从检查点恢复流水线"""
-    state = load_checkpoint(checkpoint_path)
-    
-    # 确定从哪个阶段恢复
-    current_stage = state["current_stage"]
-    print(f"Resuming pipeline from stage: {current_stage}")
-    
-    # 继续执行（这里需要根据当前阶段调整执行逻辑）
-    graph_config = build_pipeline_graph()
-    nodes = graph_config["nodes"]
-    
-    # 从当前阶段开始执行
-    remaining_stages = []
-    all_stages = ["supervisor", "qc", "assembly", "annotation", "report"]
-    
-    start_index = all_stages.index(current_stage) if current_stage in all_stages else 0
-    remaining_stages = all_stages[start_index:]
-    
-    for node_name in remaining_stages:
-        if state["done"] or state["route"] == "terminate":
-            break
-            
-        print(f"Executing {node_name}...")
-        node_func = nodes[node_name]
-        state = node_func(state)
-        
-        # 保存中间检查点
-        save_checkpoint(state, checkpoint_path)
-    
-    return state
\ No newline at end of file
+def _latest_thread_id(saver) -> Optional[str]:
+    """返回检查点库中最近一次写入的流水线 thread_id"""
+    for checkpoint_tuple in saver.list(None, limit=1):
+        return checkpoint_tuple.config["configurable"]["thread_id"]
+    return None
+
+def _last_completed_stage(state: dict) -> Optional[str]:
+    """按图中顺序返回最后一个已完成的阶段"""
+    completed = set(state.get("completed_stages") or [])
+    for stage in reversed(STAGE_ORDER):
+        if stage in completed:
+            return stage
+    return None
+
+def _reset_failed_stages(state: dict) -> dict:
+    """清除失败标记，使流水线可以从失败阶段重新路由"""
+    from .state import RouteDecision, StageStatus
+    
+    update = {
+        "route": RouteDecision.CONTINUE,
+        "failed_stages": [],
+        "done": False,
+    }
+    stage_info = dict(state.get("stage_info") or {})
+    for stage in state.get("failed_stages") or []:
+        if stage in stage_info:
+            info = dict(stage_info[stage])
+            info["status"] = StageStatus.PENDING
+            stage_info[stage] = info
+    update["stage_info"] = stage_info
+    return update
+
+def resume_pipeline(checkpoint_path: str, pipeline_id: Optional[str] = None) -> PipelineState:
+    """
+    从检查点恢复流水线
+
+    Args:
+        checkpoint_path: SQLite 检查点库、包含 checkpoints.sqlite 的工作目录，
+                         或旧版 JSON 状态快照
+        pipeline_id: 要恢复的流水线 ID（默认取检查点库中最近的一条）
+
+    已完成阶段的输出直接复用；进程在某阶段中途崩溃时从该阶段重新执行，
+    阶段失败导致流水线终止时从失败阶段重新执行。
+    """
+    path = Path(checkpoint_path)
+    legacy_state = None
+    if path.is_dir():
+        path = path / CHECKPOINT_DB_NAME
+    elif path.suffix == ".json":
+        # 旧版 JSON 快照：导入到工作目录下的检查点库后继续
+        legacy_state = load_checkpoint(str(path))
+        pipeline_id = pipeline_id or legacy_state.get("pipeline_id")
+        path = Path(legacy_state.get("workdir") or path.parent) / CHECKPOINT_DB_NAME
+
+    if legacy_state is None and not path.exists():
+        raise FileNotFoundError(f"Checkpoint not found: {checkpoint_path}")
+
+    with open_checkpointer(path) as saver:
+        compiled_graph = build_pipeline_graph(checkpointer=saver)
+        thread_id = pipeline_id or _latest_thread_id(saver)
+        if not thread_id:
+            raise FileNotFoundError(f"No pipeline checkpoints in {path}")
+        run_config = {"configurable": {"thread_id": thread_id}}
+
+        snapshot = compiled_graph.get_state(run_config)
+        values = dict(snapshot.values or {})
+        if legacy_state is not None and not values:
+            values = legacy_state
+            snapshot = None
+
+        if not values:
+            raise FileNotFoundError(f"Pipeline {thread_id} not found in {path}")
+
+        # 进程中途退出：检查点记录了待执行的节点，直接继续
+        if snapshot is not None and snapshot.next:
+            logger.info(f"Resuming pipeline {thread_id} at stage: {', '.join(snapshot.next)}")
+            return _invoke_graph(compiled_graph, None, run_config, snapshot.next[0])
+
+        if values.get("done") and not values.get("failed_stages"):
+            logger.info(f"Pipeline {thread_id} already completed, nothing to resume")
+            return values
+
+        # 流水线因阶段失败而终止：从最后完成的阶段之后重新路由
+        last_stage = _last_completed_stage(values)
+        values.update(_reset_failed_stages(values))
+        if last_stage is None:
+            logger.info(f"Restarting pipeline {thread_id} from the beginning")
+            return _invoke_graph(compiled_graph, values, run_config, "supervisor")
+
+        logger.info(f"Resuming pipeline {thread_id} after completed stage: {last_stage}")
+        compiled_graph.update_state(run_config, values, as_node=last_stage)
+        return _invoke_graph(compiled_graph, None, run_config, last_stage)
@@ -0,0 +1,156 @@
+"""
+后台 LLM 评估
+
+QC/组装/注释阶段的 LLM 评估不参与路由决策，因此不再阻塞流水线：
+节点完成生物信息学工具运行后把评估提交到后台线程池，立即进入下一阶段；
+报告阶段统一收集评估结果，写入 <stage>_ai_analysis.json 并合并到阶段指标。
+
+配置项：
+- async_llm_eval: 是否后台执行 LLM 评估（默认 True，False 时恢复同步评估）
+- llm_eval_workers: 后台线程数（默认 4）
+- llm_eval_timeout: 报告阶段等待单个评估的超时秒数（默认不限）
+"""
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .state import PipelineState
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 各阶段 AI 评估中质量评分所在的键（按优先级）
+QUALITY_KEYS = {
+    "qc": ("quality_assessment", "qc_quality"),
+    "assembly": ("assembly_quality", "assembly_assessment"),
+    "annotation": ("annotation_quality", "annotation_assessment"),
+}
+
+DEFAULT_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+# pipeline_id -> {stage: (future, output_file)}；Future 不可序列化，因此不放入 PipelineState
+_pending: Dict[str, Dict[str, Tuple[Future, str]]] = {}
+_lock = threading.Lock()
+
+
+def is_async(config: Dict[str, Any]) -> bool:
+    """是否后台执行 LLM 评估"""
+    return bool((config or {}).get("async_llm_eval", True))
+
+
+def _get_executor(max_workers: int = DEFAULT_WORKERS) -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-eval")
+        return _executor
+
+
+def make_evaluation(analyze: Callable[[Dict[str, Any]], Dict[str, Any]],
+                    results: Dict[str, Any], review: bool = False) -> Callable[[], Dict[str, Any]]:
+    """
+    构造评估任务：一轮 LLM 评估，review=True（expert 级别）时追加一轮复核；
+    复核轮的输入带上首轮评估（review_of），提示词随之不同，也不会命中首轮的响应缓存
+    """
+    def evaluate() -> Dict[str, Any]:
+        ai = analyze(results) or {}
+        merged = dict(ai) if isinstance(ai, dict) else {"raw": ai}
+        if review:
+            ai2 = analyze({**results, "review_of": dict(merged)}) or {}
+            if isinstance(ai2, dict):
+                merged["review"] = ai2
+        return merged
+    return evaluate
+
+
+def summarize_ai(stage: str, merged_ai: Dict[str, Any]) -> Dict[str, Any]:
+    """提取评分/等级/摘要指标（优先主评估，其次复核结果）"""
+    keys = QUALITY_KEYS.get(stage, ())
+    quality = {}
+    for source in (merged_ai, merged_ai.get("review")):
+        if not isinstance(source, dict):
+            continue
+        for key in keys:
+            if source.get(key):
+                quality = source[key]
+                break
+        if quality:
+            break
+    return {
+        "ai_quality_score": quality.get("overall_score"),
+        "ai_grade": quality.get("grade"),
+        "ai_summary": quality.get("summary"),
+    }
+
+
+def write_analysis(merged_ai: Dict[str, Any], output_file: str) -> None:
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(merged_ai, f, ensure_ascii=False, indent=2)
+
+
+def submit_evaluation(
+    state: PipelineState,
+    stage: str,
+    evaluate: Callable[[], Dict[str, Any]],
+    output_file: str,
+) -> Future:
+    """
+    提交后台评估任务
+
+    Args:
+        state: 流水线状态（用 pipeline_id 归档任务）
+        stage: 阶段名称
+        evaluate: 返回合并后 AI 评估字典的可调用对象
+        output_file: 评估结果 JSON 路径
+    """
+    def job() -> Dict[str, Any]:
+        merged = evaluate()
+        merged = dict(merged) if isinstance(merged, dict) else {"raw": merged}
+        write_analysis(merged, output_file)
+        return merged
+
+    workers = int(state["config"].get("llm_eval_workers", DEFAULT_WORKERS))
+    future = _get_executor(workers).submit(job)
+    with _lock:
+        _pending.setdefault(state["pipeline_id"], {})[stage] = (future, output_file)
+    logger.info(f"🧠 {stage} LLM evaluation submitted to background")
+    return future
+
+
+def pending_stages(state: PipelineState) -> list:
+    """尚未收集的后台评估阶段"""
+    with _lock:
+        return list(_pending.get(state["pipeline_id"], {}))
+
+
+def collect_evaluations(state: PipelineState, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    等待并收集本流水线的后台评估，把 AI 指标与评估文件合并到 stage_outputs
+
+    Returns:
+        stage -> 合并后的 AI 评估；失败或超时的阶段不包含在内
+    """
+    with _lock:
+        jobs = _pending.pop(state["pipeline_id"], {})
+    if timeout is None:
+        timeout = state["config"].get("llm_eval_timeout")
+
+    collected = {}
+    for stage, (future, output_file) in jobs.items():
+        try:
+            merged = future.result(timeout=timeout)
+        except Exception as e:
+            future.cancel()
+            logger.warning(f"{stage} LLM评估失败或超时，已跳过: {e}")
+            continue
+        collected[stage] = merged
+        outputs = state["stage_outputs"].get(stage)
+        if outputs:
+            metrics = summarize_ai(stage, merged)
+            outputs.setdefault("metrics", {}).update({k: v for k, v in metrics.items() if v is not None})
+            outputs.setdefault("files", {})[f"{stage}_ai_analysis"] = output_file
+    if collected:
+        logger.info(f"🧠 Collected background LLM evaluations: {sorted(collected)}")
+    return collected
@@ -6,12 +6,13 @@ import json
 import time
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 from .state import (
     PipelineState, StageOutputs, DataType, Kingdom, RouteDecision,
     start_stage, complete_stage, fail_stage, skip_stage
 )
+from . import llm_eval
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -48,6 +49,10 @@ def supervisor_node(state: PipelineState) -> PipelineState:
         config = state["config"]
         workdir = Path(state["workdir"])
         
+        # 输入完整性校验：损坏的输入在此快速失败，不会进入组装重试循环
+        if config.get("validate_inputs", True):
+            _validate_input_files(state, workdir)
+        
         # 获取kingdom参数，优先从config中获取，然后从inputs中获取
         kingdom = config.get("kingdom", inputs.get("kingdom", "animal"))
         
@@ -87,7 +92,7 @@ def supervisor_node(state: PipelineState) -> PipelineState:
 
         # === 第一步：深度数据分析 ===
         logger.info("Performing comprehensive data analysis...")
-        data_profile = _analyze_input_data_comprehensive(inputs, workdir)
+        data_profile = _analyze_input_data_comprehensive(inputs, workdir, int(config.get("threads", 4)))
         
         # === 第二步：智能策略选择或采用预选方案 ===
         logger.info("Selecting optimal execution strategy...")
@@ -245,12 +250,21 @@ def qc_node(state: PipelineState) -> PipelineState:
             if QCAgent and TaskSpec and state["config"].get("enable_llm_eval", True):
                 detail_level = os.getenv("MITO_DETAIL_LEVEL", "quick").lower()
                 qc_agent = QCAgent(state["config"])
+                # LLM 评估与工具执行分离，由节点决定同步或后台执行
+                qc_agent.defer_llm_analysis = True
                 # 初评（quick/detailed/expert 都会调用一次）
                 base_cfg = {"read_type": "illumina", "detail_level": detail_level, "llm_depth": 1}
                 # 准备 QC inputs，包含 reads2
                 qc_inputs = {"reads": str(inputs["reads"])}
                 if reads2:
                     qc_inputs["reads2"] = str(reads2)
+                # hybrid 模式：长读数据与短读并发 QC
+                if inputs.get("long_reads"):
+                    qc_inputs["long_reads"] = str(inputs["long_reads"])
+                # qc_tool: builtin 使用内置 QC 引擎（快速模式，无需 FastQC/NanoPlot）
+                qc_tool = config.get("qc_tool") or (config.get("tool_chain") or {}).get("qc")
+                if qc_tool:
+                    qc_inputs["qc_tool"] = qc_tool
                 
                 task = TaskSpec(
                     task_id="qc_pipeline",
@@ -270,41 +284,21 @@ def qc_node(state: PipelineState) -> PipelineState:
                     state["route"] = RouteDecision.TERMINATE
                     return state
                 
-                _ai = (_res.outputs or {}).get("ai_analysis", {}) or {}
-                merged_ai = dict(_ai) if isinstance(_ai, dict) else {"raw": _ai}
-                # expert 追加复核一轮（第二次调用），合并结果
-                if detail_level == "expert":
-                    review_cfg = {"read_type": "illumina", "detail_level": "expert", "llm_depth": 2, "review_of": merged_ai}
-                    # 准备 review inputs，也包含 reads2
-                    review_qc_inputs = {"reads": str(inputs["reads"]), "review": True}
-                    if reads2:
-                        review_qc_inputs["reads2"] = str(reads2)
-                    
-                    review_task = TaskSpec(
-                        task_id="qc_pipeline_review",
-                        agent_type="qc",
-                        inputs=review_qc_inputs,
-                        config=review_cfg,
-                        workdir=qc_dir
-                    )
-                    _res2 = qc_agent.execute_task(review_task)
-                    _ai2 = (_res2.outputs or {}).get("ai_analysis", {}) or {}
-                    if isinstance(_ai2, dict):
-                        merged_ai["review"] = _ai2
-                # 提取关键指标（优先用复核结果的评分/等级/摘要）
-                _qa = (merged_ai.get("quality_assessment") or merged_ai.get("qc_quality") or {})
-                # 回退逻辑：如果复核层级未提供标准键，尝试从 review 中取
-                if not _qa and isinstance(merged_ai.get("review"), dict):
-                    _qa = (merged_ai["review"].get("quality_assessment") or merged_ai["review"].get("qc_quality") or {})
-                ai_metrics = {
-                    "ai_quality_score": _qa.get("overall_score"),
-                    "ai_grade": _qa.get("grade"),
-                    "ai_summary": _qa.get("summary")
-                }
-                # 保存评估文件
-                ai_file = str(qc_dir / "qc_ai_analysis.json")
-                with open(ai_file, "w", encoding="utf-8") as f:
-                    json.dump(merged_ai, f, ensure_ascii=False, indent=2)
+                # 一轮评估，expert 追加复核一轮
+                evaluate = llm_eval.make_evaluation(
+                    qc_agent.analyze_qc_results,
+                    (_res.outputs or {}).get("qc_results") or {},
+                    review=(detail_level == "expert")
+                )
+                if llm_eval.is_async(config):
+                    # 评估不影响路由：后台执行，报告阶段收集
+                    llm_eval.submit_evaluation(state, "qc", evaluate, str(qc_dir / "qc_ai_analysis.json"))
+                else:
+                    merged_ai = evaluate()
+                    ai_metrics = llm_eval.summarize_ai("qc", merged_ai)
+                    # 保存评估文件
+                    ai_file = str(qc_dir / "qc_ai_analysis.json")
+                    llm_eval.write_analysis(merged_ai, ai_file)
                     
         except Exception as _e:
             logger.warning(f"QC LLM评估失败，使用模拟结果: {_e}")
@@ -354,6 +348,176 @@ def qc_node(state: PipelineState) -> PipelineState:
         state["route"] = RouteDecision.TERMINATE
         return state
 
+def bait_node(state: PipelineState) -> PipelineState:
+    """
+    k-mer 诱饵节点（qc 与 assembly 之间，由 bait_enabled 决定是否进入）
+    
+    职责：
+    1. 由种子参考（config.bait_reference / inputs.reference / 按界别的种子库）构建 k-mer 集合
+    2. 流式扫描 QC 后的读段，迭代招募线粒体读段
+    3. 写出精简后的读段（双端保持成对），供组装阶段使用
+    
+    诱饵失败或未招募到读段时跳过本阶段，组装使用完整读段。
+    """
+    logger.info("Starting Bait stage")
+    
+    start_stage(state, "bait")
+    
+    try:
+        config = state["config"]
+        workdir = Path(state["workdir"])
+        
+        seeds = _bait_seed_path(state)
+        if seeds is None:
+            logger.warning("No bait seed reference found (set bait_reference or MITO_FORGE_SEED_DIR), "
+                           "assembling all reads")
+            skip_stage(state, "bait", "no_seed_reference")
+            state["route"] = RouteDecision.CONTINUE
+            return state
+        
+        reads_file, reads2_file = _pre_assembly_reads(state)
+        
+        bait_dir = workdir / "01_bait"
+        from ..io.bait import bait_reads, DEFAULT_K, DEFAULT_MIN_HITS, DEFAULT_MAX_ROUNDS
+        bait_results = bait_reads(
+            reads_file,
+            seeds,
+            bait_dir,
+            reads2=reads2_file,
+            k=int(config.get("bait_k", DEFAULT_K)),
+            min_hits=int(config.get("bait_min_hits", DEFAULT_MIN_HITS)),
+            max_rounds=int(config.get("bait_rounds", DEFAULT_MAX_ROUNDS)),
+            threads=config.get("threads", 4)
+        )
+        
+        if not bait_results["recruited_reads"]:
+            logger.warning("Baiting recruited no reads, assembling all reads")
+            skip_stage(state, "bait", "no_reads_recruited")
+            state["route"] = RouteDecision.CONTINUE
+            return state
+        
+        files_dict = {"baited_reads": bait_results["reads"]}
+        if bait_results["reads2"]:
+            files_dict["baited_reads2"] = bait_results["reads2"]
+        
+        outputs = StageOutputs(
+            files=files_dict,
+            metrics={
+                "total_reads": bait_results["total_reads"],
+                "baited_reads": bait_results["recruited_reads"],
+                "baited_bases": bait_results["recruited_bases"],
+                "kept_fraction": bait_results["kept_fraction"],
+                "rounds": bait_results["rounds"],
+                "bait_kmers": bait_results["bait_kmers"]
+            },
+            metadata={
+                "tool": "kmer_bait",
+                "seed_reference": str(seeds),
+                "k": bait_results["k"],
+                "min_hits": bait_results["min_hits"],
+                "elapsed_seconds": bait_results["elapsed_seconds"]
+            }
+        )
+        
+        complete_stage(state, "bait", outputs)
+        state["current_stage"] = "assembly"
+        state["route"] = RouteDecision.CONTINUE
+        
+        logger.info(f"Bait kept {bait_results['kept_fraction']:.2%} of reads")
+        
+        return state
+        
+    except Exception as e:
+        logger.error(f"Baiting failed: {e}")
+        fail_stage(state, "bait", str(e))
+        # 诱饵失败不致命，组装使用完整读段
+        state["route"] = RouteDecision.CONTINUE
+        return state
+
+def downsample_node(state: PipelineState) -> PipelineState:
+    """
+    覆盖度降采样节点（组装前，由 downsample_enabled 决定是否进入）
+    
+    职责：
+    1. 估算线粒体覆盖度（诱饵阶段的招募碱基数优先，否则按线粒体读段比例折算全库覆盖度）
+    2. 按读段 ID 哈希确定性地降采样到目标覆盖度（downsample_coverage，默认 200×），双端同步
+    3. 写出 BGZF 压缩的读段，采样比例记录在阶段指标中
+    
+    覆盖度已低于目标或无法估算时跳过本阶段。
+    """
+    logger.info("Starting Downsample stage")
+    
+    start_stage(state, "downsample")
+    
+    try:
+        config = state["config"]
+        workdir = Path(state["workdir"])
+        reads_file, reads2_file = _pre_assembly_reads(state)
+        
+        from ..io.downsample import downsample_reads, sampling_fraction, DEFAULT_SEED, DEFAULT_TARGET_COVERAGE
+        target = float(config.get("downsample_coverage") or DEFAULT_TARGET_COVERAGE)
+        coverage = _estimate_mito_coverage(state)
+        fraction = config.get("downsample_fraction")
+        if fraction is None:
+            if coverage is None:
+                logger.warning("Mito coverage unknown, skipping downsampling")
+                skip_stage(state, "downsample", "coverage_unknown")
+                state["route"] = RouteDecision.CONTINUE
+                return state
+            fraction = sampling_fraction(coverage, target)
+        fraction = float(fraction)
+        if fraction >= 1:
+            logger.info(f"Estimated coverage {coverage or 0:.0f}x within target {target:.0f}x, skipping downsampling")
+            skip_stage(state, "downsample", "coverage_below_target")
+            state["route"] = RouteDecision.CONTINUE
+            return state
+        
+        downsample_dir = workdir / "01_downsample"
+        results = downsample_reads(
+            reads_file,
+            downsample_dir,
+            fraction,
+            reads2=reads2_file,
+            seed=int(config.get("downsample_seed", DEFAULT_SEED)),
+            threads=config.get("threads", 4)
+        )
+        
+        files_dict = {"downsampled_reads": results["reads"]}
+        if results["reads2"]:
+            files_dict["downsampled_reads2"] = results["reads2"]
+        
+        outputs = StageOutputs(
+            files=files_dict,
+            metrics={
+                "sampling_fraction": results["sampling_fraction"],
+                "kept_fraction": results["kept_fraction"],
+                "total_reads": results["total_reads"],
+                "kept_reads": results["kept_reads"],
+                "estimated_coverage": round(coverage, 1) if coverage is not None else None,
+                "target_coverage": target
+            },
+            metadata={
+                "tool": "hash_downsample",
+                "seed": results["seed"],
+                "elapsed_seconds": results["elapsed_seconds"]
+            }
+        )
+        
+        complete_stage(state, "downsample", outputs)
+        state["current_stage"] = "assembly"
+        state["route"] = RouteDecision.CONTINUE
+        
+        logger.info(f"Downsampling kept {results['kept_fraction']:.2%} of reads")
+        
+        return state
+        
+    except Exception as e:
+        logger.error(f"Downsampling failed: {e}")
+        fail_stage(state, "downsample", str(e))
+        # 降采样失败不致命，组装使用完整读段
+        state["route"] = RouteDecision.CONTINUE
+        return state
+
 def assembly_node(state: PipelineState) -> PipelineState:
     """
     组装节点
@@ -386,6 +550,15 @@ def assembly_node(state: PipelineState) -> PipelineState:
             reads_file = state["inputs"]["reads"]
             reads2_file = state["inputs"].get("reads2")
         
+        # 降采样 / 诱饵阶段的输出优先
+        for stage, key in (("downsample", "downsampled_reads"), ("bait", "baited_reads")):
+            stage_files = state["stage_outputs"].get(stage, {}).get("files", {})
+            if stage_files.get(key) and Path(stage_files[key]).exists():
+                reads_file = stage_files[key]
+                reads2_file = stage_files.get(f"{key}2")
+                logger.info(f"Assembling {stage} reads: {reads_file}")
+                break
+        
         # 创建组装工作目录
         assembly_dir = workdir / "02_assembly"
         assembly_dir.mkdir(parents=True, exist_ok=True)
@@ -405,6 +578,7 @@ def assembly_node(state: PipelineState) -> PipelineState:
             if AssemblyAgent and TaskSpec and state["config"].get("enable_llm_eval", True):
                 detail_level = os.getenv("MITO_DETAIL_LEVEL", "quick").lower()
                 asm_agent = AssemblyAgent(state["config"])
+                asm_agent.defer_llm_analysis = True
                 detected_rt = state["config"].get("detected_read_type", "illumina")
                 # 初评一次（所有分级都会执行）
                 base_cfg = {"assembler": assembler, "detail_level": detail_level, "llm_depth": 1}
@@ -442,55 +616,33 @@ def assembly_node(state: PipelineState) -> PipelineState:
                 # 兼容两种key: assembly_file (新) 和 assembly (旧PMAT返回)
                 mito_file = agent_outputs.get("assembly_file") or assembly_results.get("assembly")
                 
-                # 如果Agent返回了线粒体文件,设置mito_candidates
+                # 如果Agent返回了线粒体文件,设置mito_candidates（序列数来自 FASTA 索引，环化由组装图判断）
                 if mito_file and Path(mito_file).exists():
-                    mito_candidates = {
-                        "fasta": str(mito_file),
-                        "count": 1,  # TODO: 从assembly_results解析
-                        "is_circular": assembly_results.get("is_circular", False)
-                    }
+                    mito_candidates = _describe_mito_candidates(
+                        str(mito_file),
+                        assembly_results,
+                        _find_assembly_graph(Path(mito_file).parent, assembly_dir),
+                        config.get("kingdom", "animal"),
+                        config.get("reference_sketches")
+                    )
                     # 同时更新assembly_results以便后续metrics使用
                     if not assembly_results.get("contigs"):
                         assembly_results["contigs"] = str(mito_file)
                 
-                _ai = agent_outputs.get("ai_analysis", {}) or {}
-                merged_ai = dict(_ai) if isinstance(_ai, dict) else {"raw": _ai}
-                # expert 追加一轮复核
-                if detail_level == "expert":
-                    review_cfg = {"assembler": assembler, "detail_level": "expert", "llm_depth": 2, "review_of": merged_ai}
-                    # 准备 review inputs，也包含 reads2
-                    review_inputs = {
-                        "reads": str(reads_file),
-                        "read_type": detected_rt,
-                        "kingdom": state["config"].get("kingdom", "animal"),
-                        "assembler": assembler,
-                        "review": True
-                    }
-                    if reads2_file:
-                        review_inputs["reads2"] = str(reads2_file)
-                    
-                    review_task = TaskSpec(
-                        task_id="assembly_pipeline_review",
-                        agent_type="assembly",
-                        inputs=review_inputs,
-                        config=review_cfg,
-                        workdir=assembly_dir
-                    )
-                    _res2 = asm_agent.execute_task(review_task)
-                    _ai2 = (_res2.outputs or {}).get("ai_analysis", {}) or {}
-                    if isinstance(_ai2, dict):
-                        merged_ai["review"] = _ai2
-                _aq = (merged_ai.get("assembly_quality") or merged_ai.get("assembly_assessment") or {})
-                if not _aq and isinstance(merged_ai.get("review"), dict):
-                    _aq = (merged_ai["review"].get("assembly_quality") or merged_ai["review"].get("assembly_assessment") or {})
-                asm_ai_metrics = {
-                    "ai_quality_score": _aq.get("overall_score"),
-                    "ai_grade": _aq.get("grade"),
-                    "ai_summary": _aq.get("summary")
-                }
-                asm_ai_file = str(assembly_dir / "assembly_ai_analysis.json")
-                with open(asm_ai_file, "w", encoding="utf-8") as f:
-                    json.dump(merged_ai, f, ensure_ascii=False, indent=2)
+                # 一轮评估，expert 追加一轮复核
+                evaluate = llm_eval.make_evaluation(
+                    asm_agent.analyze_assembly_results,
+                    dict(assembly_results),
+                    review=(detail_level == "expert")
+                )
+                if llm_eval.is_async(config):
+                    # 评估不影响路由：后台执行，报告阶段收集
+                    llm_eval.submit_evaluation(state, "assembly", evaluate, str(assembly_dir / "assembly_ai_analysis.json"))
+                else:
+                    merged_ai = evaluate()
+                    asm_ai_metrics = llm_eval.summarize_ai("assembly", merged_ai)
+                    asm_ai_file = str(assembly_dir / "assembly_ai_analysis.json")
+                    llm_eval.write_analysis(merged_ai, asm_ai_file)
                     
         except Exception as _e:
             logger.warning(f"Assembly Agent执行失败，使用模拟结果: {_e}")
@@ -503,7 +655,8 @@ def assembly_node(state: PipelineState) -> PipelineState:
             # 线粒体序列筛选(模拟)
             mito_candidates = _select_mitochondrial_contigs(
                 assembly_results["contigs"],
-                config.get("kingdom", "animal")
+                config.get("kingdom", "animal"),
+                sketch_db=config.get("reference_sketches")
             )
         
         # 准备输出
@@ -515,13 +668,32 @@ def assembly_node(state: PipelineState) -> PipelineState:
         if asm_ai_file:
             files_dict["assembly_ai_analysis"] = asm_ai_file
         
+        mito_graph = mito_candidates.get("graph") or {}
+        circularity = mito_candidates.get("circularity") or {}
         metrics_dict = {
             "n50": assembly_results.get("n50", 0),
             "total_contigs": assembly_results.get("num_contigs", assembly_results.get("total_contigs", 0)),
             "mito_candidates_count": mito_candidates.get("count", 0),
             "largest_contig": assembly_results.get("largest_contig", assembly_results.get("max_length", 0)),
-            "is_circular": mito_candidates.get("is_circular", False)
+            "is_circular": mito_candidates.get("is_circular", False),
+            "circular_contigs": sum(1 for r in circularity.values() if r["is_circular"]),
+            "terminal_overlap": max((r["overlap"] for r in circularity.values()), default=0)
         }
+        closest = mito_candidates.get("closest_reference")
+        if closest:
+            metrics_dict.update({
+                "closest_reference": closest["reference"],
+                "closest_reference_ani": closest["ani"],
+                "closest_reference_containment": closest["containment"],
+            })
+        if mito_graph.get("components"):
+            best = mito_graph["components"][0]
+            metrics_dict.update({
+                "mito_graph_segments": best["n_segments"],
+                "mito_graph_length": best["length"],
+                "mito_graph_coverage": best["coverage"],
+                "mito_graph_circular": best["is_circular"],
+            })
         metrics_dict.update({k: v for k, v in asm_ai_metrics.items() if v is not None})
         
         outputs = StageOutputs(
@@ -529,7 +701,12 @@ def assembly_node(state: PipelineState) -> PipelineState:
             metrics=metrics_dict,
             metadata={
                 "tool": assembler,
-                "version": assembly_results.get("version", "unknown")
+                "assembly_graph": mito_graph.get("file"),
+                "version": assembly_results.get("version", "unknown"),
+                "mito_contigs": mito_candidates.get("names", []),
+                "circularity": circularity,
+                "closest_reference": closest,
+                "reference_matches": mito_candidates.get("references", {})
             }
         )
         
@@ -583,6 +760,7 @@ def annotation_node(state: PipelineState) -> PipelineState:
             if AnnotationAgent and TaskSpec and state["config"].get("enable_llm_eval", True):
                 detail_level = os.getenv("MITO_DETAIL_LEVEL", "quick").lower()
                 ann_agent = AnnotationAgent(state["config"])
+                ann_agent.defer_llm_analysis = True
                 base_cfg = {"annotator": "mitos", "detail_level": detail_level, "llm_depth": 1}
                 task = TaskSpec(
                     task_id="annotation_pipeline",
@@ -602,33 +780,20 @@ def annotation_node(state: PipelineState) -> PipelineState:
                     state["route"] = RouteDecision.TERMINATE
                     return state
                 
-                _ai = (_res.outputs or {}).get("ai_analysis", {}) or {}
-                merged_ai = dict(_ai) if isinstance(_ai, dict) else {"raw": _ai}
-                # expert 再进行一轮复核
-                if detail_level == "expert":
-                    review_cfg = {"annotator": "mitos", "detail_level": "expert", "llm_depth": 2, "review_of": merged_ai}
-                    review_task = TaskSpec(
-                        task_id="annotation_pipeline_review",
-                        agent_type="annotation",
-                        inputs={"assembly": str(mito_fasta), "kingdom": state["config"].get("kingdom", "animal"), "genetic_code": config.get("genetic_code", 2), "interactive": config.get("interactive", False), "review": True},
-                        config=review_cfg,
-                        workdir=annotation_dir
-                    )
-                    _res2 = ann_agent.execute_task(review_task)
-                    _ai2 = (_res2.outputs or {}).get("ai_analysis", {}) or {}
-                    if isinstance(_ai2, dict):
-                        merged_ai["review"] = _ai2
-                _aq = (merged_ai.get("annotation_quality") or merged_ai.get("annotation_assessment") or {})
-                if not _aq and isinstance(merged_ai.get("review"), dict):
-                    _aq = (merged_ai["review"].get("annotation_quality") or merged_ai["review"].get("annotation_assessment") or {})
-                ann_ai_metrics = {
-                    "ai_quality_score": _aq.get("overall_score"),
-                    "ai_grade": _aq.get("grade"),
-                    "ai_summary": _aq.get("summary")
-                }
-                ann_ai_file = str(annotation_dir / "annotation_ai_analysis.json")
-                with open(ann_ai_file, "w", encoding="utf-8") as f:
-                    json.dump(merged_ai, f, ensure_ascii=False, indent=2)
+                # 一轮评估，expert 再进行一轮复核
+                evaluate = llm_eval.make_evaluation(
+                    ann_agent.analyze_annotation_results,
+                    (_res.outputs or {}).get("annotation_results") or {},
+                    review=(detail_level == "expert")
+                )
+                if llm_eval.is_async(config):
+                    # 评估不影响路由：后台执行，报告阶段收集
+                    llm_eval.submit_evaluation(state, "annotation", evaluate, str(annotation_dir / "annotation_ai_analysis.json"))
+                else:
+                    merged_ai = evaluate()
+                    ann_ai_metrics = llm_eval.summarize_ai("annotation", merged_ai)
+                    ann_ai_file = str(annotation_dir / "annotation_ai_analysis.json")
+                    llm_eval.write_analysis(merged_ai, ann_ai_file)
                     
         except Exception as _e:
             logger.warning(f"Annotation LLM评估失败，使用模拟结果: {_e}")
@@ -742,7 +907,9 @@ def polish_node(state: PipelineState) -> PipelineState:
             output_dir=polish_dir,
             tool=polishing_tool,
             read_type=read_type,
-            threads=config.get("threads", 4)
+            threads=config.get("threads", 4),
+            contigs=assembly_outputs.get("metadata", {}).get("mito_contigs"),
+            circularity=assembly_outputs.get("metadata", {}).get("circularity")
         )
         
         # 标记完成
@@ -755,7 +922,7 @@ def polish_node(state: PipelineState) -> PipelineState:
             "tool": polishing_tool,
             "iterations": polish_results.get("iterations", 1),
             "improvement": _calculate_improvement(
-                assembly_file, 
+                polish_results.get("input_assembly", assembly_file),
                 polish_results["polished_file"]
             )
         }
@@ -798,6 +965,9 @@ def report_node(state: PipelineState) -> PipelineState:
         report_dir = workdir / "report"
         report_dir.mkdir(parents=True, exist_ok=True)
         
+        # 收集后台 LLM 评估（报告需要 AI 分析文件与指标）
+        llm_eval.collect_evaluations(state)
+        
         # 生成报告
         report_results = _generate_report(state, report_dir)
         
@@ -818,7 +988,37 @@ def report_node(state: PipelineState) -> PipelineState:
 
 # === Supervisor Agent 核心分析函数 ===
 
-def _analyze_input_data_comprehensive(inputs: Dict[str, Any], workdir: Path) -> Dict[str, Any]:
+def _validate_input_files(state: PipelineState, workdir: Path) -> None:
+    """
+    流式校验已存在的输入文件（压缩完整性、记录结构、碱基/质量字符、双端同步）
+    
+    报告写入 input_validation.json；发现错误时抛出 ReadFormatError（含文件、行号与记录号）。
+    """
+    from ..io.validate import validate_inputs
+    from ..io.reads import ReadFormatError
+    inputs = state["inputs"]
+    paths = {key: inputs.get(key) for key in ("reads", "reads2", "long_reads")}
+    if not paths["reads"] or not all(Path(p).is_file() for p in paths.values() if p):
+        # 缺失文件由后续阶段按原有逻辑处理
+        logger.warning("Some input files are missing, skipping input validation")
+        return
+    report = validate_inputs(
+        paths["reads"], paths["reads2"], paths["long_reads"],
+        threads=int(state["config"].get("threads", 4))
+    )
+    try:
+        workdir.mkdir(parents=True, exist_ok=True)
+        with open(workdir / "input_validation.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    except OSError as e:
+        logger.warning(f"Failed to write input validation report: {e}")
+    for warning in report["warnings"]:
+        state.setdefault("warnings", []).append(f"{warning['location']}: {warning['message']}")
+    if not report["valid"]:
+        error = report["errors"][0]
+        raise ReadFormatError(f"Invalid input {error['location']}: {error['message']}")
+
+def _analyze_input_data_comprehensive(inputs: Dict[str, Any], workdir: Path, threads: int = 1) -> Dict[str, Any]:
     """
     深度分析输入数据特征
     
@@ -833,6 +1033,9 @@ def _analyze_input_data_comprehensive(inputs: Dict[str, Any], workdir: Path) ->
     # 基础文件信息
     file_info = _get_file_info(reads_path)
     
+    # 抽样画像（读长/质量/GC/平台推断），文件不可读时为 None
+    read_profile = _profile_reads(reads_path)
+    
     # 读长类型检测
     read_type = _detect_read_type_advanced(reads_path)
     
@@ -840,7 +1043,7 @@ def _analyze_input_data_comprehensive(inputs: Dict[str, Any], workdir: Path) ->
     quality_metrics = _quick_quality_assessment(reads_path)
     
     # 数据量分析
-    data_stats = _analyze_data_statistics(reads_path, read_type)
+    data_stats = _analyze_data_statistics(reads_path, read_type, inputs.get("reads2"), threads)
     
     # 复杂度评分
     complexity_score = _calculate_data_complexity(quality_metrics, data_stats, read_type)
@@ -853,7 +1056,9 @@ def _analyze_input_data_comprehensive(inputs: Dict[str, Any], workdir: Path) ->
         "complexity_score": complexity_score,
         "estimated_genome_size": data_stats["estimated_genome_size"],
         "estimated_coverage": data_stats["estimated_coverage"],
+        "total_bases": data_stats["total_bases"],
         "quality_score": quality_metrics["overall_quality"],
+        "read_profile": read_profile,
         "analysis_timestamp": time.time()
     }
 
@@ -862,10 +1067,18 @@ def _detect_read_type_advanced(reads_path: str) -> DataType:
     高级读长类型检测
     
     检测方法：
-    1. 文件名模式匹配
-    2. 读长分布分析
-    3. 质量分数分布
+    1. 抽样读 ID 格式（Illumina/ONT/PacBio 命名规则）
+    2. 读长分布与质量分数分布
+    3. 文件无法读取时退回文件名模式匹配
     """
+    profile = _profile_reads(reads_path)
+    if profile and profile["sampled_reads"]:
+        logger.info(
+            f"Detected read type {profile['read_type']} "
+            f"(confidence {profile['read_type_confidence']}, {profile['read_type_evidence']})"
+        )
+        return DataType(profile["read_type"])
+    
     reads_path_lower = reads_path.lower()
     
     # 文件名模式检测
@@ -878,21 +1091,7 @@ def _detect_read_type_advanced(reads_path: str) -> DataType:
     elif any(pattern in reads_path_lower for pattern in ["illumina", "hiseq", "novaseq", "miseq"]):
         return DataType.ILLUMINA
     
-    # 如果文件名无法确定，进行内容分析
-    try:
-        read_lengths = _sample_read_lengths(reads_path, sample_size=1000)
-        avg_length = sum(read_lengths) / len(read_lengths) if read_lengths else 0
-        
-        if avg_length > 5000:  # 长读长
-            return DataType.NANOPORE  # 默认为 Nanopore
-        elif avg_length > 1000:  # 中等读长
-            return DataType.PACBIO_HIFI
-        else:  # 短读长
-            return DataType.ILLUMINA
-            
-    except Exception as e:
-        logger.warning(f"Could not analyze read lengths: {e}")
-        return DataType.ILLUMINA  # 默认值
+    return DataType.ILLUMINA  # 默认值
 
 def _select_optimal_strategy(data_profile: Dict[str, Any], kingdom: Kingdom) -> Dict[str, Any]:
     """
@@ -1077,7 +1276,7 @@ def _estimate_resource_requirements(data_profile: Dict[str, Any], strategy: Dict
         }
     }
     
-    base_req = base_requirements[read_type]
+    base_req = base_requirements.get(read_type, base_requirements[DataType.NANOPORE])
     
     # 计算各阶段资源需求
     stage_requirements = {
@@ -1091,6 +1290,11 @@ def _estimate_resource_requirements(data_profile: Dict[str, Any], strategy: Dict
             "time_minutes": max(30, file_size_gb * base_req["time_per_gb"]),
             "cpu_cores": base_req["cpu_cores"]
         },
+        "polish": {
+            "memory_gb": max(4, file_size_gb * 2),
+            "time_minutes": max(10, file_size_gb * 5),
+            "cpu_cores": max(4, base_req["cpu_cores"] // 2)
+        },
         "annotation": {
             "memory_gb": max(4, file_size_gb * 1),
             "time_minutes": max(10, coverage * 0.5),
@@ -1274,38 +1478,88 @@ def _get_file_info(file_path: str) -> Dict[str, Any]:
             "error": str(e)
         }
 
+def _profile_reads(file_path: str) -> Optional[Dict[str, Any]]:
+    """抽样画像（按文件指纹缓存）；文件不存在或无法解析时返回 None"""
+    if not file_path or not os.path.isfile(file_path):
+        return None
+    try:
+        from ..io.profile import cached_profile
+        return cached_profile(file_path)
+    except Exception as e:
+        logger.warning(f"Could not profile reads {file_path}: {e}")
+        return None
+
 def _sample_read_lengths(file_path: str, sample_size: int = 1000) -> List[int]:
-    """采样读长分布"""
-    lengths = []
+    """从整个文件中蓄水池抽样读长"""
     try:
-        # 简化实现，实际会解析 FASTQ/FASTA 文件
-        # 这里返回模拟数据
-        if "nanopore" in file_path.lower():
-            lengths = [8000 + i * 100 for i in range(sample_size)]
-        elif "pacbio" in file_path.lower():
-            lengths = [15000 + i * 50 for i in range(sample_size)]
-        else:
-            lengths = [150 + i for i in range(sample_size)]
+        from ..io.profile import sample_reads
+        batch, _ = sample_reads(file_path, sample_size=sample_size)
+        return batch.lengths.tolist()
     except Exception as e:
         logger.warning(f"Could not sample read lengths: {e}")
-    
-    return lengths[:sample_size]
+        return []
 
 def _quick_quality_assessment(file_path: str) -> Dict[str, Any]:
-    """快速质量评估"""
-    # 简化实现，实际会运行 FastQC 或类似工具
+    """快速质量评估（基于抽样画像；文件不可读时返回中性默认值）"""
+    profile = _profile_reads(file_path)
+    if not profile or not profile["sampled_reads"]:
+        return {
+            "overall_quality": 0.85,
+            "avg_phred_score": 28,
+            "gc_content": 0.42,
+            "n_content": 0.01,
+            "sequence_length_distribution": "unknown",
+            "adapter_contamination": 0.02,
+            "source": "default"
+        }
+    
+    length = profile["length"]
+    spread = (length["p90"] - length["p10"]) / max(length["median"], 1)
     return {
-        "overall_quality": 0.85,  # 模拟质量分数
-        "avg_phred_score": 28,
-        "gc_content": 0.42,
-        "n_content": 0.01,
-        "sequence_length_distribution": "normal",
-        "adapter_contamination": 0.02
+        "overall_quality": profile["overall_quality"],
+        "avg_phred_score": profile["mean_phred"],
+        "avg_phred_ci95": profile["mean_phred_ci95"],
+        "gc_content": profile["gc_content"],
+        "gc_content_ci95": profile["gc_content_ci95"],
+        "n_content": profile["n_content"],
+        "sequence_length_distribution": "uniform" if spread < 0.1 else "variable",
+        "adapter_contamination": profile["adapter_fraction"],
+        "sampled_reads": profile["sampled_reads"],
+        "source": f"sampled:{profile['sampling_mode']}"
     }
 
-def _analyze_data_statistics(file_path: str, read_type: DataType) -> Dict[str, Any]:
-    """分析数据统计信息"""
+def _count_reads(file_path: str, threads: int = 1) -> Optional[Dict[str, Any]]:
+    """精确读数/碱基数（按文件指纹缓存，输入校验与内置 QC 的扫描结果直接复用）；不可读时返回 None"""
+    if not file_path or not os.path.isfile(file_path):
+        return None
+    try:
+        from ..io.count import cached_count
+        return cached_count(file_path, threads=threads)
+    except Exception as e:
+        logger.warning(f"Could not count reads in {file_path}: {e}")
+        return None
+
+def _analyze_data_statistics(file_path: str, read_type: DataType, file_path2: Optional[str] = None,
+                             threads: int = 1) -> Dict[str, Any]:
+    """分析数据统计信息（读数与碱基数为精确计数，文件不可读时按文件大小估算）"""
     file_info = _get_file_info(file_path)
+    # 线粒体基因组大小估算（动物：16kb，植物：200kb）
+    mito_genome_size = 16000  # 默认动物
+    
+    counts = [_count_reads(path, threads) for path in (file_path, file_path2) if path]
+    if counts and all(counts):
+        total_reads = sum(c["reads"] for c in counts)
+        total_bases = sum(c["bases"] for c in counts)
+        return {
+            "estimated_reads": total_reads,
+            "total_reads": total_reads,
+            "avg_read_length": total_bases / total_reads if total_reads else 0,
+            "total_bases": total_bases,
+            "estimated_genome_size": mito_genome_size,
+            "estimated_coverage": total_bases / mito_genome_size,
+            "data_density": file_info["size_gb"] / max(1, total_reads / 1000000),
+            "source": "exact"
+        }
     
     # 根据读长类型估算
     if read_type == DataType.NANOPORE:
@@ -1320,9 +1574,6 @@ def _analyze_data_statistics(file_path: str, read_type: DataType) -> Dict[str, A
     
     estimated_reads = int(file_info["size_gb"] * reads_per_gb)
     total_bases = estimated_reads * avg_read_length
-    
-    # 线粒体基因组大小估算（动物：16kb，植物：200kb）
-    mito_genome_size = 16000  # 默认动物
     estimated_coverage = total_bases / mito_genome_size
     
     return {
@@ -1331,7 +1582,8 @@ def _analyze_data_statistics(file_path: str, read_type: DataType) -> Dict[str, A
         "total_bases": total_bases,
         "estimated_genome_size": mito_genome_size,
         "estimated_coverage": estimated_coverage,
-        "data_density": file_info["size_gb"] / max(1, estimated_reads / 1000000)
+        "data_density": file_info["size_gb"] / max(1, estimated_reads / 1000000),
+        "source": "size_estimate"
     }
 
 def _calculate_data_complexity(quality_metrics: Dict[str, Any], data_stats: Dict[str, Any], read_type: DataType) -> float:
@@ -1409,6 +1661,72 @@ def _run_qc_analysis(inputs: Dict[str, Any], qc_dir: Path, config: Dict[str, Any
         "clean_reads": str(qc_dir / "clean_reads.fastq")
     }
 
+def _pre_assembly_reads(state: PipelineState) -> Tuple[str, Optional[str]]:
+    """组装前阶段的输入读段：诱饵输出 > QC 清洗后读段 > 原始读段"""
+    inputs = state["inputs"]
+    stage_outputs = state["stage_outputs"]
+    for stage, key in (("bait", "baited_reads"), ("qc", "clean_reads")):
+        files = stage_outputs.get(stage, {}).get("files", {})
+        if files.get(key) and Path(files[key]).exists():
+            return files[key], files.get(f"{key}2", inputs.get("reads2") if stage == "qc" else None)
+    return inputs["reads"], inputs.get("reads2")
+
+# 各界别线粒体基因组的典型长度 (bp)，用于未设置 target_length 时的覆盖度估算
+TYPICAL_MITO_LENGTHS = {"animal": 16_000, "fungi": 50_000, "plant": 200_000}
+
+def _estimate_mito_coverage(state: PipelineState) -> Optional[float]:
+    """
+    线粒体覆盖度：诱饵招募碱基数 / 目标长度（未设置 target_length 时按界别取典型长度）
+
+    没有诱饵计数时，用 supervisor 统计的全库碱基数按 mito_read_fraction
+    （线粒体读段占比，默认 0.01）折算，否则会高估数十倍。
+    """
+    config = state["config"]
+    genome_size = config.get("target_length") or TYPICAL_MITO_LENGTHS.get(
+        config.get("kingdom", "animal"), TYPICAL_MITO_LENGTHS["animal"])
+    bait_metrics = state["stage_outputs"].get("bait", {}).get("metrics", {})
+    if bait_metrics.get("baited_bases"):
+        return bait_metrics["baited_bases"] / float(genome_size)
+    profile = config.get("data_profile") or {}
+    total_bases = profile.get("total_bases")
+    if not total_bases and profile.get("estimated_coverage"):
+        # 旧版画像只有 estimated_coverage（全库碱基数 / estimated_genome_size）
+        total_bases = float(profile["estimated_coverage"]) * float(profile.get("estimated_genome_size") or 16000)
+    if not total_bases:
+        return None
+    return float(total_bases) * float(config.get("mito_read_fraction", 0.01)) / float(genome_size)
+
+def downsample_enabled(state: PipelineState) -> bool:
+    """设置了 downsample_coverage 或 downsample_fraction 的短读长数据才降采样"""
+    config = state.get("config") or {}
+    if not (config.get("downsample_coverage") or config.get("downsample_fraction")):
+        return False
+    return str(config.get("detected_read_type", "illumina")).lower() == "illumina"
+
+def _bait_seed_path(state: PipelineState) -> Optional[Path]:
+    """诱饵种子参考：config.bait_reference > inputs.reference > 按界别的种子库"""
+    from ..io.bait import resolve_seed_panel
+    config = state.get("config") or {}
+    reference = config.get("bait_reference") or (state.get("inputs") or {}).get("reference")
+    return resolve_seed_panel(config.get("kingdom", "animal"), reference)
+
+def bait_enabled(state: PipelineState) -> bool:
+    """
+    是否在组装前运行 k-mer 诱饵阶段
+    
+    config.bait_reads: True / False / "auto"（默认）。
+    只对短读长生效；auto 模式下找到种子参考时才启用。
+    """
+    config = state.get("config") or {}
+    mode = str(config.get("bait_reads", "auto")).lower()
+    if mode in ("false", "0", "no", "off", "none"):
+        return False
+    if str(config.get("detected_read_type", "illumina")).lower() != "illumina":
+        return False
+    if mode == "auto":
+        return _bait_seed_path(state) is not None
+    return True
+
 def _run_assembly(reads_file: str, assembly_dir: Path, assembler: str, config: Dict[str, Any]) -> Dict[str, Any]:
     """执行基因组组装（模拟）"""
     # 实际实现会调用 Flye/SPAdes 等工具
@@ -1423,16 +1741,165 @@ def _run_assembly(reads_file: str, assembly_dir: Path, assembler: str, config: D
         "version": "2.9.1"
     }
 
-def _select_mitochondrial_contigs(contigs_file: str, kingdom: str) -> Dict[str, Any]:
-    """筛选线粒体序列（模拟）"""
-    # 实际实现会基于长度、覆盖度或 BLAST 筛选
-    mito_file = Path(contigs_file).parent / "mitochondrial_candidates.fasta"
-    mito_file.write_text(">mito_candidate_1\nATCGATCGATCG...\n")
+# 各界别线粒体基因组的典型长度范围 (bp)
+MITO_LENGTH_RANGES = {
+    "animal": (10_000, 30_000),
+    "fungi": (12_000, 250_000),
+    "plant": (100_000, 4_000_000),
+}
+MAX_MITO_CANDIDATES = 5
+
+# 组装图文件（按优先级）
+ASSEMBLY_GRAPH_PATTERNS = ["assembly_graph_with_scaffolds.gfa", "assembly_graph.gfa", "assembly_graph.fastg",
+                           "*.gfa", "*.fastg"]
+
+def _find_assembly_graph(*directories: Path) -> Optional[str]:
+    """在组装输出目录（含子目录）中查找 FASTG/GFA 组装图"""
+    for pattern in ASSEMBLY_GRAPH_PATTERNS:
+        for directory in directories:
+            if directory and Path(directory).is_dir():
+                match = next(iter(sorted(Path(directory).rglob(pattern))), None)
+                if match:
+                    return str(match)
+    return None
+
+def _analyze_assembly_graph(graph_file: Optional[str], kingdom: str) -> Optional[Dict[str, Any]]:
+    """加载组装图并提取线粒体子图；没有图或无法解析时返回 None"""
+    if not graph_file:
+        return None
+    try:
+        from ..io.graph import extract_mito_subgraph, load_graph
+        graph = load_graph(graph_file)
+        summary = extract_mito_subgraph(graph, MITO_LENGTH_RANGES.get(kingdom, MITO_LENGTH_RANGES["animal"]))
+        summary["file"] = graph_file
+        if summary["components"]:
+            best = summary["components"][0]
+            logger.info(
+                f"Assembly graph {Path(graph_file).name}: mito subgraph {best['n_segments']} segments, "
+                f"{best['length']} bp, coverage {best['coverage']}x, circular={best['is_circular']}"
+            )
+        return summary
+    except Exception as e:
+        logger.warning(f"Could not analyze assembly graph {graph_file}: {e}")
+        return None
+
+# 参考草图库查询：只查询足够长、覆盖度最高的若干条 contig
+MAX_SKETCH_QUERIES = 200
+MIN_SKETCH_QUERY_LENGTH = 500
+
+def _match_references(fasta: str, names: List[str], sketch_db: Optional[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """用参考线粒体草图库为 contig 查找最接近的参考；未配置或无法读取时返回空字典"""
+    if not sketch_db or not names:
+        return {}
+    try:
+        from ..io.sketch import open_sketch_db
+        return open_sketch_db(sketch_db).classify_fasta(fasta, names)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not query reference sketches {sketch_db}: {e}")
+        return {}
+
+def _closest_reference(matches: Dict[str, List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """所有候选中包含度最高的参考命中"""
+    best = None
+    for name, hits in matches.items():
+        if hits and (best is None or hits[0]["containment"] > best["containment"]):
+            best = {"contig": name, **hits[0]}
+    return best
+
+def _describe_mito_candidates(mito_fasta: str, assembly_results: Dict[str, Any], graph_file: Optional[str],
+                              kingdom: str, sketch_db: Optional[str] = None) -> Dict[str, Any]:
+    """
+    组装器已给出线粒体序列文件时：序列数取自 FASTA 索引，环化综合组装器报告、组装图与首尾重叠检测；
+    检测到首尾重叠时另存去除重叠后的序列
+    """
+    from ..io.circular import check_circularity, write_trimmed
+    from ..io.faidx import open_fasta_index
+    try:
+        names = open_fasta_index(mito_fasta).names
+        circularity = check_circularity(mito_fasta, names)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not index {mito_fasta}: {e}")
+        names, circularity = [], {}
+    if any(r["overlap"] for r in circularity.values()):
+        trimmed = Path(mito_fasta).with_name(f"{Path(mito_fasta).stem}.trimmed.fasta")
+        mito_fasta = str(write_trimmed(mito_fasta, circularity, trimmed, names))
+    graph = _analyze_assembly_graph(graph_file, kingdom)
+    is_circular = bool(assembly_results.get("is_circular", False)) or any(r["is_circular"] for r in circularity.values())
+    if graph and graph["components"]:
+        is_circular = is_circular or graph["components"][0]["is_circular"]
+    references = _match_references(mito_fasta, names, sketch_db)
+    return {
+        "fasta": str(mito_fasta),
+        "count": len(names),
+        "names": names,
+        "is_circular": is_circular,
+        "circularity": circularity,
+        "graph": graph,
+        "references": references,
+        "closest_reference": _closest_reference(references)
+    }
+
+def _select_mitochondrial_contigs(contigs_file: str, kingdom: str, graph_file: Optional[str] = None,
+                                  sketch_db: Optional[str] = None) -> Dict[str, Any]:
+    """
+    筛选线粒体候选序列
     
+    一次流式统计得到每条 contig 的长度与标题覆盖度。配置了参考草图库时，优先选择与参考线粒体
+    基因组包含度达到阈值的 contig（按包含度、覆盖度排序）。其次有组装图时，以图中线粒体子图的覆盖度为准：
+    覆盖度不低于其一半的 contig 入选，环化由子图能否闭合判断；
+    否则落在界别长度范围内的按覆盖度（线粒体拷贝数远高于核基因组）降序取前几条，
+    都不在范围内时取最长的一条。选中的序列做首尾重叠检测，通过 FASTA 索引写出（环状序列去除重叠）。
+    """
+    from ..io.circular import check_circularity, write_trimmed
+    from ..io.fasta import fasta_stats
+    from ..io.sketch import MIN_CONTAINMENT
+    
+    mito_file = Path(contigs_file).parent / "mitochondrial_candidates.fasta"
+    contigs = fasta_stats(contigs_file)["contigs"]
+    graph = _analyze_assembly_graph(graph_file or _find_assembly_graph(Path(contigs_file).parent), kingdom)
+    best = graph["components"][0] if graph and graph["components"] else None
+    
+    low, high = MITO_LENGTH_RANGES.get(kingdom, MITO_LENGTH_RANGES["animal"])
+    by_coverage = lambda c: (c["coverage"] or 0, c["length"])
+    pool = sorted((c for c in contigs if c["length"] >= MIN_SKETCH_QUERY_LENGTH), key=by_coverage, reverse=True)
+    matches = _match_references(contigs_file, [c["name"] for c in pool[:MAX_SKETCH_QUERIES]], sketch_db)
+    containment = lambda c: matches[c["name"]][0]["containment"] if matches.get(c["name"]) else 0.0
+    selected = sorted((c for c in contigs if containment(c) >= MIN_CONTAINMENT),
+                      key=lambda c: (containment(c), c["coverage"] or 0), reverse=True)
+    if not selected and best and best["in_range"]:
+        floor = best["coverage"] / 2
+        selected = sorted((c for c in contigs if (c["coverage"] or 0) >= floor), key=by_coverage, reverse=True)
+    if not selected:
+        in_range = [c for c in contigs if low <= c["length"] <= high]
+        selected = sorted(in_range, key=by_coverage, reverse=True)
+    if not selected:
+        selected = sorted(contigs, key=lambda c: c["length"], reverse=True)[:1]
+    selected = selected[:MAX_MITO_CANDIDATES]
+    
+    names = [c["name"] for c in selected]
+    circularity = check_circularity(contigs_file, names)
+    write_trimmed(contigs_file, circularity, mito_file, names)
+    logger.info(f"Selected {len(names)} mitochondrial candidate(s) from {len(contigs)} contigs")
+    references = {name: matches[name] for name in names if name in matches}
+    references.update(_match_references(contigs_file, [n for n in names if n not in matches], sketch_db))
+    unmatched = [name for name in names if sketch_db and not references.get(name)]
+    if unmatched:
+        logger.warning(f"⚠️ Candidate contigs without any reference match (possible contamination): {unmatched}")
+    
+    is_circular = any("circular" in c["header"].lower() for c in selected)
+    is_circular = is_circular or any(r["is_circular"] for r in circularity.values())
+    if best:
+        is_circular = is_circular or best["is_circular"]
     return {
         "fasta": str(mito_file),
-        "count": 1,
-        "is_circular": True
+        "count": len(names),
+        "names": names,
+        "is_circular": is_circular,
+        "circularity": circularity,
+        "graph": graph,
+        "references": references,
+        "closest_reference": _closest_reference(references),
+        "unmatched_contigs": unmatched
     }
 
 def _run_annotation(mito_fasta: str, annotation_dir: Path, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -1490,6 +1957,7 @@ def _generate_report(state: PipelineState, report_dir: Path) -> Dict[str, Any]:
             }
             for stage in ['qc', 'assembly', 'polish', 'annotation']
         },
+        'closest_reference': state['stage_outputs'].get('assembly', {}).get('metadata', {}).get('closest_reference'),
         'config': state.get('config', {}),
         'errors': state.get('errors', [])
     }
@@ -1518,12 +1986,15 @@ def _run_polishing(
     output_dir: Path,
     tool: str,
     read_type: str,
-    threads: int = 4
+    threads: int = 4,
+    contigs: Optional[List[str]] = None,
+    circularity: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """
     执行抛光
     
-    根据工具类型和数据类型选择合适的抛光策略
+    根据工具类型和数据类型选择合适的抛光策略；给出 contigs 时只抛光这些序列
+    （通过 FASTA 索引提取，不重新解析整个组装文件，环状序列去除首尾重叠）
     """
     from ..tools import run_racon, run_pilon, run_medaka
     
@@ -1531,7 +2002,7 @@ def _run_polishing(
     
     reads_path = Path(reads_file)
     reads2_path = Path(reads2_file) if reads2_file else None
-    assembly_path = Path(assembly_file)
+    assembly_path = _extract_polish_contigs(Path(assembly_file), contigs, output_dir, circularity)
     
     try:
         if tool.lower() == "racon":
@@ -1574,38 +2045,55 @@ def _run_polishing(
         else:
             raise ValueError(f"Unknown polishing tool: {tool}")
         
+        result["input_assembly"] = str(assembly_path)
         return result
         
     except Exception as e:
         logger.error(f"Polishing with {tool} failed: {e}")
         raise
 
+def _extract_polish_contigs(assembly_path: Path, contigs: Optional[List[str]], output_dir: Path,
+                            circularity: Optional[Dict[str, Dict[str, Any]]] = None) -> Path:
+    """组装文件中除候选序列外还有其它序列、或候选序列有首尾重叠时，把候选序列提取为抛光输入"""
+    if not contigs:
+        return assembly_path
+    from ..io.circular import write_trimmed
+    from ..io.faidx import open_fasta_index
+    try:
+        index = open_fasta_index(assembly_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not index {assembly_path}, polishing the whole file: {e}")
+        return assembly_path
+    circularity = circularity or {}
+    trimmed = any(circularity.get(name, {}).get("overlap") for name in contigs)
+    if (set(index.names) == set(contigs) and not trimmed) or not all(name in index for name in contigs):
+        return assembly_path
+    output_dir.mkdir(parents=True, exist_ok=True)
+    subset = write_trimmed(assembly_path, circularity, output_dir / "polish_input.fasta", contigs)
+    logger.info(f"Polishing {len(contigs)} of {len(index)} contigs from {assembly_path.name}")
+    return subset
+
 def _calculate_improvement(original_file: str, polished_file: str) -> Dict[str, Any]:
     """
     计算抛光改进
     
-    对比抛光前后的统计信息
+    对比抛光前后的统计信息（流式统计，不加载序列）
     """
     try:
-        from Bio import SeqIO
+        from ..io.fasta import fasta_stats
         
-        # 读取原始序列
-        orig_seqs = list(SeqIO.parse(original_file, "fasta"))
-        orig_lengths = [len(seq) for seq in orig_seqs]
+        orig = fasta_stats(original_file)
+        polish = fasta_stats(polished_file)
         
-        # 读取抛光后序列
-        polish_seqs = list(SeqIO.parse(polished_file, "fasta"))
-        polish_lengths = [len(seq) for seq in polish_seqs]
-        
-        if not orig_lengths or not polish_lengths:
+        if not orig["num_sequences"] or not polish["num_sequences"]:
             return {"status": "no_data"}
         
         # 计算统计
-        orig_total = sum(orig_lengths)
-        polish_total = sum(polish_lengths)
+        orig_total = orig["total_length"]
+        polish_total = polish["total_length"]
         
-        orig_n50 = _calculate_n50(orig_lengths)
-        polish_n50 = _calculate_n50(polish_lengths)
+        orig_n50 = orig["n50"]
+        polish_n50 = polish["n50"]
         
         return {
             "status": "calculated",
@@ -1615,31 +2103,17 @@ def _calculate_improvement(original_file: str, polished_file: str) -> Dict[str,
             "n50_change_pct": ((polish_n50 - orig_n50) / orig_n50 * 100) if orig_n50 > 0 else 0,
             "original": {
                 "total_length": orig_total,
-                "num_contigs": len(orig_lengths),
-                "n50": orig_n50
+                "num_contigs": orig["num_sequences"],
+                "n50": orig_n50,
+                "n_count": orig["n_count"]
             },
             "polished": {
                 "total_length": polish_total,
-                "num_contigs": len(polish_lengths),
-                "n50": polish_n50
+                "num_contigs": polish["num_sequences"],
+                "n50": polish_n50,
+                "n_count": polish["n_count"]
             }
         }
     except Exception as e:
         logger.warning(f"Failed to calculate improvement: {e}")
-        return {"status": "error", "message": str(e)}
-
-def _calculate_n50(lengths: list) -> int:
-    """计算 N50"""
-    if not lengths:
-        return 0
-    
-    sorted_lengths = sorted(lengths, reverse=True)
-    total = sum(sorted_lengths)
-    cumsum = 0
-    
-    for length in sorted_lengths:
-        cumsum += length
-        if cumsum >= total / 2:
-            return length
-    
-    return 0
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+资源感知的阶段调度器
+
+将每个阶段的 CPU/内存需求（来自 _estimate_resource_requirements）视为
+对主机容量的预留：
+- 容量足够的阶段可并发运行（包括不同样本流水线的阶段）
+- 会超出内存/CPU 容量的阶段阻塞等待，直到其它阶段释放资源
+- 单个需求超过主机容量的阶段会被裁剪到容量上限，并在空闲时独占运行
+
+批处理模式下通过 multiprocessing.Manager 的共享 Condition/dict 在进程间共享账本。
+账本按进程号记录各进程持有的预留：工作进程被杀（如 OOM）时来不及释放，
+等待资源的阶段与批处理主进程会回收已退出进程的预留。
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable
+
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 资源计划中缺失阶段时的默认需求
+DEFAULT_STAGE_REQUEST = {"cpu_cores": 4, "memory_gb": 4.0}
+
+# 预留给操作系统和 Python 进程本身的内存比例
+MEMORY_HEADROOM = 0.9
+
+
+def detect_host_capacity() -> Dict[str, float]:
+    """探测主机可用 CPU 核数和物理内存（GB）"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+
+    memory_gb = 0.0
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    memory_gb = int(line.split()[1]) / (1024 ** 2)
+                    break
+    except OSError:
+        pass
+    if not memory_gb:
+        try:
+            memory_gb = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 ** 3)
+        except (ValueError, OSError, AttributeError):
+            memory_gb = 8.0
+
+    return {"cpu_cores": cpus, "memory_gb": round(memory_gb * MEMORY_HEADROOM, 2)}
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否仍在运行（僵尸进程视为已退出；无法判断时视为存活）"""
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
+
+
+class Reservation:
+    """一次成功的资源预留"""
+
+    def __init__(self, stage: str, cpu_cores: int, memory_gb: float, waited: float = 0.0,
+                 pid: Optional[int] = None):
+        self.stage = stage
+        self.cpu_cores = cpu_cores
+        self.memory_gb = memory_gb
+        self.waited = waited
+        self.pid = pid if pid is not None else os.getpid()
+
+    def __repr__(self):
+        return f"Reservation({self.stage}, cpu={self.cpu_cores}, mem={self.memory_gb}GB)"
+
+
+class ResourceScheduler:
+    """
+    基于 CPU/内存预留的阶段调度器
+
+    Args:
+        cpu_cores: 可调度的 CPU 核数（默认探测主机）
+        memory_gb: 可调度的内存（GB，默认探测主机）
+        condition: 同步原语（跨进程共享时传入 Manager().Condition()）
+        ledger: 已预留资源账本（跨进程共享时传入 Manager().dict()），
+            holders 项按进程号记录 (核数, 内存, 预留数)
+    """
+
+    def __init__(self, cpu_cores: Optional[int] = None, memory_gb: Optional[float] = None,
+                 condition=None, ledger=None):
+        host = detect_host_capacity() if (cpu_cores is None or memory_gb is None) else {}
+        self.cpu_cores = int(cpu_cores if cpu_cores is not None else host["cpu_cores"])
+        self.memory_gb = float(memory_gb if memory_gb is not None else host["memory_gb"])
+        self._cond = condition if condition is not None else threading.Condition()
+        self._ledger = ledger if ledger is not None else {}
+        with self._cond:
+            for key, default in (("cpu", 0), ("memory", 0.0), ("running", 0), ("holders", {})):
+                if key not in self._ledger:
+                    self._ledger[key] = default
+
+    @classmethod
+    def shared(cls, manager, cpu_cores: Optional[int] = None, memory_gb: Optional[float] = None):
+        """创建可在进程间共享的调度器（账本保存在 Manager 中）"""
+        return cls(cpu_cores, memory_gb, condition=manager.Condition(), ledger=manager.dict())
+
+    def __getstate__(self):
+        # Manager 代理可以被 pickle；本地 threading.Condition 不能跨进程
+        if isinstance(self._ledger, dict):
+            raise TypeError("Local ResourceScheduler cannot be shared across processes; use ResourceScheduler.shared()")
+        return self.__dict__.copy()
+
+    # ------------------------------------------------------------------
+    def usage(self) -> Dict[str, Any]:
+        """当前预留情况"""
+        with self._cond:
+            return {
+                "cpu_cores": self._ledger["cpu"],
+                "memory_gb": round(self._ledger["memory"], 2),
+                "running": self._ledger["running"],
+                "capacity_cpu_cores": self.cpu_cores,
+                "capacity_memory_gb": self.memory_gb,
+            }
+
+    def fit_request(self, cpu_cores: int, memory_gb: float) -> Dict[str, Any]:
+        """将请求裁剪到主机容量范围内"""
+        cpu = max(1, min(int(cpu_cores or 1), self.cpu_cores))
+        mem = max(0.0, min(float(memory_gb or 0.0), self.memory_gb))
+        return {"cpu_cores": cpu, "memory_gb": round(mem, 2)}
+
+    def _hold(self, pid: int, cpu: int, mem: float, count: int) -> None:
+        """更新进程 pid 持有的预留（Manager 代理中的嵌套 dict 需整体写回）"""
+        holders = dict(self._ledger["holders"])
+        held_cpu, held_mem, held_count = holders.get(pid, (0, 0.0, 0))
+        held = (held_cpu + cpu, round(held_mem + mem, 6), held_count + count)
+        if held[2] > 0:
+            holders[pid] = held
+        else:
+            holders.pop(pid, None)
+        self._ledger["holders"] = holders
+
+    def _reclaim_locked(self) -> int:
+        holders = dict(self._ledger["holders"])
+        dead = [pid for pid in holders if not _pid_alive(pid)]
+        if not dead:
+            return 0
+        reclaimed = 0
+        for pid in dead:
+            cpu, mem, count = holders.pop(pid)
+            self._ledger["cpu"] = max(0, self._ledger["cpu"] - cpu)
+            self._ledger["memory"] = max(0.0, self._ledger["memory"] - mem)
+            self._ledger["running"] = max(0, self._ledger["running"] - count)
+            reclaimed += count
+        self._ledger["holders"] = holders
+        logger.warning(f"♻️ Reclaimed {reclaimed} reservation(s) held by exited process(es) {dead}")
+        self._cond.notify_all()
+        return reclaimed
+
+    def reclaim_dead(self) -> int:
+        """释放已退出进程仍持有的预留，返回回收的预留数"""
+        with self._cond:
+            return self._reclaim_locked()
+
+    def _fits(self, cpu: int, mem: float) -> bool:
+        if self._ledger["running"] == 0:
+            # 空闲时总是允许运行，避免超大阶段永久饥饿
+            return True
+        return (self._ledger["cpu"] + cpu <= self.cpu_cores
+                and self._ledger["memory"] + mem <= self.memory_gb)
+
+    def acquire(self, stage: str, cpu_cores: int, memory_gb: float,
+                timeout: Optional[float] = None) -> Reservation:
+        """
+        阻塞直到资源可用并完成预留
+
+        Raises:
+            TimeoutError: 超时仍未获得资源
+        """
+        req = self.fit_request(cpu_cores, memory_gb)
+        cpu, mem = req["cpu_cores"], req["memory_gb"]
+        start = time.time()
+        logged = False
+
+        with self._cond:
+            while not self._fits(cpu, mem):
+                if self._reclaim_locked():
+                    continue
+                if not logged:
+                    logger.info(f"⏳ Stage {stage} waiting for resources "
+                                f"(need {cpu} cores/{mem}GB, in use {self._ledger['cpu']}/{self.cpu_cores} cores, "
+                                f"{self._ledger['memory']:.1f}/{self.memory_gb}GB)")
+                    logged = True
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (time.time() - start)
+                    if remaining <= 0:
+                        raise TimeoutError(f"Timed out waiting for resources for stage {stage}")
+                self._cond.wait(remaining if remaining is not None else 5.0)
+            self._ledger["cpu"] = self._ledger["cpu"] + cpu
+            self._ledger["memory"] = self._ledger["memory"] + mem
+            self._ledger["running"] = self._ledger["running"] + 1
+            self._hold(os.getpid(), cpu, mem, 1)
+
+        waited = time.time() - start
+        logger.debug(f"Reserved {cpu} cores/{mem}GB for {stage} (waited {waited:.1f}s)")
+        return Reservation(stage, cpu, mem, waited)
+
+    def release(self, reservation: Reservation) -> None:
+        """释放预留并唤醒等待中的阶段"""
+        with self._cond:
+            self._ledger["cpu"] = max(0, self._ledger["cpu"] - reservation.cpu_cores)
+            self._ledger["memory"] = max(0.0, self._ledger["memory"] - reservation.memory_gb)
+            self._ledger["running"] = max(0, self._ledger["running"] - 1)
+            self._hold(reservation.pid, -reservation.cpu_cores, -reservation.memory_gb, -1)
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, stage: str, cpu_cores: int, memory_gb: float, timeout: Optional[float] = None):
+        """上下文管理器形式的预留"""
+        reservation = self.acquire(stage, cpu_cores, memory_gb, timeout=timeout)
+        try:
+            yield reservation
+        finally:
+            self.release(reservation)
+
+
+# === 进程级默认调度器 ===
+
+_scheduler: Optional[ResourceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ResourceScheduler:
+    """获取当前进程的调度器（首次调用时按主机容量创建）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ResourceScheduler()
+        return _scheduler
+
+
+def set_scheduler(scheduler: Optional[ResourceScheduler]) -> None:
+    """设置当前进程的调度器（批处理工作进程初始化时使用）"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+
+def stage_request(config: Dict[str, Any], stage: str) -> Dict[str, Any]:
+    """
+    从 supervisor 的资源计划中读取阶段需求
+
+    CPU 需求不超过用户指定的 threads，内存需求不超过 memory_gb（如有）。
+    """
+    plan = (config.get("resource_plan") or {}).get("memory_per_stage") or {}
+    est = plan.get(stage) or {}
+    cpu = int(est.get("cpu_cores") or DEFAULT_STAGE_REQUEST["cpu_cores"])
+    mem = float(est.get("memory_gb") or DEFAULT_STAGE_REQUEST["memory_gb"])
+    if config.get("threads"):
+        cpu = min(cpu, int(config["threads"]))
+    if config.get("memory_gb"):
+        mem = min(mem, float(config["memory_gb"]))
+    return {"cpu_cores": max(1, cpu), "memory_gb": mem}
+
+
+def scheduled_node(stage: str, node_func: Callable) -> Callable:
+    """
+    包装流水线节点：执行前按资源计划预留 CPU/内存
+
+    预留期间 config["threads"] 被设置为实际获得的核数，结束后恢复。
+    config["resource_scheduler"] 为 False 时直接执行原节点。
+    """
+
+    @functools.wraps(node_func)
+    def wrapper(state):
+        config = state.get("config") or {}
+        if not config.get("resource_scheduler", True):
+            return node_func(state)
+
+        req = stage_request(config, stage)
+        scheduler = get_scheduler()
+        original_threads = config.get("threads")
+        with scheduler.reserve(stage, req["cpu_cores"], req["memory_gb"]) as res:
+            config["threads"] = res.cpu_cores
+            try:
+                return node_func(state)
+            finally:
+                if original_threads is None:
+                    config.pop("threads", None)
+                else:
+                    config["threads"] = original_threads
+
+    return wrapper
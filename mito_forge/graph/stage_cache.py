@@ -0,0 +1,375 @@
+"""
+内容寻址的阶段结果缓存
+
+包装 qc/bait/downsample/assembly/polish/annotation 节点：
+- 缓存键 = 阶段名 + 输入文件指纹 + 上游阶段缓存键 + 工具名/版本 + 有效参数
+- 输入文件指纹默认使用 大小+mtime 快速路径，可选 sha256 全量哈希
+- 命中时恢复阶段的 StageOutputs 并将产物复制回工作目录
+- 缓存总大小超过上限时按最近访问时间（LRU）淘汰
+
+缓存目录默认为 ~/.mito-forge/stage_cache，可通过 config["stage_cache_dir"]
+或环境变量 MITO_STAGE_CACHE_DIR 覆盖；config["stage_cache"] = False 或
+MITO_STAGE_CACHE=0 时关闭。
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Callable
+
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".mito-forge" / "stage_cache"
+DEFAULT_MAX_SIZE_GB = 50.0
+
+# 阶段 -> (工作子目录, tool_chain 中的键, 上游阶段)
+STAGE_LAYOUT = {
+    "qc": ("01_qc", "qc", None),
+    "bait": ("01_bait", "bait", "qc"),
+    "downsample": ("01_downsample", "downsample", "bait"),
+    "assembly": ("02_assembly", "assembly", "downsample"),
+    "polish": ("03_polish", "polishing", "assembly"),
+    "annotation": ("03_annotation", "annotation", "polish"),
+}
+
+# 影响阶段结果的配置项（线程数等不影响结果的配置不参与缓存键）
+RESULT_CONFIG_KEYS = ("kingdom", "genetic_code", "detected_read_type", "target_length",
+                      "enable_llm_eval", "assembly_race", "race_size", "race_candidates",
+                      "race_accept_score", "bait_reads", "bait_reference", "bait_k", "bait_min_hits",
+                      "bait_rounds", "downsample_coverage", "downsample_fraction", "downsample_seed",
+                      "reference_sketches", "qc_tool", "long_read_select", "long_read_target_bases",
+                      "long_read_coverage", "long_read_min_length", "mito_read_fraction",
+                      "qc_builtin_fallback", "long_read_type")
+
+# 工具名 -> 可执行文件
+TOOL_EXECUTABLES = {
+    "spades": "spades.py",
+    "getorganelle": "get_organelle_from_reads.py",
+    "medaka": "medaka_consensus",
+    "mitos": "runmitos.py",
+    "nanoplot": "NanoPlot",
+}
+
+ENTRY_FILE = "entry.json"
+
+
+def _cache_enabled(config: Dict[str, Any]) -> bool:
+    if os.getenv("MITO_STAGE_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return False
+    return bool(config.get("stage_cache", True))
+
+
+@functools.lru_cache(maxsize=64)
+def resolve_tool_version(tool: str) -> str:
+    """解析工具版本（`<tool> --version` 首行；结果在进程内缓存）"""
+    if not tool:
+        return "none"
+    exe = shutil.which(TOOL_EXECUTABLES.get(tool.lower(), tool))
+    if not exe:
+        return "unavailable"
+    try:
+        proc = subprocess.run([exe, "--version"], capture_output=True, text=True, timeout=20)
+        out = (proc.stdout or proc.stderr or "").strip().splitlines()
+        return out[0].strip() if out else "unknown"
+    except Exception:
+        return "unknown"
+
+
+def fingerprint_file(path: str, mode: str = "fast") -> Optional[str]:
+    """
+    文件指纹
+
+    Args:
+        mode: "fast" 使用 大小+mtime；"sha256" 计算全量内容哈希
+
+    Returns:
+        指纹字符串；文件不存在时返回 None
+    """
+    p = Path(path)
+    if not p.exists():
+        return None
+    if p.is_dir():
+        parts = []
+        for child in sorted(p.rglob("*")):
+            if child.is_file():
+                parts.append(f"{child.relative_to(p)}:{fingerprint_file(str(child), mode)}")
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    st = p.stat()
+    if mode == "sha256":
+        h = hashlib.sha256()
+        with p.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return f"sha256:{h.hexdigest()}"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _stage_input_files(stage: str, state: Dict[str, Any]) -> Dict[str, str]:
+    """阶段依赖的输入文件（原始输入 + 上游阶段输出文件）"""
+    files = {}
+    inputs = state.get("inputs") or {}
+    for key in ("reads", "reads2", "long_reads", "reference"):
+        if inputs.get(key):
+            files[f"inputs.{key}"] = str(inputs[key])
+
+    upstream = STAGE_LAYOUT[stage][2]
+    while upstream:
+        outputs = (state.get("stage_outputs") or {}).get(upstream) or {}
+        for key, value in (outputs.get("files") or {}).items():
+            if isinstance(value, str):
+                files[f"{upstream}.{key}"] = value
+        upstream = STAGE_LAYOUT.get(upstream, (None, None, None))[2]
+    return files
+
+
+def compute_cache_key(stage: str, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    计算阶段缓存键
+
+    Returns:
+        {"key": ..., "manifest": {...}}；原始输入文件缺失时返回 None（不缓存）
+    """
+    config = state.get("config") or {}
+    mode = config.get("stage_cache_hash", "fast")
+    tool_key = STAGE_LAYOUT[stage][1]
+    tool = (config.get("tool_chain") or {}).get(tool_key) or ""
+
+    fingerprints = {}
+    for name, path in sorted(_stage_input_files(stage, state).items()):
+        fp = fingerprint_file(path, mode)
+        if fp is None and name.startswith("inputs."):
+            return None
+        fingerprints[name] = fp
+
+    manifest = {
+        "stage": stage,
+        "tool": tool,
+        "tool_version": resolve_tool_version(tool),
+        "parameters": (config.get("tool_parameters") or {}).get(tool, {}),
+        "tool_plan": (config.get("tool_plan") or {}).get(tool_key),
+        "config": {k: config.get(k) for k in RESULT_CONFIG_KEYS if k in config},
+        "inputs": fingerprints,
+    }
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True, default=str).encode()).hexdigest()
+    return {"key": f"{stage}-{digest[:32]}", "manifest": manifest}
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class StageCache:
+    """
+    阶段结果缓存存储
+
+    每个条目是缓存目录下的一个子目录：artifacts/ 保存阶段工作目录的副本，
+    entry.json 保存 StageOutputs、清单、大小与最近访问时间。
+    """
+
+    def __init__(self, root: Optional[str] = None, max_size_gb: float = DEFAULT_MAX_SIZE_GB):
+        self.root = Path(root or os.getenv("MITO_STAGE_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_size_bytes = int(max_size_gb * 1024 ** 3)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "StageCache":
+        return cls(config.get("stage_cache_dir"),
+                   float(config.get("stage_cache_max_gb", DEFAULT_MAX_SIZE_GB)))
+
+    # ------------------------------------------------------------------
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def _read_entry(self, entry_dir: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with (entry_dir / ENTRY_FILE).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, entry_dir: Path, entry: Dict[str, Any]) -> None:
+        tmp = entry_dir / (ENTRY_FILE + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, entry_dir / ENTRY_FILE)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取条目并更新最近访问时间"""
+        entry_dir = self._entry_dir(key)
+        entry = self._read_entry(entry_dir)
+        if not entry:
+            return None
+        entry["last_access"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        try:
+            self._write_entry(entry_dir, entry)
+        except OSError:
+            pass
+        entry["path"] = str(entry_dir)
+        return entry
+
+    def put(self, key: str, stage: str, stage_dir: Path, outputs: Dict[str, Any],
+            manifest: Dict[str, Any]) -> Optional[Path]:
+        """保存阶段产物和输出，随后执行 LRU 淘汰"""
+        entry_dir = self._entry_dir(key)
+        staging = self.root / f".{key}.{os.getpid()}.tmp"
+        try:
+            if staging.exists():
+                shutil.rmtree(staging)
+            staging.mkdir(parents=True)
+            if stage_dir.exists():
+                shutil.copytree(stage_dir, staging / "artifacts")
+            entry = {
+                "key": key,
+                "stage": stage,
+                "tool": manifest.get("tool"),
+                "tool_version": manifest.get("tool_version"),
+                "stage_dir": stage_dir.name,
+                "outputs": _relativize_files(outputs, stage_dir),
+                "manifest": manifest,
+                "size_bytes": _dir_size(staging),
+                "created": time.time(),
+                "last_access": time.time(),
+                "hits": 0,
+            }
+            self._write_entry(staging, entry)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            os.replace(staging, entry_dir)
+        except OSError as e:
+            logger.warning(f"Failed to store stage cache entry {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        self.prune()
+        return entry_dir
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """列出所有条目（按最近访问时间倒序）"""
+        if not self.root.exists():
+            return []
+        result = []
+        for entry_dir in self.root.iterdir():
+            if not entry_dir.is_dir() or entry_dir.name.startswith("."):
+                continue
+            entry = self._read_entry(entry_dir)
+            if entry:
+                entry["path"] = str(entry_dir)
+                result.append(entry)
+        result.sort(key=lambda e: e.get("last_access", 0), reverse=True)
+        return result
+
+    def total_size(self) -> int:
+        return sum(e.get("size_bytes", 0) for e in self.entries())
+
+    def prune(self, max_size_bytes: Optional[int] = None, stage: Optional[str] = None,
+              remove_all: bool = False) -> List[str]:
+        """
+        淘汰条目
+
+        Args:
+            max_size_bytes: 大小上限（默认使用实例上限），超出时淘汰最久未访问的条目
+            stage: 仅处理指定阶段的条目
+            remove_all: 删除全部（或指定阶段的全部）条目
+
+        Returns:
+            被删除的缓存键列表
+        """
+        limit = self.max_size_bytes if max_size_bytes is None else max_size_bytes
+        entries = self.entries()
+        total = sum(e.get("size_bytes", 0) for e in entries)
+        removed = []
+        for entry in reversed(entries):  # 最久未访问的在前
+            if stage and entry.get("stage") != stage:
+                continue
+            if not remove_all and total <= limit:
+                break
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            total -= entry.get("size_bytes", 0)
+            removed.append(entry["key"])
+        if removed:
+            logger.info(f"Stage cache pruned {len(removed)} entries")
+        return removed
+
+
+def _relativize_files(outputs: Dict[str, Any], stage_dir: Path) -> Dict[str, Any]:
+    """将阶段目录内的文件路径改写为 {stage_dir} 占位符，便于恢复到其它工作目录"""
+    outputs = json.loads(json.dumps(outputs, default=str))
+    base = str(stage_dir.resolve())
+    files = outputs.get("files") or {}
+    for k, v in list(files.items()):
+        if isinstance(v, str):
+            try:
+                resolved = str(Path(v).resolve())
+            except OSError:
+                continue
+            if resolved == base or resolved.startswith(base + os.sep):
+                files[k] = "{stage_dir}" + resolved[len(base):]
+    return outputs
+
+
+def _restore_files(outputs: Dict[str, Any], stage_dir: Path) -> Dict[str, Any]:
+    files = outputs.get("files") or {}
+    for k, v in list(files.items()):
+        if isinstance(v, str) and v.startswith("{stage_dir}"):
+            files[k] = str(stage_dir) + v[len("{stage_dir}"):]
+    return outputs
+
+
+def cached_node(stage: str, node_func: Callable) -> Callable:
+    """
+    包装流水线节点：命中缓存时跳过执行并恢复结果，成功执行后写入缓存
+    """
+    from .state import complete_stage, RouteDecision
+
+    @functools.wraps(node_func)
+    def wrapper(state):
+        config = state.get("config") or {}
+        if not _cache_enabled(config):
+            return node_func(state)
+
+        try:
+            cache = StageCache.from_config(config)
+            key_info = compute_cache_key(stage, state)
+        except Exception as e:
+            logger.warning(f"Stage cache disabled for {stage}: {e}")
+            return node_func(state)
+        if key_info is None:
+            return node_func(state)
+
+        key = key_info["key"]
+        stage_dir = Path(state["workdir"]) / STAGE_LAYOUT[stage][0]
+        entry = cache.get(key)
+        if entry:
+            try:
+                artifacts = Path(entry["path"]) / "artifacts"
+                if artifacts.exists():
+                    shutil.copytree(artifacts, stage_dir, dirs_exist_ok=True)
+                outputs = _restore_files(entry["outputs"], stage_dir)
+                outputs.setdefault("metadata", {})
+                outputs["metadata"].update({"cache_hit": True, "cache_key": key})
+                complete_stage(state, stage, outputs)
+                state["route"] = RouteDecision.CONTINUE
+                logger.info(f"♻️ Stage {stage} restored from cache ({key})")
+                return state
+            except Exception as e:
+                logger.warning(f"Failed to restore cached {stage} result, re-running: {e}")
+
+        result = node_func(state)
+        try:
+            route = result.get("route")
+            route = route.value if hasattr(route, "value") else str(route)
+            outputs = (result.get("stage_outputs") or {}).get(stage)
+            if outputs and stage in (result.get("completed_stages") or []) and route == "continue":
+                outputs.setdefault("metadata", {})
+                outputs["metadata"]["cache_key"] = key
+                cache.put(key, stage, stage_dir, outputs, key_info["manifest"])
+        except Exception as e:
+            logger.warning(f"Failed to cache {stage} result: {e}")
+        return result
+
+    return wrapper
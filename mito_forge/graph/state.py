@@ -43,7 +43,7 @@ class Kingdom(str, Enum):
 
 # === 类型定义 ===
 
-StageName = Literal["supervisor", "qc", "assembly", "annotation", "report"]
+StageName = Literal["supervisor", "qc", "bait", "downsample", "assembly", "annotation", "report"]
 
 class InputData(TypedDict):
     """输入数据结构"""
@@ -178,7 +178,7 @@ def init_pipeline_state(
     import uuid
     
     # 初始化阶段信息
-    stage_names: List[StageName] = ["supervisor", "qc", "assembly", "polish", "annotation", "report"]
+    stage_names: List[StageName] = ["supervisor", "qc", "bait", "downsample", "assembly", "polish", "annotation", "report"]
     stage_info = {}
     for stage in stage_names:
         stage_info[stage] = StageInfo(
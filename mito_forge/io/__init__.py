@@ -0,0 +1,77 @@
+"""
+测序数据读写
+"""
+from .reads import (
+    ReadBatch,
+    ReadFormatError,
+    ReadParser,
+    ReadRecord,
+    detect_compression,
+    detect_format,
+    iter_batches,
+    iter_chunk_batches,
+    iter_paired_batches,
+    iter_reads,
+    open_bytes,
+)
+from .profile import cached_profile, profile_reads, sample_reads
+from .qc import QCAccumulator, run_builtin_qc
+from .longreads import LongReadStats, long_read_stats, render_long_read_plots
+from .longread_filter import select_long_reads
+from .bait import BaitSet, bait_reads, resolve_seed_panel
+from .bgzf import BgzfWriter
+from .downsample import downsample_reads, keep_mask
+from .count import cached_count, count_reads
+from .fasta import assembly_stats, fasta_stats
+from .faidx import FastaIndex, open_fasta_index
+from .graph import AssemblyGraph, extract_mito_subgraph, load_graph
+from .circular import check_circularity, terminal_overlaps, write_trimmed
+from .sketch import SketchDB, build_sketch_db, open_sketch_db, sketch_sequence
+from .validate import validate_inputs, validate_read_file
+
+__all__ = [
+    "BaitSet",
+    "bait_reads",
+    "resolve_seed_panel",
+    "BgzfWriter",
+    "assembly_stats",
+    "FastaIndex",
+    "open_fasta_index",
+    "AssemblyGraph",
+    "extract_mito_subgraph",
+    "load_graph",
+    "check_circularity",
+    "terminal_overlaps",
+    "write_trimmed",
+    "SketchDB",
+    "build_sketch_db",
+    "open_sketch_db",
+    "sketch_sequence",
+    "fasta_stats",
+    "cached_count",
+    "count_reads",
+    "downsample_reads",
+    "keep_mask",
+    "cached_profile",
+    "profile_reads",
+    "sample_reads",
+    "LongReadStats",
+    "long_read_stats",
+    "render_long_read_plots",
+    "select_long_reads",
+    "QCAccumulator",
+    "run_builtin_qc",
+    "ReadBatch",
+    "ReadFormatError",
+    "ReadParser",
+    "ReadRecord",
+    "detect_compression",
+    "detect_format",
+    "iter_batches",
+    "iter_chunk_batches",
+    "iter_paired_batches",
+    "iter_reads",
+    "open_bytes",
+    "validate_inputs",
+    "validate_read_file",
+]
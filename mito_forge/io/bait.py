@@ -0,0 +1,295 @@
+"""
+k-mer 诱饵：组装前从全部读段中招募线粒体读段
+
+与 GetOrganelle / MITObim 的思路相同：
+
+1. 由种子参考（按界别的种子序列或用户提供的 FASTA）构建规范 k-mer 集合
+2. 流式扫描读段，命中 k-mer 数达到阈值的读（双端任一端命中即整对）被招募
+3. 把新招募读段的 k-mer 并入诱饵集合，再扫描一轮，直到招募数收敛
+
+k-mer 以 2-bit 编码存入 uint64（k <= 32），诱饵集合是有序数组加哈希占位表（BaitSet），
+整批在 NumPy 中完成；批次在线程池中并行计算（NumPy 运算期间释放 GIL）。
+输出精简后的 FASTQ（双端输入输出成对文件），供组装阶段直接使用。
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .reads import ReadBatch, detect_format, iter_batches, iter_paired_batches
+
+logger = get_logger(__name__)
+
+DEFAULT_K = 25
+DEFAULT_MIN_HITS = 3
+DEFAULT_MAX_ROUNDS = 5
+# 诱饵集合上限（uint64，约 160MB）；达到后停止扩展，避免被核基因组重复序列带偏
+MAX_BAIT_KMERS = 20_000_000
+# 新招募读数不足已招募读数的 1% 视为收敛
+CONVERGENCE_FRACTION = 0.01
+BAIT_BATCH_SIZE = 16384
+SEED_DIR_ENV = "MITO_FORGE_SEED_DIR"
+
+# A/C/G/T（不区分大小写）-> 0..3，其余 -> 4
+_BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _i, _b in enumerate(b"ACGT"):
+    _BASE_CODES[_b] = _i
+    _BASE_CODES[_b | 0x20] = _i
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def resolve_seed_panel(kingdom: str = "animal", reference: Optional[Union[str, Path]] = None) -> Optional[Path]:
+    """
+    查找种子参考：显式 reference > $MITO_FORGE_SEED_DIR > ~/.mito-forge/seeds
+
+    按界别的种子文件名为 <kingdom>.fasta（或 .fa / .fasta.gz）；找不到时返回 None。
+    包内不附带种子库，需由用户提供。
+    """
+    if reference:
+        path = Path(reference)
+        return path if path.is_file() else None
+    dirs = []
+    if os.environ.get(SEED_DIR_ENV):
+        dirs.append(Path(os.environ[SEED_DIR_ENV]))
+    dirs.append(Path.home() / ".mito-forge" / "seeds")
+    for directory in dirs:
+        for suffix in (".fasta", ".fa", ".fasta.gz", ".fa.gz"):
+            path = directory / f"{str(kingdom).lower()}{suffix}"
+            if path.is_file():
+                return path
+    return None
+
+
+def _packed_words(codes: np.ndarray, k: int, reverse: bool) -> np.ndarray:
+    """
+    每个起点的 k-mer 2-bit 编码（长度 len(codes) - k + 1）
+
+    按 1, 2, 4, 8, 16 倍增拼接，k 按二进制拆分，只需 O(log k) 次整数组运算。
+    reverse=True 时得到反向互补链的编码（codes 需已取补）。
+    """
+    n = len(codes) - k + 1
+    words = {1: codes.astype(np.uint64)}
+    size = 1
+    while size * 2 <= k:
+        prev = words[size]
+        shift = np.uint64(2 * size)
+        head, tail = prev[:len(prev) - size], prev[size:]
+        words[size * 2] = (tail << shift) | head if reverse else (head << shift) | tail
+        if not k & size:
+            del words[size]
+        size *= 2
+
+    result = np.zeros(n, dtype=np.uint64)
+    offset = 0
+    for size in sorted(words, reverse=True):
+        if not k & size:
+            continue
+        part = words[size][offset:offset + n]
+        if reverse:
+            result |= part << np.uint64(2 * offset)
+        else:
+            result = (result << np.uint64(2 * size)) | part
+        offset += size
+    return result
+
+
+def canonical_kmers(batch: ReadBatch, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    整批记录的规范 k-mer（正反链编码取小）及其所属记录下标
+
+    含非 ACGT 碱基或跨越记录边界的窗口被丢弃。
+    """
+    if not 1 <= k <= 32:
+        raise ValueError(f"k must be between 1 and 32, got {k}")
+    total = batch.total_bases
+    if total < k:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    codes = _BASE_CODES[batch.seq]
+    invalid = np.zeros(total + 1, dtype=np.int32)
+    np.cumsum(codes > 3, out=invalid[1:])
+    record = np.repeat(np.arange(len(batch), dtype=np.int64), batch.lengths)[:total - k + 1]
+    valid = (invalid[k:] == invalid[:-k]) & (np.arange(total - k + 1) + k <= batch.offsets[1:][record])
+    codes &= 3
+    forward = _packed_words(codes, k, reverse=False)
+    backward = _packed_words(3 - codes, k, reverse=True)
+    return np.minimum(forward, backward)[valid], record[valid]
+
+
+def kmer_set(path: Union[str, Path], k: int = DEFAULT_K) -> np.ndarray:
+    """读取 FASTA/FASTQ 的全部规范 k-mer，返回有序去重数组"""
+    parts = [canonical_kmers(batch, k)[0] for batch in iter_batches(path, batch_size=BAIT_BATCH_SIZE)]
+    if not parts:
+        return np.zeros(0, dtype=np.uint64)
+    return np.unique(np.concatenate(parts))
+
+
+class BaitSet:
+    """
+    有序 k-mer 数组 + 哈希占位表
+
+    绝大多数读段 k-mer 不在诱饵中，先查占位表（一次随机访问）排除，
+    只有占位表命中的才做 searchsorted 精确比对。
+    """
+
+    def __init__(self, kmers: np.ndarray):
+        self.kmers = kmers
+        bits = int(np.clip(np.ceil(np.log2(max(len(kmers), 1) * 8)), 16, 28))
+        self._shift = np.uint64(64 - bits)
+        self._table = np.zeros(1 << bits, dtype=bool)
+        self._table[self._slot(kmers)] = True
+
+    def __len__(self) -> int:
+        return len(self.kmers)
+
+    def _slot(self, kmers: np.ndarray) -> np.ndarray:
+        # Fibonacci 哈希：乘法后取高位
+        return (kmers * _HASH_MULTIPLIER) >> self._shift
+
+    def contains(self, kmers: np.ndarray) -> np.ndarray:
+        found = self._table[self._slot(kmers)]
+        candidates = np.flatnonzero(found)
+        if len(candidates):
+            idx = np.minimum(np.searchsorted(self.kmers, kmers[candidates]), len(self.kmers) - 1)
+            found[candidates] = self.kmers[idx] == kmers[candidates]
+        return found
+
+
+def _hits(batch: ReadBatch, bait: BaitSet, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """每条记录命中诱饵的 k-mer 数，以及全部 (k-mer, 记录下标)"""
+    kmers, record = canonical_kmers(batch, k)
+    counts = np.zeros(len(batch), dtype=np.int64)
+    if len(bait) and len(kmers):
+        counts = np.bincount(record[bait.contains(kmers)], minlength=len(batch))
+    return counts, kmers, record
+
+
+def _bounded_map(pool: ThreadPoolExecutor, func: Callable, items: Iterable, depth: int) -> Iterator[Tuple[Any, Any]]:
+    """按顺序产出 (item, func(item))，同时在途的任务不超过 depth 个"""
+    pending: deque = deque()
+    for item in items:
+        pending.append((item, pool.submit(func, item)))
+        if len(pending) >= depth:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def bait_reads(
+    reads: Union[str, Path],
+    seeds: Union[str, Path, np.ndarray],
+    out_dir: Union[str, Path],
+    reads2: Optional[Union[str, Path]] = None,
+    k: int = DEFAULT_K,
+    min_hits: int = DEFAULT_MIN_HITS,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    max_kmers: int = MAX_BAIT_KMERS,
+    threads: int = 1,
+) -> Dict[str, Any]:
+    """
+    迭代 k-mer 诱饵，写出招募到的读段
+
+    Args:
+        seeds: 种子 FASTA 路径，或已构建好的有序 k-mer 数组
+        min_hits: 单端命中 k-mer 数达到该值即招募（双端任一端达到即整对招募）
+        max_rounds: 最多扫描轮数；第 1 轮只用种子，之后每轮加入上一轮新招募读段的 k-mer
+
+    Returns:
+        招募结果：输出文件、总读数（对数）、招募数、保留比例、轮数、诱饵 k-mer 数等
+
+    Raises:
+        OSError / ReadFormatError: 文件不可读、格式错误或双端不同步
+    """
+    start = time.time()
+    reads = Path(reads)
+    reads2 = Path(reads2) if reads2 else None
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    bait = BaitSet(seeds if isinstance(seeds, np.ndarray) else kmer_set(seeds, k))
+    seed_kmers = len(bait)
+    suffix = ".fq" if detect_format(reads) == "fastq" else ".fa"
+    outputs = [out_dir / f"baited_R1{suffix}"] + ([out_dir / f"baited_R2{suffix}"] if reads2 else [])
+
+    def scan(pair):
+        batch1, batch2 = pair
+        hits1, kmers1, record1 = _hits(batch1, bait, k)
+        mask = hits1 >= min_hits
+        kmers, records = [kmers1], [record1]
+        if batch2 is not None:
+            hits2, kmers2, record2 = _hits(batch2, bait, k)
+            mask |= hits2 >= min_hits
+            kmers.append(kmers2)
+            records.append(record2)
+        # 只保留被招募记录的 k-mer，供下一轮扩展
+        recruited_kmers = np.concatenate([km[mask[rec]] for km, rec in zip(kmers, records)])
+        recruited_records = np.concatenate([rec[mask[rec]] for rec in records])
+        return mask, recruited_kmers, recruited_records
+
+    known = np.zeros(0, dtype=np.int64)
+    total = rounds = recruited_bases = 0
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+        while rounds < max_rounds:
+            rounds += 1
+            total = recruited_bases = 0
+            recruited: List[np.ndarray] = []
+            new_kmers: List[np.ndarray] = []
+            handles = [open(path, "wb") for path in outputs]
+            try:
+                for (batch1, batch2), (mask, kmers, records) in _bounded_map(
+                        pool, scan, iter_paired_batches(reads, reads2, BAIT_BATCH_SIZE), depth=2 * max(1, threads)):
+                    ordinals = total + np.flatnonzero(mask)
+                    total += len(batch1)
+                    if not len(ordinals):
+                        continue
+                    recruited.append(ordinals)
+                    handles[0].write(batch1.to_bytes(mask))
+                    recruited_bases += int(batch1.lengths[mask].sum())
+                    if batch2 is not None:
+                        handles[1].write(batch2.to_bytes(mask))
+                        recruited_bases += int(batch2.lengths[mask].sum())
+                    # 招募只会增多：不在上一轮结果中的就是新读段
+                    fresh = ~np.isin(ordinals, known, assume_unique=True)
+                    if fresh.any():
+                        new_kmers.append(kmers[np.isin(records, np.flatnonzero(mask)[fresh])])
+            finally:
+                for handle in handles:
+                    handle.close()
+
+            current = np.concatenate(recruited) if recruited else np.zeros(0, dtype=np.int64)
+            gained = len(current) - len(known)
+            known = current
+            logger.info(f"🎣 Bait round {rounds}: {len(current)} reads recruited (+{gained}), {len(bait)} bait k-mers")
+            if len(bait) >= max_kmers:
+                logger.warning(f"Bait set reached {len(bait)} k-mers, stopping extension")
+                break
+            if rounds >= max_rounds or gained <= CONVERGENCE_FRACTION * len(current):
+                break
+            if new_kmers:
+                bait = BaitSet(np.union1d(bait.kmers, np.concatenate(new_kmers)))
+
+    result = {
+        "reads": str(outputs[0]),
+        "reads2": str(outputs[1]) if reads2 else None,
+        "paired_end": reads2 is not None,
+        "total_reads": total,
+        "recruited_reads": len(known),
+        "recruited_bases": recruited_bases,
+        "kept_fraction": round(len(known) / total, 6) if total else 0.0,
+        "rounds": rounds,
+        "k": k,
+        "min_hits": min_hits,
+        "seed_kmers": seed_kmers,
+        "bait_kmers": len(bait),
+        "elapsed_seconds": round(time.time() - start, 3),
+    }
+    logger.info(
+        f"✅ Baiting kept {result['recruited_reads']}/{total} "
+        f"{'pairs' if reads2 else 'reads'} ({result['kept_fraction']:.2%}) in {rounds} rounds"
+    )
+    return result
@@ -0,0 +1,183 @@
+"""
+基于滚动哈希的 contig 环化检测（首尾重叠）
+
+环状基因组组装成线性 contig 时，SPAdes 等 de Bruijn 组装器会在两端各保留一段相同序列
+（通常为 k-mer 长度），长读长组装的重叠可达数百到数千 bp。这里不做自比对：
+
+- 只取每条 contig 首尾各 W bp（W = min(max_overlap, 长度/2)，通过 FASTA 索引读取）
+- 全部 contig 的尾部拼接后一次性计算 2-bit 编码的 k-mer 滚动哈希
+- 以头部若干位置的 k-mer 作为种子在尾部查找，得到候选重叠长度
+- 按允许的错配率逐一校验候选重叠，取最长的一个
+
+一个种子内含错配时其余种子仍可命中，因此可容忍少量测序/组装错误。
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .faidx import FastaIndex, open_fasta_index
+
+SEED_K = 21
+SEED_OFFSETS = (0, 21, 42, 63)
+MIN_OVERLAP = 30
+MAX_OVERLAP = 10_000
+MAX_MISMATCH_RATE = 0.02
+# k-mer 编码占 2k 位，其上放 contig 编号
+_CODE_BITS = 2 * SEED_K
+
+_ENCODE = np.full(256, 4, dtype=np.uint8)
+for _code, _bases in enumerate((b"Aa", b"Cc", b"Gg", b"Tt")):
+    for _base in _bases:
+        _ENCODE[_base] = _code
+
+
+def _encode(parts: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """拼接序列（以无效碱基分隔），返回编码数组与各段起点"""
+    lengths = np.array([len(p) + 1 for p in parts], dtype=np.int64)
+    starts = np.zeros(len(parts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    joined = np.frombuffer(b"\0".join(parts) + b"\0", dtype=np.uint8)
+    return _ENCODE[joined], starts
+
+
+def _kmer_hashes(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """所有位置的 k-mer 哈希（2-bit 精确编码，逐碱基滚动移入）与是否不含无效碱基"""
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    hashes = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        hashes = (hashes << np.uint64(2)) | (codes[j:j + n] & 3).astype(np.uint64)
+    invalid = np.concatenate(([0], np.cumsum(codes == 4)))
+    return hashes, invalid[k:] - invalid[:n] == 0
+
+
+def terminal_overlaps(
+    ends: Sequence[Tuple[bytes, bytes]],
+    min_overlap: int = MIN_OVERLAP,
+    max_mismatch_rate: float = MAX_MISMATCH_RATE,
+) -> List[int]:
+    """
+    批量计算首尾重叠长度
+
+    Args:
+        ends: 每条 contig 的 (头部, 尾部)，两者等长，即序列的前 W 与后 W 个碱基
+
+    Returns:
+        每条 contig 的重叠长度（bp），0 表示未检测到
+    """
+    result = [0] * len(ends)
+    if not ends:
+        return result
+    heads = [h for h, _ in ends]
+    tails = [t for _, t in ends]
+    widths = np.array([len(t) for t in tails], dtype=np.int64)
+    tail_codes, tail_starts = _encode(tails)
+    head_codes, head_starts = _encode(heads)
+
+    # 尾部 k-mer：键为 (contig 编号, 哈希)
+    hashes, valid = _kmer_hashes(tail_codes, SEED_K)
+    positions = np.flatnonzero(valid)
+    owner = np.searchsorted(tail_starts, positions, side="right") - 1
+    keys = (owner.astype(np.uint64) << np.uint64(_CODE_BITS)) | hashes[positions]
+    order = np.argsort(keys, kind="stable")
+    keys, positions, owner = keys[order], positions[order], owner[order]
+
+    # 头部种子
+    head_hashes, head_valid = _kmer_hashes(head_codes, SEED_K)
+    seed_owner = np.repeat(np.arange(len(ends)), len(SEED_OFFSETS))
+    seed_offset = np.tile(np.array(SEED_OFFSETS, dtype=np.int64), len(ends))
+    seed_pos = head_starts[seed_owner] + seed_offset
+    usable = seed_offset + SEED_K <= widths[seed_owner]
+    seed_owner, seed_offset, seed_pos = seed_owner[usable], seed_offset[usable], seed_pos[usable]
+    usable = head_valid[seed_pos]
+    seed_owner, seed_offset, seed_pos = seed_owner[usable], seed_offset[usable], seed_pos[usable]
+    seed_keys = (seed_owner.astype(np.uint64) << np.uint64(_CODE_BITS)) | head_hashes[seed_pos]
+
+    # 展开每个种子在尾部的所有命中
+    left = np.searchsorted(keys, seed_keys, side="left")
+    right = np.searchsorted(keys, seed_keys, side="right")
+    counts = right - left
+    total = int(counts.sum())
+    if not total:
+        return result
+    first = np.repeat(left - np.cumsum(counts) + counts, counts) + np.arange(total)
+    hit_owner = owner[first]
+    local = positions[first] - tail_starts[hit_owner]
+    # 头部 offset 处的种子出现在尾部 local 处 => 重叠长度 = W - local + offset
+    overlap = widths[hit_owner] - local + np.repeat(seed_offset, counts)
+    keep = (overlap >= min_overlap) & (overlap <= widths[hit_owner])
+    candidates = np.unique(np.stack([hit_owner[keep], overlap[keep]], axis=1), axis=0)
+
+    # 每条 contig 从最长的候选开始校验
+    for contig, length in candidates[::-1]:
+        if result[contig]:
+            continue
+        head_start, tail_start = head_starts[contig], tail_starts[contig]
+        width = widths[contig]
+        head = head_codes[head_start:head_start + length]
+        tail = tail_codes[tail_start + width - length:tail_start + width]
+        if np.count_nonzero(head != tail) <= max_mismatch_rate * length:
+            result[int(contig)] = int(length)
+    return result
+
+
+def _ends(index: FastaIndex, name: str, max_overlap: int) -> Tuple[bytes, bytes]:
+    length = index.length(name)
+    width = min(max_overlap, length // 2)
+    if width <= 0:
+        return b"", b""
+    return (index.fetch(name, 0, width).encode(),
+            index.fetch(name, length - width, length).encode())
+
+
+def check_circularity(
+    path: Union[str, Path],
+    names: Optional[Iterable[str]] = None,
+    min_overlap: int = MIN_OVERLAP,
+    max_overlap: int = MAX_OVERLAP,
+    max_mismatch_rate: float = MAX_MISMATCH_RATE,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    检测 FASTA 中（或指定名称的）contig 是否首尾重叠
+
+    Returns:
+        {name: {"length", "is_circular", "overlap", "trimmed_length"}}
+    """
+    index = open_fasta_index(path)
+    names = index.names if names is None else list(names)
+    overlaps = terminal_overlaps([_ends(index, name, max_overlap) for name in names],
+                                 min_overlap=min_overlap, max_mismatch_rate=max_mismatch_rate)
+    report = {}
+    for name, overlap in zip(names, overlaps):
+        length = index.length(name)
+        report[name] = {
+            "length": length,
+            "is_circular": overlap > 0,
+            "overlap": overlap,
+            "trimmed_length": length - overlap,
+        }
+    return report
+
+
+def write_trimmed(
+    path: Union[str, Path],
+    report: Dict[str, Dict[str, Any]],
+    out_path: Union[str, Path],
+    names: Optional[Iterable[str]] = None,
+) -> Path:
+    """按 check_circularity 的结果写出序列，环状 contig 去掉尾部的重叠部分"""
+    index = open_fasta_index(path)
+    out_path = Path(out_path)
+    with open(out_path, "wb") as f:
+        for name in (report if names is None else names):
+            overlap = report.get(name, {}).get("overlap", 0)
+            if not overlap:
+                f.write(index.record_bytes(name))
+                continue
+            width = index.line_bases(name) or 60
+            seq = index.fetch(name, 0, index.length(name) - overlap).encode()
+            f.write(index.header_bytes(name) + b"\n")
+            f.write(b"".join(seq[i:i + width] + b"\n" for i in range(0, len(seq), width)))
+    return out_path
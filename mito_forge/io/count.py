@@ -0,0 +1,189 @@
+"""
+精确读数/碱基数统计（按块扫描换行符）
+
+不解析记录：对固定大小的解压块用 NumPy 定位换行符，由行长直接累加，
+跨块的半行只记录其长度与行号相位：
+
+- FASTQ：第 4n+2 行为序列行（计入碱基），每完成 4 行计一条记录
+- FASTA：以 '>' 开头的行计为记录，其余行计入碱基
+- 行尾的 '\\r' 不计入碱基
+
+未压缩与 bgzip 文件按记录边界切成分片多进程统计（与内置 QC 共用分片逻辑），
+其它压缩格式顺序解压。结果按文件指纹（路径、大小、修改时间）缓存，
+输入校验与内置 QC 扫描全文件时也会写入同一缓存，后续阶段直接复用。
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .qc import MIN_SHARD_BYTES, Boundary, _shard_chunks, shard_boundaries
+from .reads import DEFAULT_CHUNK_SIZE, detect_compression, detect_format, iter_chunks
+
+logger = get_logger(__name__)
+
+NEWLINE = 10
+CARRIAGE_RETURN = 13
+FASTA_HEADER = ord(">")
+
+
+class _LineCounter:
+    """跨块累计记录数与碱基数（每个分片从记录起点开始）"""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.records = 0
+        self.bases = 0
+        # 当前未结束行：已读字节数、在记录内的行号（FASTQ）、是否标题行（FASTA）
+        self.partial = 0
+        self.phase = 0
+        self.header = False
+        self.last_byte = NEWLINE
+
+    def update(self, data: bytes) -> None:
+        if not data:
+            return
+        arr = np.frombuffer(data, dtype=np.uint8)
+        if not self.partial:
+            self.header = arr[0] == FASTA_HEADER
+        newlines = np.flatnonzero(arr == NEWLINE)
+        if not len(newlines):
+            self.partial += len(arr)
+            self.last_byte = int(arr[-1])
+            return
+
+        lengths = np.empty(len(newlines), dtype=np.int64)
+        lengths[0] = newlines[0] + self.partial
+        lengths[1:] = np.diff(newlines) - 1
+        before = arr[np.maximum(newlines - 1, 0)]
+        if newlines[0] == 0:
+            before[0] = self.last_byte
+        lengths -= before == CARRIAGE_RETURN
+
+        if self.fmt == "fastq":
+            self.bases += int(lengths[(1 - self.phase) % 4::4].sum())
+            self.records += len(range((3 - self.phase) % 4, len(lengths), 4))
+            self.phase = (self.phase + len(lengths)) % 4
+        else:
+            headers = np.empty(len(newlines), dtype=bool)
+            headers[0] = self.header
+            headers[1:] = arr[newlines[:-1] + 1] == FASTA_HEADER
+            self.records += int(headers.sum())
+            self.bases += int(lengths[~headers].sum())
+
+        self.partial = len(arr) - int(newlines[-1]) - 1
+        if self.partial:
+            self.header = arr[newlines[-1] + 1] == FASTA_HEADER
+        self.last_byte = int(arr[-1])
+
+    def finish(self) -> Tuple[int, int]:
+        """处理文件末尾没有换行符的最后一行，返回 (记录数, 碱基数)"""
+        if self.partial:
+            length = self.partial - (self.last_byte == CARRIAGE_RETURN)
+            if self.fmt == "fastq":
+                self.bases += length if self.phase == 1 else 0
+                self.records += self.phase == 3
+            elif self.header:
+                self.records += 1
+            else:
+                self.bases += length
+            self.partial = 0
+        return self.records, self.bases
+
+
+def _count(chunks: Iterator[bytes], fmt: str) -> Tuple[int, int]:
+    counter = _LineCounter(fmt)
+    for chunk in chunks:
+        counter.update(chunk)
+    return counter.finish()
+
+
+def _count_shard(path: str, compression: str, fmt: str, start: Boundary, end: Boundary,
+                 chunk_size: int) -> Tuple[int, int]:
+    return _count(_shard_chunks(Path(path), compression, start, end, chunk_size), fmt)
+
+
+def count_reads(
+    path: Union[str, Path],
+    threads: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    精确统计单个 FASTQ/FASTA 文件的记录数与碱基数
+
+    Returns:
+        {"file", "format", "compression", "reads", "bases", "mean_length", "shards", "elapsed_seconds"}
+
+    Raises:
+        OSError / ReadFormatError: 文件不可读或格式无法识别
+    """
+    start = time.time()
+    path = Path(path)
+    fmt = detect_format(path)
+    compression = detect_compression(path)
+    n_shards = max(1, min(int(threads or 1), path.stat().st_size // MIN_SHARD_BYTES))
+    boundaries = shard_boundaries(path, n_shards, fmt) if n_shards > 1 else []
+    if len(boundaries) <= 2:
+        shards = 1
+        reads, bases = _count(iter_chunks(path, chunk_size), fmt)
+    else:
+        args = [(str(path), compression, fmt, lo, hi, chunk_size) for lo, hi in zip(boundaries[:-1], boundaries[1:])]
+        shards = len(args)
+        try:
+            with ProcessPoolExecutor(max_workers=shards) as pool:
+                results = list(pool.map(_count_shard, *zip(*args)))
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Read counting process pool unavailable, counting shards sequentially: {e}")
+            results = [_count_shard(*a) for a in args]
+        reads = sum(r for r, _ in results)
+        bases = sum(b for _, b in results)
+    result = _count_result(path, fmt, compression, reads, bases)
+    result.update({"shards": shards, "elapsed_seconds": round(time.time() - start, 3)})
+    logger.info(f"🔢 Counted {reads} reads / {bases} bp in {path.name} ({result['elapsed_seconds']}s)")
+    return result
+
+
+def _count_result(path: Path, fmt: Optional[str], compression: Optional[str], reads: int, bases: int) -> Dict[str, Any]:
+    return {
+        "file": str(path),
+        "format": fmt,
+        "compression": compression,
+        "reads": int(reads),
+        "bases": int(bases),
+        "mean_length": round(bases / reads, 2) if reads else 0.0,
+    }
+
+
+_count_cache: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+
+def _fingerprint(path: Union[str, Path]) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def cached_count(path: Union[str, Path], threads: int = 1) -> Dict[str, Any]:
+    """按文件指纹缓存 count_reads 的结果"""
+    key = _fingerprint(path)
+    result = _count_cache.get(key)
+    if result is None:
+        result = count_reads(path, threads=threads)
+        _count_cache[key] = result
+    return result
+
+
+def remember_count(path: Union[str, Path], reads: int, bases: int,
+                   fmt: Optional[str] = None, compression: Optional[str] = None) -> None:
+    """其它全文件扫描（输入校验、内置 QC）得到的精确计数写入缓存，避免重复扫描"""
+    try:
+        key = _fingerprint(path)
+    except OSError:
+        return
+    result = _count_result(Path(path), fmt, compression, reads, bases)
+    result.update({"shards": None, "elapsed_seconds": 0.0})
+    _count_cache[key] = result
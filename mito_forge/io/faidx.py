@@ -0,0 +1,204 @@
+"""
+FASTA 索引（与 samtools faidx 的 .fai 格式兼容）与随机读取
+
+候选序列提取、逐 contig 抛光和注释拆分只需要组装结果中的一两条序列。
+建立一次 .fai 索引（每行：名称、长度、首个碱基的字节偏移、每行碱基数、每行字节数），
+之后通过 mmap 直接定位所需区间，读取量只与所取序列的长度有关，而与文件大小无关。
+
+索引写在 FASTA 旁（<file>.fai，samtools/pysam 可直接使用），比 FASTA 旧时自动重建；
+目录不可写时只保存在内存中。仅支持未压缩 FASTA。
+"""
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ..utils.logging import get_logger
+from .reads import detect_compression
+
+logger = get_logger(__name__)
+
+
+class FaiEntry(NamedTuple):
+    name: str
+    length: int
+    offset: int
+    linebases: int
+    linewidth: int
+
+
+def _finish_entry(name: str, length: int, offset: int, lines: List[Tuple[int, int]]) -> FaiEntry:
+    """lines 为该记录每行的 (碱基数, 字节数)；除最后一行外行宽必须一致"""
+    linebases, linewidth = lines[0] if lines else (0, 0)
+    for bases, width in lines[:-1]:
+        if (bases, width) != (linebases, linewidth):
+            raise ValueError(f"Different line length in sequence '{name}', cannot build FASTA index")
+    if len(lines) > 1 and lines[-1][0] > linebases:
+        raise ValueError(f"Different line length in sequence '{name}', cannot build FASTA index")
+    return FaiEntry(name, length, offset, linebases, linewidth)
+
+
+def build_fai(path: Union[str, Path]) -> List[FaiEntry]:
+    """扫描 FASTA 建立索引条目（不写文件）"""
+    entries: List[FaiEntry] = []
+    name: Optional[str] = None
+    length = offset = position = 0
+    lines: List[Tuple[int, int]] = []
+    with open(path, "rb") as f:
+        for line in f:
+            width = len(line)
+            if line.startswith(b">"):
+                if name is not None:
+                    entries.append(_finish_entry(name, length, offset, lines))
+                header = line[1:].strip()
+                name = header.split(None, 1)[0].decode(errors="replace") if header else ""
+                length, offset, lines = 0, position + width, []
+            elif name is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                if bases:
+                    lines.append((bases, width))
+                    length += bases
+            position += width
+    if name is not None:
+        entries.append(_finish_entry(name, length, offset, lines))
+    return entries
+
+
+def write_fai(entries: Iterable[FaiEntry], fai_path: Union[str, Path]) -> None:
+    with open(fai_path, "w", encoding="utf-8") as f:
+        for e in entries:
+            f.write(f"{e.name}\t{e.length}\t{e.offset}\t{e.linebases}\t{e.linewidth}\n")
+
+
+def read_fai(fai_path: Union[str, Path]) -> List[FaiEntry]:
+    entries = []
+    with open(fai_path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 5:
+                entries.append(FaiEntry(fields[0], *(int(v) for v in fields[1:5])))
+    return entries
+
+
+class FastaIndex:
+    """
+    基于 .fai 与 mmap 的 FASTA 随机读取
+
+    用法：
+        with FastaIndex("contigs.fasta") as index:
+            seq = index.fetch("NODE_1", 0, 1000)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        if detect_compression(self.path) != "plain":
+            raise ValueError(f"FASTA index requires an uncompressed FASTA: {self.path}")
+        self.fai_path = Path(f"{self.path}.fai")
+        self.entries = self._load()
+        self._by_name: Dict[str, FaiEntry] = {e.name: e for e in self.entries}
+        self._handle = open(self.path, "rb")
+        size = os.fstat(self._handle.fileno()).st_size
+        self._mm = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def _load(self) -> List[FaiEntry]:
+        try:
+            # 严格晚于 FASTA 才复用：同一时钟刻度内改写的 FASTA 不会误用旧索引
+            if self.fai_path.stat().st_mtime_ns > self.path.stat().st_mtime_ns:
+                return read_fai(self.fai_path)
+        except OSError:
+            pass
+        entries = build_fai(self.path)
+        try:
+            write_fai(entries, self.fai_path)
+        except OSError as e:
+            logger.debug(f"Could not write FASTA index {self.fai_path}: {e}")
+        return entries
+
+    @property
+    def names(self) -> List[str]:
+        return [e.name for e in self.entries]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def length(self, name: str) -> int:
+        return self._entry(name).length
+
+    def _entry(self, name: str) -> FaiEntry:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise KeyError(f"Sequence '{name}' not found in {self.path}") from None
+
+    def _byte_range(self, entry: FaiEntry, start: int, end: int) -> Tuple[int, int]:
+        def position(pos: int) -> int:
+            return entry.offset + pos // entry.linebases * entry.linewidth + pos % entry.linebases
+        return position(start), position(end - 1) + 1
+
+    def fetch(self, name: str, start: int = 0, end: Optional[int] = None) -> str:
+        """取 name 的 [start, end) 区间（0 起始、半开区间，越界自动截断）"""
+        entry = self._entry(name)
+        end = entry.length if end is None else min(end, entry.length)
+        start = max(start, 0)
+        if end <= start or not entry.linebases:
+            return ""
+        lo, hi = self._byte_range(entry, start, end)
+        return self._mm[lo:hi].translate(None, b"\r\n").decode("ascii")
+
+    def line_bases(self, name: str) -> int:
+        return self._entry(name).linebases
+
+    def header_bytes(self, name: str) -> bytes:
+        """标题行（含 '>'，不含换行符）"""
+        entry = self._entry(name)
+        return self._mm[self._mm.rfind(b">", 0, entry.offset):entry.offset].rstrip(b"\r\n")
+
+    def record_bytes(self, name: str) -> bytes:
+        """整条记录的原始字节（标题行 + 序列行），直接按字节区间复制"""
+        entry = self._entry(name)
+        header_start = self._mm.rfind(b">", 0, entry.offset)
+        if entry.linebases and entry.length:
+            end = self._byte_range(entry, 0, entry.length)[1]
+            end = self._mm.find(b"\n", end - 1)
+            end = len(self._mm) if end < 0 else end + 1
+        else:
+            end = entry.offset
+        data = self._mm[header_start:end]
+        return data if data.endswith(b"\n") else data + b"\n"
+
+    def write_subset(self, names: Iterable[str], out_path: Union[str, Path]) -> Path:
+        """把选定序列写入新 FASTA（按 names 顺序）"""
+        out_path = Path(out_path)
+        with open(out_path, "wb") as f:
+            for name in names:
+                f.write(self.record_bytes(name))
+        return out_path
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._handle.close()
+
+    def __enter__(self) -> "FastaIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_index_cache: Dict[Tuple[str, int, int], FastaIndex] = {}
+
+
+def open_fasta_index(path: Union[str, Path]) -> FastaIndex:
+    """按文件指纹（路径、大小、修改时间）复用已打开的索引，每个组装文件只建一次"""
+    stat = os.stat(path)
+    key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    index = _index_cache.get(key)
+    if index is None:
+        index = FastaIndex(path)
+        _index_cache[key] = index
+    return index
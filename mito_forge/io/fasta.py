@@ -0,0 +1,193 @@
+"""
+流式 FASTA 统计引擎
+
+组装结果（植物线粒体组装、SPAdes 的全部 contig）可能很大，这里单次流式扫描、
+不保留序列本身，只为每条 contig 记录一行元数据：
+
+- 序列数、总长、最长/最短/平均长度、N50/N90/L50/L90
+- GC 含量（按 A/C/G/T 以外的碱基也计入分母，与旧实现一致）、N 碱基数与 N 连续段数
+- 从标题解析的 contig 覆盖度（SPAdes `cov_12.3`、`depth=`/`coverage=`/`cov=`、MEGAHIT `multi=`）
+
+内存占用只与块大小、最长标题行和 contig 数有关；gzip/bgzip/zstd 压缩的 FASTA 同样支持。
+"""
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .reads import DEFAULT_CHUNK_SIZE, iter_chunks
+
+COVERAGE_PATTERNS = [
+    re.compile(rb"_cov_(\d+(?:\.\d+)?)"),
+    re.compile(rb"\b(?:depth|coverage|cov|multi)=(\d+(?:\.\d+)?)x?", re.IGNORECASE),
+]
+N_RUN = re.compile(rb"[Nn]+")
+# 序列行中不计入碱基的字符
+LINE_CHARS = b"\r\n \t"
+
+
+def header_coverage(header: bytes) -> Optional[float]:
+    """从 FASTA 标题解析 contig 覆盖度（无法解析时为 None）"""
+    for pattern in COVERAGE_PATTERNS:
+        match = pattern.search(header)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def nx_stats(lengths: List[int], fraction: float) -> Tuple[int, int]:
+    """(Nx, Lx)：按长度降序累加首次达到总长 fraction 时的 contig 长度与条数"""
+    if not lengths:
+        return 0, 0
+    ordered = sorted(lengths, reverse=True)
+    target = sum(ordered) * fraction
+    cumulative = 0
+    for index, length in enumerate(ordered, start=1):
+        cumulative += length
+        if cumulative >= target:
+            return length, index
+    return ordered[-1], len(ordered)
+
+
+class _FastaScanner:
+    """逐块消费 FASTA 字节，维护当前 contig 的计数"""
+
+    def __init__(self):
+        self.contigs: List[Dict[str, Any]] = []
+        self.at_line_start = True
+        self.in_header = False
+        self.header = b""
+        self.current: Optional[Dict[str, Any]] = None
+        self.last_was_n = False
+
+    def _close(self) -> None:
+        if self.current is not None:
+            self.contigs.append(self.current)
+            self.current = None
+
+    def _open(self, header: bytes) -> None:
+        header = header.rstrip(b"\r").strip()
+        self.current = {
+            "name": (header.split(None, 1)[0] if header else b"").decode(errors="replace"),
+            "header": header.decode(errors="replace"),
+            "length": 0,
+            "gc": 0,
+            "n_count": 0,
+            "n_runs": 0,
+            "coverage": header_coverage(header),
+        }
+        self.last_was_n = False
+
+    def _sequence(self, data: bytes) -> None:
+        if self.current is None:
+            return  # 第一个标题之前的内容忽略
+        bases = data.translate(None, LINE_CHARS)
+        if not bases:
+            return
+        contig = self.current
+        contig["length"] += len(bases)
+        contig["gc"] += bases.count(b"G") + bases.count(b"C") + bases.count(b"g") + bases.count(b"c")
+        n_count = bases.count(b"N") + bases.count(b"n")
+        if n_count:
+            contig["n_count"] += n_count
+            runs = sum(1 for _ in N_RUN.finditer(bases))
+            # 与上一块末尾相连的 N 段不重复计数
+            if self.last_was_n and bases[:1] in (b"N", b"n"):
+                runs -= 1
+            contig["n_runs"] += runs
+        self.last_was_n = bases[-1:] in (b"N", b"n")
+
+    def feed(self, data: bytes) -> None:
+        pos = 0
+        size = len(data)
+        while pos < size:
+            if self.in_header:
+                end = data.find(b"\n", pos)
+                if end < 0:
+                    self.header += data[pos:]
+                    return
+                self._open(self.header + data[pos:end])
+                self.in_header = False
+                self.at_line_start = True
+                pos = end + 1
+                continue
+            if self.at_line_start and data[pos:pos + 1] == b">":
+                self._close()
+                self.in_header = True
+                self.header = b""
+                pos += 1
+                continue
+            start = data.find(b"\n>", pos)
+            end = size if start < 0 else start + 1
+            self._sequence(data[pos:end])
+            self.at_line_start = data[end - 1:end] == b"\n"
+            pos = end
+
+    def finish(self) -> List[Dict[str, Any]]:
+        if self.in_header:
+            self._open(self.header)
+            self.in_header = False
+        self._close()
+        return self.contigs
+
+
+def fasta_stats(path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    单次流式统计 FASTA 文件；文件不存在时返回空统计
+
+    Returns:
+        num_sequences、total_length、lengths、max/min/mean_length、n50/n90/l50/l90、
+        gc_content（百分比）、n_count、n_runs、mean/min/max_coverage 以及每条 contig 的
+        {"name", "header", "length", "gc_content", "n_count", "n_runs", "coverage"}
+    """
+    path = Path(path)
+    scanner = _FastaScanner()
+    if path.exists():
+        for chunk in iter_chunks(path, chunk_size):
+            scanner.feed(chunk)
+    contigs = scanner.finish()
+
+    lengths = [c["length"] for c in contigs]
+    total = sum(lengths)
+    gc = 0
+    for contig in contigs:
+        count = contig.pop("gc")
+        gc += count
+        contig["gc_content"] = round(count / contig["length"] * 100, 2) if contig["length"] else 0.0
+    n50, l50 = nx_stats(lengths, 0.5)
+    n90, l90 = nx_stats(lengths, 0.9)
+    coverages = [c["coverage"] for c in contigs if c["coverage"] is not None]
+    return {
+        "num_sequences": len(contigs),
+        "total_length": total,
+        "lengths": lengths,
+        "max_length": max(lengths) if lengths else 0,
+        "min_length": min(lengths) if lengths else 0,
+        "mean_length": total / len(lengths) if lengths else 0,
+        "n50": n50,
+        "n90": n90,
+        "l50": l50,
+        "l90": l90,
+        "gc_content": gc / total * 100 if total else 0.0,
+        "n_count": sum(c["n_count"] for c in contigs),
+        "n_runs": sum(c["n_runs"] for c in contigs),
+        "mean_coverage": sum(coverages) / len(coverages) if coverages else None,
+        "min_coverage": min(coverages) if coverages else None,
+        "max_coverage": max(coverages) if coverages else None,
+        "contigs": contigs,
+    }
+
+
+def assembly_stats(path: Union[str, Path]) -> Dict[str, Any]:
+    """抛光工具封装使用的组装摘要；无序列时返回空字典"""
+    stats = fasta_stats(path)
+    if not stats["num_sequences"]:
+        return {}
+    return {
+        "total_length": stats["total_length"],
+        "num_contigs": stats["num_sequences"],
+        "n50": stats["n50"],
+        "max_contig_length": stats["max_length"],
+        "min_contig_length": stats["min_length"],
+        "gc_content": round(stats["gc_content"], 2),
+        "n_count": stats["n_count"],
+    }
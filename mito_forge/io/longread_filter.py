@@ -0,0 +1,145 @@
+"""
+长读长按质量加权筛选（Filtlong 风格）
+
+Flye/PMAT 的运行时间随输入碱基数增长。按读长与平均读质量给每条读打分，
+只保留得分最高、总碱基数达到目标预算的读段：
+
+- 得分 = 读长^length_weight × 平均准确率^quality_weight（对数空间计算），
+  平均准确率 = 1 - 碱基错误概率均值（与 NanoPlot/Filtlong 相同，先转错误概率再平均）
+- 两遍流式扫描、内存有界：第一遍统计 得分 × 碱基数 直方图求阈值，第二遍按阈值输出；
+  恰好落在阈值格内的读按出现顺序补足预算（近似 top-K）
+"""
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple, Union
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .bgzf import BgzfWriter
+from .longreads import ERROR_PROBABILITY, MAX_PHRED
+from .reads import DEFAULT_CHUNK_SIZE, ReadBatch, detect_format, iter_chunk_batches
+
+logger = get_logger(__name__)
+
+DEFAULT_MIN_LENGTH = 1000
+# 对数得分直方图：范围覆盖 1bp - 1e13bp 的读长，精度 0.001
+SCORE_MIN = -30.0
+SCORE_MAX = 30.0
+SCORE_STEP = 1e-3
+N_SCORE_BINS = int((SCORE_MAX - SCORE_MIN) / SCORE_STEP) + 1
+
+
+def read_scores(batch: ReadBatch, length_weight: float = 1.0, quality_weight: float = 1.0) -> np.ndarray:
+    """每条读的对数得分（空读为 -inf；FASTA 无质量时只按读长打分）"""
+    lengths = batch.lengths
+    scores = np.full(len(batch), -np.inf)
+    nonempty = lengths > 0
+    if not nonempty.any():
+        return scores
+    scores[nonempty] = length_weight * np.log(lengths[nonempty])
+    if batch.qual is not None and quality_weight:
+        errors = ERROR_PROBABILITY[np.minimum(batch.qual, MAX_PHRED)]
+        mean_error = np.add.reduceat(errors, batch.offsets[:-1][nonempty]) / lengths[nonempty]
+        scores[nonempty] += quality_weight * np.log(np.maximum(1.0 - mean_error, 1e-12))
+    return scores
+
+
+def _score_bins(scores: np.ndarray) -> np.ndarray:
+    return np.clip(((scores - SCORE_MIN) / SCORE_STEP).astype(np.int64), 0, N_SCORE_BINS - 1)
+
+
+def _scored_batches(
+    path: Union[str, Path], min_length: int, length_weight: float, quality_weight: float, chunk_size: int
+) -> Iterator[Tuple[ReadBatch, np.ndarray, np.ndarray]]:
+    """逐块产出 (批次, 得分格, 是否达到最短读长)"""
+    for batch in iter_chunk_batches(path, chunk_size):
+        scores = read_scores(batch, length_weight, quality_weight)
+        eligible = (batch.lengths >= max(min_length, 1))
+        # 裁剪前先把 -inf 排除，避免整型转换告警
+        bins = np.zeros(len(batch), dtype=np.int64)
+        bins[eligible] = _score_bins(scores[eligible])
+        yield batch, bins, eligible
+
+
+def select_long_reads(
+    path: Union[str, Path],
+    out_dir: Union[str, Path],
+    target_bases: int,
+    min_length: int = DEFAULT_MIN_LENGTH,
+    length_weight: float = 1.0,
+    quality_weight: float = 1.0,
+    threads: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    选取得分最高、总碱基数约为 target_bases 的长读，写出 selected_long_reads（BGZF）
+
+    达到最短读长的读总碱基数不超过预算时不做筛选，直接返回原文件（selected=False）。
+
+    Raises:
+        OSError / ReadFormatError: 文件不可读或格式错误
+    """
+    start = time.time()
+    bases_hist = np.zeros(N_SCORE_BINS, dtype=np.int64)
+    total_reads = total_bases = 0
+    for batch, bins, eligible in _scored_batches(path, min_length, length_weight, quality_weight, chunk_size):
+        total_reads += len(batch)
+        total_bases += batch.total_bases
+        bases_hist += np.bincount(bins[eligible], weights=batch.lengths[eligible],
+                                  minlength=N_SCORE_BINS).astype(np.int64)
+
+    eligible_bases = int(bases_hist.sum())
+    result = {
+        "reads": str(path),
+        "selected": False,
+        "total_reads": total_reads,
+        "total_bases": total_bases,
+        "kept_reads": total_reads,
+        "kept_bases": total_bases,
+        "target_bases": int(target_bases),
+        "min_length": min_length,
+        "score_threshold": None,
+    }
+    if eligible_bases <= target_bases:
+        logger.info(f"Long reads total {eligible_bases} bp within target {target_bases} bp, no selection needed")
+        result["elapsed_seconds"] = round(time.time() - start, 3)
+        return result
+
+    # 从高分往低分累加碱基数，阈值格 = 累计首次达到预算的格
+    from_top = np.cumsum(bases_hist[::-1])
+    threshold = N_SCORE_BINS - 1 - int(np.searchsorted(from_top, target_bases))
+    budget = int(target_bases - bases_hist[threshold + 1:].sum())
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".fq.gz" if detect_format(path) == "fastq" else ".fa.gz"
+    out_path = out_dir / f"selected_long_reads{suffix}"
+    kept_reads = kept_bases = 0
+    with BgzfWriter(out_path, threads=threads) as writer:
+        for batch, bins, eligible in _scored_batches(path, min_length, length_weight, quality_weight, chunk_size):
+            keep = eligible & (bins > threshold)
+            # 阈值格内的读按出现顺序补足剩余预算
+            boundary = np.flatnonzero(eligible & (bins == threshold))
+            if len(boundary) and budget > 0:
+                cumulative = np.cumsum(batch.lengths[boundary])
+                take = boundary[:int(np.searchsorted(cumulative, budget)) + 1]
+                keep[take] = True
+                budget -= int(batch.lengths[take].sum())
+            kept_reads += int(keep.sum())
+            kept_bases += int(batch.lengths[keep].sum())
+            writer.write(batch.to_bytes(keep))
+
+    result.update({
+        "reads": str(out_path),
+        "selected": True,
+        "kept_reads": kept_reads,
+        "kept_bases": kept_bases,
+        "score_threshold": round(SCORE_MIN + threshold * SCORE_STEP, 3),
+        "elapsed_seconds": round(time.time() - start, 3),
+    })
+    logger.info(
+        f"✅ Selected {kept_reads}/{total_reads} long reads, {kept_bases}/{total_bases} bp "
+        f"(target {target_bases} bp, {result['elapsed_seconds']}s)"
+    )
+    return result
@@ -0,0 +1,240 @@
+"""
+长读长（ONT/PacBio）统计引擎
+
+单次流式扫描即可得到 NanoPlot 的全部指标，不渲染图表：
+
+- 读数、总碱基、平均/中位读长、N50/N90
+- 平均/中位读质量与 Q 阈值产出（达到阈值的读数与碱基数）
+- 读长（log10）× 读质量 二维直方图
+
+读质量与 NanoPlot 一致：先把每个碱基的 Phred 转成错误概率求平均，再换算回 Phred。
+图表是可选的：render_long_read_plots() 由结果中的直方图绘制（需要 matplotlib），不会重读文件。
+"""
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .profile import EXPECTED_PHRED
+from .reads import DEFAULT_CHUNK_SIZE, ReadBatch, iter_chunk_batches
+
+logger = get_logger(__name__)
+
+MAX_PHRED = 93
+ERROR_PROBABILITY = 10.0 ** (-np.arange(MAX_PHRED + 1) / 10.0)
+# 读质量直方图：0.1 精度，60 以上合并
+QUALITY_RESOLUTION = 10
+QUALITY_MAX = 60
+QUALITY_THRESHOLDS = (5, 7, 10, 12, 15, 20, 25, 30)
+# 二维直方图：log10(读长) 步长 0.1（1bp - 10Mbp），读质量步长 1
+LENGTH_EDGES = np.round(np.arange(0, 7.01, 0.1), 1)
+QUALITY_EDGES = np.arange(0, QUALITY_MAX + 1)
+
+
+class LongReadStats:
+    """长读长统计累加器（按批次 update，结果精确；中位读质量精确到 0.1）"""
+
+    def __init__(self):
+        self.reads = 0
+        self.bases = 0
+        self.gc_bases = 0
+        self.has_quality = False
+        self.quality_sum = 0.0
+        n_bins = QUALITY_MAX * QUALITY_RESOLUTION + 1
+        self.quality_reads = np.zeros(n_bins, dtype=np.int64)
+        self.quality_bases = np.zeros(n_bins, dtype=np.int64)
+        self.length_hist = np.zeros(len(LENGTH_EDGES) - 1, dtype=np.int64)
+        self.length_quality = np.zeros((len(LENGTH_EDGES) - 1, len(QUALITY_EDGES) - 1), dtype=np.int64)
+        self.length_counts: Dict[int, int] = {}
+
+    def update(self, batch: ReadBatch) -> None:
+        if not len(batch):
+            return
+        lengths = batch.lengths
+        self.reads += len(batch)
+        self.bases += batch.total_bases
+        self.gc_bases += int(batch.gc_counts().sum())
+        for length, count in zip(*np.unique(lengths, return_counts=True)):
+            self.length_counts[int(length)] = self.length_counts.get(int(length), 0) + int(count)
+
+        nonempty = lengths > 0
+        length_bin = np.clip(np.log10(lengths[nonempty]) * 10, 0, len(LENGTH_EDGES) - 2).astype(np.int64)
+        self.length_hist += np.bincount(length_bin, minlength=len(self.length_hist))
+        if batch.qual is None:
+            return
+        self.has_quality = True
+        errors = ERROR_PROBABILITY[np.minimum(batch.qual, MAX_PHRED)]
+        mean_error = np.add.reduceat(errors, batch.offsets[:-1][nonempty]) / lengths[nonempty]
+        read_quality = -10 * np.log10(mean_error)
+        self.quality_sum += float(read_quality.sum())
+
+        # 1e-9 抵消 log10 的舍入误差，使恰好为 Q20 的读落入 20.0 这一格
+        quality_bin = np.minimum((read_quality * QUALITY_RESOLUTION + 1e-9).astype(np.int64), len(self.quality_reads) - 1)
+        self.quality_reads += np.bincount(quality_bin, minlength=len(self.quality_reads))
+        self.quality_bases += np.bincount(quality_bin, weights=lengths[nonempty],
+                                          minlength=len(self.quality_bases)).astype(np.int64)
+        quality_col = np.minimum(read_quality.astype(np.int64), len(QUALITY_EDGES) - 2)
+        cells = np.bincount(length_bin * (len(QUALITY_EDGES) - 1) + quality_col, minlength=self.length_quality.size)
+        self.length_quality += cells.reshape(self.length_quality.shape)
+
+    def _length_at(self, fraction: float) -> int:
+        """按碱基累计（从长到短）达到 fraction 时的读长，即 N50/N90"""
+        if not self.bases:
+            return 0
+        lengths = np.array(sorted(self.length_counts, reverse=True), dtype=np.int64)
+        counts = np.array([self.length_counts[v] for v in lengths.tolist()], dtype=np.int64)
+        cumulative = np.cumsum(lengths * counts)
+        return int(lengths[np.searchsorted(cumulative, self.bases * fraction)])
+
+    def median_length(self) -> float:
+        if not self.reads:
+            return 0.0
+        lengths = np.array(sorted(self.length_counts), dtype=np.int64)
+        cumulative = np.cumsum([self.length_counts[v] for v in lengths.tolist()])
+        lower = lengths[np.searchsorted(cumulative, (self.reads + 1) // 2)]
+        upper = lengths[np.searchsorted(cumulative, self.reads // 2 + 1)]
+        return float(lower + upper) / 2
+
+    def quality_yields(self) -> Dict[str, Dict[str, Any]]:
+        yields = {}
+        for threshold in QUALITY_THRESHOLDS:
+            reads = int(self.quality_reads[threshold * QUALITY_RESOLUTION:].sum())
+            bases = int(self.quality_bases[threshold * QUALITY_RESOLUTION:].sum())
+            yields[f"Q{threshold}"] = {
+                "reads": reads,
+                "bases": bases,
+                "percent_reads": round(reads * 100 / self.reads, 2) if self.reads else 0.0,
+                "percent_bases": round(bases * 100 / self.bases, 2) if self.bases else 0.0,
+            }
+        return yields
+
+    def to_metrics(self, filename: str = "", read_type: str = "nanopore") -> Dict[str, Any]:
+        """转换为 QC 指标字典（字段与 NanoPlot 解析结果一致，附加分布数据）"""
+        read_type = str(read_type).lower()
+        lengths = list(self.length_counts)
+        avg_quality = median_quality = 0.0
+        if self.has_quality and self.reads:
+            avg_quality = self.quality_sum / self.reads
+            median_bin = np.searchsorted(np.cumsum(self.quality_reads), (self.reads + 1) // 2)
+            median_quality = median_bin / QUALITY_RESOLUTION
+        yields = self.quality_yields() if self.has_quality else {}
+        n50 = self._length_at(0.5)
+
+        issues = []
+        expected = EXPECTED_PHRED.get(read_type, 15.0)
+        if self.has_quality and self.reads and avg_quality < expected * 0.7:
+            issues.append({
+                "type": "Read quality",
+                "severity": "high" if avg_quality < expected * 0.5 else "medium",
+                "description": f"Mean read quality Q{avg_quality:.1f} below expected Q{expected:.0f} for {read_type}",
+            })
+        if self.reads and n50 < 1000:
+            issues.append({
+                "type": "Read length",
+                "severity": "medium",
+                "description": f"Read length N50 {n50} bp is short for long-read data",
+            })
+
+        return {
+            "filename": filename,
+            "read_type": read_type,
+            "total_reads": self.reads,
+            "total_bases": self.bases,
+            "avg_length": int(round(self.bases / self.reads)) if self.reads else 0,
+            "avg_quality": round(avg_quality, 2),
+            # 与 NanoPlot 相同：按读质量统计的读比例
+            "q20_percent": yields.get("Q20", {}).get("percent_reads", 0.0),
+            "q30_percent": yields.get("Q30", {}).get("percent_reads", 0.0),
+            "gc_content": round(self.gc_bases * 100 / self.bases, 2) if self.bases else 0.0,
+            "n50": n50,
+            "detected_issues": issues,
+            "n90": self._length_at(0.9),
+            "median_length": self.median_length(),
+            "median_quality": round(float(median_quality), 1),
+            "min_length": min(lengths) if lengths else 0,
+            "max_length": max(lengths) if lengths else 0,
+            "quality_yields": yields,
+            "length_histogram": self.length_hist.tolist(),
+            "length_quality_histogram": {
+                "log10_length_edges": LENGTH_EDGES.tolist(),
+                "quality_edges": QUALITY_EDGES.tolist(),
+                "counts": self.length_quality.tolist(),
+            },
+        }
+
+
+def long_read_stats(
+    path: Union[str, Path],
+    read_type: str = "nanopore",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    plot_dir: Optional[Union[str, Path]] = None,
+) -> Dict[str, Any]:
+    """
+    单次扫描统计长读长 FASTQ/FASTA；plot_dir 非空时额外渲染图表
+
+    Raises:
+        OSError / ReadFormatError: 文件不可读或格式错误
+    """
+    start = time.time()
+    stats = LongReadStats()
+    # 直接按解析块累积，块大小由 chunk_size 控制，超长读也不会积攒大批次
+    for batch in iter_chunk_batches(path, chunk_size):
+        stats.update(batch)
+    metrics = stats.to_metrics(Path(path).name, read_type)
+    metrics["engine"] = "native"
+    metrics["elapsed_seconds"] = round(time.time() - start, 3)
+    if plot_dir is not None:
+        metrics["plots"] = [str(p) for p in render_long_read_plots(metrics, plot_dir)]
+    logger.info(
+        f"✅ Long-read stats: {metrics['total_reads']} reads, N50 {metrics['n50']}, "
+        f"mean Q{metrics['avg_quality']} ({metrics['elapsed_seconds']}s)"
+    )
+    return metrics
+
+
+def render_long_read_plots(metrics: Dict[str, Any], out_dir: Union[str, Path]) -> List[Path]:
+    """
+    由 long_read_stats() 的结果绘制读长分布与读长 × 质量热图
+
+    只使用已累积的直方图，可在统计完成后任意时刻调用；未安装 matplotlib 时返回空列表。
+    """
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logger.warning("matplotlib not installed, skipping long-read plots")
+        return []
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    hist = metrics["length_quality_histogram"]
+    counts = np.array(hist["counts"])
+    length_edges = 10 ** np.array(hist["log10_length_edges"])
+    quality_edges = np.array(hist["quality_edges"])
+    paths = []
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.stairs(np.array(metrics["length_histogram"]), length_edges, fill=True, color="#667eea")
+    ax.set_xscale("log")
+    ax.set_xlabel("Read length (bp)")
+    ax.set_ylabel("Reads")
+    ax.set_title(f"Read length distribution (N50 {metrics['n50']} bp)")
+    paths.append(out_dir / "read_length_histogram.png")
+    fig.savefig(paths[-1], dpi=100, bbox_inches="tight")
+    plt.close(fig)
+
+    if counts.any() and metrics.get("quality_yields"):
+        fig, ax = plt.subplots(figsize=(8, 6))
+        mesh = ax.pcolormesh(length_edges, quality_edges, np.ma.masked_equal(counts.T, 0), cmap="viridis")
+        ax.set_xscale("log")
+        ax.set_xlabel("Read length (bp)")
+        ax.set_ylabel("Mean read quality")
+        ax.set_title("Read length vs quality")
+        fig.colorbar(mesh, ax=ax, label="Reads")
+        paths.append(out_dir / "length_vs_quality.png")
+        fig.savefig(paths[-1], dpi=100, bbox_inches="tight")
+        plt.close(fig)
+    return paths
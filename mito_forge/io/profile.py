@@ -0,0 +1,409 @@
+"""
+输入数据快速画像（抽样）
+
+不做全量扫描：在文件中分层随机选取若干窗口，从每个窗口内的记录边界开始解析，
+再用蓄水池抽样保留 N 条记录，统计读长分布、平均 Phred、GC 与 N 含量（附 95% 置信区间），
+并根据读 ID 格式与长度/质量分布推断测序平台。
+
+- 未压缩文件：直接 seek 到随机偏移
+- bgzip / 多成员 gzip / 多帧 zstd：seek 后查找下一个压缩块（成员/帧）起点并从那里解压
+- 单成员 gzip 无法随机访问：退化为读取文件头部（sampling_mode = "head"）
+
+窗口内被截断的首条记录会被丢弃，因此长读长不会因"落点概率与长度成正比"而被过采样。
+"""
+import math
+import os
+import random
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .reads import (
+    GZIP_MAGIC, ZSTD_MAGIC, ReadBatch, _split_fasta, _split_fastq,
+    detect_compression, detect_format, open_bytes,
+)
+
+DEFAULT_SAMPLE_SIZE = 10000
+DEFAULT_WINDOWS = 64
+DEFAULT_WINDOW_BYTES = 1 << 20
+HEAD_BYTES = 32 << 20
+# 在随机偏移后查找压缩块起点的最大距离
+MEMBER_SEARCH_BYTES = 1 << 20
+
+ILLUMINA_ADAPTER = b"AGATCGGAAGAGC"
+
+# 读 ID 格式 -> 平台
+ID_PATTERNS = [
+    ("pacbio_hifi", re.compile(rb"^m\d+\S*/\d+/ccs")),
+    ("pacbio_clr", re.compile(rb"^m\d+\S*/\d+/\d+_\d+")),
+    ("nanopore", re.compile(rb"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")),
+    ("illumina", re.compile(rb"^\S+:\d+:\S+:\d+:\d+:\d+:\d+")),   # CASAVA 1.8+
+    ("illumina", re.compile(rb"^\S+:\d+:\d+:\d+:\d+#")),          # CASAVA 1.4-1.7
+]
+
+# 各平台的典型平均质量，用于把 Phred 归一化为 0-1 的质量分
+EXPECTED_PHRED = {"illumina": 30.0, "pacbio_hifi": 30.0, "nanopore": 15.0, "pacbio_clr": 10.0}
+
+
+def _stratified_offsets(size: int, n: int, rng: random.Random) -> List[int]:
+    step = size / n
+    return [0] + [int((i + rng.random()) * step) for i in range(1, n)]
+
+
+def _plain_windows(path: Path, size: int, n_windows: int, window_bytes: int,
+                   rng: random.Random) -> Iterator[Tuple[bytes, bool, bool]]:
+    """产出 (窗口数据, 是否文件起点, 是否文件末尾)"""
+    with open(path, "rb") as f:
+        if size <= n_windows * window_bytes:
+            yield f.read(), True, True
+            return
+        for offset in _stratified_offsets(size, n_windows, rng):
+            f.seek(offset)
+            data = f.read(window_bytes)
+            yield data, offset == 0, offset + len(data) >= size
+
+
+def _decompressor(compression: str):
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+def _is_member_start(buf: bytes, pos: int, compression: str) -> bool:
+    if compression == "zstd":
+        return buf.startswith(ZSTD_MAGIC, pos)
+    if not buf.startswith(GZIP_MAGIC + b"\x08", pos):
+        return False
+    if compression == "bgzip":
+        return len(buf) >= pos + 14 and buf[pos + 3] & 0x04 and buf[pos + 12:pos + 14] == b"BC"
+    return True
+
+
+def _decompress_from(f, offset: int, compression: str, window_bytes: int) -> Optional[bytes]:
+    """从 offset 之后的第一个可解压块起点解压约 window_bytes 字节；找不到时返回 None"""
+    f.seek(offset)
+    buf = f.read(MEMBER_SEARCH_BYTES)
+    magic = ZSTD_MAGIC if compression == "zstd" else GZIP_MAGIC
+    pos = buf.find(magic)
+    while pos >= 0:
+        if _is_member_start(buf, pos, compression):
+            out = _inflate(f, offset + pos, compression, window_bytes)
+            if out:
+                return out
+        pos = buf.find(magic, pos + 1)
+    return None
+
+
+def _inflate(f, start: int, compression: str, window_bytes: int) -> Optional[bytes]:
+    f.seek(start)
+    decomp = _decompressor(compression)
+    out = []
+    produced = 0
+    try:
+        while produced < window_bytes:
+            data = f.read(256 * 1024)
+            if not data:
+                break
+            while data and produced < window_bytes:
+                piece = decomp.decompress(data)
+                out.append(piece)
+                produced += len(piece)
+                # 成员/帧结束后从剩余数据继续下一个
+                data = decomp.unused_data if decomp.eof else b""
+                if decomp.eof:
+                    decomp = _decompressor(compression)
+    except Exception:
+        # 魔数的假阳性（压缩数据中恰好出现）会在这里解压失败
+        return b"".join(out) if produced else None
+    return b"".join(out)
+
+
+def _compressed_windows(path: Path, compression: str, size: int, n_windows: int, window_bytes: int,
+                        rng: random.Random, stats: Dict[str, Any]) -> Iterator[Tuple[bytes, bool, bool]]:
+    if size > n_windows * MEMBER_SEARCH_BYTES:
+        with open(path, "rb") as f:
+            found = 0
+            for offset in _stratified_offsets(size, n_windows, rng)[1:]:
+                data = _decompress_from(f, offset, compression, window_bytes)
+                if data is None:
+                    # 单成员 gzip：偏移之后没有可独立解压的块
+                    break
+                found += 1
+                yield data, False, False
+        if found:
+            stats["sampling_mode"] = "blocks"
+            # 文件头部作为第一个窗口
+            with open_bytes(path, compression) as handle:
+                yield handle.read(window_bytes), True, False
+            return
+    with open_bytes(path, compression) as handle:
+        data = handle.read(HEAD_BYTES)
+        at_end = not handle.read(1)
+    stats["sampling_mode"] = "full" if at_end else "head"
+    yield data, True, at_end
+
+
+def _window_records(data: bytes, fmt: str, at_start: bool, at_end: bool):
+    """解析窗口内的完整记录：丢弃首条（可能被截断）与末条不完整记录"""
+    if fmt == "fasta":
+        if not at_start:
+            cut = data.find(b"\n>")
+            if cut < 0:
+                return [], [], None
+            data = data[cut + 1:]
+        if not at_end:
+            cut = data.rfind(b"\n>")
+            if cut <= 0:
+                return [], [], None
+            data = data[:cut]
+        if not data.strip():
+            return [], [], None
+        return _split_fasta(data)
+
+    lines = data.split(b"\n")
+    if not at_end:
+        lines.pop()  # 最后一行可能不完整
+    while lines and not lines[-1].strip():
+        lines.pop()
+    start = 0 if at_start else _fastq_sync(lines)
+    if start is None:
+        return [], [], []
+    usable = (len(lines) - start) // 4 * 4
+    if usable <= 0:
+        return [], [], []
+    return _split_fastq(lines[start:start + usable])
+
+
+def _fastq_sync(lines: List[bytes]) -> Optional[int]:
+    """找到第一个完整 FASTQ 记录的起始行（跳过第 0 行，它可能被截断）"""
+    for i in range(1, len(lines) - 3):
+        if (lines[i][:1] == b"@" and lines[i + 2][:1] == b"+"
+                and len(lines[i + 1].rstrip(b"\r")) == len(lines[i + 3].rstrip(b"\r"))):
+            return i
+    return None
+
+
+def sample_reads(
+    path: Union[str, Path],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    n_windows: int = DEFAULT_WINDOWS,
+    window_bytes: int = DEFAULT_WINDOW_BYTES,
+    seed: int = 0,
+) -> Tuple[ReadBatch, Dict[str, Any]]:
+    """
+    从整个文件中抽样 sample_size 条记录
+
+    Returns:
+        (抽样记录, 抽样信息: format / compression / sampling_mode / records_seen / bytes_per_record)
+    """
+    path = Path(path)
+    rng = random.Random(seed)
+    compression = detect_compression(path)
+    fmt = detect_format(path)
+    size = path.stat().st_size
+    info: Dict[str, Any] = {"format": fmt, "compression": compression, "sampling_mode": "full"}
+
+    if compression == "plain":
+        windows = _plain_windows(path, size, n_windows, window_bytes, rng)
+        if size > n_windows * window_bytes:
+            info["sampling_mode"] = "blocks"
+    else:
+        windows = _compressed_windows(path, compression, size, n_windows, window_bytes, rng, info)
+
+    names: List[bytes] = []
+    seqs: List[bytes] = []
+    quals: Optional[List[bytes]] = [] if fmt == "fastq" else None
+    seen = 0
+    window_bytes_total = 0
+    for data, at_start, at_end in windows:
+        window_bytes_total += len(data)
+        w_names, w_seqs, w_quals = _window_records(data, fmt, at_start, at_end)
+        for i in range(len(w_names)):
+            # 蓄水池抽样（Algorithm R）
+            if seen < sample_size:
+                names.append(w_names[i])
+                seqs.append(w_seqs[i])
+                if quals is not None:
+                    quals.append(w_quals[i])
+            else:
+                j = rng.randrange(seen + 1)
+                if j < sample_size:
+                    names[j], seqs[j] = w_names[i], w_seqs[i]
+                    if quals is not None:
+                        quals[j] = w_quals[i]
+            seen += 1
+
+    info["records_seen"] = seen
+    info["bytes_per_record"] = window_bytes_total / seen if seen else 0.0
+    return ReadBatch.from_lists(names, seqs, quals), info
+
+
+def _mean_ci(values: np.ndarray) -> Tuple[float, List[float]]:
+    if len(values) == 0:
+        return 0.0, [0.0, 0.0]
+    mean = float(values.mean())
+    half = 1.96 * float(values.std(ddof=1)) / math.sqrt(len(values)) if len(values) > 1 else 0.0
+    return mean, [mean - half, mean + half]
+
+
+def _n50(lengths: np.ndarray) -> int:
+    if len(lengths) == 0:
+        return 0
+    ordered = np.sort(lengths)[::-1]
+    cumulative = np.cumsum(ordered)
+    return int(ordered[np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def infer_read_type(batch: ReadBatch, mean_phred: Optional[float]) -> Tuple[str, float, str]:
+    """
+    推断测序平台
+
+    Returns:
+        (read_type, confidence, evidence)
+    """
+    if len(batch):
+        votes: Dict[str, int] = {}
+        for name in batch.names[:2000]:
+            for read_type, pattern in ID_PATTERNS:
+                if pattern.match(name):
+                    votes[read_type] = votes.get(read_type, 0) + 1
+                    break
+        if votes:
+            read_type, count = max(votes.items(), key=lambda kv: kv[1])
+            fraction = count / min(len(batch), 2000)
+            if fraction >= 0.8:
+                return read_type, round(0.8 + 0.15 * fraction, 3), f"read_id:{read_type}"
+
+    if not len(batch):
+        return "illumina", 0.0, "no_reads"
+
+    lengths = batch.lengths
+    median = float(np.median(lengths))
+    if median < 1000:
+        confidence = 0.85 if mean_phred is not None and mean_phred >= 25 else 0.7
+        return "illumina", confidence, "length_distribution"
+    if mean_phred is None:
+        return "nanopore", 0.5, "length_distribution"
+    cv = float(lengths.std() / lengths.mean()) if lengths.mean() else 0.0
+    if mean_phred >= 25 and cv < 0.5:
+        return "pacbio_hifi", 0.75, "length_quality_distribution"
+    if batch.qual is not None and len(batch.qual) and int(batch.qual.max()) == int(batch.qual.min()):
+        # PacBio CLR 转出的 FASTQ 常为恒定质量值
+        return "pacbio_clr", 0.6, "constant_quality"
+    return "nanopore", 0.7, "length_quality_distribution"
+
+
+def profile_reads(
+    path: Union[str, Path],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    n_windows: int = DEFAULT_WINDOWS,
+    window_bytes: int = DEFAULT_WINDOW_BYTES,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    抽样画像：读长分布、平均 Phred、GC、N 含量、接头比例、平台推断（均附 95% 置信区间）
+
+    Raises:
+        OSError / ReadFormatError: 文件不可读或格式无法识别
+    """
+    start = time.time()
+    path = Path(path)
+    batch, info = sample_reads(path, sample_size, n_windows, window_bytes, seed)
+    n = len(batch)
+    lengths = batch.lengths
+    safe_lengths = np.maximum(lengths, 1)
+
+    mean_length, length_ci = _mean_ci(lengths.astype(float))
+    gc_fraction = batch.gc_counts() / safe_lengths
+    n_fraction = batch.n_counts() / safe_lengths
+    gc_content, gc_ci = _mean_ci(gc_fraction)
+    n_content, _ = _mean_ci(n_fraction)
+
+    mean_phred = phred_ci = None
+    if batch.qual is not None and n:
+        mean_phred, phred_ci = _mean_ci(batch.mean_qualities())
+
+    read_type, confidence, evidence = infer_read_type(batch, mean_phred)
+    expected = EXPECTED_PHRED.get(read_type, 30.0)
+    overall_quality = min(1.0, mean_phred / expected) if mean_phred is not None else 0.7
+    overall_quality *= 1.0 - min(1.0, n_content * 10)
+
+    seq_bytes = batch.seq.tobytes()
+    adapters = sum(ILLUMINA_ADAPTER in seq_bytes[batch.offsets[i]:batch.offsets[i + 1]] for i in range(n))
+
+    file_size = path.stat().st_size
+    estimated_reads = int(file_size * _compression_ratio(path, info["compression"]) / info["bytes_per_record"]) \
+        if info["bytes_per_record"] else 0
+
+    def q(p):
+        return int(np.percentile(lengths, p)) if n else 0
+
+    return {
+        "path": str(path),
+        "format": info["format"],
+        "compression": info["compression"],
+        "sampling_mode": info["sampling_mode"],
+        "sampled_reads": n,
+        "records_seen": info["records_seen"],
+        "read_type": read_type,
+        "read_type_confidence": confidence,
+        "read_type_evidence": evidence,
+        "length": {
+            "mean": round(mean_length, 1),
+            "mean_ci95": [round(v, 1) for v in length_ci],
+            "median": q(50), "p10": q(10), "p90": q(90),
+            "min": int(lengths.min()) if n else 0,
+            "max": int(lengths.max()) if n else 0,
+            "n50": _n50(lengths),
+        },
+        "mean_phred": round(mean_phred, 2) if mean_phred is not None else None,
+        "mean_phred_ci95": [round(v, 2) for v in phred_ci] if phred_ci else None,
+        "gc_content": round(gc_content, 4),
+        "gc_content_ci95": [round(v, 4) for v in gc_ci],
+        "n_content": round(n_content, 5),
+        "adapter_fraction": round(adapters / n, 4) if n else 0.0,
+        "overall_quality": round(max(0.0, overall_quality), 3),
+        "estimated_reads": estimated_reads,
+        "estimated_bases": int(estimated_reads * mean_length),
+        "elapsed_seconds": round(time.time() - start, 3),
+    }
+
+
+def _compression_ratio(path: Path, compression: str) -> float:
+    """解压后/压缩前的字节比（由文件头部估算，用于按文件大小推算记录数）"""
+    if compression == "plain":
+        return 1.0
+    with open(path, "rb") as f:
+        raw = f.read(4 << 20)
+    decomp = _decompressor(compression)
+    produced = 0
+    data = raw
+    try:
+        while data:
+            produced += len(decomp.decompress(data))
+            if not decomp.eof:
+                break
+            data = decomp.unused_data
+            decomp = _decompressor(compression)
+    except Exception:
+        return 1.0
+    return produced / len(raw) if raw and produced else 1.0
+
+
+_profile_cache: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+
+def cached_profile(path: Union[str, Path], **kwargs) -> Dict[str, Any]:
+    """按文件指纹（路径、大小、修改时间）缓存画像结果"""
+    stat = os.stat(path)
+    key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    profile = _profile_cache.get(key)
+    if profile is None:
+        profile = profile_reads(path, **kwargs)
+        _profile_cache[key] = profile
+    return profile
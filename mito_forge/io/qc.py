@@ -0,0 +1,474 @@
+"""
+内置 QC 引擎（向量化，不依赖 FastQC/NanoPlot）
+
+按块解析 FASTQ/FASTA，用 NumPy 在整个文件上累积：
+
+- 每个位置的质量分布（位置 × Phred 计数矩阵，可得均值/中位数/四分位数）
+- 每条序列平均质量的直方图、每条序列 GC 含量分布
+- 每个位置的 N 含量
+- 重复率估计（每个分片前若干条序列的前 50bp）
+
+Q20/Q30 为 Phred ≥ 20/30 的碱基精确比例，而不是由平均质量推算。
+
+未压缩与 bgzip 输入按字节范围切成分片，各进程从记录边界开始统计后合并；
+单成员 gzip 与 zstd 只能顺序解压，使用单进程。
+输出与 parse_fastqc_output 相同的指标字典（附加分布数据），可直接替换 FastQC 结果。
+"""
+import struct
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .profile import EXPECTED_PHRED, _fastq_sync
+from .reads import (
+    DEFAULT_CHUNK_SIZE, GZIP_MAGIC, ReadBatch, _fasta_blocks, _fastq_blocks,
+    detect_compression, detect_format, iter_chunks,
+)
+
+logger = get_logger(__name__)
+
+MAX_PHRED = 93
+N_PHRED = MAX_PHRED + 1
+# 超过该位置的碱基合并到最后一个位置统计（长读长）
+MAX_POSITIONS = 1000
+# 每个分片用于估计重复率的序列数与前缀长度
+DUPLICATE_READS = 100000
+DUPLICATE_PREFIX = 50
+# 每个分片的最小字节数，小文件不值得启动多进程
+MIN_SHARD_BYTES = 16 << 20
+SYNC_BYTES = 1 << 20
+
+LONG_READ_TYPES = {"nanopore", "pacbio_hifi", "pacbio_clr"}
+
+# 边界：(文件偏移, 从该偏移处解压后再跳过的字节数)；未压缩文件第二项恒为 0
+Boundary = Tuple[int, int]
+
+
+class QCAccumulator:
+    """
+    可合并的 QC 统计累加器
+
+    每个分片独立累积，最后用 merge() 合并；所有计数均为精确值（重复率除外）。
+    """
+
+    def __init__(self, max_positions: int = MAX_POSITIONS, duplicate_reads: int = DUPLICATE_READS):
+        self.max_positions = max_positions
+        self.duplicate_reads = duplicate_reads
+        self.reads = 0
+        self.bases = 0
+        self.gc_bases = 0
+        self.n_bases = 0
+        self.has_quality = False
+        self.position_quality = np.zeros((max_positions, N_PHRED), dtype=np.int64)
+        self.position_bases = np.zeros(max_positions, dtype=np.int64)
+        self.position_n = np.zeros(max_positions, dtype=np.int64)
+        self.sequence_quality = np.zeros(N_PHRED, dtype=np.int64)
+        self.gc_distribution = np.zeros(101, dtype=np.int64)
+        self.length_counts: Dict[int, int] = {}
+        self.sequence_counts: Counter = Counter()
+        self.tracked_reads = 0
+
+    def update(self, batch: ReadBatch) -> None:
+        n = len(batch)
+        if not n:
+            return
+        lengths = batch.lengths
+        total = batch.total_bases
+        self.reads += n
+        self.bases += total
+        for length, count in zip(*np.unique(lengths, return_counts=True)):
+            self.length_counts[int(length)] = self.length_counts.get(int(length), 0) + int(count)
+
+        # 位置 p 上的碱基数 = 长度 > p 的记录数；最后一个位置累计其后的全部碱基
+        last = self.max_positions - 1
+        ending = np.bincount(np.minimum(lengths, last), minlength=self.max_positions)
+        self.position_bases[:last] += n - np.cumsum(ending)[:last]
+        self.position_bases[last] += int(np.maximum(lengths - last, 0).sum())
+
+        # 每个碱基在所属记录内的位置
+        positions = np.arange(total, dtype=np.int32) - np.repeat(batch.offsets[:-1].astype(np.int32), lengths)
+        np.minimum(positions, last, out=positions)
+        is_n = (batch.seq & 0xDF) == ord("N")
+        self.position_n += np.bincount(positions[is_n], minlength=self.max_positions)
+        self.n_bases += int(is_n.sum())
+
+        gc = batch.gc_counts()
+        self.gc_bases += int(gc.sum())
+        nonempty = lengths > 0
+        gc_percent = np.rint(gc[nonempty] * 100 / lengths[nonempty]).astype(np.int64)
+        self.gc_distribution += np.bincount(gc_percent, minlength=101)
+
+        if batch.qual is not None:
+            self.has_quality = True
+            qual = np.minimum(batch.qual, MAX_PHRED)
+            cells = np.bincount(positions * N_PHRED + qual, minlength=self.max_positions * N_PHRED)
+            self.position_quality += cells.reshape(self.max_positions, N_PHRED)
+            mean_q = np.minimum(np.rint(batch.mean_qualities()[nonempty]), MAX_PHRED).astype(np.int64)
+            self.sequence_quality += np.bincount(mean_q, minlength=N_PHRED)
+
+        if self.tracked_reads < self.duplicate_reads:
+            take = min(n, self.duplicate_reads - self.tracked_reads)
+            data = batch.seq[:batch.offsets[take]].tobytes()
+            starts = batch.offsets[:take]
+            ends = np.minimum(starts + DUPLICATE_PREFIX, batch.offsets[1:take + 1])
+            self.sequence_counts.update(data[s:e] for s, e in zip(starts.tolist(), ends.tolist()))
+            self.tracked_reads += take
+
+    def merge(self, other: "QCAccumulator") -> "QCAccumulator":
+        self.reads += other.reads
+        self.bases += other.bases
+        self.gc_bases += other.gc_bases
+        self.n_bases += other.n_bases
+        self.has_quality = self.has_quality or other.has_quality
+        self.position_quality += other.position_quality
+        self.position_bases += other.position_bases
+        self.position_n += other.position_n
+        self.sequence_quality += other.sequence_quality
+        self.gc_distribution += other.gc_distribution
+        for length, count in other.length_counts.items():
+            self.length_counts[length] = self.length_counts.get(length, 0) + count
+        self.sequence_counts.update(other.sequence_counts)
+        self.tracked_reads += other.tracked_reads
+        return self
+
+    def n50(self) -> int:
+        if not self.bases:
+            return 0
+        lengths = np.array(sorted(self.length_counts, reverse=True), dtype=np.int64)
+        counts = np.array([self.length_counts[v] for v in lengths.tolist()], dtype=np.int64)
+        cumulative = np.cumsum(lengths * counts)
+        return int(lengths[np.searchsorted(cumulative, self.bases / 2)])
+
+    def per_base_quality(self) -> Dict[str, List[float]]:
+        """每个位置的质量均值与四分位数（最后一个位置包含其后的所有碱基）"""
+        covered = self.position_quality.sum(axis=1)
+        matrix = self.position_quality[covered > 0]
+        covered = covered[covered > 0]
+        if not len(covered):
+            return {"mean": [], "lower_quartile": [], "median": [], "upper_quartile": []}
+        cumulative = np.cumsum(matrix, axis=1)
+
+        def quantile(fraction: float) -> List[float]:
+            rank = np.ceil(covered * fraction)[:, None]
+            return np.argmax(cumulative >= rank, axis=1).astype(float).tolist()
+
+        mean = matrix @ np.arange(N_PHRED) / covered
+        return {
+            "mean": np.round(mean, 2).tolist(),
+            "lower_quartile": quantile(0.25),
+            "median": quantile(0.5),
+            "upper_quartile": quantile(0.75),
+        }
+
+    def detected_issues(self, per_base: Dict[str, List[float]], duplication: float,
+                        long_reads: bool) -> List[Dict[str, str]]:
+        """按 FastQC 的默认阈值给出 WARN/FAIL 模块"""
+        issues = []
+
+        def flag(module: str, warn: bool, fail: bool) -> None:
+            if fail or warn:
+                status = "FAIL" if fail else "WARN"
+                issues.append({
+                    "type": module,
+                    "severity": "high" if fail else "medium",
+                    "description": f"{module} check {status.lower()}ed",
+                })
+
+        # 长读长平台的质量标尺不同，质量相关模块只对短读长生效
+        if self.has_quality and not long_reads and per_base["median"]:
+            lower = min(per_base["lower_quartile"])
+            median = min(per_base["median"])
+            flag("Per base sequence quality", lower < 10 or median < 25, lower < 5 or median < 20)
+            mode = int(np.argmax(self.sequence_quality))
+            flag("Per sequence quality scores", mode < 27, mode < 20)
+        covered = self.position_bases > 0
+        if covered.any():
+            worst_n = float((self.position_n[covered] / self.position_bases[covered]).max() * 100)
+            flag("Per base N content", worst_n > 5, worst_n > 20)
+        flag("Sequence Duplication Levels", duplication > 20, duplication > 50)
+        return issues
+
+    def to_metrics(self, filename: str = "", read_type: str = "illumina") -> Dict[str, Any]:
+        """转换为与 parse_fastqc_output 相同结构的指标字典"""
+        read_type = str(read_type).lower()
+        quality_bases = int(self.position_quality.sum())
+        avg_quality = q20 = q30 = 0.0
+        if quality_bases:
+            per_phred = self.position_quality.sum(axis=0)
+            avg_quality = float(per_phred @ np.arange(N_PHRED)) / quality_bases
+            q20 = float(per_phred[20:].sum()) * 100 / quality_bases
+            q30 = float(per_phred[30:].sum()) * 100 / quality_bases
+        called = self.bases - self.n_bases
+        duplication = (1 - len(self.sequence_counts) / self.tracked_reads) * 100 if self.tracked_reads else 0.0
+        per_base = self.per_base_quality()
+        covered = self.position_bases > 0
+        n_percent = self.position_n[covered] * 100 / self.position_bases[covered]
+
+        overall_quality = 0.7
+        if quality_bases:
+            overall_quality = min(1.0, avg_quality / EXPECTED_PHRED.get(read_type, 30.0))
+
+        lengths = list(self.length_counts)
+        return {
+            "filename": filename,
+            "total_reads": self.reads,
+            "total_bases": self.bases,
+            "avg_length": int(round(self.bases / self.reads)) if self.reads else 0,
+            "avg_quality": round(avg_quality, 2),
+            "gc_content": round(self.gc_bases * 100 / called, 2) if called else 0.0,
+            "q20_percent": round(q20, 2),
+            "q30_percent": round(q30, 2),
+            "detected_issues": self.detected_issues(per_base, duplication, read_type in LONG_READ_TYPES),
+            "read_type": read_type,
+            "min_length": min(lengths) if lengths else 0,
+            "max_length": max(lengths) if lengths else 0,
+            "n50": self.n50(),
+            "overall_quality": round(overall_quality, 3),
+            "n_content": round(self.n_bases * 100 / self.bases, 4) if self.bases else 0.0,
+            "duplication_percent": round(duplication, 2),
+            "has_quality": self.has_quality,
+            "per_base_quality": per_base,
+            "per_base_n_percent": np.round(n_percent, 3).tolist(),
+            "per_sequence_quality": np.trim_zeros(self.sequence_quality, "b").tolist(),
+            "gc_distribution": self.gc_distribution.tolist(),
+        }
+
+
+# ---------------------------------------------------------------------------
+# 分片
+# ---------------------------------------------------------------------------
+
+def _sync_offset(data: bytes, fmt: str, at_end: bool) -> Optional[int]:
+    """data 中下标 ≥ 1 的第一个记录起点（data[0] 之前的内容未知）"""
+    if fmt == "fasta":
+        pos = data.find(b"\n>")
+        return pos + 1 if pos >= 0 else None
+    lines = data.split(b"\n")
+    if not at_end:
+        lines.pop()  # 最后一行可能不完整
+    index = _fastq_sync(lines)
+    if index is None:
+        return None
+    return sum(len(line) + 1 for line in lines[:index])
+
+
+def _plain_boundary(f, offset: int, size: int, fmt: str) -> Boundary:
+    """offset 处或之后的第一个记录起点"""
+    window = SYNC_BYTES
+    while True:
+        # 从 offset - 1 读起：恰好从 offset 开始的记录也能被识别
+        f.seek(offset - 1)
+        data = f.read(window)
+        at_end = offset - 1 + len(data) >= size
+        pos = _sync_offset(data, fmt, at_end)
+        if pos is not None:
+            return offset - 1 + pos, 0
+        if at_end:
+            return size, 0
+        window *= 4
+
+
+def _bgzf_member_size(header: bytes) -> Optional[int]:
+    """由 BGZF 成员头部（含 extra 字段）求成员总字节数；不是 BGZF 头时返回 None"""
+    if len(header) < 18 or not header.startswith(GZIP_MAGIC + b"\x08") or not header[3] & 0x04:
+        return None
+    xlen = struct.unpack("<H", header[10:12])[0]
+    extra = header[12:12 + xlen]
+    pos = 0
+    while pos + 4 <= len(extra):
+        slen = struct.unpack("<H", extra[pos + 2:pos + 4])[0]
+        if extra[pos:pos + 2] == b"BC" and slen == 2:
+            return struct.unpack("<H", extra[pos + 4:pos + 6])[0] + 1
+        pos += 4 + slen
+    return None
+
+
+def _bgzf_members(path: Path, start: int) -> Iterator[Tuple[int, bytes]]:
+    """从 start 处的成员开始，依次产出 (成员偏移, 解压数据)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while True:
+            head = f.read(12)
+            if not head:
+                return
+            xlen = struct.unpack("<H", head[10:12])[0] if len(head) == 12 else 0
+            size = _bgzf_member_size(head + f.read(xlen))
+            if size is None:
+                raise ValueError(f"Invalid BGZF block at offset {offset}: {path}")
+            f.seek(offset)
+            yield offset, zlib.decompress(f.read(size), 31)
+            offset += size
+
+
+def _bgzf_member_after(f, offset: int, size: int) -> int:
+    """offset 处或之后的第一个 BGZF 成员起点（同时校验下一个成员头以排除魔数假阳性）"""
+    f.seek(offset)
+    buf = f.read(SYNC_BYTES + (1 << 16))
+    pos = buf.find(GZIP_MAGIC)
+    while pos >= 0:
+        member_size = _bgzf_member_size(buf[pos:pos + 64])
+        if member_size is not None:
+            following = offset + pos + member_size
+            f.seek(following)
+            if following >= size or _bgzf_member_size(f.read(64)) is not None:
+                return offset + pos
+        pos = buf.find(GZIP_MAGIC, pos + 1)
+    return size
+
+
+def _bgzf_boundary(path: Path, f, offset: int, size: int, fmt: str) -> Boundary:
+    member = _bgzf_member_after(f, offset, size)
+    if member >= size:
+        return size, 0
+    data = b""
+    for _, block in _bgzf_members(path, member):
+        data += block
+        if len(data) >= SYNC_BYTES:
+            pos = _sync_offset(data, fmt, at_end=False)
+            if pos is not None:
+                return member, pos
+    pos = _sync_offset(data, fmt, at_end=True)
+    return (member, pos) if pos is not None else (size, 0)
+
+
+def shard_boundaries(path: Union[str, Path], n_shards: int, fmt: Optional[str] = None) -> List[Boundary]:
+    """
+    把文件切成最多 n_shards 个分片，返回 n+1 个边界（每个边界都是记录起点）
+
+    仅支持未压缩与 bgzip 文件；其它压缩格式返回单个分片。
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    compression = detect_compression(path)
+    if n_shards <= 1 or compression not in ("plain", "bgzip") or not size:
+        return [(0, 0), (size, 0)]
+    fmt = fmt or detect_format(path)
+    boundaries = [(0, 0)]
+    with open(path, "rb") as f:
+        for i in range(1, n_shards):
+            offset = size * i // n_shards
+            if compression == "plain":
+                boundary = _plain_boundary(f, offset, size, fmt)
+            else:
+                boundary = _bgzf_boundary(path, f, offset, size, fmt)
+            if boundary > boundaries[-1] and boundary[0] < size:
+                boundaries.append(boundary)
+    boundaries.append((size, 0))
+    return boundaries
+
+
+def _shard_chunks(path: Path, compression: str, start: Boundary, end: Boundary,
+                  chunk_size: int) -> Iterator[bytes]:
+    """产出 [start, end) 之间解压后的字节"""
+    if compression == "plain":
+        with open(path, "rb") as f:
+            f.seek(start[0])
+            remaining = end[0] - start[0]
+            while remaining > 0:
+                data = f.read(min(chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        return
+    # bgzip：pos 为自 start[0] 处成员起算的解压流位置
+    pos = 0
+    stop = None
+    for offset, data in _bgzf_members(path, start[0]):
+        if stop is None and offset >= end[0]:
+            stop = pos + end[1]
+        if stop is not None and pos >= stop:
+            return
+        lo = max(start[1] - pos, 0)
+        hi = len(data) if stop is None else min(len(data), stop - pos)
+        if hi > lo:
+            yield data[lo:hi]
+        pos += len(data)
+
+
+def _accumulate(chunks: Iterator[bytes], fmt: str) -> QCAccumulator:
+    acc = QCAccumulator()
+    blocks = _fastq_blocks(chunks) if fmt == "fastq" else _fasta_blocks(chunks)
+    for names, seqs, quals in blocks:
+        acc.update(ReadBatch.from_lists(names, seqs, quals))
+    return acc
+
+
+def _accumulate_shard(path: str, compression: str, fmt: str, start: Boundary, end: Boundary,
+                      chunk_size: int) -> QCAccumulator:
+    return _accumulate(_shard_chunks(Path(path), compression, start, end, chunk_size), fmt)
+
+
+def accumulate_qc(
+    path: Union[str, Path],
+    threads: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> QCAccumulator:
+    """统计单个文件（threads > 1 且文件可分片时多进程执行），精确计数同时写入计数缓存"""
+    # count 模块复用本模块的分片逻辑，这里延迟导入避免循环导入
+    from .count import remember_count
+    path = Path(path)
+    fmt = detect_format(path)
+    compression = detect_compression(path)
+    n_shards = max(1, min(int(threads or 1), path.stat().st_size // MIN_SHARD_BYTES))
+    boundaries = shard_boundaries(path, n_shards, fmt) if n_shards > 1 else []
+    if len(boundaries) <= 2:
+        total = _accumulate(iter_chunks(path, chunk_size), fmt)
+        remember_count(path, total.reads, total.bases, fmt, compression)
+        return total
+
+    shards = list(zip(boundaries[:-1], boundaries[1:]))
+    logger.info(f"🧮 Builtin QC: {path.name} split into {len(shards)} shards")
+    args = [(str(path), compression, fmt, start, end, chunk_size) for start, end in shards]
+    try:
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            results = list(pool.map(_accumulate_shard, *zip(*args)))
+    except (OSError, BrokenProcessPool) as e:
+        # 受限环境无法创建子进程时，逐个分片顺序统计
+        logger.warning(f"Builtin QC process pool unavailable, running shards sequentially: {e}")
+        results = [_accumulate_shard(*a) for a in args]
+    total = results[0]
+    for acc in results[1:]:
+        total.merge(acc)
+    remember_count(path, total.reads, total.bases, fmt, compression)
+    return total
+
+
+def run_builtin_qc(
+    reads: Union[str, Path],
+    reads2: Optional[Union[str, Path]] = None,
+    threads: int = 1,
+    read_type: str = "illumina",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    内置 QC：返回与 parse_fastqc_output 相同结构的指标字典
+
+    双端数据 R1/R2 合并统计（Q20/Q30 等按碱基精确合并），并保留各自的读数。
+
+    Raises:
+        OSError / ReadFormatError: 文件不可读或格式错误
+    """
+    start = time.time()
+    acc = accumulate_qc(reads, threads, chunk_size)
+    r1_reads = acc.reads
+    if reads2:
+        acc.merge(accumulate_qc(reads2, threads, chunk_size))
+    metrics = acc.to_metrics(Path(reads).name, read_type)
+    if reads2:
+        metrics.update({"paired_end": True, "r1_reads": r1_reads, "r2_reads": acc.reads - r1_reads})
+    metrics["engine"] = "builtin"
+    metrics["elapsed_seconds"] = round(time.time() - start, 3)
+    logger.info(
+        f"✅ Builtin QC: {metrics['total_reads']} reads, Q30 {metrics['q30_percent']}% "
+        f"({metrics['elapsed_seconds']}s)"
+    )
+    return metrics
@@ -0,0 +1,352 @@
+"""
+流式 FASTQ/FASTA 读取引擎
+
+按块读取原始字节并在块内切分记录，内存占用与输入大小无关：
+
+- 压缩格式按文件头魔数识别：plain / gzip / bgzip / zstd（zstd 需要 zstandard 包）
+- 未压缩文件可选 mmap 读取
+- 逐条迭代 ReadRecord，或按批次获取 NumPy 数组（长度、碱基、Phred 质量）
+
+FASTQ 需为标准四行格式；FASTA 支持多行序列。
+"""
+import gzip
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.exceptions import ValidationError
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 65536
+PHRED_OFFSET = 33
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class ReadFormatError(ValidationError):
+    """FASTQ/FASTA 格式错误"""
+    pass
+
+
+class ReadRecord(NamedTuple):
+    """单条序列记录（均为原始字节；FASTA 的 qual 为 None）"""
+    name: bytes
+    seq: bytes
+    qual: Optional[bytes] = None
+
+
+@dataclass
+class ReadBatch:
+    """
+    一批记录的 NumPy 表示
+
+    seq/qual 为整批拼接后的 uint8 数组，第 i 条记录位于 [offsets[i], offsets[i+1])；
+    qual 为已减去偏移量 33 的 Phred 值，FASTA 时为 None。
+    """
+    names: List[bytes]
+    lengths: np.ndarray
+    offsets: np.ndarray
+    seq: np.ndarray
+    qual: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_lists(cls, names: List[bytes], seqs: List[bytes], quals: Optional[List[bytes]] = None) -> "ReadBatch":
+        """由原始字节列表构造（quals 为 None 表示 FASTA）"""
+        lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+        offsets = np.zeros(len(seqs) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        seq = np.frombuffer(b"".join(seqs), dtype=np.uint8)
+        qual = None
+        if quals is not None:
+            qual = np.frombuffer(b"".join(quals), dtype=np.uint8) - np.uint8(PHRED_OFFSET)
+        return cls(names=list(names), lengths=lengths, offsets=offsets, seq=seq, qual=qual)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def total_bases(self) -> int:
+        return int(self.offsets[-1])
+
+    def _per_read_sum(self, values: np.ndarray) -> np.ndarray:
+        sums = np.zeros(len(self), dtype=np.int64)
+        nonempty = self.lengths > 0
+        if nonempty.any():
+            sums[nonempty] = np.add.reduceat(values.astype(np.int64), self.offsets[:-1][nonempty])
+        return sums
+
+    def mean_qualities(self) -> np.ndarray:
+        """每条记录的平均 Phred 质量（FASTA 抛出 ReadFormatError）"""
+        if self.qual is None:
+            raise ReadFormatError("FASTA records have no quality scores")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.nan_to_num(self._per_read_sum(self.qual) / self.lengths)
+
+    def gc_counts(self) -> np.ndarray:
+        """每条记录的 G/C 碱基数（不区分大小写）"""
+        upper = self.seq & 0xDF
+        return self._per_read_sum((upper == ord("G")) | (upper == ord("C")))
+
+    def n_counts(self) -> np.ndarray:
+        """每条记录的 N 碱基数"""
+        return self._per_read_sum((self.seq & 0xDF) == ord("N"))
+
+    def to_bytes(self, mask: Optional[np.ndarray] = None) -> bytes:
+        """把（mask 选中的）记录还原成 FASTQ/FASTA 文本"""
+        seq = self.seq.tobytes()
+        qual = (self.qual + np.uint8(PHRED_OFFSET)).tobytes() if self.qual is not None else None
+        indices = range(len(self)) if mask is None else np.flatnonzero(mask).tolist()
+        out = []
+        for i in indices:
+            start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+            if qual is not None:
+                out.append(b"@%s\n%s\n+\n%s\n" % (self.names[i], seq[start:end], qual[start:end]))
+            else:
+                out.append(b">%s\n%s\n" % (self.names[i], seq[start:end]))
+        return b"".join(out)
+
+
+def detect_compression(path: Union[str, Path]) -> str:
+    """按文件头识别压缩格式：plain / gzip / bgzip / zstd"""
+    with open(path, "rb") as f:
+        head = f.read(18)
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if head.startswith(GZIP_MAGIC):
+        # BGZF: FLG.FEXTRA 置位且额外字段为 'BC' 子字段
+        if len(head) >= 16 and head[3] & 0x04 and head[12:14] == b"BC":
+            return "bgzip"
+        return "gzip"
+    return "plain"
+
+
+def _open_zstd(path: Path) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:
+        try:
+            from compression import zstd  # Python 3.14+
+        except ImportError:
+            raise ImportError("Reading .zst inputs requires the 'zstandard' package: pip install zstandard")
+        return zstd.open(path, "rb")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+
+
+def open_bytes(path: Union[str, Path], compression: Optional[str] = None) -> BinaryIO:
+    """以二进制流打开（自动解压）；bgzip 为多成员 gzip，按 gzip 流读取"""
+    path = Path(path)
+    compression = compression or detect_compression(path)
+    if compression in ("gzip", "bgzip"):
+        return gzip.open(path, "rb")
+    if compression == "zstd":
+        return _open_zstd(path)
+    return open(path, "rb")
+
+
+def iter_chunks(
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
+) -> Iterator[bytes]:
+    """按固定大小产出解压后的字节块；use_mmap 仅对未压缩文件生效"""
+    path = Path(path)
+    compression = detect_compression(path)
+    if use_mmap and compression == "plain" and path.stat().st_size > 0:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, len(mm), chunk_size):
+                yield mm[start:start + chunk_size]
+        return
+    with open_bytes(path, compression) as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def detect_format(path: Union[str, Path]) -> str:
+    """按首个非空字符识别 fastq / fasta"""
+    with open_bytes(path) as handle:
+        head = handle.read(4096).lstrip()
+    if head.startswith(b"@"):
+        return "fastq"
+    if head.startswith(b">"):
+        return "fasta"
+    raise ReadFormatError(f"Unrecognized sequence format: {path}")
+
+
+class ReadParser:
+    """
+    FASTQ/FASTA 流式解析器
+
+    Examples:
+        >>> for rec in ReadParser("reads.fq.gz"):
+        ...     print(rec.name, len(rec.seq))
+        >>> for batch in ReadParser("reads.fq.zst").batches():
+        ...     batch.mean_qualities()
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = False,
+        fmt: Optional[str] = None,
+    ):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.format = fmt or detect_format(self.path)
+
+    def _blocks(self) -> Iterator[Tuple[List[bytes], List[bytes], Optional[List[bytes]]]]:
+        """按块产出 (names, seqs, quals) 列表"""
+        chunks = iter_chunks(self.path, self.chunk_size, self.use_mmap)
+        if self.format == "fastq":
+            return _fastq_blocks(chunks)
+        return _fasta_blocks(chunks)
+
+    def __iter__(self) -> Iterator[ReadRecord]:
+        for names, seqs, quals in self._blocks():
+            if quals is None:
+                for name, seq in zip(names, seqs):
+                    yield ReadRecord(name, seq)
+            else:
+                yield from map(ReadRecord, names, seqs, quals)
+
+    def batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[ReadBatch]:
+        """按批次产出 ReadBatch（每批最多 batch_size 条记录）"""
+        names: List[bytes] = []
+        seqs: List[bytes] = []
+        quals: Optional[List[bytes]] = [] if self.format == "fastq" else None
+        for block_names, block_seqs, block_quals in self._blocks():
+            names += block_names
+            seqs += block_seqs
+            if quals is not None:
+                quals += block_quals
+            while len(names) >= batch_size:
+                yield _make_batch(names[:batch_size], seqs[:batch_size],
+                                  quals[:batch_size] if quals is not None else None)
+                del names[:batch_size], seqs[:batch_size]
+                if quals is not None:
+                    del quals[:batch_size]
+        if names:
+            yield _make_batch(names, seqs, quals)
+
+    def chunk_batches(self) -> Iterator[ReadBatch]:
+        """
+        每个解析块产出一个 ReadBatch（块大小由 chunk_size 控制）
+
+        与 batches() 按记录数分批不同，内存占用按字节数封顶，适合读长差异极大的长读数据。
+        """
+        for names, seqs, quals in self._blocks():
+            yield _make_batch(names, seqs, quals)
+
+
+def _make_batch(names: List[bytes], seqs: List[bytes], quals: Optional[List[bytes]]) -> ReadBatch:
+    return ReadBatch.from_lists(names, seqs, quals)
+
+
+def _fastq_blocks(chunks: Iterator[bytes]) -> Iterator[Tuple[List[bytes], List[bytes], List[bytes]]]:
+    leftover = b""
+    for chunk in chunks:
+        lines = (leftover + chunk).split(b"\n")
+        # 最后一行可能不完整，连同不足一条记录的行留到下一块
+        usable = (len(lines) - 1) // 4 * 4
+        leftover = b"\n".join(lines[usable:])
+        if usable:
+            yield _split_fastq(lines[:usable])
+    lines = leftover.split(b"\n")
+    while lines and not lines[-1].strip():
+        lines.pop()
+    if lines:
+        if len(lines) % 4:
+            raise ReadFormatError(f"Truncated FASTQ record: {lines[0][:50]!r}")
+        yield _split_fastq(lines)
+
+
+def _split_fastq(lines: List[bytes]) -> Tuple[List[bytes], List[bytes], List[bytes]]:
+    if lines[0].endswith(b"\r"):
+        lines = [line.rstrip(b"\r") for line in lines]
+    headers, seqs, pluses, quals = lines[0::4], lines[1::4], lines[2::4], lines[3::4]
+    # 整块校验（在 C 层完成），出错时再逐条定位
+    n = len(headers)
+    if ((b"\n" + b"\n".join(headers)).count(b"\n@") != n
+            or (b"\n" + b"\n".join(pluses)).count(b"\n+") != n
+            or list(map(len, seqs)) != list(map(len, quals))):
+        for header, plus, seq, qual in zip(headers, pluses, seqs, quals):
+            if not header.startswith(b"@") or not plus.startswith(b"+") or len(seq) != len(qual):
+                raise ReadFormatError(f"Malformed FASTQ record: {header[:50]!r}")
+    return [h[1:] for h in headers], seqs, quals
+
+
+def _fasta_blocks(chunks: Iterator[bytes]) -> Iterator[Tuple[List[bytes], List[bytes], None]]:
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        # 最后一个 '>' 之前的记录都已完整
+        cut = buffer.rfind(b"\n>")
+        if cut <= 0:
+            continue
+        yield _split_fasta(buffer[:cut])
+        buffer = buffer[cut + 1:]
+    if buffer.strip():
+        yield _split_fasta(buffer)
+
+
+def _split_fasta(text: bytes) -> Tuple[List[bytes], List[bytes], None]:
+    text = text.replace(b"\r", b"").lstrip()
+    if not text.startswith(b">"):
+        raise ReadFormatError(f"Malformed FASTA record: {text[:50]!r}")
+    names, seqs = [], []
+    for record in text[1:].split(b"\n>"):
+        header, _, body = record.partition(b"\n")
+        names.append(header)
+        seqs.append(body.replace(b"\n", b""))
+    return names, seqs, None
+
+
+def iter_reads(path: Union[str, Path], **kwargs) -> Iterator[ReadRecord]:
+    """逐条迭代 FASTQ/FASTA 记录"""
+    return iter(ReadParser(path, **kwargs))
+
+
+def iter_batches(path: Union[str, Path], batch_size: int = DEFAULT_BATCH_SIZE, **kwargs) -> Iterator[ReadBatch]:
+    """按批次迭代 FASTQ/FASTA 记录（NumPy 数组）"""
+    return ReadParser(path, **kwargs).batches(batch_size)
+
+
+def iter_chunk_batches(path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> Iterator[ReadBatch]:
+    """按解析块迭代 FASTQ/FASTA 记录（每块约 chunk_size 字节）"""
+    return ReadParser(path, chunk_size=chunk_size, **kwargs).chunk_batches()
+
+
+def iter_paired_batches(
+    reads: Union[str, Path],
+    reads2: Optional[Union[str, Path]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **kwargs,
+) -> Iterator[Tuple[ReadBatch, Optional[ReadBatch]]]:
+    """
+    按相同记录数成批读取 R1/R2，保证两端同步（单端时 R2 批次为 None）
+
+    Raises:
+        ReadFormatError: 两端记录数不一致
+    """
+    first = iter_batches(reads, batch_size, **kwargs)
+    if reads2 is None:
+        for batch in first:
+            yield batch, None
+        return
+    second = iter_batches(reads2, batch_size, **kwargs)
+    for batch1 in first:
+        batch2 = next(second, None)
+        if batch2 is None or len(batch2) != len(batch1):
+            raise ReadFormatError(f"Paired files out of sync: {Path(reads).name} has more records than {Path(reads2).name}")
+        yield batch1, batch2
+    # R1 耗尽后 R2 也必须耗尽
+    if next(second, None) is not None:
+        raise ReadFormatError(f"Paired files out of sync: {Path(reads2).name} has more records than {Path(reads).name}")
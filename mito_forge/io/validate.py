@@ -0,0 +1,317 @@
+"""
+输入数据流式校验（快速失败）
+
+组装器往往运行数小时后才因输入损坏而退出。supervisor 阶段先完整扫描一遍输入，
+在数秒到数分钟内（磁盘带宽级别）发现问题并给出精确位置：
+
+- 压缩完整性：截断的 gzip/zstd、CRC 错误
+- 记录结构：'@' 标题行、'+' 分隔行、序列与质量长度一致、文件末尾记录完整
+- 碱基字符（IUPAC）与质量字符（Phred+33 可打印范围，疑似 Phred+64 给出警告）
+- 双端同步：R1/R2 记录数一致且读段 ID 逐条对应
+
+多个文件在线程池中并行校验（解压与整块检查期间释放 GIL）；
+双端 ID 按块计算摘要后比较，只有不一致时才回到出错的块内逐条定位。
+"""
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from ..utils.logging import get_logger
+from .count import remember_count
+from .downsample import read_id
+from .reads import DEFAULT_CHUNK_SIZE, ReadFormatError, detect_compression, detect_format, iter_chunks, iter_reads
+
+logger = get_logger(__name__)
+
+# 每多少条记录计算一次 ID 摘要（双端比较的粒度）
+PAIR_CHECK_RECORDS = 65536
+QUALITY_MIN = 33
+QUALITY_MAX = 126
+
+_VALID_BASES = np.zeros(256, dtype=bool)
+for _b in b"ACGTUNRYKMSWBDHV":
+    _VALID_BASES[_b] = _VALID_BASES[_b | 0x20] = True
+
+
+def _issue(kind: str, path: Path, message: str, record: Optional[int] = None,
+           line: Optional[int] = None) -> Dict[str, Any]:
+    location = f"{path.name}" + (f":{line}" if line else "") + (f" (record {record})" if record else "")
+    return {"type": kind, "file": str(path), "record": record, "line": line,
+            "message": message, "location": location}
+
+
+def _bad_char(data: bytes, valid: np.ndarray) -> int:
+    """data 中第一个非法字符的位置（无则 -1）"""
+    bad = np.flatnonzero(~valid[np.frombuffer(data, dtype=np.uint8)])
+    return int(bad[0]) if len(bad) else -1
+
+
+class _FileValidator:
+    """单个 FASTQ/FASTA 文件的流式校验状态"""
+
+    def __init__(self, path: Path, fmt: Optional[str], pair_ids: bool):
+        self.path = path
+        self.format = fmt
+        self.pair_ids = pair_ids
+        self.decompressed = 0
+        self.records = 0
+        self.lines = 0
+        self.bases = 0
+        self.quality_min = 255
+        self.quality_max = 0
+        self.id_digests: List[int] = []
+        self.error: Optional[Dict[str, Any]] = None
+        self.warnings: List[Dict[str, Any]] = []
+
+    def _digest_ids(self, headers: List[bytes]) -> None:
+        """按 PAIR_CHECK_RECORDS 条一块累积读段 ID 的 CRC 摘要"""
+        start = self.records
+        offset = 0
+        while offset < len(headers):
+            block, within = divmod(start + offset, PAIR_CHECK_RECORDS)
+            take = min(PAIR_CHECK_RECORDS - within, len(headers) - offset)
+            ids = b"\n".join(read_id(h) for h in headers[offset:offset + take]) + b"\n"
+            if within == 0:
+                self.id_digests.append(0)
+            self.id_digests[block] = zlib.crc32(ids, self.id_digests[block])
+            offset += take
+
+    def fastq_lines(self, lines: List[bytes]) -> bool:
+        """校验若干完整的四行记录；出错时记录精确位置并返回 False"""
+        if lines[0].endswith(b"\r"):
+            lines = [line.rstrip(b"\r") for line in lines]
+        headers, seqs, pluses, quals = lines[0::4], lines[1::4], lines[2::4], lines[3::4]
+        n = len(headers)
+        # 整块检查（C 层完成），出错时再逐条定位
+        if ((b"\n" + b"\n".join(headers)).count(b"\n@") != n
+                or (b"\n" + b"\n".join(pluses)).count(b"\n+") != n
+                or list(map(len, seqs)) != list(map(len, quals))):
+            for i, (header, seq, plus, qual) in enumerate(zip(headers, seqs, pluses, quals)):
+                record, line = self.records + i + 1, self.lines + 4 * i + 1
+                if not header.startswith(b"@"):
+                    self.error = _issue("structure", self.path, f"Header line does not start with '@': {header[:50]!r}",
+                                        record, line)
+                elif not plus.startswith(b"+"):
+                    self.error = _issue("structure", self.path, f"Separator line does not start with '+': {plus[:50]!r}",
+                                        record, line + 2)
+                elif len(seq) != len(qual):
+                    self.error = _issue("structure", self.path,
+                                        f"Sequence length {len(seq)} != quality length {len(qual)}", record, line + 3)
+                if self.error:
+                    return False
+
+        seq_data = b"".join(seqs)
+        position = _bad_char(seq_data, _VALID_BASES)
+        if position >= 0:
+            self._locate_char("sequence", seqs, position, line_offset=1)
+            return False
+        qual_data = np.frombuffer(b"".join(quals), dtype=np.uint8)
+        if len(qual_data):
+            low, high = int(qual_data.min()), int(qual_data.max())
+            if low < QUALITY_MIN or high > QUALITY_MAX:
+                bad = np.flatnonzero((qual_data < QUALITY_MIN) | (qual_data > QUALITY_MAX))
+                self._locate_char("quality", quals, int(bad[0]), line_offset=3)
+                return False
+            self.quality_min = min(self.quality_min, low)
+            self.quality_max = max(self.quality_max, high)
+
+        if self.pair_ids:
+            self._digest_ids([h[1:] for h in headers])
+        self.records += n
+        self.lines += 4 * n
+        self.bases += len(seq_data)
+        return True
+
+    def fasta_lines(self, lines: List[bytes]) -> bool:
+        """校验若干 FASTA 行（标题行以 '>' 开头，其余为序列行）"""
+        if lines and lines[0].endswith(b"\r"):
+            lines = [line.rstrip(b"\r") for line in lines]
+        for i, line in enumerate(lines):
+            if line.startswith(b">"):
+                self.records += 1
+                continue
+            if self.records == 0 and line.strip():
+                self.error = _issue("structure", self.path, f"FASTA must start with '>': {line[:50]!r}",
+                                    None, self.lines + i + 1)
+                return False
+            position = _bad_char(line, _VALID_BASES)
+            if position >= 0:
+                self.error = _issue("sequence", self.path,
+                                    f"Invalid base {chr(line[position])!r} at column {position + 1}",
+                                    self.records, self.lines + i + 1)
+                return False
+            self.bases += len(line)
+        self.lines += len(lines)
+        return True
+
+    def _locate_char(self, kind: str, values: List[bytes], position: int, line_offset: int) -> None:
+        lengths = np.cumsum([len(v) for v in values])
+        index = int(np.searchsorted(lengths, position, side="right"))
+        column = position - (int(lengths[index - 1]) if index else 0)
+        char = values[index][column:column + 1]
+        label = "base" if kind == "sequence" else "quality character"
+        self.error = _issue(kind, self.path, f"Invalid {label} {char!r} at column {column + 1}",
+                            self.records + index + 1, self.lines + 4 * index + 1 + line_offset)
+
+
+def _scan(validator: _FileValidator, chunks) -> None:
+    """按块切行校验；FASTQ 以四行为一组，末尾不完整的记录报告为截断"""
+    check = validator.fastq_lines if validator.format == "fastq" else validator.fasta_lines
+    group = 4 if validator.format == "fastq" else 1
+    pending: List[bytes] = []
+    tail = b""
+    for chunk in chunks:
+        validator.decompressed += len(chunk)
+        data = tail + chunk
+        cut = data.rfind(b"\n") + 1
+        tail = data[cut:]
+        lines = pending + data[:cut].split(b"\n")[:-1]
+        usable = len(lines) // group * group
+        pending = lines[usable:]
+        if usable and not check(lines[:usable]):
+            return
+    lines = pending + ([tail] if tail else [])
+    # 允许文件末尾的空行
+    while lines and not lines[-1].strip():
+        lines.pop()
+    if len(lines) % group:
+        validator.error = _issue(
+            "structure", validator.path,
+            f"Truncated record at end of file ({len(lines)} of 4 lines)",
+            validator.records + 1, validator.lines + 1,
+        )
+    elif lines:
+        check(lines)
+
+
+def validate_read_file(
+    path: Union[str, Path],
+    pair_ids: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    流式校验单个 FASTQ/FASTA 文件（遇到第一个错误即停止）
+
+    Args:
+        pair_ids: 是否计算读段 ID 块摘要（双端同步检查用）
+
+    Returns:
+        {"file", "format", "compression", "valid", "records", "bases", "quality_encoding",
+         "errors", "warnings", "id_digests"}
+    """
+    path = Path(path)
+    compression = detect_compression(path)
+    validator = _FileValidator(path, None, pair_ids)
+    try:
+        validator.format = detect_format(path)
+        _scan(validator, iter_chunks(path, chunk_size))
+    except ReadFormatError as e:
+        validator.error = _issue("structure", path, str(e), None, 1)
+    except (EOFError, OSError, zlib.error) as e:
+        # 截断/损坏的压缩流：报告已通过校验的记录数与解压字节数
+        validator.error = _issue(
+            "compression", path,
+            f"Corrupt or truncated {compression} data after {validator.decompressed} uncompressed bytes: {e}",
+            validator.records + 1, None,
+        )
+
+    encoding = None
+    if validator.quality_max:
+        encoding = "phred33"
+        # 全部质量字符都在 '@'..'h' 之间：疑似 Phred+64（也可能是整体高质量的 HiFi 数据）
+        if validator.quality_min >= 64 and validator.quality_max <= 104:
+            encoding = "phred64?"
+            validator.warnings.append(_issue(
+                "quality", path,
+                f"Quality characters range {chr(validator.quality_min)!r}..{chr(validator.quality_max)!r} "
+                f"look like Phred+64; assemblers are run with Phred+33",
+            ))
+    if validator.error is None:
+        # 全文件扫描已得到精确计数，后续数据统计直接复用
+        remember_count(path, validator.records, validator.bases, validator.format, compression)
+    return {
+        "file": str(path),
+        "format": validator.format,
+        "compression": compression,
+        "valid": validator.error is None,
+        "records": validator.records,
+        "bases": validator.bases,
+        "quality_encoding": encoding,
+        "errors": [validator.error] if validator.error else [],
+        "warnings": validator.warnings,
+        "id_digests": validator.id_digests,
+    }
+
+
+def _locate_pair_mismatch(reads: Path, reads2: Path, block: int) -> Optional[Dict[str, Any]]:
+    """从不一致的摘要块起逐条比较 R1/R2 的读段 ID（只是一端提前结束时返回 None）"""
+    skip = block * PAIR_CHECK_RECORDS
+    first = islice(iter_reads(reads), skip, None)
+    second = islice(iter_reads(reads2), skip, None)
+    for index, (rec1, rec2) in enumerate(zip(first, second), start=skip + 1):
+        if read_id(rec1.name) != read_id(rec2.name):
+            return _issue("pairing", reads2,
+                          f"Read ID {read_id(rec2.name)[:60]!r} does not match R1 {read_id(rec1.name)[:60]!r}",
+                          index, 4 * (index - 1) + 1)
+    return None
+
+
+def validate_inputs(
+    reads: Union[str, Path],
+    reads2: Optional[Union[str, Path]] = None,
+    long_reads: Optional[Union[str, Path]] = None,
+    threads: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    并行校验全部输入文件及双端同步
+
+    Returns:
+        {"valid", "files": [...], "errors": [...], "warnings": [...], "elapsed_seconds"}
+    """
+    start = time.time()
+    paths = [Path(p) for p in (reads, reads2, long_reads) if p]
+    paired = reads2 is not None
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(paths)))) as pool:
+        futures = [
+            pool.submit(validate_read_file, path, paired and i < 2, chunk_size)
+            for i, path in enumerate(paths)
+        ]
+        reports = [future.result() for future in futures]
+
+    errors = [issue for report in reports for issue in report["errors"]]
+    warnings = [issue for report in reports for issue in report["warnings"]]
+    if paired and reports[0]["valid"] and reports[1]["valid"]:
+        r1, r2 = reports[0], reports[1]
+        mismatch = next((i for i, (a, b) in enumerate(zip(r1["id_digests"], r2["id_digests"])) if a != b), None)
+        issue = _locate_pair_mismatch(paths[0], paths[1], mismatch) if mismatch is not None else None
+        if issue:
+            errors.append(issue)
+        elif r1["records"] != r2["records"]:
+            shorter = paths[1] if r2["records"] < r1["records"] else paths[0]
+            errors.append(_issue(
+                "pairing", shorter,
+                f"R1 has {r1['records']} records but R2 has {r2['records']}",
+                min(r1["records"], r2["records"]) + 1, None,
+            ))
+
+    for report in reports:
+        report.pop("id_digests")
+    result = {
+        "valid": not errors,
+        "files": reports,
+        "errors": errors,
+        "warnings": warnings,
+        "elapsed_seconds": round(time.time() - start, 3),
+    }
+    if errors:
+        logger.error(f"❌ Input validation failed: {errors[0]['location']}: {errors[0]['message']}")
+    else:
+        logger.info(f"✅ Input validation passed: {sum(r['records'] for r in reports)} records "
+                    f"in {len(reports)} file(s) ({result['elapsed_seconds']}s)")
+    return result
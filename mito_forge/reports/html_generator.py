@@ -146,7 +146,9 @@ def _prepare_template_data(state: Dict[str, Any]) -> Dict[str, Any]:
             'n50': _format_number(assembly_metrics.get('n50', 0)),
             'total_length': _format_number(assembly_metrics.get('total_length', 0)),
             'num_contigs': assembly_metrics.get('num_contigs', 0),
-            'quality_score': assembly_metrics.get('quality_score', 'N/A')
+            'quality_score': assembly_metrics.get('quality_score', 'N/A'),
+            'closest_reference': assembly_metrics.get('closest_reference'),
+            'closest_reference_ani': assembly_metrics.get('closest_reference_ani')
         }
         
         # 生成 Assembly 图表
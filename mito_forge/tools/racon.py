@@ -8,6 +8,7 @@ import shutil
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, Optional
+from ..io.fasta import assembly_stats
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -98,7 +99,7 @@ def run_racon(
     shutil.copy(current_assembly, final_output)
     
     # 获取统计信息
-    stats = _get_assembly_stats(final_output)
+    stats = assembly_stats(final_output)
     
     logger.info(f"Racon polishing completed after {iterations} iterations")
     
@@ -109,39 +110,3 @@ def run_racon(
         "stats": stats,
         "success": True
     }
-
-
-def _get_assembly_stats(fasta_file: Path) -> Dict[str, Any]:
-    """获取组装统计信息"""
-    try:
-        from Bio import SeqIO
-        
-        sequences = list(SeqIO.parse(str(fasta_file), "fasta"))
-        lengths = [len(seq) for seq in sequences]
-        
-        if not lengths:
-            return {}
-        
-        total_length = sum(lengths)
-        num_contigs = len(lengths)
-        
-        # 计算 N50
-        lengths_sorted = sorted(lengths, reverse=True)
-        cumsum = 0
-        n50 = 0
-        for length in lengths_sorted:
-            cumsum += length
-            if cumsum >= total_length / 2:
-                n50 = length
-                break
-        
-        return {
-            "total_length": total_length,
-            "num_contigs": num_contigs,
-            "n50": n50,
-            "max_contig_length": max(lengths),
-            "min_contig_length": min(lengths)
-        }
-    except Exception as e:
-        logger.warning(f"Failed to get assembly stats: {e}")
-        return {}
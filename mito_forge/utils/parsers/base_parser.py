@@ -116,55 +116,14 @@ class BaseOutputParser(ABC):
 
 def parse_fasta(fasta_file: Path) -> Dict[str, Any]:
     """
-    解析 FASTA 文件，提取基本统计信息
+    流式统计 FASTA 文件（不在内存中保留序列）
     
     Args:
         fasta_file: FASTA 文件路径
         
     Returns:
-        包含序列统计信息的字典
+        序列数、长度分布、N50/N90、GC、N 含量、标题覆盖度及每条 contig 的元数据，
+        见 mito_forge.io.fasta.fasta_stats
     """
-    if not fasta_file.exists():
-        return {
-            "num_sequences": 0,
-            "total_length": 0,
-            "lengths": [],
-            "sequences": {}
-        }
-    
-    sequences = {}
-    current_id = None
-    current_seq = []
-    
-    with open(fasta_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.startswith('>'):
-                # 保存前一个序列
-                if current_id is not None:
-                    sequences[current_id] = ''.join(current_seq)
-                
-                # 开始新序列
-                current_id = line[1:].split()[0]  # 取第一个空格前的部分作为ID
-                current_seq = []
-            else:
-                current_seq.append(line)
-        
-        # 保存最后一个序列
-        if current_id is not None:
-            sequences[current_id] = ''.join(current_seq)
-    
-    lengths = [len(seq) for seq in sequences.values()]
-    
-    return {
-        "num_sequences": len(sequences),
-        "total_length": sum(lengths),
-        "lengths": lengths,
-        "sequences": sequences,
-        "max_length": max(lengths) if lengths else 0,
-        "min_length": min(lengths) if lengths else 0,
-        "mean_length": sum(lengths) / len(lengths) if lengths else 0
-    }
+    from ...io.fasta import fasta_stats
+    return fasta_stats(fasta_file)
@@ -47,13 +47,10 @@ class FlyeParser(BaseOutputParser):
                 'num_contigs': fasta_stats['num_sequences'],
                 'total_length': fasta_stats['total_length'],
                 'max_contig_length': fasta_stats['max_length'],
-                'n50': self._calculate_n50(fasta_stats['lengths']),
-                'n90': self._calculate_n90(fasta_stats['lengths']),
+                'n50': fasta_stats['n50'],
+                'n90': fasta_stats['n90'],
+                'gc_content': round(fasta_stats['gc_content'], 2),
             })
-            
-            # 计算 GC 含量
-            gc_content = self._calculate_gc_content(fasta_stats['sequences'])
-            result['metrics']['gc_content'] = round(gc_content, 2)
         
         # 解析日志文件
         if files.get('log'):
@@ -154,24 +151,6 @@ class FlyeParser(BaseOutputParser):
         
         return "unknown"
     
-    def _calculate_gc_content(self, sequences: Dict[str, str]) -> float:
-        """计算 GC 含量百分比"""
-        if not sequences:
-            return 0.0
-        
-        total_bases = 0
-        gc_bases = 0
-        
-        for seq in sequences.values():
-            seq_upper = seq.upper()
-            total_bases += len(seq_upper)
-            gc_bases += seq_upper.count('G') + seq_upper.count('C')
-        
-        if total_bases == 0:
-            return 0.0
-        
-        return (gc_bases / total_bases) * 100
-    
     def _parse_log(self, log_file: Path) -> Dict[str, Any]:
         """解析 Flye 日志文件"""
         info = {}
@@ -1,6 +1,6 @@
 """GetOrganelle 输出解析器"""
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import re
 from .base_parser import BaseOutputParser, parse_fasta
 
@@ -60,14 +60,14 @@ class GetOrganelleParser(BaseOutputParser):
                 'total_length': seq_stats['total_length'],
                 'max_length': seq_stats['max_length'],
                 'min_length': seq_stats['min_length'],
+                'gc_content': round(seq_stats['gc_content'], 2),
             })
             
-            # 计算 GC 含量
-            gc_content = self._calculate_gc_content(seq_stats['sequences'])
-            result['metrics']['gc_content'] = round(gc_content, 2)
-            
             # 检测环状序列（GetOrganelle 通常在头部标记）
-            result['metrics']['circular_sequences'] = self._count_circular_sequences(seq_stats['sequences'])
+            result['metrics']['circular_sequences'] = self._count_circular_sequences(
+                [contig['header'] for contig in seq_stats['contigs']],
+                files['path_sequence']
+            )
         
         # 解析 CSV 统计文件
         if files.get('csv_stats'):
@@ -102,32 +102,23 @@ class GetOrganelleParser(BaseOutputParser):
         
         return "unknown"
     
-    def _calculate_gc_content(self, sequences: Dict[str, str]) -> float:
-        """计算 GC 含量"""
-        if not sequences:
-            return 0.0
-        
-        total_bases = 0
-        gc_bases = 0
-        
-        for seq in sequences.values():
-            seq_upper = seq.upper()
-            total_bases += len(seq_upper)
-            gc_bases += seq_upper.count('G') + seq_upper.count('C')
-        
-        if total_bases == 0:
-            return 0.0
-        
-        return (gc_bases / total_bases) * 100
-    
-    def _count_circular_sequences(self, sequences: Dict[str, str]) -> int:
+    def _count_circular_sequences(self, headers: List[str], sequence_file: Optional[Path] = None) -> int:
         """
         统计环状序列数量
-        GetOrganelle 通常在序列ID中包含 circular 或 (circular) 标记
+        GetOrganelle 通常在序列标题中包含 circular 或 (circular) 标记；
+        给出序列文件时，标题未标记的序列再做首尾重叠检测
         """
+        overlaps = {}
+        if sequence_file:
+            try:
+                from ...io.circular import check_circularity
+                overlaps = check_circularity(sequence_file)
+            except (OSError, ValueError):
+                overlaps = {}
         count = 0
-        for seq_id in sequences.keys():
-            if 'circular' in seq_id.lower():
+        for seq_id in headers:
+            name = seq_id.split(None, 1)[0] if seq_id else ""
+            if 'circular' in seq_id.lower() or overlaps.get(name, {}).get('is_circular'):
                 count += 1
         return count
     
@@ -46,18 +46,16 @@ class SPAdesParser(BaseOutputParser):
                 'max_contig_length': contig_stats['max_length'],
                 'min_contig_length': contig_stats['min_length'],
                 'mean_contig_length': int(contig_stats['mean_length']),
-                'n50': self._calculate_n50(contig_stats['lengths']),
-                'n90': self._calculate_n90(contig_stats['lengths']),
+                'n50': contig_stats['n50'],
+                'n90': contig_stats['n90'],
+                'l50': contig_stats['l50'],
+                'gc_content': round(contig_stats['gc_content'], 2),
+                'n_count': contig_stats['n_count'],
             })
             
-            # 计算 GC 含量
-            gc_content = self._calculate_gc_content(contig_stats['sequences'])
-            result['metrics']['gc_content'] = round(gc_content, 2)
-            
-            # 从 contig 名称解析覆盖度信息
-            coverage_info = self._parse_coverage_from_headers(contig_stats['sequences'])
-            if coverage_info:
-                result['metrics']['average_coverage'] = round(coverage_info['mean_coverage'], 2)
+            # contig 名称中的覆盖度（NODE_1_length_16569_cov_150.123）
+            if contig_stats['mean_coverage'] is not None:
+                result['metrics']['average_coverage'] = round(contig_stats['mean_coverage'], 2)
         
         # 解析日志文件获取额外信息
         if files.get('log'):
@@ -87,50 +85,6 @@ class SPAdesParser(BaseOutputParser):
         
         return "unknown"
     
-    def _calculate_gc_content(self, sequences: Dict[str, str]) -> float:
-        """计算 GC 含量百分比"""
-        if not sequences:
-            return 0.0
-        
-        total_bases = 0
-        gc_bases = 0
-        
-        for seq in sequences.values():
-            seq_upper = seq.upper()
-            total_bases += len(seq_upper)
-            gc_bases += seq_upper.count('G') + seq_upper.count('C')
-        
-        if total_bases == 0:
-            return 0.0
-        
-        return (gc_bases / total_bases) * 100
-    
-    def _parse_coverage_from_headers(self, sequences: Dict[str, str]) -> Optional[Dict[str, float]]:
-        """
-        从 SPAdes contig 头部解析覆盖度信息
-        格式例如: NODE_1_length_16569_cov_150.123
-        """
-        coverages = []
-        
-        for header in sequences.keys():
-            # 匹配 cov_XXX.XXX 模式
-            match = re.search(r'cov_(\d+\.?\d*)', header)
-            if match:
-                try:
-                    cov = float(match.group(1))
-                    coverages.append(cov)
-                except ValueError:
-                    continue
-        
-        if not coverages:
-            return None
-        
-        return {
-            'mean_coverage': sum(coverages) / len(coverages),
-            'min_coverage': min(coverages),
-            'max_coverage': max(coverages)
-        }
-    
     def _parse_log(self, log_file: Path) -> Dict[str, Any]:
         """解析 SPAdes 日志文件获取额外信息"""
         info = {}
@@ -0,0 +1,33 @@
+"""
+测试共用的 fixture
+"""
+import struct
+import zlib
+
+import pytest
+
+
+def _bgzip(data: bytes, block_size: int = 4096, level: int = 1) -> bytes:
+    """按 BGZF 规范把 data 写成若干压缩块（每块最多 block_size 字节，上限 65280）"""
+    out = []
+    for start in range(0, len(data), block_size):
+        block = data[start:start + block_size]
+        comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+        cdata = comp.compress(block) + comp.flush()
+        header = b"\x1f\x8b\x08\x04" + b"\x00" * 4 + b"\x00\xff" + struct.pack("<H", 6)
+        extra = b"BC" + struct.pack("<HH", 2, len(cdata) + 25)
+        out.append(header + extra + cdata + struct.pack("<II", zlib.crc32(block), len(block)))
+    return b"".join(out)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_caches(tmp_path, monkeypatch):
+    """LLM 响应缓存与阶段缓存默认位于 ~/.mito-forge，测试中改到临时目录"""
+    monkeypatch.setenv("MITO_LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setenv("MITO_STAGE_CACHE_DIR", str(tmp_path / "stage_cache"))
+
+
+@pytest.fixture
+def bgzip():
+    """返回 BGZF 压缩函数：bgzip(data, block_size=4096, level=1) -> bytes"""
+    return _bgzip
@@ -0,0 +1,110 @@
+"""
+测试 FASTG/GFA 组装图加载与线粒体子图提取
+"""
+import random
+
+import numpy as np
+
+from mito_forge.graph.nodes import _describe_mito_candidates, _select_mitochondrial_contigs
+from mito_forge.io.graph import AssemblyGraph, extract_mito_subgraph, load_gfa, load_graph
+
+ANIMAL = (10_000, 30_000)
+
+
+def _edge(i, length, cov):
+    return f"EDGE_{i}_length_{length}_cov_{cov}"
+
+
+def _write_fastg(path, edges, links):
+    """edges: {id: (length, cov)}；links: [(a, b)]，负数表示反向互补"""
+    def token(i):
+        length, cov = edges[abs(i)]
+        return _edge(abs(i), length, cov) + ("'" if i < 0 else "")
+
+    with open(path, "w") as f:
+        for i in sorted(edges):
+            for sign in (1, -1):
+                succ = [token(b) for a, b in links if a == sign * i]
+                f.write(f">{token(sign * i)}{':' + ','.join(succ) if succ else ''};\n")
+                f.write("ACGT" * 3 + "\n")
+    return path
+
+
+def _mito_fastg(tmp_path):
+    # 核基因组：覆盖度约 20x 的 40 条线性片段；线粒体：3 条 400x 片段首尾成环
+    edges = {i: (50_000, 20.0 + i % 3) for i in range(1, 41)}
+    edges.update({41: (7_000, 400.0), 42: (6_000, 410.0), 43: (3_500, 390.0)})
+    links = [(i, i + 1) for i in range(1, 40)] + [(41, 42), (42, 43), (43, 41), (-41, -43), (-43, -42), (-42, -41)]
+    return _write_fastg(tmp_path / "assembly_graph.fastg", edges, links)
+
+
+def test_fastg_parsing_and_mito_component(tmp_path):
+    graph = load_graph(_mito_fastg(tmp_path))
+    assert graph.n_segments == 43
+    assert graph.names[0] == "EDGE_1"
+    assert graph.lengths[40] == 7_000 and graph.coverage[41] == 410.0
+    # 正向 41 -> 42 的连接
+    assert 2 * 41 in graph.successors(2 * 40)
+
+    result = extract_mito_subgraph(graph, ANIMAL)
+    best = result["components"][0]
+    assert best["segments"] == ["EDGE_41", "EDGE_42", "EDGE_43"]
+    assert best["length"] == 16_500
+    assert best["in_range"] and best["is_circular"]
+    assert 390 <= best["coverage"] <= 410
+    assert result["baseline_coverage"] < 25
+
+
+def test_gfa_parsing_linear_component(tmp_path):
+    gfa = tmp_path / "assembly_graph.gfa"
+    gfa.write_text(
+        "H\tVN:Z:1.0\n"
+        "S\tedge_1\t*\tLN:i:9000\tdp:i:300\n"
+        "S\tedge_2\t*\tLN:i:8000\tKC:i:2400000\n"
+        "S\tedge_3\t*\tLN:i:500000\tdp:i:10\n"
+        "L\tedge_1\t+\tedge_2\t-\t0M\n"
+    )
+    graph = load_gfa(gfa)
+    assert graph.names == ["edge_1", "edge_2", "edge_3"]
+    assert graph.coverage.tolist() == [300.0, 300.0, 10.0]
+    # 反向互补方向上的连接同样存在：edge_2(+) -> edge_1(-)
+    assert 2 * 0 + 1 in graph.successors(2 * 1)
+
+    best = extract_mito_subgraph(graph, ANIMAL)["components"][0]
+    assert best["segments"] == ["edge_1", "edge_2"]
+    assert best["in_range"] and not best["is_circular"]
+
+
+def test_components_and_cycles_on_large_random_graph():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    # 一条长链加若干随机连接，只保留前半部分的片段
+    src = np.concatenate([2 * np.arange(n - 1), 2 * rng.integers(0, n, 500)])
+    dst = np.concatenate([2 * np.arange(1, n), 2 * rng.integers(0, n, 500) + 1])
+    graph = AssemblyGraph([f"s{i}" for i in range(n)], np.ones(n), np.ones(n), src, dst)
+    mask = np.arange(n) < n // 2
+    labels = graph.components(mask)
+    assert (labels[: n // 2] == 0).all() and (labels[n // 2:] == -1).all()
+    chain = AssemblyGraph(["a", "b", "c"], np.ones(3), np.ones(3), np.array([0, 2]), np.array([2, 4]))
+    assert not chain.has_cycle(np.arange(3))
+    loop = AssemblyGraph(["a", "b"], np.ones(2), np.ones(2), np.array([0, 2]), np.array([2, 0]))
+    assert loop.has_cycle(np.arange(2))
+
+
+def test_candidate_selection_uses_graph(tmp_path):
+    _mito_fastg(tmp_path)
+    rng = random.Random(5)
+    contigs = tmp_path / "contigs.fasta"
+    with open(contigs, "w") as f:
+        # 长度在范围内但覆盖度低的核 contig 不应入选
+        for name, length in [(_edge(41, 16_500, 400.0), 16_500), (_edge(7, 12_000, 21.0), 12_000)]:
+            f.write(f">{name}\n{''.join(rng.choice('ACGT') for _ in range(length))}\n")
+    result = _select_mitochondrial_contigs(str(contigs), "animal")
+    assert result["names"] == [_edge(41, 16_500, 400.0)]
+    assert result["is_circular"]
+    assert result["graph"]["components"][0]["n_segments"] == 3
+
+    described = _describe_mito_candidates(result["fasta"], {"is_circular": False},
+                                          str(tmp_path / "assembly_graph.fastg"), "animal")
+    assert described["count"] == 1 and described["is_circular"]
+    assert _describe_mito_candidates(result["fasta"], {}, None, "animal")["is_circular"] is False
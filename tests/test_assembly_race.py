@@ -0,0 +1,176 @@
+"""
+测试 Assembly Agent 的组装器竞速模式
+"""
+import os
+import sys
+import threading
+import time
+
+from mito_forge.core.agents.assembly_agent import AssemblyAgent
+from mito_forge.core.agents.types import AgentStatus
+
+
+def _result(tool, length, circular, n50):
+    return {"assembler": tool, "assembly_file": f"/tmp/{tool}.fasta", "total_length": length,
+            "max_length": length, "n50": n50, "num_circular": int(circular)}
+
+
+def test_race_candidates_from_plan_and_fallbacks():
+    agent = AssemblyAgent({
+        "race_size": 3,
+        "tool_plan": {"candidates": {"assembler": ["MitoZ", "GetOrganelle", "SPAdes"]}},
+        "fallback_tools": {"assembly": ["flye", "spades"]},
+    })
+    # 不支持的工具被过滤，重复的去重
+    assert agent._race_candidates({"assembler": "spades"}) == ["spades", "getorganelle", "flye"]
+    assert AssemblyAgent({"race_candidates": ["flye"]})._race_candidates({"assembler": "flye"}) == ["flye"]
+
+
+def test_score_prefers_circular_mito_sized_assembly():
+    agent = AssemblyAgent({"target_length": 16500})
+    good = agent._score_assembly(_result("getorganelle", 16400, True, 16400))
+    fragmented = agent._score_assembly(_result("spades", 120000, False, 800))
+    assert good >= 0.8 > fragmented
+    assert agent._score_assembly({}) == 0.0
+
+
+def test_race_accepts_first_good_result_and_cancels_loser(monkeypatch, tmp_path):
+    agent = AssemblyAgent({"threads": 8, "assembly_race": True,
+                           "race_candidates": ["getorganelle"]})
+    agent.prepare(tmp_path)
+    release = threading.Event()
+    seen = {}
+
+    def fake_run_assembly(self, inputs):
+        seen[inputs["assembler"]] = (self.config["threads"], self.workdir)
+        if inputs["assembler"] == "spades":
+            # 慢速失败者：直到被取消才返回
+            release.wait(timeout=10)
+            return _result("spades", 16500, True, 16500)
+        return _result("getorganelle", 16450, True, 16450)
+
+    def fake_cancel(self):
+        release.set()
+        return True
+
+    monkeypatch.setattr(AssemblyAgent, "run_assembly", fake_run_assembly)
+    monkeypatch.setattr(AssemblyAgent, "cancel", fake_cancel)
+
+    start = time.time()
+    result = agent._race_assemblers({"reads": "r.fq", "assembler": "spades"})
+    assert time.time() - start < 5
+
+    assert result["race"]["winner"] == "getorganelle"
+    assert result["race"]["cancelled"] == ["spades"]
+    assert result["assembly_file"] == "/tmp/getorganelle.fasta"
+    # 共享线程预算，每个候选独立工作目录
+    assert seen["spades"][0] == seen["getorganelle"][0] == 4
+    assert seen["getorganelle"][1] == tmp_path / "race" / "getorganelle"
+
+
+def test_race_picks_best_when_none_meets_threshold(monkeypatch, tmp_path):
+    agent = AssemblyAgent({"threads": 2, "race_candidates": ["flye"], "race_accept_score": 0.99})
+    agent.prepare(tmp_path)
+
+    def fake_run_assembly(self, inputs):
+        if inputs["assembler"] == "flye":
+            return _result("flye", 30000, False, 5000)
+        raise RuntimeError("spades crashed")
+
+    monkeypatch.setattr(AssemblyAgent, "run_assembly", fake_run_assembly)
+    result = agent._race_assemblers({"reads": "r.fq", "assembler": "spades"})
+    assert result["race"]["winner"] == "flye"
+    assert "spades" in result["race"]["errors"]
+
+
+def test_cancel_terminates_running_tool(tmp_path):
+    agent = AssemblyAgent({"tool_timeout": 30, "cancellable_tools": True})
+    agent.status = AgentStatus.RUNNING
+    timer = threading.Timer(0.5, agent.cancel)
+    timer.start()
+    start = time.time()
+    rc = agent.run_tool(sys.executable, ["-c", "import time; time.sleep(30)"], cwd=tmp_path)
+    assert time.time() - start < 10
+    assert rc["exit_code"] != 0
+
+
+def test_cancel_kills_tool_grandchildren(tmp_path):
+    agent = AssemblyAgent({"tool_timeout": 30, "cancellable_tools": True})
+    agent.status = AgentStatus.RUNNING
+    pid_file = tmp_path / "grandchild.pid"
+    # 工具派生一个忽略 SIGTERM 的长时间运行的子进程（类似 spades.py -> spades-core）
+    script = (
+        "import subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', "
+        "'import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)'])\n"
+        f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+        "time.sleep(60)\n"
+    )
+    timer = threading.Timer(1.0, agent.cancel)
+    timer.start()
+    start = time.time()
+    rc = agent.run_tool(sys.executable, ["-c", script], cwd=tmp_path)
+    assert time.time() - start < 10
+    assert rc["exit_code"] != 0
+
+    grandchild = int(pid_file.read_text())
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            os.waitpid(grandchild, os.WNOHANG)
+        except ChildProcessError:
+            pass
+        try:
+            with open(f"/proc/{grandchild}/stat") as f:
+                if f.read().rsplit(")", 1)[1].split()[0] == "Z":
+                    break
+        except FileNotFoundError:
+            break
+        time.sleep(0.1)
+    else:
+        raise AssertionError("grandchild process survived cancel()")
+
+
+def test_cancel_between_spawn_and_registration(tmp_path, monkeypatch):
+    import subprocess
+
+    agent = AssemblyAgent({"tool_timeout": 30, "cancellable_tools": True})
+    agent.status = AgentStatus.RUNNING
+    real_popen = subprocess.Popen
+
+    def popen_then_cancel(*args, **kwargs):
+        proc = real_popen(*args, **kwargs)
+        # 进程已启动但尚未登记时到达的 cancel()
+        assert agent.cancel()
+        return proc
+
+    monkeypatch.setattr(subprocess, "Popen", popen_then_cancel)
+    start = time.time()
+    rc = agent.run_tool(sys.executable, ["-c", "import time; time.sleep(60)"], cwd=tmp_path)
+    assert time.time() - start < 10
+    assert rc["exit_code"] != 0
+
+
+def test_pmat_result_has_scoring_metrics(tmp_path, monkeypatch):
+    import random
+
+    rng = random.Random(8)
+    genome = "".join(rng.choice("ACGT") for _ in range(16000))
+    fasta = tmp_path / "PMAT_mt.fa"
+    fasta.write_text(f">ctg1\n{genome + genome[:200]}\n")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "pmat2"
+    fake.write_text(f"#!/bin/sh\nmkdir -p pmat_output/gfa_result\ncp {fasta} pmat_output/gfa_result/PMAT_mt.fa\n")
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    reads = tmp_path / "reads.fq"
+    reads.write_text("@r\nACGT\n+\nIIII\n")
+
+    agent = AssemblyAgent({"threads": 1, "long_read_select": False, "target_length": 16500})
+    agent.prepare(tmp_path / "work")
+    result = agent.run_assembly({"reads": str(reads), "assembler": "pmat", "read_type": "pacbio-hifi"})
+    assert result["tool"] == "PMAT"
+    assert result["max_length"] == 16200 and result["n50"] == 16200
+    assert result["is_circular"]
+    assert agent._score_assembly(result) >= 0.9
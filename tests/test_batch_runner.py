@@ -0,0 +1,106 @@
+"""
+测试多样本批处理运行器
+"""
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mito_forge.graph import batch as batch_mod
+from mito_forge.utils.exceptions import ValidationError
+
+
+def _write_sheet(tmp_path, rows):
+    sheet = tmp_path / "samples.tsv"
+    lines = ["sample\treads\treads2\tkingdom"] + ["\t".join(r) for r in rows]
+    sheet.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return sheet
+
+
+def test_load_samplesheet_resolves_relative_paths(tmp_path):
+    sheet = _write_sheet(tmp_path, [("s1", "s1_R1.fq", "s1_R2.fq", "plant"), ("s2", "s2.fq", "", "")])
+    samples = batch_mod.load_samplesheet(str(sheet))
+    assert [s["sample"] for s in samples] == ["s1", "s2"]
+    assert samples[0]["reads"] == str(tmp_path / "s1_R1.fq")
+    assert samples[0]["kingdom"] == "plant"
+    assert "reads2" not in samples[1]
+
+
+def test_load_samplesheet_rejects_duplicates(tmp_path):
+    sheet = _write_sheet(tmp_path, [("s1", "a.fq", "", ""), ("s1", "b.fq", "", "")])
+    with pytest.raises(ValidationError):
+        batch_mod.load_samplesheet(str(sheet))
+
+
+@pytest.mark.parametrize("name", ["../x", "a/b", "a\\b", "..", "x..y"])
+def test_load_samplesheet_rejects_path_like_names(tmp_path, name):
+    sheet = _write_sheet(tmp_path, [("ok", "a.fq", "", ""), (name, "b.fq", "", "")])
+    with pytest.raises(ValidationError, match="row 3"):
+        batch_mod.load_samplesheet(str(sheet))
+    with pytest.raises(ValidationError):
+        batch_mod.run_batch([{"sample": name, "reads": "b.fq"}], str(tmp_path / "out"))
+    assert not (tmp_path / "x").exists()
+
+
+def test_split_budget_divides_threads_and_memory():
+    budget = batch_mod.split_budget(32, 64, 4)
+    assert budget == {"threads": 8, "memory_gb": 16.0}
+    assert batch_mod.split_budget(2, None, 4)["threads"] == 1
+
+
+def test_run_batch_isolates_failures(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run_pipeline_sync(inputs, config, workdir, pipeline_id):
+        calls.append((pipeline_id, config["threads"], workdir))
+        if pipeline_id == "bad":
+            raise RuntimeError("assembler exploded")
+        return {
+            "pipeline_id": pipeline_id, "done": True, "current_stage": "report",
+            "completed_stages": ["supervisor", "qc", "assembly"], "errors": [],
+        }
+
+    import mito_forge.graph.build as build_mod
+    monkeypatch.setattr(build_mod, "run_pipeline_sync", fake_run_pipeline_sync)
+
+    samples = [
+        {"sample": "good", "reads": "g.fq"},
+        {"sample": "bad", "reads": "b.fq"},
+        {"sample": "also_good", "reads": "a.fq"},
+    ]
+    records = batch_mod.run_batch(
+        samples, str(tmp_path / "out"), config={"tool_plan": {}},
+        threads=6, jobs=3, executor_cls=ThreadPoolExecutor,
+    )
+
+    assert [r["status"] for r in records] == ["success", "failed", "success"]
+    assert "assembler exploded" in records[1]["error"]
+    assert all(threads == 2 for _, threads, _ in calls)
+    assert {w for _, _, w in calls} == {str(tmp_path / "out" / n / "work") for n in ("good", "bad", "also_good")}
+
+    with open(tmp_path / "out" / "batch_status.tsv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f, delimiter="\t"))
+    assert [r["sample"] for r in rows] == ["good", "bad", "also_good"]
+    assert rows[1]["status"] == "failed"
+
+
+def test_run_batch_recovers_from_killed_worker(tmp_path, monkeypatch):
+    import os
+
+    def fake_run_pipeline_sync(inputs, config, workdir, pipeline_id):
+        if pipeline_id == "killer":
+            os._exit(9)  # 模拟工作进程被 OOM 杀死
+        assert config.get("seq_type") == "ont"
+        return {"pipeline_id": pipeline_id, "done": True, "current_stage": "report",
+                "completed_stages": ["assembly"], "errors": []}
+
+    import mito_forge.graph.build as build_mod
+    monkeypatch.setattr(build_mod, "run_pipeline_sync", fake_run_pipeline_sync)
+    monkeypatch.delenv("MITO_SEQ_TYPE", raising=False)
+
+    samples = [{"sample": name, "reads": f"{name}.fq", "seq_type": "ont"} for name in ("a", "killer", "b", "c")]
+    records = batch_mod.run_batch(samples, str(tmp_path / "out"), config={"tool_plan": {}}, threads=2, jobs=2)
+
+    assert [r["status"] for r in records] == ["success", "failed", "success", "success"]
+    assert "worker crashed" in records[1]["error"]
+    assert "MITO_SEQ_TYPE" not in os.environ
@@ -0,0 +1,106 @@
+"""
+测试内置向量化 QC 引擎
+"""
+import random
+import shutil
+
+import numpy as np
+import pytest
+
+from mito_forge.core.agents.qc_agent import QCAgent
+from mito_forge.io import qc as builtin_qc
+from mito_forge.io.qc import run_builtin_qc, shard_boundaries
+
+
+def _records(n, seed=1):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        length = rng.randint(40, 160)
+        seq = "".join(rng.choices("ACGTN", weights=[30, 20, 20, 30, 1], k=length))
+        qual = "".join(chr(33 + rng.randint(2, 41)) for _ in range(length))
+        if i % 7 == 0:
+            # 以 '@' 开头的质量行不能被误认为记录起点
+            qual = "@" + qual[1:]
+        records.append((f"r{i}", seq, qual))
+    return records
+
+
+def _write(path, records):
+    path.write_text("".join(f"@{name}\n{seq}\n+\n{qual}\n" for name, seq, qual in records))
+    return path
+
+
+@pytest.fixture
+def fastq(tmp_path):
+    records = _records(3000)
+    return _write(tmp_path / "reads.fq", records), records
+
+
+def test_metrics_are_exact(fastq):
+    path, records = fastq
+    quals = np.concatenate([np.frombuffer(q.encode(), dtype=np.uint8) - 33 for _, _, q in records])
+    seqs = "".join(s for _, s, _ in records)
+    gc = sum(seqs.count(c) for c in "GC")
+
+    metrics = run_builtin_qc(path)
+    assert metrics["filename"] == "reads.fq" and metrics["engine"] == "builtin"
+    assert metrics["total_reads"] == 3000 and metrics["total_bases"] == len(quals)
+    assert metrics["q20_percent"] == round((quals >= 20).mean() * 100, 2)
+    assert metrics["q30_percent"] == round((quals >= 30).mean() * 100, 2)
+    assert metrics["avg_quality"] == round(quals.mean(), 2)
+    assert metrics["gc_content"] == round(gc * 100 / (len(seqs) - seqs.count("N")), 2)
+    assert metrics["min_length"] == min(len(s) for _, s, _ in records)
+    assert metrics["max_length"] == max(len(s) for _, s, _ in records)
+    assert len(metrics["per_base_quality"]["mean"]) == metrics["max_length"]
+    assert sum(metrics["per_sequence_quality"]) == 3000 and sum(metrics["gc_distribution"]) == 3000
+    assert metrics["duplication_percent"] == 0.0
+
+
+def test_shards_match_single_process(fastq, tmp_path, monkeypatch, bgzip):
+    path, _ = fastq
+    bgz = tmp_path / "reads.fq.bgz"
+    bgz.write_bytes(bgzip(path.read_bytes()))
+    expected = run_builtin_qc(path, threads=1)
+
+    monkeypatch.setattr(builtin_qc, "MIN_SHARD_BYTES", 1 << 14)
+    monkeypatch.setattr(builtin_qc, "SYNC_BYTES", 1 << 10)
+    for target in (path, bgz):
+        assert len(shard_boundaries(target, 5)) == 6
+        metrics = run_builtin_qc(target, threads=5)
+        for key in ("total_reads", "total_bases", "q20_percent", "q30_percent", "avg_quality",
+                    "gc_content", "n50", "per_base_quality", "gc_distribution", "per_sequence_quality"):
+            assert metrics[key] == expected[key], key
+
+
+def test_qc_agent_builtin_tool(tmp_path, monkeypatch):
+    r1 = _write(tmp_path / "s_R1.fq", _records(500, seed=2))
+    r2 = _write(tmp_path / "s_R2.fq", _records(400, seed=3))
+
+    agent = QCAgent(config={"qc_tool": "builtin", "threads": 2})
+    agent.prepare(tmp_path / "work")
+    monkeypatch.setattr(agent, "run_tool", lambda *a, **k: pytest.fail("external tool called"))
+    result = agent.run_qc_analysis({"reads": str(r1), "reads2": str(r2), "read_type": "illumina"})
+    assert result["paired_end"] and result["total_reads"] == 900
+    assert (result["r1_reads"], result["r2_reads"]) == (500, 400)
+    assert (tmp_path / "work" / "qc" / "builtin_qc.json").exists()
+    assert result["qc_engine"] == "builtin"
+
+
+def test_qc_agent_falls_back_to_builtin(tmp_path, monkeypatch):
+    reads = _write(tmp_path / "reads.fq", _records(200))
+    agent = QCAgent(config={})
+    agent.prepare(tmp_path / "work")
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    monkeypatch.setattr("mito_forge.utils.tools_manager.ToolsManager.where", lambda self, name: None)
+    monkeypatch.setattr(agent, "run_tool", lambda *a, **k: {"exit_code": 1})
+    # 默认不静默回退
+    with pytest.raises(RuntimeError, match="qc_builtin_fallback"):
+        agent.run_qc_analysis({"reads": str(reads)})
+
+    agent = QCAgent(config={"qc_builtin_fallback": True})
+    agent.prepare(tmp_path / "work")
+    monkeypatch.setattr(agent, "run_tool", lambda *a, **k: {"exit_code": 1})
+    result = agent.run_qc_analysis({"reads": str(reads)})
+    assert result["engine"] == "builtin" and result["total_reads"] == 200
+    assert result["qc_engine"] == "builtin (fallback)"
@@ -0,0 +1,125 @@
+"""
+测试 SQLite 检查点与断点恢复
+
+通过子进程运行流水线并在注释阶段中途 SIGKILL，验证恢复时跳过已完成阶段。
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from mito_forge.graph import build as build_mod
+from mito_forge.graph.state import complete_stage, fail_stage, RouteDecision
+
+
+# 子进程脚本：用记录调用的假节点替换真实节点，CRASH_AT 指定的阶段中途被杀
+_RUNNER = textwrap.dedent('''
+    import json, os, signal, sys
+    from pathlib import Path
+    import mito_forge.graph.build as b
+    from mito_forge.graph.state import complete_stage, finalize_pipeline, RouteDecision
+
+    mode, workdir, log = sys.argv[1], sys.argv[2], Path(sys.argv[3])
+
+    def make(stage):
+        def node(state):
+            with log.open("a") as f:
+                f.write(stage + "\\n")
+            if stage == os.environ.get("CRASH_AT"):
+                os.kill(os.getpid(), signal.SIGKILL)
+            complete_stage(state, stage, {"files": {}, "metrics": {stage + "_ok": 1},
+                                          "metadata": {}, "summary": stage, "success": True})
+            state["route"] = RouteDecision.CONTINUE
+            if stage == "report":
+                finalize_pipeline(state)
+            return state
+        return node
+
+    for name in ("supervisor", "qc", "assembly", "polish", "annotation", "report"):
+        setattr(b, name + "_node", make(name))
+
+    if mode == "run":
+        final = b.run_pipeline_sync({"reads": "r.fq"}, {"threads": 1, "resource_scheduler": False},
+                                    workdir, "crash-test")
+    else:
+        final = b.resume_pipeline(workdir)
+    print(json.dumps({"done": final["done"], "completed": final["completed_stages"],
+                      "outputs": sorted(final["stage_outputs"])}))
+''')
+
+
+def _run(tmp_path, mode, crash_at=""):
+    script = tmp_path / "runner.py"
+    script.write_text(_RUNNER, encoding="utf-8")
+    env = dict(os.environ, CRASH_AT=crash_at)
+    return subprocess.run(
+        [sys.executable, str(script), mode, str(tmp_path / "work"), str(tmp_path / "calls.log")],
+        capture_output=True, text=True, env=env, timeout=120,
+    )
+
+
+def _calls(tmp_path):
+    return (tmp_path / "calls.log").read_text().split()
+
+
+def test_crash_mid_annotation_resumes_without_rerunning_assembly(tmp_path):
+    crashed = _run(tmp_path, "run", crash_at="annotation")
+    assert crashed.returncode != 0
+    assert _calls(tmp_path) == ["supervisor", "qc", "assembly", "annotation"]
+    assert (tmp_path / "work" / "checkpoints.sqlite").exists()
+
+    resumed = _run(tmp_path, "resume")
+    assert resumed.returncode == 0, resumed.stderr
+    result = json.loads(resumed.stdout.strip().splitlines()[-1])
+
+    # 恢复时仅重新执行被中断的注释阶段及其后续阶段
+    assert _calls(tmp_path) == ["supervisor", "qc", "assembly", "annotation", "annotation", "report"]
+    assert result["done"] is True
+    assert result["completed"] == ["supervisor", "qc", "assembly", "annotation", "report"]
+    assert "assembly" in result["outputs"]
+
+
+def _fake_nodes(monkeypatch, calls, fail_once=None):
+    failed = set()
+
+    def make(stage):
+        def node(state):
+            calls.append(stage)
+            if stage == fail_once and stage not in failed:
+                failed.add(stage)
+                fail_stage(state, stage, "boom")
+                state["route"] = RouteDecision.TERMINATE
+                return state
+            complete_stage(state, stage, {"files": {}, "metrics": {}, "metadata": {},
+                                          "summary": stage, "success": True})
+            state["route"] = RouteDecision.CONTINUE
+            if stage == "report":
+                state["done"] = True
+            return state
+        return node
+
+    for name in ("supervisor", "qc", "assembly", "polish", "annotation", "report"):
+        monkeypatch.setattr(build_mod, name + "_node", make(name))
+
+
+def test_resume_after_failed_stage_restarts_at_that_stage(tmp_path, monkeypatch):
+    calls = []
+    _fake_nodes(monkeypatch, calls, fail_once="assembly")
+    workdir = str(tmp_path / "work")
+
+    first = build_mod.run_pipeline_sync({"reads": "r.fq"}, {"resource_scheduler": False}, workdir, "p1")
+    assert first["done"] is False
+    assert calls == ["supervisor", "qc", "assembly"]
+
+    final = build_mod.resume_pipeline(workdir)
+    assert calls == ["supervisor", "qc", "assembly", "assembly", "annotation", "report"]
+    assert final["done"] is True
+    assert final["failed_stages"] == []
+
+
+def test_resume_missing_checkpoint_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        build_mod.resume_pipeline(str(tmp_path / "nope.sqlite"))
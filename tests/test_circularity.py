@@ -0,0 +1,92 @@
+"""
+测试基于滚动哈希的首尾重叠（环化）检测及其在候选筛选、GetOrganelle 解析与竞速评分中的使用
+"""
+import random
+
+from mito_forge.core.agents.assembly_agent import AssemblyAgent
+from mito_forge.graph.nodes import _extract_polish_contigs, _select_mitochondrial_contigs
+from mito_forge.io.circular import check_circularity, terminal_overlaps, write_trimmed
+from mito_forge.io.fasta import fasta_stats
+from mito_forge.utils.parsers.getorganelle_parser import GetOrganelleParser
+
+
+def _random_seq(rng, n):
+    return "".join(rng.choice("ACGT") for _ in range(n))
+
+
+def _write_fasta(path, records, width=60):
+    with open(path, "w") as f:
+        for header, seq in records:
+            f.write(f">{header}\n" + "".join(seq[i:i + width] + "\n" for i in range(0, len(seq), width)))
+    return path
+
+
+def _with_errors(seq, positions):
+    seq = list(seq)
+    for i in positions:
+        seq[i] = "A" if seq[i] != "A" else "C"
+    return "".join(seq)
+
+
+def _records(rng):
+    genome = _random_seq(rng, 16000)
+    return genome, [
+        ("spades_like cov_300", genome + genome[:127]),
+        # 长读长组装：2 kb 重叠，尾部含少量错配（包括第一个种子内）
+        ("long_read", _with_errors(genome + genome[:2000], [16005, 16500, 17500])),
+        ("linear", _random_seq(rng, 15000)),
+        ("tiny", "ACGTACGTAC"),
+    ]
+
+
+def test_overlap_detection_and_trimming(tmp_path):
+    rng = random.Random(11)
+    genome, records = _records(rng)
+    path = _write_fasta(tmp_path / "contigs.fasta", records)
+    report = check_circularity(path)
+    assert report["spades_like"]["overlap"] == 127
+    assert report["long_read"]["overlap"] == 2000
+    assert not report["linear"]["is_circular"] and not report["tiny"]["is_circular"]
+    assert report["spades_like"]["trimmed_length"] == 16000
+
+    out = write_trimmed(path, report, tmp_path / "trimmed.fasta")
+    stats = fasta_stats(out)
+    assert stats["lengths"] == [16000, 16000, 15000, 10]
+    assert stats["contigs"][0]["header"] == "spades_like cov_300"
+
+
+def test_batch_is_vectorized_over_contigs():
+    rng = random.Random(2)
+    ends = []
+    for i in range(50):
+        seq = _random_seq(rng, 4000)
+        if i % 2:
+            seq += seq[:60 + i]
+        width = len(seq) // 2
+        ends.append((seq[:width].encode(), seq[-width:].encode()))
+    overlaps = terminal_overlaps(ends)
+    assert overlaps == [0 if i % 2 == 0 else 60 + i for i in range(50)]
+    assert terminal_overlaps([]) == []
+
+
+def test_selection_polish_parser_and_score_use_overlap(tmp_path):
+    rng = random.Random(4)
+    genome, records = _records(rng)
+    path = _write_fasta(tmp_path / "contigs.fasta", records[:1] + records[2:])
+    selected = _select_mitochondrial_contigs(str(path), "animal")
+    assert selected["is_circular"]
+    assert selected["circularity"]["spades_like"]["overlap"] == 127
+    assert fasta_stats(selected["fasta"])["lengths"][0] == 16000
+
+    polish_input = _extract_polish_contigs(path, ["spades_like"], tmp_path / "polish", selected["circularity"])
+    assert fasta_stats(polish_input)["lengths"] == [16000]
+
+    organelle = tmp_path / "getorganelle"
+    organelle.mkdir()
+    _write_fasta(organelle / "animal_mt.K105.complete.graph1.1.path_sequence.fasta", records[:1])
+    assert GetOrganelleParser(organelle).parse()["metrics"]["circular_sequences"] == 1
+
+    agent = AssemblyAgent({"target_length": 16500})
+    result = {"assembly_file": str(path), "max_length": 16127, "n50": 16127}
+    assert agent._score_assembly(result) >= 0.9
+    assert not agent._detect_circularity(str(tmp_path / "missing.fasta"))
@@ -0,0 +1,108 @@
+"""
+测试按覆盖度的确定性降采样
+"""
+import gzip
+import random
+
+import pytest
+
+import mito_forge.graph.build as build_mod
+import mito_forge.graph.nodes as nodes
+from mito_forge.graph.state import RouteDecision, init_pipeline_state
+from mito_forge.io.downsample import downsample_reads, keep_mask, read_id, sampling_fraction
+from mito_forge.io.reads import detect_compression, iter_reads
+
+
+@pytest.fixture
+def paired_reads(tmp_path):
+    rng = random.Random(5)
+    r1, r2 = tmp_path / "s_1.fq", tmp_path / "s_2.fq"
+    with open(r1, "w") as f1, open(r2, "w") as f2:
+        for i in range(4000):
+            a = "".join(rng.choices("ACGT", k=100))
+            b = "".join(rng.choices("ACGT", k=100))
+            f1.write(f"@A00123:8:H7K2:1:1101:{i}:1000 1:N:0:ACGT\n{a}\n+\n{'F' * 100}\n")
+            f2.write(f"@A00123:8:H7K2:1:1101:{i}:1000 2:N:0:ACGT\n{b}\n+\n{'F' * 100}\n")
+    return r1, r2
+
+
+def test_hash_selection_is_deterministic_per_id():
+    assert read_id(b"r17/1") == read_id(b"r17/2 extra") == b"r17"
+    names = [f"read{i}".encode() for i in range(20000)]
+    mask = keep_mask(names, 0.1, seed=3)
+    assert 0.09 < mask.mean() < 0.11
+    # 与顺序无关：同一 ID 的去留恒定
+    assert (keep_mask(names[::-1], 0.1, seed=3)[::-1] == mask).all()
+    assert (keep_mask([n + b"/2" for n in names], 0.1, seed=3) == mask).all()
+    assert not (keep_mask(names, 0.1, seed=4) == mask).all()
+    assert sampling_fraction(5000, 200) == pytest.approx(0.04) and sampling_fraction(150, 200) == 1.0
+
+
+def test_downsample_pairs_in_sync_with_bgzf_output(paired_reads, tmp_path):
+    r1, r2 = paired_reads
+    result = downsample_reads(r1, tmp_path / "a", 0.25, reads2=r2, threads=1)
+    again = downsample_reads(r1, tmp_path / "b", 0.25, reads2=r2, threads=4)
+    assert result["total_reads"] == 4000
+    assert 0.22 < result["kept_fraction"] < 0.28
+    assert result["kept_bases"] == result["kept_reads"] * 200
+
+    assert detect_compression(result["reads"]) == "bgzip"
+    names1 = [rec.name.split()[0] for rec in iter_reads(result["reads"])]
+    names2 = [rec.name.split()[0] for rec in iter_reads(result["reads2"])]
+    assert names1 == names2 and len(names1) == result["kept_reads"]
+    # 标准 gzip 可直接解压；线程数不影响输出
+    with gzip.open(result["reads"], "rb") as handle:
+        assert handle.read().count(b"\n") == 4 * result["kept_reads"]
+    with gzip.open(again["reads2"], "rb") as a, gzip.open(result["reads2"], "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_downsample_stage_uses_coverage_estimate(paired_reads, tmp_path):
+    r1, r2 = paired_reads
+    inputs = {"reads": str(r1), "reads2": str(r2)}
+    state = init_pipeline_state(inputs, {"kingdom": "animal", "bait_reads": False}, str(tmp_path / "work"))
+    state["route"] = RouteDecision.CONTINUE
+    assert build_mod.qc_route_decider(state) == "continue"
+
+    state["config"].update({"downsample_coverage": 100, "threads": 2, "target_length": 16000})
+    assert build_mod.qc_route_decider(state) == "downsample"
+    assert build_mod.bait_route_decider(state) == "downsample"
+    # 诱饵招募 8Mbp -> 500x，目标 100x -> 采样 20%
+    state["stage_outputs"]["bait"] = {"files": {}, "metrics": {"baited_bases": 8_000_000}}
+    state = nodes.downsample_node(state)
+    metrics = state["stage_outputs"]["downsample"]["metrics"]
+    assert metrics["sampling_fraction"] == pytest.approx(0.2)
+    assert metrics["estimated_coverage"] == 500 and 0.17 < metrics["kept_fraction"] < 0.23
+
+    # 覆盖度已低于目标：跳过
+    state["stage_outputs"]["bait"]["metrics"]["baited_bases"] = 800_000
+    state = nodes.downsample_node(state)
+    assert state["stage_info"]["downsample"]["status"].value == "skipped"
+
+
+def test_library_coverage_fallback_uses_supervisor_profile(tmp_path, monkeypatch):
+    reads = tmp_path / "reads.fq"
+    reads.write_text("@A00123:8:H7K2:1:1101:1:1000 1:N:0:ACGT\nACGT\n+\nFFFF\n")
+    # 模拟 20 Gbp 的文库
+    monkeypatch.setattr(nodes, "_count_reads", lambda path, threads=1: {"reads": 10 ** 8, "bases": 2 * 10 ** 10})
+    state = init_pipeline_state({"reads": str(reads)}, {"kingdom": "plant", "target_length": 400_000,
+                                                        "downsample_coverage": 200}, str(tmp_path / "work"))
+    state = nodes.supervisor_node(state)
+    assert state["config"]["data_profile"]["total_bases"] == 2 * 10 ** 10
+    # 20 Gbp x 1% / 400 kb = 500x
+    assert nodes._estimate_mito_coverage(state) == pytest.approx(500)
+    state["config"]["mito_read_fraction"] = 0.001
+    assert nodes._estimate_mito_coverage(state) == pytest.approx(50)
+
+    # 未设置 target_length 时按界别取典型长度（植物 200 kb）
+    del state["config"]["target_length"]
+    state["config"]["mito_read_fraction"] = 0.01
+    assert nodes._estimate_mito_coverage(state) == pytest.approx(1000)
+    # 只有 estimated_coverage 的旧画像按其基因组大小还原碱基数
+    state["config"]["data_profile"] = {"estimated_coverage": 2 * 10 ** 10 / 16000, "estimated_genome_size": 16000}
+    assert nodes._estimate_mito_coverage(state) == pytest.approx(1000)
+    state["config"]["data_profile"] = {}
+    assert nodes._estimate_mito_coverage(state) is None
+    # 诱饵计数优先
+    state["stage_outputs"]["bait"] = {"metrics": {"baited_bases": 20_000_000}}
+    assert nodes._estimate_mito_coverage(state) == pytest.approx(100)
@@ -0,0 +1,87 @@
+"""
+测试 .fai 兼容索引、随机读取及其在候选提取/抛光/注释拆分中的使用
+"""
+import os
+import random
+
+import pytest
+
+import mito_forge.io.faidx as faidx
+from mito_forge.core.agents.annotation_agent import AnnotationAgent
+from mito_forge.graph.nodes import _extract_polish_contigs, _select_mitochondrial_contigs
+from mito_forge.io.faidx import FastaIndex, open_fasta_index
+
+
+def _write_fasta(path, records, width=60, newline="\n"):
+    with open(path, "w", newline="") as f:
+        for header, seq in records:
+            f.write(f">{header}{newline}")
+            f.write("".join(seq[i:i + width] + newline for i in range(0, len(seq), width)))
+    return path
+
+
+def _random_seq(rng, n):
+    return "".join(rng.choice("ACGT") for _ in range(n))
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_fai_format_and_fetch(tmp_path, newline):
+    rng = random.Random(7)
+    records = [(f"c{i} len", _random_seq(rng, n)) for i, n in enumerate([150, 60, 7, 0, 301])]
+    path = _write_fasta(tmp_path / "asm.fasta", records, newline=newline)
+    with FastaIndex(path) as index:
+        assert index.names == ["c0", "c1", "c2", "c3", "c4"]
+        for (header, seq), name in zip(records, index.names):
+            assert index.fetch(name) == seq
+            assert index.fetch(name, 55, 125) == seq[55:125]
+            assert index.fetch(name, 290, 1000) == seq[290:]
+    fai = (tmp_path / "asm.fasta.fai").read_text().splitlines()
+    step = 60 + len(newline)
+    assert fai[0] == f"c0\t150\t{len('>c0 len') + len(newline)}\t60\t{step}"
+    with pytest.raises(KeyError):
+        FastaIndex(path).fetch("missing")
+
+
+def test_index_reused_and_rejects_ragged_lines(tmp_path, monkeypatch):
+    path = _write_fasta(tmp_path / "asm.fasta", [("a", "ACGT" * 40)])
+    os.utime(path, (1_000_000, 1_000_000))
+    first = open_fasta_index(path)
+    assert open_fasta_index(path) is first
+    monkeypatch.setattr(faidx, "build_fai", lambda p: pytest.fail("index rebuilt"))
+    assert FastaIndex(path).length("a") == 160
+
+    ragged = tmp_path / "ragged.fasta"
+    ragged.write_text(">a\nACGT\nAC\nACGT\n")
+    monkeypatch.undo()
+    with pytest.raises(ValueError, match="line length"):
+        FastaIndex(ragged)
+
+
+def test_candidates_polish_and_annotation_use_index(tmp_path):
+    rng = random.Random(3)
+    records = [
+        ("NODE_1_length_90000_cov_8.0", _random_seq(rng, 900)),
+        ("NODE_2_length_16500_cov_900.0", _random_seq(rng, 16500)),
+        ("NODE_3_length_15000_cov_40.0 circular", _random_seq(rng, 15000)),
+        ("NODE_4_length_500_cov_2.0", _random_seq(rng, 500)),
+    ]
+    contigs = _write_fasta(tmp_path / "contigs.fasta", records)
+    selected = _select_mitochondrial_contigs(str(contigs), "animal")
+    assert selected["names"] == ["NODE_2_length_16500_cov_900.0", "NODE_3_length_15000_cov_40.0"]
+    assert selected["count"] == 2 and selected["is_circular"]
+    candidates = FastaIndex(selected["fasta"])
+    assert candidates.fetch(selected["names"][0]) == records[1][1]
+
+    runs, genome_length = AnnotationAgent()._split_for_annotation(selected["fasta"], tmp_path / "ann")
+    assert genome_length == 31500
+    assert [fasta.name for fasta, _ in runs] == [f"{name}.fasta" for name in selected["names"]]
+    assert all(out.is_dir() for _, out in runs)
+
+    fallback = _select_mitochondrial_contigs(str(contigs), "plant")
+    assert fallback["names"] == ["NODE_2_length_16500_cov_900.0"]
+
+    subset = _extract_polish_contigs(contigs, ["NODE_3_length_15000_cov_40.0"], tmp_path / "polish")
+    assert subset.name == "polish_input.fasta"
+    assert FastaIndex(subset).fetch("NODE_3_length_15000_cov_40.0") == records[2][1]
+    assert _extract_polish_contigs(contigs, None, tmp_path / "polish") == contigs
+
@@ -0,0 +1,60 @@
+"""
+测试流式 FASTA 统计引擎及其在解析器/抛光封装中的使用
+"""
+import gzip
+
+import pytest
+
+import mito_forge.io.fasta as fasta
+from mito_forge.graph.nodes import _calculate_improvement
+from mito_forge.io.fasta import assembly_stats, fasta_stats
+from mito_forge.utils.parsers import parse_spades_output
+
+ASSEMBLY = (
+    ">NODE_1_length_12_cov_150.5\nACGTACGT\r\nNNNN\n"
+    ">NODE_2_length_6_cov_20.0\nGGNNCC\n"
+    ">NODE_3_length_2_cov_5.5 extra\nat"
+)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 1 << 16])
+def test_one_pass_stats_are_chunk_independent(tmp_path, chunk_size):
+    path = tmp_path / "contigs.fasta"
+    path.write_text(ASSEMBLY)
+    stats = fasta_stats(path, chunk_size=chunk_size)
+    assert stats["lengths"] == [12, 6, 2]
+    assert (stats["n50"], stats["l50"], stats["n90"], stats["l90"]) == (12, 1, 6, 2)
+    assert stats["gc_content"] == pytest.approx(8 / 20 * 100)
+    assert (stats["n_count"], stats["n_runs"]) == (6, 2)
+    assert [c["coverage"] for c in stats["contigs"]] == [150.5, 20.0, 5.5]
+    assert stats["contigs"][2]["name"] == "NODE_3_length_2_cov_5.5"
+    assert "sequences" not in stats
+
+
+def test_compressed_missing_and_tool_summary(tmp_path):
+    path = tmp_path / "polished.fasta.gz"
+    path.write_bytes(gzip.compress(ASSEMBLY.encode()))
+    assert assembly_stats(path) == {
+        "total_length": 20, "num_contigs": 3, "n50": 12,
+        "max_contig_length": 12, "min_contig_length": 2, "gc_content": 40.0, "n_count": 6,
+    }
+    assert assembly_stats(tmp_path / "missing.fasta") == {}
+    assert fasta_stats(tmp_path / "missing.fasta")["num_sequences"] == 0
+
+
+def test_parsers_and_improvement_use_engine(tmp_path, monkeypatch):
+    (tmp_path / "contigs.fasta").write_text(ASSEMBLY)
+    metrics = parse_spades_output(tmp_path)["metrics"]
+    assert (metrics["num_contigs"], metrics["n50"], metrics["n90"]) == (3, 12, 6)
+    assert metrics["gc_content"] == 40.0
+    assert metrics["average_coverage"] == pytest.approx((150.5 + 20 + 5.5) / 3, abs=0.01)
+
+    polished = tmp_path / "polished.fasta"
+    polished.write_text(">NODE_1\n" + "A" * 14 + "\n>NODE_2\nGGCC\n")
+    calls = []
+    real = fasta.fasta_stats
+    monkeypatch.setattr(fasta, "fasta_stats", lambda p, *a: calls.append(p) or real(p, *a))
+    result = _calculate_improvement(str(tmp_path / "contigs.fasta"), str(polished))
+    assert len(calls) == 2
+    assert result["length_change"] == -2 and result["n50_change"] == 2
+    assert (result["original"]["n_count"], result["polished"]["n_count"]) == (6, 0)
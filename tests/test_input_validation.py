@@ -0,0 +1,88 @@
+"""
+测试输入数据流式校验与 supervisor 快速失败
+"""
+import gzip
+import json
+
+import pytest
+
+import mito_forge.graph.nodes as nodes
+from mito_forge.graph.state import init_pipeline_state
+from mito_forge.io.validate import validate_inputs, validate_read_file
+
+
+def _records(n, mate, start=0, length=60):
+    return "".join(f"@r{i}/{mate}\n{'ACGT' * (length // 4)}\n+\n{'5?I' * (length // 3)}\n" for i in range(start, start + n))
+
+
+@pytest.fixture
+def pair(tmp_path):
+    r1, r2 = tmp_path / "ok_1.fq", tmp_path / "ok_2.fq"
+    r1.write_text(_records(3000, 1))
+    r2.write_text(_records(3000, 2))
+    return r1, r2
+
+
+def test_valid_pair_passes(pair):
+    report = validate_inputs(*pair, threads=2)
+    assert report["valid"] and not report["errors"]
+    assert [f["records"] for f in report["files"]] == [3000, 3000]
+    assert report["files"][0]["quality_encoding"] == "phred33"
+
+    high = pair[0].with_name("high.fq")
+    high.write_text(pair[0].read_text().replace("5?I", "III"))
+    report = validate_read_file(high)
+    assert report["valid"] and report["quality_encoding"] == "phred64?" and report["warnings"]
+
+
+def test_structure_errors_have_precise_location(tmp_path, pair):
+    lines = pair[0].read_text().splitlines()
+    lines[4 * 41 + 3] = lines[4 * 41 + 3][:-2]
+    bad = tmp_path / "len.fq"
+    bad.write_text("\n".join(lines) + "\n")
+    error = validate_read_file(bad)["errors"][0]
+    assert (error["type"], error["record"], error["line"]) == ("structure", 42, 4 * 41 + 4)
+
+    lines = pair[0].read_text().splitlines()
+    lines[4 * 9 + 3] = lines[4 * 9 + 3][:5] + " " + lines[4 * 9 + 3][6:]
+    bad.write_text("\n".join(lines) + "\n")
+    error = validate_read_file(bad)["errors"][0]
+    assert (error["type"], error["record"], error["line"]) == ("quality", 10, 40)
+    assert "column 6" in error["message"]
+
+    bad.write_text("\n".join(pair[0].read_text().splitlines()[:-2]) + "\n")
+    error = validate_read_file(bad)["errors"][0]
+    assert error["record"] == 3000 and "Truncated" in error["message"]
+
+
+def test_truncated_gzip_and_pair_mismatch(tmp_path, pair):
+    data = gzip.compress(pair[0].read_bytes())
+    truncated = tmp_path / "cut_1.fq.gz"
+    truncated.write_bytes(data[:len(data) // 2])
+    report = validate_inputs(truncated, pair[1])
+    assert not report["valid"] and report["errors"][0]["type"] == "compression"
+
+    lines = pair[1].read_text().splitlines()
+    lines[4 * 1999] = "@other/2"
+    swapped = tmp_path / "swapped_2.fq"
+    swapped.write_text("\n".join(lines) + "\n")
+    error = validate_inputs(pair[0], swapped)["errors"][0]
+    assert (error["type"], error["record"], error["line"]) == ("pairing", 2000, 4 * 1999 + 1)
+
+    short = tmp_path / "short_2.fq"
+    short.write_text(_records(2999, 2))
+    error = validate_inputs(pair[0], short)["errors"][0]
+    assert error["type"] == "pairing" and "2999" in error["message"]
+
+
+def test_supervisor_fails_fast_on_bad_input(tmp_path, pair, monkeypatch):
+    short = tmp_path / "short_2.fq"
+    short.write_text(_records(2999, 2))
+    called = []
+    monkeypatch.setattr(nodes, "_analyze_input_data_comprehensive", lambda *a: called.append(a))
+    state = init_pipeline_state({"reads": str(pair[0]), "reads2": str(short)}, {}, str(tmp_path / "work"))
+    state = nodes.supervisor_node(state)
+    assert "supervisor" in state["failed_stages"] and not called
+    assert state["route"].value == "terminate"
+    report = json.loads((tmp_path / "work" / "input_validation.json").read_text())
+    assert report["errors"][0]["type"] == "pairing"
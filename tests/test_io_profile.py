@@ -0,0 +1,97 @@
+"""
+测试抽样输入画像与 supervisor 的读长类型检测
+"""
+import gzip
+import random
+import uuid
+
+import pytest
+
+import mito_forge.graph.nodes as nodes
+from mito_forge.graph.state import DataType
+from mito_forge.io import profile as read_profile
+from mito_forge.io.profile import profile_reads, sample_reads
+
+
+def _write_fastq(path, n, length, name, qual_range, seed=1):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(n):
+            L = length(rng)
+            seq = "".join(rng.choices("ACGT", weights=[3, 2, 2, 3], k=L))
+            qual = "".join(chr(33 + rng.randint(*qual_range)) for _ in range(L))
+            f.write(f"@{name(i, rng)}\n{seq}\n+\n{qual}\n")
+
+
+@pytest.fixture
+def illumina_fastq(tmp_path):
+    path = tmp_path / "sample.fq"
+    _write_fastq(path, 6000, lambda rng: 150,
+                 lambda i, rng: f"A00123:8:H7K2:1:1101:{i}:1000 1:N:0:ACGT", (30, 40))
+    return path
+
+
+def test_samples_whole_file_not_just_head(tmp_path, monkeypatch, bgzip):
+    # 前半部分读长 100，后半部分读长 300：只读文件头会得到 100
+    path = tmp_path / "mixed.fq"
+    _write_fastq(path, 4000, lambda rng: 100, lambda i, rng: f"r{i}", (30, 40))
+    tail = tmp_path / "tail.fq"
+    _write_fastq(tail, 4000, lambda rng: 300, lambda i, rng: f"t{i}", (30, 40), seed=2)
+    data = path.read_bytes() + tail.read_bytes()
+    path.write_bytes(data)
+    bgz = tmp_path / "mixed.fq.bgz"
+    bgz.write_bytes(bgzip(data, block_size=65280))
+    # 缩小查找范围，使小文件也走按压缩块随机访问的路径
+    monkeypatch.setattr(read_profile, "MEMBER_SEARCH_BYTES", 1 << 16)
+    assert bgz.stat().st_size > 16 * (1 << 16)
+
+    for target in (path, bgz):
+        batch, info = sample_reads(target, sample_size=500, n_windows=16, window_bytes=32 * 1024)
+        assert info["sampling_mode"] == "blocks"
+        lengths = batch.lengths
+        assert len(lengths) == 500
+        assert 0.2 < (lengths == 300).mean() < 0.8
+        # 抽样记录都是完整记录
+        assert set(lengths.tolist()) <= {100, 300}
+
+
+def test_profile_metrics_and_confidence_intervals(illumina_fastq):
+    profile = profile_reads(illumina_fastq, sample_size=2000)
+    assert profile["read_type"] == "illumina"
+    assert profile["read_type_evidence"] == "read_id:illumina"
+    assert profile["length"]["median"] == 150
+    lo, hi = profile["mean_phred_ci95"]
+    assert lo <= profile["mean_phred"] <= hi and 34 < profile["mean_phred"] < 36
+    assert 0.38 < profile["gc_content"] < 0.42
+    assert profile["n_content"] == 0
+    assert abs(profile["estimated_reads"] - 6000) < 600
+
+
+def test_read_type_from_ids_and_distribution(tmp_path):
+    ont = tmp_path / "reads_a.fq.gz"
+    _write_fastq(tmp_path / "a.fq", 200, lambda rng: rng.randint(2000, 9000),
+                 lambda i, rng: f"{uuid.UUID(int=rng.getrandbits(128))} runid=x ch=7", (5, 20))
+    ont.write_bytes(gzip.compress((tmp_path / "a.fq").read_bytes()))
+    assert profile_reads(ont)["read_type"] == "nanopore"
+
+    hifi = tmp_path / "reads_b.fq"
+    _write_fastq(hifi, 50, lambda rng: rng.randint(14000, 16000),
+                 lambda i, rng: f"m64011_190830_220126/{i}/ccs", (30, 40))
+    assert profile_reads(hifi)["read_type"] == "pacbio_hifi"
+
+    # 无可识别 ID：长读长 + 高质量 + 长度集中 -> HiFi
+    anon = tmp_path / "reads_c.fq"
+    _write_fastq(anon, 50, lambda rng: rng.randint(14000, 16000), lambda i, rng: f"read{i}", (30, 40))
+    profile = profile_reads(anon)
+    assert profile["read_type"] == "pacbio_hifi" and profile["read_type_confidence"] < 0.9
+
+
+def test_supervisor_uses_content_over_filename(tmp_path, illumina_fastq):
+    # 文件名暗示 nanopore，内容是 Illumina
+    misleading = tmp_path / "nanopore_run.fq"
+    misleading.write_bytes(illumina_fastq.read_bytes())
+    assert nodes._detect_read_type_advanced(str(misleading)) == DataType.ILLUMINA
+    quality = nodes._quick_quality_assessment(str(misleading))
+    assert quality["source"].startswith("sampled") and quality["avg_phred_score"] > 30
+    # 文件不存在时退回文件名规则
+    assert nodes._detect_read_type_advanced(str(tmp_path / "missing_nanopore.fq")) == DataType.NANOPORE
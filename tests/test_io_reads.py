@@ -0,0 +1,93 @@
+"""
+测试流式 FASTQ/FASTA 读取引擎
+"""
+import gzip
+
+import numpy as np
+import pytest
+
+from mito_forge.io.reads import (
+    ReadFormatError, ReadParser, detect_compression, iter_batches, iter_chunk_batches, iter_reads,
+)
+
+
+def _fastq_text(n=300):
+    lines = []
+    for i in range(n):
+        seq = "ACGTN"[i % 5] * (5 + i % 20) + "GC"
+        qual = chr(33 + i % 41) * len(seq)
+        lines += [f"@read{i} extra", seq, "+", qual]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def fastq_files(tmp_path, bgzip):
+    data = _fastq_text().encode()
+    files = {"plain": tmp_path / "r.fq", "gzip": tmp_path / "r.fq.gz", "bgzip": tmp_path / "r.fq.bgz"}
+    files["plain"].write_bytes(data)
+    files["gzip"].write_bytes(gzip.compress(data))
+    files["bgzip"].write_bytes(bgzip(data))
+    try:
+        import zstandard
+        files["zstd"] = tmp_path / "r.fq.zst"
+        files["zstd"].write_bytes(zstandard.ZstdCompressor().compress(data))
+    except ImportError:
+        pass
+    return files
+
+
+def test_all_compressions_yield_identical_records(fastq_files):
+    expected = list(iter_reads(fastq_files["plain"], chunk_size=1 << 20))
+    assert len(expected) == 300
+    assert expected[7].name == b"read7 extra" and expected[7].seq == b"G" * 13 + b"C"
+
+    for compression, path in fastq_files.items():
+        assert detect_compression(path) == compression
+        # 小块大小迫使记录跨块切分
+        assert list(iter_reads(path, chunk_size=97)) == expected
+    assert list(iter_reads(fastq_files["plain"], chunk_size=97, use_mmap=True)) == expected
+
+
+def test_batches_expose_numpy_arrays(fastq_files):
+    records = list(iter_reads(fastq_files["plain"]))
+    batches = list(iter_batches(fastq_files["gzip"], batch_size=64, chunk_size=500))
+    assert [len(b) for b in batches] == [64, 64, 64, 64, 44]
+
+    batch = batches[1]
+    expected = records[64:128]
+    assert batch.lengths.tolist() == [len(r.seq) for r in expected]
+    assert batch.seq[batch.offsets[3]:batch.offsets[4]].tobytes() == expected[3].seq
+    quals = [np.frombuffer(r.qual, dtype=np.uint8).astype(float) - 33 for r in expected]
+    np.testing.assert_allclose(batch.mean_qualities(), [q.mean() for q in quals])
+    assert batch.gc_counts().tolist() == [r.seq.count(b"G") + r.seq.count(b"C") for r in expected]
+    assert batch.n_counts().tolist() == [r.seq.count(b"N") for r in expected]
+
+
+def test_chunk_batches_are_bounded_by_chunk_size(fastq_files):
+    records = list(iter_reads(fastq_files["plain"]))
+    batches = list(iter_chunk_batches(fastq_files["bgzip"], chunk_size=500))
+    assert len(batches) > 1 and sum(len(b) for b in batches) == 300
+    # 每块最多覆盖 chunk_size 字节加上一条跨块记录（最短记录 31 字节）
+    assert max(len(b) for b in batches) <= 500 // 31 + 1
+    names = [n for b in batches for n in b.names]
+    assert names == [r.name for r in records]
+
+
+def test_multiline_fasta_and_crlf(tmp_path):
+    fasta = tmp_path / "a.fa"
+    fasta.write_bytes(b">c1 circular\r\nACGT\r\nggcc\r\n>c2\r\nNNA\r\n")
+    records = list(ReadParser(fasta, chunk_size=5))
+    assert [(r.name, r.seq, r.qual) for r in records] == [(b"c1 circular", b"ACGTggcc", None), (b"c2", b"NNA", None)]
+    batch = next(iter_batches(fasta))
+    assert batch.qual is None and batch.gc_counts().tolist() == [6, 0]
+
+
+def test_malformed_fastq_raises(tmp_path):
+    bad = tmp_path / "bad.fq"
+    bad.write_text("@r1\nACGT\n+\nIII\n")
+    with pytest.raises(ReadFormatError):
+        list(iter_reads(bad))
+    truncated = tmp_path / "trunc.fq"
+    truncated.write_text("@r1\nACGT\n+\nIIII\n@r2\nAC\n")
+    with pytest.raises(ReadFormatError):
+        list(iter_reads(truncated))
@@ -0,0 +1,107 @@
+"""
+测试 LLM 评估后台执行：节点不等待 LLM，报告阶段收集
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+import mito_forge.graph.nodes as nodes
+from mito_forge.graph import llm_eval
+from mito_forge.graph.state import init_pipeline_state
+from mito_forge.core.agents.types import AgentStatus, StageResult
+
+
+class _FakeQCAgent:
+    release = None
+    calls = []
+
+    def __init__(self, config):
+        self.config = config
+        self.defer_llm_analysis = False
+
+    def execute_task(self, task):
+        assert self.defer_llm_analysis is True
+        return StageResult(status=AgentStatus.FINISHED, outputs={"qc_results": {"total_reads": 10}})
+
+    def analyze_qc_results(self, qc_results):
+        self.calls.append(qc_results)
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        return {"quality_assessment": {"overall_score": 0.9, "grade": "A", "summary": "good"}}
+
+
+def _state(tmp_path, **config):
+    reads = tmp_path / "r.fq"
+    reads.write_text("@r\nACGT\n+\nIIII\n")
+    return init_pipeline_state({"reads": str(reads)}, dict(config), str(tmp_path / "work"),
+                               f"llm-{tmp_path.name}")
+
+
+def test_qc_node_returns_before_llm_evaluation(monkeypatch, tmp_path):
+    monkeypatch.setattr(nodes, "QCAgent", _FakeQCAgent)
+    monkeypatch.setenv("MITO_DETAIL_LEVEL", "expert")
+    _FakeQCAgent.release = threading.Event()
+    _FakeQCAgent.calls = []
+
+    state = nodes.qc_node(_state(tmp_path))
+    # LLM 仍在等待，节点已完成且路由已确定
+    assert "qc" in state["completed_stages"]
+    assert "ai_quality_score" not in state["stage_outputs"]["qc"]["metrics"]
+    assert llm_eval.pending_stages(state) == ["qc"]
+
+    _FakeQCAgent.release.set()
+    collected = llm_eval.collect_evaluations(state)
+
+    ai_file = Path(state["workdir"]) / "01_qc" / "qc_ai_analysis.json"
+    assert set(collected) == {"qc"}
+    assert "review" in json.loads(ai_file.read_text(encoding="utf-8"))
+    assert len(_FakeQCAgent.calls) == 2  # expert 复核不再重跑 QC 工具
+    metrics = state["stage_outputs"]["qc"]["metrics"]
+    assert metrics["ai_quality_score"] == 0.9 and metrics["ai_grade"] == "A"
+    assert state["stage_outputs"]["qc"]["files"]["qc_ai_analysis"] == str(ai_file)
+    assert llm_eval.pending_stages(state) == []
+
+
+def test_sync_mode_evaluates_inline(monkeypatch, tmp_path):
+    monkeypatch.setattr(nodes, "QCAgent", _FakeQCAgent)
+    monkeypatch.setenv("MITO_DETAIL_LEVEL", "quick")
+    _FakeQCAgent.release = None
+
+    state = nodes.qc_node(_state(tmp_path, async_llm_eval=False))
+    assert llm_eval.pending_stages(state) == []
+    assert state["stage_outputs"]["qc"]["metrics"]["ai_summary"] == "good"
+    assert Path(state["stage_outputs"]["qc"]["files"]["qc_ai_analysis"]).exists()
+
+
+def test_failed_evaluation_is_skipped(tmp_path):
+    state = _state(tmp_path)
+    state["stage_outputs"]["assembly"] = {"files": {}, "metrics": {"n50": 1}}
+
+    def boom():
+        time.sleep(0.05)
+        raise RuntimeError("provider down")
+
+    llm_eval.submit_evaluation(state, "assembly", boom, str(tmp_path / "a.json"))
+    assert llm_eval.collect_evaluations(state) == {}
+    assert state["stage_outputs"]["assembly"]["metrics"] == {"n50": 1}
+
+
+def test_expert_review_receives_first_analysis():
+    from mito_forge.core.agents.qc_agent import QCAgent
+
+    calls = []
+
+    def analyze(results):
+        calls.append(results)
+        return {"quality_assessment": {"overall_score": 0.5 + 0.3 * len(calls), "summary": f"round {len(calls)}"}}
+
+    merged = llm_eval.make_evaluation(analyze, {"total_reads": 10}, review=True)()
+    assert calls[0] == {"total_reads": 10}
+    assert calls[1]["review_of"]["quality_assessment"]["summary"] == "round 1"
+    assert merged["review"]["quality_assessment"]["summary"] == "round 2"
+
+    # 复核轮提示词附上首轮评估
+    agent = QCAgent({})
+    assert agent.review_prompt(calls[0]) == ""
+    assert "round 1" in agent.review_prompt(calls[1])
@@ -0,0 +1,81 @@
+"""
+测试进程级共享提供者注册表
+"""
+import time
+
+import yaml
+
+from mito_forge.core.llm.registry import ProviderRegistry, get_provider_registry
+from mito_forge.core.llm.unified_provider import UnifiedProvider
+
+
+def _write_config(config_dir, default="primary", ttl=300):
+    config_dir.mkdir(parents=True, exist_ok=True)
+    (config_dir / "model_config.yaml").write_text(yaml.safe_dump({
+        "default_profile": default,
+        "fallback_profiles": ["backup"],
+        "auto_fallback": True,
+        "health_check_ttl": ttl,
+        # 提供者不应打开 ~/.mito-forge 下的响应缓存
+        "response_cache": {"enabled": False},
+    }))
+    (config_dir / "model_profiles.yaml").write_text(yaml.safe_dump({
+        "primary": {"provider_type": "ollama", "model": "a", "api_base": "http://primary"},
+        "backup": {"provider_type": "ollama", "model": "b", "api_base": "http://backup"},
+    }))
+
+
+def _count_probes(monkeypatch, up):
+    probes = []
+
+    def fake_available(self):
+        probes.append(self.model)
+        return self.model in up
+
+    monkeypatch.setattr(UnifiedProvider, "is_available", fake_available)
+    return probes
+
+
+def test_agents_share_provider_and_probe_once(tmp_path, monkeypatch):
+    from mito_forge.core.agents.qc_agent import QCAgent
+    from mito_forge.core.agents.assembly_agent import AssemblyAgent
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    _write_config(tmp_path / ".mito-forge")
+    probes = _count_probes(monkeypatch, up={"b"})
+
+    providers = [QCAgent({}).get_llm_provider(), AssemblyAgent({}).get_llm_provider(),
+                 QCAgent({}).get_llm_provider()]
+    assert providers[0] is providers[1] is providers[2]
+    assert providers[0].model == "b" and providers[0].response_cache is None
+    # 默认配置与回退配置各探测一次，之后全部命中缓存
+    assert probes == ["a", "b"]
+
+
+def test_stale_health_refreshes_in_background(tmp_path, monkeypatch):
+    _write_config(tmp_path, ttl=0.05)
+    up = {"a"}
+    probes = _count_probes(monkeypatch, up)
+    registry = ProviderRegistry(tmp_path)
+
+    assert registry.get_with_fallback().model == "a"
+    up.clear()
+    time.sleep(0.1)
+    # 过期后先返回旧结果，后台刷新
+    assert registry.is_available("primary") is True
+    deadline = time.time() + 2
+    while registry.is_available("primary") and time.time() < deadline:
+        time.sleep(0.01)
+    assert registry.is_available("primary") is False
+    assert probes.count("a") >= 2
+
+
+def test_config_change_reloads_profiles(tmp_path, monkeypatch):
+    _write_config(tmp_path)
+    _count_probes(monkeypatch, up={"a", "b"})
+    registry = get_provider_registry(tmp_path)
+    assert registry is get_provider_registry(tmp_path)
+    assert registry.get_with_fallback().model == "a"
+
+    _write_config(tmp_path, default="backup")
+    assert registry.get_with_fallback().model == "b"
@@ -0,0 +1,89 @@
+"""
+测试 LLM 响应持久化缓存
+"""
+import time
+
+import yaml
+from click.testing import CliRunner
+
+from mito_forge.core.llm.response_cache import LLMResponseCache, get_response_cache
+from mito_forge.core.llm.unified_provider import UnifiedProvider
+
+
+def _provider(tmp_path, monkeypatch, replies):
+    provider = UnifiedProvider("ollama", model="m", api_base="http://stub")
+    provider.response_cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    calls = []
+
+    def fake_request(url, payload, headers, params=None, response_key="choices"):
+        calls.append(payload)
+        return replies[min(len(calls), len(replies)) - 1]
+
+    monkeypatch.setattr(provider, "_make_request", fake_request)
+    return provider, calls
+
+
+def test_generate_hits_cache_for_identical_requests(tmp_path, monkeypatch):
+    provider, calls = _provider(tmp_path, monkeypatch, ["answer"])
+
+    assert provider.generate("p", system="s", temperature=0.2) == "answer"
+    assert provider.generate("p", system="s", temperature=0.2) == "answer"
+    assert len(calls) == 1
+    # 采样参数、系统提示词不同 -> 未命中
+    provider.generate("p", system="s", temperature=0.7)
+    provider.generate("p", system="other", temperature=0.2)
+    # 显式跳过缓存
+    provider.generate("p", system="s", temperature=0.2, use_cache=False)
+    assert len(calls) == 4
+    assert "use_cache" not in str(calls[-1])
+
+    stats = provider.response_cache.stats()
+    assert stats["hits"] == 1 and stats["entries"] == 3
+
+
+def test_invalid_json_response_is_not_replayed(tmp_path, monkeypatch):
+    provider, calls = _provider(tmp_path, monkeypatch, ["not json", '{"ok": true}'])
+    assert provider.generate_json("p") == {"ok": True}
+    assert len(calls) == 2
+    # 有效响应已缓存
+    assert provider.generate_json("p") == {"ok": True}
+    assert len(calls) == 2
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.sqlite"), ttl_hours=1, max_size_mb=2500 / 1024 / 1024)
+    for key in ("a", "b", "c"):
+        cache.put(key, "x" * 1000)
+        time.sleep(0.01)
+    # 超过 2500 字节，最久未访问的 a 被淘汰
+    assert cache.get("a") is None
+    assert cache.get("b") == "x" * 1000
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 1
+
+
+def test_disable_and_clear_via_config_and_cli(tmp_path, monkeypatch):
+    from mito_forge.cli.main import cli
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("MITO_LLM_CACHE_PATH", str(tmp_path / "cli.sqlite"))
+
+    cache = get_response_cache()
+    cache.put("k", "v")
+    assert get_response_cache({"enabled": False}) is None
+    monkeypatch.setenv("MITO_LLM_CACHE", "0")
+    assert get_response_cache() is None
+    monkeypatch.delenv("MITO_LLM_CACHE")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["model", "cache", "--disable"])
+    assert result.exit_code == 0, result.output
+    saved = yaml.safe_load((tmp_path / ".mito-forge" / "model_config.yaml").read_text())
+    assert saved["response_cache"]["enabled"] is False
+
+    result = runner.invoke(cli, ["model", "cache", "--clear"])
+    assert result.exit_code == 0, result.output
+    assert cache.stats()["entries"] == 0
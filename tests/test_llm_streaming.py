@@ -0,0 +1,113 @@
+"""
+测试流式生成（SSE / NDJSON）与 generate_json 提前中断
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mito_forge.core.llm.response_cache import LLMResponseCache
+from mito_forge.core.llm.unified_provider import UnifiedProvider
+
+
+def _events(path, pieces):
+    if path.endswith("/api/generate"):
+        lines = [json.dumps({"response": p, "done": False}) for p in pieces]
+        return lines + [json.dumps({"response": "", "done": True})]
+    if path.endswith("/messages"):
+        lines = ["event: message_start", 'data: {"type": "message_start"}', ""]
+        for p in pieces:
+            lines += ["event: content_block_delta",
+                      "data: " + json.dumps({"type": "content_block_delta", "delta": {"type": "text_delta", "text": p}}),
+                      ""]
+        return lines + ["event: message_stop", 'data: {"type": "message_stop"}', ""]
+    lines = []
+    for p in pieces:
+        lines += ["data: " + json.dumps({"choices": [{"delta": {"content": p}, "finish_reason": None}]}), ""]
+    return lines + ["data: [DONE]", ""]
+
+
+@pytest.fixture
+def stream_server():
+    state = type("State", (), {})()
+    state.pieces = ["你好", "，", "world"]
+    state.delay = 0.0
+    state.requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        # 与真实 SSE 服务一致使用分块传输，逐行推送
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state.requests.append((self.path, body.get("stream")))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for line in _events(self.path.split("?")[0], state.pieces):
+                    data = (line + "\n").encode("utf-8")
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                    time.sleep(state.delay)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("provider_type", ["openai", "anthropic", "ollama", "azure"])
+def test_stream_generate_all_formats(stream_server, provider_type):
+    provider = UnifiedProvider(provider_type, model="m", api_key="k", api_base=stream_server.url)
+    chunks = list(provider.stream_generate("hi"))
+    assert chunks == ["你好", "，", "world"]
+    assert stream_server.requests[0][1] is True
+
+
+def test_completed_stream_is_cached(stream_server, tmp_path):
+    provider = UnifiedProvider("openai", model="m", api_key="k", api_base=stream_server.url)
+    provider.response_cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    assert "".join(provider.stream_generate("hi")) == "你好，world"
+    # 非流式调用复用同一缓存键
+    assert provider.generate("hi") == "你好，world"
+    assert stream_server.requests == [("/chat/completions", True)]
+
+
+def test_generate_json_stops_at_complete_object(stream_server, tmp_path):
+    stream_server.pieces = ['```json\n{"score": 0.9, ', '"note": "a } in \\"str\\""}', "\n```\n"] + ["trailing "] * 20
+    stream_server.delay = 0.1
+    provider = UnifiedProvider("ollama", model="m", api_base=stream_server.url)
+    provider.response_cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+
+    start = time.time()
+    result = provider.generate_json("give json", stream=True)
+    assert result == {"score": 0.9, "note": 'a } in "str"'}
+    # 未等待剩余 20 个块
+    assert time.time() - start < 1.0
+    # 提前中断的响应也写入了缓存
+    assert provider.generate_json("give json") == result
+    assert len(stream_server.requests) == 1
+
+
+def test_model_ask_renders_stream(stream_server, monkeypatch):
+    from click.testing import CliRunner
+    from mito_forge.cli.main import cli
+    from mito_forge.core.llm.config_manager import ModelConfigManager
+
+    provider = UnifiedProvider("anthropic", model="m", api_key="k", api_base=stream_server.url)
+    monkeypatch.setattr(ModelConfigManager, "create_provider", lambda self, name=None: provider)
+    result = CliRunner().invoke(cli, ["model", "ask", "hi"])
+    assert result.exit_code == 0, result.output
+    assert result.output == "你好，world\n"
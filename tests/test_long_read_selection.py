@@ -0,0 +1,101 @@
+"""
+测试 Filtlong 风格的长读筛选
+"""
+import random
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from mito_forge.core.agents.assembly_agent import AssemblyAgent
+from mito_forge.io.longread_filter import read_scores, select_long_reads
+from mito_forge.io.reads import ReadBatch, detect_compression, iter_batches, iter_reads
+
+
+@pytest.fixture
+def ont_reads(tmp_path):
+    rng = random.Random(9)
+    path = tmp_path / "ont.fq"
+    with open(path, "w") as f:
+        for i in range(400):
+            length = rng.choice([rng.randint(200, 900), rng.randint(1000, 12000)])
+            low, high = rng.choice([(4, 12), (10, 25), (20, 40)])
+            seq = "".join(rng.choices("ACGT", k=length))
+            qual = "".join(chr(33 + rng.randint(low, high)) for _ in range(length))
+            f.write(f"@read{i} runid=abc\n{seq}\n+\n{qual}\n")
+    return path
+
+
+def test_selects_top_scoring_reads_to_budget(ont_reads, tmp_path):
+    batch = next(iter_batches(ont_reads, batch_size=10000))
+    scores = read_scores(batch)
+    eligible = batch.lengths >= 1000
+    eligible_bases = int(batch.lengths[eligible].sum())
+    target = eligible_bases // 3
+
+    result = select_long_reads(ont_reads, tmp_path / "sel", target, min_length=1000)
+    assert result["selected"] and detect_compression(result["reads"]) == "bgzip"
+    kept = {rec.name.split()[0] for rec in iter_reads(result["reads"])}
+    assert len(kept) == result["kept_reads"]
+    # 达到预算，且最多超出一条读
+    assert target <= result["kept_bases"] < target + int(batch.lengths.max())
+
+    names = [n.split()[0] for n in batch.names]
+    kept_mask = np.array([n in kept for n in names])
+    assert not (kept_mask & ~eligible).any()
+    # 保留的读得分都不低于被丢弃的合格读（阈值格精度内）
+    dropped = eligible & ~kept_mask
+    assert scores[kept_mask].min() >= scores[dropped].max() - 1e-3
+    assert kept_mask.sum() == result["kept_reads"]
+
+
+def test_no_selection_within_budget(ont_reads, tmp_path):
+    result = select_long_reads(ont_reads, tmp_path / "sel", 10 ** 9)
+    assert not result["selected"] and result["reads"] == str(ont_reads)
+    assert not (tmp_path / "sel").exists()
+
+
+def test_score_prefers_long_accurate_reads():
+    batch = ReadBatch.from_lists(
+        [b"a", b"b", b"c"], [b"A" * 5000, b"A" * 5000, b"A" * 2000],
+        [b"5" * 5000, b"+" * 5000, b"5" * 2000],
+    )
+    scores = read_scores(batch)
+    assert scores[0] > scores[1] and scores[0] > scores[2]
+
+
+def test_assembly_agent_budget_from_config(ont_reads, tmp_path):
+    agent = AssemblyAgent({"long_read_target_bases": 200000})
+    selection = agent._select_long_reads(ont_reads, tmp_path, threads=1)
+    assert selection["selected"] and selection["target_bases"] == 200000
+    assert selection["kept_bases"] >= 200000
+
+    # 默认预算 = 16500 x 100 / 0.01，远大于输入
+    assert not AssemblyAgent({})._select_long_reads(ont_reads, tmp_path, threads=1)["selected"]
+    assert AssemblyAgent({"long_read_select": False})._select_long_reads(ont_reads, tmp_path, threads=1) is None
+
+
+def test_selection_runs_once_after_tool_check(ont_reads, tmp_path, monkeypatch):
+    import mito_forge.io.longread_filter as longread_filter
+
+    calls = []
+    real = longread_filter.select_long_reads
+    monkeypatch.setattr(longread_filter, "select_long_reads", lambda *a, **k: calls.append(a) or real(*a, **k))
+    agent = AssemblyAgent({"long_read_target_bases": 200000})
+    agent.prepare(tmp_path / "work")
+    # 组装器不可用时不做筛选
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    no_tools = types.SimpleNamespace(ToolsManager=lambda project_root=None: types.SimpleNamespace(where=lambda name: None))
+    monkeypatch.setitem(sys.modules, "mito_forge.utils.tools_manager", no_tools)
+    with pytest.raises(Exception):
+        agent.run_assembly({"reads": str(ont_reads), "assembler": "flye"})
+    assert calls == []
+
+    # 重试与竞速候选复用同一次筛选
+    first = agent._select_long_reads(ont_reads, tmp_path / "a", threads=1)
+    racer = AssemblyAgent({"long_read_target_bases": 200000})
+    racer._read_selections = agent._read_selections
+    assert agent._select_long_reads(ont_reads, tmp_path / "b", threads=1) == first
+    assert racer._select_long_reads(ont_reads, tmp_path / "c", threads=1) == first
+    assert len(calls) == 1
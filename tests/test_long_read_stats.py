@@ -0,0 +1,69 @@
+"""
+测试内置长读长统计引擎
+"""
+import random
+import shutil
+
+import numpy as np
+import pytest
+
+from mito_forge.core.agents.qc_agent import QCAgent
+from mito_forge.io.longreads import long_read_stats, render_long_read_plots
+
+
+@pytest.fixture
+def ont_reads(tmp_path):
+    rng = random.Random(7)
+    records = []
+    with open(tmp_path / "ont.fq", "w") as f:
+        for i in range(300):
+            length = rng.randint(500, 6000)
+            quals = [rng.randint(3, 30) for _ in range(length)]
+            seq = "".join(rng.choices("ACGT", k=length))
+            f.write(f"@read{i}\n{seq}\n+\n{''.join(chr(33 + q) for q in quals)}\n")
+            records.append((length, quals))
+    return tmp_path / "ont.fq", records
+
+
+def test_metrics_match_direct_computation(ont_reads):
+    path, records = ont_reads
+    lengths = np.array([length for length, _ in records])
+    read_q = np.array([-10 * np.log10(np.mean(10 ** (-np.array(q) / 10))) for _, q in records])
+    ordered = np.sort(lengths)[::-1]
+    cumulative = np.cumsum(ordered)
+
+    metrics = long_read_stats(path)
+    assert metrics["total_reads"] == 300 and metrics["total_bases"] == lengths.sum()
+    assert metrics["n50"] == ordered[np.searchsorted(cumulative, cumulative[-1] * 0.5)]
+    assert metrics["n90"] == ordered[np.searchsorted(cumulative, cumulative[-1] * 0.9)]
+    assert metrics["median_length"] == np.median(lengths)
+    assert metrics["avg_quality"] == pytest.approx(read_q.mean(), abs=0.01)
+    assert abs(metrics["median_quality"] - np.median(read_q)) <= 0.1
+    q10 = metrics["quality_yields"]["Q10"]
+    assert q10["reads"] == (read_q >= 10).sum() and q10["bases"] == lengths[read_q >= 10].sum()
+    assert np.array(metrics["length_quality_histogram"]["counts"]).sum() == 300
+    assert "plots" not in metrics
+
+
+def test_plots_are_optional(ont_reads, tmp_path):
+    path, _ = ont_reads
+    metrics = long_read_stats(path)
+    plots = render_long_read_plots(metrics, tmp_path / "plots")
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        assert plots == []
+    else:
+        assert plots and all(p.exists() for p in plots)
+
+
+def test_qc_agent_uses_native_stats_for_long_reads(ont_reads, tmp_path, monkeypatch):
+    path, _ = ont_reads
+    agent = QCAgent(config={})
+    agent.prepare(tmp_path / "work")
+    # 即使安装了 NanoPlot 也不再调用
+    monkeypatch.setattr(shutil, "which", lambda name: f"/bin/{name}")
+    monkeypatch.setattr(agent, "run_tool", lambda *a, **k: pytest.fail("NanoPlot called"))
+    result = agent.run_qc_analysis({"reads": str(path), "read_type": "nanopore"})
+    assert result["engine"] == "native" and result["total_reads"] == 300
+    assert (tmp_path / "work" / "qc" / "long_read_stats.json").exists()
@@ -0,0 +1,107 @@
+"""
+测试 QC Agent 对双端/hybrid 输入的并发 QC
+"""
+import shutil
+import threading
+from pathlib import Path
+
+import mito_forge.utils.parsers as parsers
+from mito_forge.core.agents.qc_agent import QCAgent
+
+
+def _fake_fastqc(monkeypatch):
+    def find(qc_dir, reads):
+        z = Path(qc_dir) / f"{Path(reads).stem}_fastqc.zip"
+        z.touch()
+        return z
+
+    monkeypatch.setattr(parsers, "find_fastqc_output", find)
+    monkeypatch.setattr(parsers, "parse_fastqc_output",
+                        lambda z: {"total_reads": 100 if "R1" in z.name else 90, "avg_quality": 35.0})
+
+
+def test_paired_reads_use_single_multithreaded_fastqc(monkeypatch, tmp_path):
+    agent = QCAgent(config={"threads": 8})
+    agent.prepare(tmp_path)
+    monkeypatch.setattr(shutil, "which", lambda name: "/bin/fastqc" if name == "fastqc" else None)
+
+    calls = []
+
+    def fake_run_tool(exe, args, cwd, env=None, timeout=None):
+        calls.append((exe, list(args)))
+        return {"exit_code": 0, "stdout_path": "", "stderr_path": "", "elapsed_sec": 0.0}
+
+    monkeypatch.setattr(agent, "run_tool", fake_run_tool)
+    _fake_fastqc(monkeypatch)
+
+    res = agent.run_qc_analysis({"reads": "s_R1.fq", "reads2": "s_R2.fq", "read_type": "illumina"})
+
+    assert len(calls) == 1
+    exe, args = calls[0]
+    assert exe == "fastqc"
+    assert args[:2] == ["-t", "2"]
+    assert args[-2].endswith("s_R1.fq") and args[-1].endswith("s_R2.fq")
+    assert res["paired_end"] is True
+    assert res["r1_reads"] == 100 and res["r2_reads"] == 90
+
+
+def test_hybrid_long_reads_qc_runs_concurrently(monkeypatch, tmp_path):
+    agent = QCAgent(config={"threads": 4, "long_read_qc": "nanoplot"})
+    agent.prepare(tmp_path)
+    monkeypatch.setattr(shutil, "which", lambda name: f"/bin/{name}" if name in ("fastqc", "NanoPlot") else None)
+
+    nanoplot_started = threading.Event()
+
+    def fake_run_tool(exe, args, cwd, env=None, timeout=None):
+        if exe == "NanoPlot":
+            nanoplot_started.set()
+        else:
+            # FastQC 运行期间 NanoPlot 必须已经启动
+            assert nanoplot_started.wait(timeout=5)
+        return {"exit_code": 0, "stdout_path": "", "stderr_path": "", "elapsed_sec": 0.0}
+
+    monkeypatch.setattr(agent, "run_tool", fake_run_tool)
+    monkeypatch.setattr(parsers, "parse_nanoplot_output",
+                        lambda d: {"success": True, "metrics": {"total_reads": 7, "n50": 12000}})
+    _fake_fastqc(monkeypatch)
+
+    res = agent.run_qc_analysis({"reads": "s_R1.fq", "reads2": "s_R2.fq",
+                                 "long_reads": "ont.fq", "read_type": "illumina"})
+
+    assert res["paired_end"] is True
+    assert res["long_reads_qc"]["total_reads"] == 7
+    assert res["long_reads_qc"]["n50"] == 12000
+
+
+def test_hybrid_long_read_qc_is_awaited_and_typed(monkeypatch, tmp_path):
+    import time
+
+    import pytest
+
+    agent = QCAgent(config={"threads": 2, "long_read_type": "PacBio_HiFi"})
+    agent.prepare(tmp_path)
+    monkeypatch.setattr(shutil, "which", lambda name: "/bin/fastqc" if name == "fastqc" else None)
+    runs = []
+
+    def slow_long_qc(reads_file, out_dir, read_type, nanoplot_exists=True):
+        time.sleep(0.3)
+        runs.append(read_type)
+        return {"total_reads": 3, "read_type": read_type}
+
+    def failing_fastqc(exe, args, cwd, env=None, timeout=None):
+        raise OSError("fastqc crashed")
+
+    monkeypatch.setattr(agent, "_run_long_read_qc", slow_long_qc)
+    monkeypatch.setattr(agent, "run_tool", failing_fastqc)
+    inputs = {"reads": "s_R1.fq", "long_reads": "hifi.fq", "read_type": "illumina"}
+    with pytest.raises(RuntimeError, match="fastqc crashed"):
+        agent.run_qc_analysis(inputs)
+    # FastQC 出错返回时长读 QC 已经结束，而不是继续在后台运行
+    assert runs == ["pacbio_hifi"]
+
+    monkeypatch.setattr(agent, "run_tool", lambda *a, **k: {"exit_code": 0})
+    _fake_fastqc(monkeypatch)
+    assert agent.run_qc_analysis(inputs)["long_reads_qc"]["read_type"] == "pacbio_hifi"
+
+    # 未配置时按抽样画像推断，无法读取时默认 nanopore
+    assert QCAgent(config={})._long_read_type({"long_reads": str(tmp_path / "missing.fq")}) == "nanopore"
@@ -0,0 +1,114 @@
+"""
+测试 k-mer 诱饵招募线粒体读段及其在流水线中的路由
+"""
+import random
+
+import pytest
+
+import mito_forge.graph.build as build_mod
+import mito_forge.graph.nodes as nodes
+from mito_forge.graph.state import RouteDecision, init_pipeline_state
+from mito_forge.io.bait import bait_reads, canonical_kmers, resolve_seed_panel
+from mito_forge.io.reads import ReadBatch, ReadFormatError, iter_reads
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+
+def _revcomp(seq):
+    return seq.translate(_COMPLEMENT)[::-1]
+
+
+@pytest.fixture
+def paired_sample(tmp_path):
+    """10% 的读对来自 3kb 的"线粒体"，其余来自 30kb 的"核基因组"；种子只覆盖线粒体中间 600bp"""
+    rng = random.Random(7)
+    mito = "".join(rng.choices("ACGT", k=3000))
+    nuclear = "".join(rng.choices("ACGT", k=30000))
+    seed = tmp_path / "seed.fasta"
+    seed.write_text(f">seed\n{mito[1200:1800]}\n")
+    r1, r2 = tmp_path / "r_1.fq", tmp_path / "r_2.fq"
+    with open(r1, "w") as f1, open(r2, "w") as f2:
+        for i in range(3000):
+            source, tag = (mito, "mt") if rng.random() < 0.1 else (nuclear, "nu")
+            start = rng.randint(0, len(source) - 300)
+            fragment = source[start:start + 300]
+            a, b = fragment[:100], _revcomp(fragment)[:100]
+            f1.write(f"@{tag}{i}/1\n{a}\n+\n{'I' * 100}\n")
+            f2.write(f"@{tag}{i}/2\n{b}\n+\n{'I' * 100}\n")
+    return {"r1": r1, "r2": r2, "seed": seed}
+
+
+def test_canonical_kmers_match_brute_force():
+    rng = random.Random(1)
+    seqs = ["".join(rng.choices("ACGTN", weights=[5, 5, 5, 5, 0.3], k=rng.randint(0, 60))) for _ in range(40)]
+    batch = ReadBatch.from_lists([b"r"] * len(seqs), [s.encode() for s in seqs])
+    code = {"A": 0, "C": 1, "G": 2, "T": 3}
+    for k in (7, 21, 32):
+        expected, owners = [], []
+        for i, seq in enumerate(seqs):
+            for j in range(len(seq) - k + 1):
+                word = seq[j:j + k]
+                if "N" in word:
+                    continue
+                forward = int("".join(str(code[c]) for c in word), 4)
+                backward = int("".join(str(code[c]) for c in _revcomp(word)), 4)
+                expected.append(min(forward, backward))
+                owners.append(i)
+        kmers, records = canonical_kmers(batch, k)
+        assert kmers.tolist() == expected and records.tolist() == owners
+
+
+def test_iterative_baiting_recruits_mito_pairs(paired_sample, tmp_path):
+    single_round = bait_reads(paired_sample["r1"], paired_sample["seed"], tmp_path / "one",
+                              reads2=paired_sample["r2"], max_rounds=1)
+    result = bait_reads(paired_sample["r1"], paired_sample["seed"], tmp_path / "out",
+                        reads2=paired_sample["r2"], max_rounds=10, threads=2)
+    assert result["total_reads"] == 3000
+    # 迭代扩展后招募到的读对多于只用种子的第一轮
+    assert result["rounds"] > 1 and result["recruited_reads"] > single_round["recruited_reads"]
+    assert result["bait_kmers"] > result["seed_kmers"]
+    assert result["kept_fraction"] == pytest.approx(result["recruited_reads"] / 3000, abs=1e-6)
+
+    names1 = [rec.name.decode() for rec in iter_reads(result["reads"])]
+    names2 = [rec.name.decode() for rec in iter_reads(result["reads2"])]
+    # 只招募线粒体读对，且两端同步
+    assert len(names1) == result["recruited_reads"]
+    assert all(name.startswith("mt") for name in names1)
+    assert [n[:-2] for n in names1] == [n[:-2] for n in names2]
+    total_mito = sum(1 for rec in iter_reads(paired_sample["r1"]) if rec.name.startswith(b"mt"))
+    assert len(names1) > 0.9 * total_mito
+
+
+def test_paired_files_out_of_sync(paired_sample, tmp_path):
+    truncated = tmp_path / "short_2.fq"
+    truncated.write_text("".join(paired_sample["r2"].read_text().splitlines(keepends=True)[:400]))
+    with pytest.raises(ReadFormatError):
+        bait_reads(paired_sample["r1"], paired_sample["seed"], tmp_path / "out", reads2=truncated)
+
+
+def test_bait_stage_routing(paired_sample, tmp_path, monkeypatch):
+    monkeypatch.setenv("MITO_FORGE_SEED_DIR", str(tmp_path / "no_seeds"))
+    monkeypatch.setattr("pathlib.Path.home", lambda: tmp_path)
+    inputs = {"reads": str(paired_sample["r1"]), "reads2": str(paired_sample["r2"])}
+    state = init_pipeline_state(inputs, {"kingdom": "animal"}, str(tmp_path / "work"))
+    state["route"] = RouteDecision.CONTINUE
+    # 无种子参考：auto 模式不进入诱饵阶段
+    assert resolve_seed_panel("animal") is None
+    assert build_mod.qc_route_decider(state) == "continue"
+
+    # 按界别的种子库
+    (tmp_path / "no_seeds").mkdir()
+    (tmp_path / "no_seeds" / "animal.fasta").write_text(paired_sample["seed"].read_text())
+    assert build_mod.qc_route_decider(state) == "bait"
+    state["config"]["detected_read_type"] = "nanopore"
+    assert build_mod.qc_route_decider(state) == "continue"
+    state["config"]["detected_read_type"] = "illumina"
+    state["config"]["bait_reads"] = False
+    assert build_mod.qc_route_decider(state) == "continue"
+
+    state["config"].update({"bait_reads": True, "threads": 1})
+    state = nodes.bait_node(state)
+    assert "bait" in state["completed_stages"]
+    bait_out = state["stage_outputs"]["bait"]
+    assert 0 < bait_out["metrics"]["kept_fraction"] < 0.2
+    assert bait_out["files"]["baited_reads2"].endswith("baited_R2.fq")
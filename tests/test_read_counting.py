@@ -0,0 +1,61 @@
+"""
+测试按块扫描换行符的精确读数/碱基数统计
+"""
+import gzip
+import random
+
+import pytest
+
+import mito_forge.io.count as count
+from mito_forge.graph.nodes import _analyze_data_statistics
+from mito_forge.graph.state import DataType
+from mito_forge.io.validate import validate_read_file
+
+
+def _fastq(n, seed=1):
+    rng = random.Random(seed)
+    lengths = [rng.randint(20, 300) for _ in range(n)]
+    text = "".join(f"@r{i} c\n{'A' * l}\n+\n{'I' * l}\n" for i, l in enumerate(lengths))
+    return text, sum(lengths)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 4096])
+def test_chunk_boundaries_line_endings_and_fasta(chunk_size):
+    text, bases = _fastq(200)
+    for data, fmt, expected in [
+        (text, "fastq", (200, bases)),
+        (text.replace("\n", "\r\n")[:-2], "fastq", (200, bases)),
+        (">a d\nACG\nTT\n>b\n\nAC\r\n>c\nG", "fasta", (3, 8)),
+    ]:
+        raw = data.encode()
+        chunks = (raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size))
+        assert count._count(chunks, fmt) == expected
+
+
+def test_count_reads_sharded_and_compressed(tmp_path, monkeypatch):
+    text, bases = _fastq(20000)
+    plain = tmp_path / "reads.fq"
+    plain.write_text(text)
+    gz = tmp_path / "reads.fq.gz"
+    gz.write_bytes(gzip.compress(text.encode()))
+    # 缩小分片下限，使小文件也按多个分片统计
+    monkeypatch.setattr(count, "MIN_SHARD_BYTES", 1 << 16)
+    sharded = count.count_reads(plain, threads=4)
+    assert sharded["shards"] > 1
+    assert (sharded["reads"], sharded["bases"]) == (20000, bases)
+    assert (count.count_reads(gz)["reads"], count.count_reads(gz)["bases"]) == (20000, bases)
+
+
+def test_counts_are_memoized_and_reused(tmp_path, monkeypatch):
+    text, bases = _fastq(500)
+    reads = tmp_path / "reads_1.fq"
+    reads.write_text(text)
+    validate_read_file(reads)
+    monkeypatch.setattr(count, "count_reads", lambda *a, **k: pytest.fail("counted twice"))
+    stats = _analyze_data_statistics(str(reads), DataType.ILLUMINA)
+    assert stats["source"] == "exact"
+    assert (stats["total_reads"], stats["total_bases"]) == (500, bases)
+    assert stats["estimated_coverage"] == bases / stats["estimated_genome_size"]
+
+    stats = _analyze_data_statistics(str(tmp_path / "missing.fq"), DataType.ILLUMINA)
+    assert stats["source"] == "size_estimate"
@@ -0,0 +1,86 @@
+"""
+测试参考线粒体草图库的构建、查询及其在候选筛选与报告中的使用
+"""
+import gzip
+import random
+
+from click.testing import CliRunner
+
+from mito_forge.cli.commands.sketch import sketch_group
+from mito_forge.graph.nodes import _select_mitochondrial_contigs
+from mito_forge.io.sketch import SketchDB, build_sketch_db, sketch_sequence
+
+COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+
+def _random_seq(rng, n):
+    return "".join(rng.choice("ACGT") for _ in range(n))
+
+
+def _mutate(rng, seq, rate):
+    return "".join(rng.choice("ACGT".replace(c, "")) if rng.random() < rate else c for c in seq)
+
+
+def _references(tmp_path, rng, n=20):
+    refs = {f"NC_{i:06d}": _random_seq(rng, 16000) for i in range(n)}
+    path = tmp_path / "refs.fasta.gz"
+    with gzip.open(path, "wt") as f:
+        for name, seq in refs.items():
+            f.write(f">{name} Species {name}\n" + "".join(seq[i:i + 70] + "\n" for i in range(0, len(seq), 70)))
+    return refs, build_sketch_db(path, tmp_path / "refs.sketch")
+
+
+def test_sketch_is_strand_independent():
+    rng = random.Random(1)
+    seq = _random_seq(rng, 5000)
+    forward = sketch_sequence(seq)
+    assert len(forward) > 50
+    assert (forward == sketch_sequence(seq.translate(COMPLEMENT)[::-1])).all()
+    assert len(sketch_sequence("ACGT")) == 0
+    # 含 N 的 k-mer 不计入
+    assert len(sketch_sequence("N" * 100)) == 0
+
+
+def test_build_and_query(tmp_path):
+    rng = random.Random(2)
+    refs, db_path = _references(tmp_path, rng)
+    with SketchDB(db_path) as db:
+        assert len(db) == 20 and db.k == 21 and db.scaled == 50
+        query = _mutate(rng, refs["NC_000007"][1000:11000], 0.02)
+        hits = db.query(query, top=3)
+        assert hits[0]["reference"] == "NC_000007"
+        assert hits[0]["description"] == "Species NC_000007"
+        assert 0.95 <= hits[0]["ani"] <= 1.0
+        assert hits[0]["reference_containment"] < hits[0]["containment"]
+        assert db.query(_random_seq(rng, 10000)) == []
+
+
+def test_selection_prefers_reference_matches(tmp_path):
+    rng = random.Random(3)
+    refs, db_path = _references(tmp_path, rng)
+    contigs = tmp_path / "contigs.fasta"
+    with open(contigs, "w") as f:
+        # 覆盖度更高、长度同样在范围内的核 contig 不应入选
+        f.write(f">nuclear_cov_900\n{_random_seq(rng, 15000)}\n")
+        f.write(f">mito_cov_200\n{_mutate(rng, refs['NC_000011'], 0.01)}\n")
+    selected = _select_mitochondrial_contigs(str(contigs), "animal", sketch_db=str(db_path))
+    assert selected["names"] == ["mito_cov_200"]
+    assert selected["closest_reference"]["reference"] == "NC_000011"
+    assert selected["closest_reference"]["contig"] == "mito_cov_200"
+    assert selected["unmatched_contigs"] == []
+
+    # 未配置草图库时沿用覆盖度启发式
+    assert _select_mitochondrial_contigs(str(contigs), "animal")["names"][0] == "nuclear_cov_900"
+
+
+def test_sketch_cli(tmp_path):
+    rng = random.Random(4)
+    refs, _ = _references(tmp_path, rng, n=3)
+    fasta = tmp_path / "refs.fasta"
+    fasta.write_text("".join(f">{name}\n{seq}\n" for name, seq in refs.items()))
+    runner = CliRunner()
+    result = runner.invoke(sketch_group, ["build", str(fasta), "-o", str(tmp_path / "cli.sketch")])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(sketch_group, ["query", str(tmp_path / "cli.sketch"), str(fasta)])
+    assert result.exit_code == 0, result.output
+    assert "NC_000001" in result.output
@@ -0,0 +1,110 @@
+"""
+测试资源感知阶段调度器
+"""
+import threading
+import time
+
+import pytest
+
+from mito_forge.graph import scheduler as sched_mod
+from mito_forge.graph.scheduler import ResourceScheduler, scheduled_node, stage_request
+
+
+def test_fit_request_clamps_to_capacity():
+    s = ResourceScheduler(cpu_cores=8, memory_gb=16)
+    assert s.fit_request(32, 64) == {"cpu_cores": 8, "memory_gb": 16.0}
+    assert s.fit_request(0, 0)["cpu_cores"] == 1
+
+
+def test_stages_pack_until_memory_exhausted():
+    s = ResourceScheduler(cpu_cores=16, memory_gb=10)
+    first = s.acquire("qc", 4, 6)
+    second = s.acquire("qc", 4, 3)  # 6 + 3 <= 10，可并发
+    assert s.usage()["running"] == 2
+
+    with pytest.raises(TimeoutError):
+        s.acquire("assembly", 4, 8, timeout=0.1)  # 会超出内存，必须等待
+
+    s.release(first)
+    third = s.acquire("assembly", 4, 6, timeout=1)
+    assert s.usage()["memory_gb"] == 9.0
+    s.release(second)
+    s.release(third)
+    assert s.usage()["running"] == 0
+
+
+def test_waiting_stage_starts_after_release():
+    s = ResourceScheduler(cpu_cores=4, memory_gb=8)
+    held = s.acquire("assembly", 4, 8)
+    started = []
+
+    def worker():
+        with s.reserve("qc", 2, 2):
+            started.append(time.time())
+
+    t = threading.Thread(target=worker)
+    t.start()
+    time.sleep(0.2)
+    assert not started
+    released_at = time.time()
+    s.release(held)
+    t.join(timeout=5)
+    assert started and started[0] >= released_at
+
+
+def test_oversized_stage_runs_when_idle():
+    s = ResourceScheduler(cpu_cores=2, memory_gb=4)
+    with s.reserve("assembly", 64, 256, timeout=0.5) as res:
+        assert res.cpu_cores == 2 and res.memory_gb == 4.0
+
+
+def test_stage_request_reads_resource_plan():
+    config = {
+        "threads": 8,
+        "resource_plan": {"memory_per_stage": {"assembly": {"memory_gb": 24, "cpu_cores": 16}}},
+    }
+    assert stage_request(config, "assembly") == {"cpu_cores": 8, "memory_gb": 24.0}
+    assert stage_request(config, "polish") == {"cpu_cores": 4, "memory_gb": 4.0}
+
+
+def test_scheduled_node_sets_threads_during_stage(monkeypatch):
+    monkeypatch.setattr(sched_mod, "_scheduler", ResourceScheduler(cpu_cores=3, memory_gb=8))
+    seen = {}
+
+    def fake_node(state):
+        seen["threads"] = state["config"]["threads"]
+        seen["running"] = sched_mod.get_scheduler().usage()["running"]
+        return state
+
+    state = {"config": {"threads": 16}}
+    scheduled_node("qc", fake_node)(state)
+    assert seen == {"threads": 3, "running": 1}
+    assert state["config"]["threads"] == 16
+    assert sched_mod.get_scheduler().usage()["running"] == 0
+
+
+def test_reservations_of_dead_process_are_reclaimed():
+    import multiprocessing
+    import os
+
+    manager = multiprocessing.Manager()
+    try:
+        s = ResourceScheduler.shared(manager, cpu_cores=4, memory_gb=8)
+
+        def hold_and_die(scheduler):
+            scheduler.acquire("assembly", 4, 8)
+            os._exit(1)  # 模拟被 OOM 杀死：不会执行 release
+
+        worker = multiprocessing.get_context("fork").Process(target=hold_and_die, args=(s,))
+        worker.start()
+        worker.join()
+        assert s.usage()["running"] == 1
+
+        # 等待中的阶段回收已退出进程的预留后即可运行
+        res = s.acquire("polish", 4, 8, timeout=2)
+        assert s.usage()["running"] == 1
+        s.release(res)
+        assert s.usage()["running"] == 0 and s.usage()["cpu_cores"] == 0
+        assert s.reclaim_dead() == 0
+    finally:
+        manager.shutdown()
@@ -0,0 +1,116 @@
+"""
+测试阶段结果缓存
+"""
+import os
+import time
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mito_forge.graph.stage_cache import StageCache, cached_node, compute_cache_key, fingerprint_file
+from mito_forge.graph.state import init_pipeline_state, complete_stage, RouteDecision
+
+
+def _state(tmp_path, reads, **config):
+    cfg = {"tool_chain": {"assembly": "flye", "annotation": "mitos"},
+           "tool_parameters": {"mitos": {"--genetic-code": 2}},
+           "stage_cache_dir": str(tmp_path / "cache")}
+    cfg.update(config)
+    return init_pipeline_state({"reads": str(reads)}, cfg, str(tmp_path / "work"), "p")
+
+
+def _fake_assembly(calls):
+    def node(state):
+        calls.append("assembly")
+        out_dir = Path(state["workdir"]) / "02_assembly"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        fasta = out_dir / "assembly.fasta"
+        fasta.write_text(">mt\nACGT\n")
+        complete_stage(state, "assembly", {"files": {"assembly": str(fasta)}, "metrics": {"n50": 4},
+                                           "metadata": {}, "summary": "", "success": True})
+        state["route"] = RouteDecision.CONTINUE
+        return state
+    return node
+
+
+def test_fingerprint_fast_and_sha256(tmp_path):
+    f = tmp_path / "r.fq"
+    f.write_text("@r\nACGT\n+\nIIII\n")
+    assert fingerprint_file(str(f)).startswith("15:")
+    assert fingerprint_file(str(f), "sha256").startswith("sha256:")
+    assert fingerprint_file(str(tmp_path / "missing")) is None
+
+
+def test_cache_hit_restores_outputs_and_artifacts(tmp_path):
+    reads = tmp_path / "r.fq"
+    reads.write_text("@r\nACGT\n+\nIIII\n")
+    calls = []
+    node = cached_node("assembly", _fake_assembly(calls))
+
+    first = node(_state(tmp_path, reads))
+    assert calls == ["assembly"]
+    assert first["stage_outputs"]["assembly"]["metadata"]["cache_key"].startswith("assembly-")
+
+    # 新的工作目录，同样的输入和参数 -> 命中缓存
+    state = _state(tmp_path, reads)
+    state["workdir"] = str(tmp_path / "work2")
+    second = node(state)
+    assert calls == ["assembly"]
+    out = second["stage_outputs"]["assembly"]
+    assert out["metadata"]["cache_hit"] is True
+    assert out["files"]["assembly"] == str(tmp_path / "work2" / "02_assembly" / "assembly.fasta")
+    assert Path(out["files"]["assembly"]).read_text() == ">mt\nACGT\n"
+    assert "assembly" in second["completed_stages"]
+
+
+def test_cache_key_changes_with_parameters_and_inputs(tmp_path):
+    reads = tmp_path / "r.fq"
+    reads.write_text("@r\nACGT\n+\nIIII\n")
+    base = compute_cache_key("annotation", _state(tmp_path, reads))["key"]
+    changed = _state(tmp_path, reads, tool_parameters={"mitos": {"--genetic-code": 5}})
+    assert compute_cache_key("annotation", changed)["key"] != base
+    # 线程数不影响结果
+    assert compute_cache_key("annotation", _state(tmp_path, reads, threads=32))["key"] == base
+    # QC 引擎与长读长筛选参数会改变阶段产物
+    for option in ({"qc_tool": "builtin"}, {"long_read_select": False}, {"long_read_coverage": 50},
+                   {"long_read_target_bases": 10**8}, {"long_read_min_length": 5000},
+                   {"mito_read_fraction": 0.05}):
+        assert compute_cache_key("assembly", _state(tmp_path, reads, **option))["key"] != \
+            compute_cache_key("assembly", _state(tmp_path, reads))["key"]
+
+    os.utime(reads, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert compute_cache_key("annotation", _state(tmp_path, reads))["key"] != base
+    # 原始输入缺失时不缓存
+    assert compute_cache_key("qc", _state(tmp_path, tmp_path / "missing.fq")) is None
+
+
+def test_lru_prune_evicts_least_recently_used(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    for i, key in enumerate(["qc-a", "qc-b", "qc-c"]):
+        stage_dir = tmp_path / f"s{i}"
+        stage_dir.mkdir()
+        (stage_dir / "blob").write_bytes(b"x" * 1000)
+        cache.put(key, "qc", stage_dir, {"files": {}}, {"tool": "fastqc"})
+        time.sleep(0.01)
+    cache.get("qc-a")  # a 变为最近访问
+
+    removed = cache.prune(max_size_bytes=2500)
+    assert removed == ["qc-b"]
+    assert {e["key"] for e in cache.entries()} == {"qc-a", "qc-c"}
+
+
+def test_cache_cli_ls_and_prune(tmp_path):
+    from mito_forge.cli.main import cli
+    cache = StageCache(str(tmp_path / "cache"))
+    stage_dir = tmp_path / "s"
+    stage_dir.mkdir()
+    cache.put("assembly-abc", "assembly", stage_dir, {"files": {}}, {"tool": "flye", "tool_version": "2.9"})
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["cache", "ls", "--cache-dir", str(tmp_path / "cache")])
+    assert result.exit_code == 0, result.output
+    assert "assembly-abc" in result.output
+
+    result = runner.invoke(cli, ["cache", "prune", "--cache-dir", str(tmp_path / "cache"), "--all"])
+    assert result.exit_code == 0, result.output
+    assert cache.entries() == []